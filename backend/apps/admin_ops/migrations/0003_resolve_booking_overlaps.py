@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:56
+
+from django.db import migrations
+
+
+def resolve_overlaps(apps, schema_editor):
+    """
+    Settle double bookings made before the exclusion constraints: of
+    overlapping blocking bookings the one starting first keeps the room or
+    vehicle (later ones are rejected) and the driver (later ones lose it).
+    """
+    reason = 'Bentrok dengan pemesanan lain'
+
+    def sweep(model, resource, statuses, resolve):
+        bookings = model._base_manager.filter(status__in=statuses, **{f'{resource}__isnull': False})
+        busy_until = {}
+        for booking in bookings.order_by(resource, 'start_time', 'created_at'):
+            key = getattr(booking, f'{resource}_id')
+            if key in busy_until and booking.start_time < busy_until[key]:
+                resolve(booking)
+            else:
+                busy_until[key] = max(busy_until.get(key, booking.end_time), booking.end_time)
+
+    def reject(booking):
+        booking.status = 'rejected'
+        booking.rejection_reason = reason
+        booking.save(update_fields=['status', 'rejection_reason'])
+
+    def unassign(booking):
+        booking.driver = None
+        booking.notes = f'{booking.notes}\n{reason} (pengemudi dilepas)'.strip()
+        booking.save(update_fields=['driver', 'notes'])
+
+    sweep(apps.get_model('admin_ops', 'RoomBooking'), 'room', ['pending', 'approved'], reject)
+    vehicle_statuses = ['pending', 'approved', 'in_progress']
+    VehicleBooking = apps.get_model('admin_ops', 'VehicleBooking')
+    sweep(VehicleBooking, 'vehicle', vehicle_statuses, reject)
+    sweep(VehicleBooking, 'driver', vehicle_statuses, unassign)
+
+
+class Migration(migrations.Migration):
+    """Runs apart from 0004: row updates before ALTER TABLE in one transaction fail."""
+
+    dependencies = [
+        ('admin_ops', '0002_driver_tenant_room_tenant_roombooking_tenant_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_overlaps, migrations.RunPython.noop),
+    ]
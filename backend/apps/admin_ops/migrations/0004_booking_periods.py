@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:56
+
+import apps.admin_ops.scheduling
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_ops', '0003_resolve_booking_overlaps'),
+        ('tenants', '0002_invoice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Single-value id ranges stand in for uuid equality in the GiST constraints
+        migrations.RunSQL(
+            'CREATE TYPE uuidrange AS RANGE (subtype = uuid)',
+            'DROP TYPE uuidrange',
+        ),
+        migrations.AddField(
+            model_name='roombooking',
+            name='period',
+            field=models.GeneratedField(db_persist=True, expression=apps.admin_ops.scheduling.TsTzRange('start_time', 'end_time'), output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField()),
+        ),
+        migrations.AddField(
+            model_name='vehiclebooking',
+            name='period',
+            field=models.GeneratedField(db_persist=True, expression=apps.admin_ops.scheduling.TsTzRange('start_time', 'end_time'), output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField()),
+        ),
+        migrations.AddConstraint(
+            model_name='roombooking',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['pending', 'approved'])), expressions=[(apps.admin_ops.scheduling.UuidRange('room'), '='), ('period', '&&')], name='room_booking_no_overlap', violation_error_message='This room is already booked for the selected time.'),
+        ),
+        migrations.AddConstraint(
+            model_name='vehiclebooking',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['pending', 'approved', 'in_progress'])), expressions=[(apps.admin_ops.scheduling.UuidRange('vehicle'), '='), ('period', '&&')], name='vehicle_booking_no_overlap', violation_error_message='This vehicle is already booked for the selected time.'),
+        ),
+        migrations.AddConstraint(
+            model_name='vehiclebooking',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['pending', 'approved', 'in_progress']), ('driver__isnull', False)), expressions=[(apps.admin_ops.scheduling.UuidRange('driver'), '='), ('period', '&&')], name='vehicle_booking_driver_no_overlap', violation_error_message='This driver is already assigned to another trip at the selected time.'),
+        ),
+    ]
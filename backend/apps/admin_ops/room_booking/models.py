@@ -5,6 +5,7 @@ from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from apps.core.models import TenantBaseModel, AuditMixin
+from apps.admin_ops import scheduling
 
 
 class RoomType(models.TextChoices):
@@ -24,6 +25,10 @@ class BookingStatus(models.TextChoices):
     COMPLETED = 'completed', 'Selesai'
 
 
+# Bookings that hold their room
+BLOCKING_STATUSES = [BookingStatus.PENDING, BookingStatus.APPROVED]
+
+
 class Room(TenantBaseModel):
     """Meeting rooms and facilities available for booking."""
     name = models.CharField(max_length=100)
@@ -81,6 +86,8 @@ class RoomBooking(TenantBaseModel, AuditMixin):
 
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
+    # [start_time, end_time) as a tstzrange, for the no-overlap constraint
+    period = scheduling.period_field()
 
     status = models.CharField(
         max_length=20,
@@ -119,28 +126,42 @@ class RoomBooking(TenantBaseModel, AuditMixin):
             models.Index(fields=['status']),
             models.Index(fields=['start_time']),
         ]
+        constraints = [
+            scheduling.no_overlap(
+                'room_booking_no_overlap', 'room', BLOCKING_STATUSES,
+                'This room is already booked for the selected time.',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.room.name} - {self.title} ({self.start_time.strftime('%Y-%m-%d %H:%M')})"
 
     def clean(self):
-        if self.start_time and self.end_time:
-            if self.end_time <= self.start_time:
-                raise ValidationError('End time must be after start time.')
-
-            # Check for overlapping bookings
-            overlapping = RoomBooking.objects.filter(
-                room=self.room,
-                status__in=[BookingStatus.PENDING, BookingStatus.APPROVED],
-                start_time__lt=self.end_time,
-                end_time__gt=self.start_time,
-            ).exclude(pk=self.pk)
+        # Overlaps are rejected by the room_booking_no_overlap constraint
+        if self.start_time and self.end_time and self.end_time <= self.start_time:
+            raise ValidationError('End time must be after start time.')
 
-            if overlapping.exists():
-                raise ValidationError('This room is already booked for the selected time.')
+    def validate_constraints(self, exclude=None):
+        super().validate_constraints(exclude=scheduling.constraint_exclusions(exclude))
 
     def save(self, *args, **kwargs):
         # Auto-approve if room doesn't require approval
         if self._state.adding and not self.room.requires_approval:
             self.status = BookingStatus.APPROVED
-        super().save(*args, **kwargs)
+        with scheduling.raise_conflicts(RoomBooking):
+            super().save(*args, **kwargs)
+        self.publish_change()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.publish_change()
+        return result
+
+    def publish_change(self):
+        """Tell open room schedules of the tenant to refresh."""
+        from apps.core.services.events import publish
+        publish(
+            'room_booking.changed',
+            {'id': self.pk, 'room': self.room_id, 'start_time': self.start_time, 'status': self.status},
+            tenant_id=self.tenant_id,
+        )
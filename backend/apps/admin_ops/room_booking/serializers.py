@@ -1,6 +1,16 @@
 from rest_framework import serializers
 from django.utils import timezone
-from .models import Room, RoomBooking, BookingStatus
+from apps.admin_ops.scheduling import ConflictSerializerMixin, WindowSerializer
+from .models import Room, RoomBooking
+
+# Query parameter value -> Room facility flag
+FACILITIES = {
+    'projector': 'has_projector',
+    'whiteboard': 'has_whiteboard',
+    'video_conference': 'has_video_conference',
+    'teleconference': 'has_teleconference',
+    'ac': 'has_ac',
+}
 
 
 class RoomSerializer(serializers.ModelSerializer):
@@ -34,7 +44,7 @@ class RoomSerializer(serializers.ModelSerializer):
         return facilities
 
 
-class RoomBookingSerializer(serializers.ModelSerializer):
+class RoomBookingSerializer(ConflictSerializerMixin, serializers.ModelSerializer):
     room_name = serializers.CharField(source='room.name', read_only=True)
     booked_by_name = serializers.SerializerMethodField()
     approved_by_name = serializers.SerializerMethodField()
@@ -89,21 +99,7 @@ class RoomBookingSerializer(serializers.ModelSerializer):
                         'end_time': f'Booking cannot exceed {room.max_booking_hours} hours.'
                     })
 
-            # Check for overlapping bookings
-            overlapping = RoomBooking.objects.filter(
-                room=room,
-                status__in=[BookingStatus.PENDING, BookingStatus.APPROVED],
-                start_time__lt=end_time,
-                end_time__gt=start_time,
-            )
-            if self.instance:
-                overlapping = overlapping.exclude(pk=self.instance.pk)
-
-            if overlapping.exists():
-                raise serializers.ValidationError({
-                    'start_time': 'This room is already booked for the selected time.'
-                })
-
+        # Overlapping bookings are rejected on save by the no-overlap constraint
         return data
 
     def create(self, validated_data):
@@ -137,3 +133,18 @@ class BookingApprovalSerializer(serializers.Serializer):
 
 class BookingCancellationSerializer(serializers.Serializer):
     reason = serializers.CharField(required=False, allow_blank=True)
+
+
+class FreeRoomQuerySerializer(WindowSerializer):
+    """Window and requirements of a free room search."""
+    capacity = serializers.IntegerField(required=False, min_value=1)
+    facilities = serializers.CharField(
+        required=False, help_text=f"Comma-separated: {', '.join(FACILITIES)}",
+    )
+
+    def validate_facilities(self, value):
+        facilities = [facility.strip() for facility in value.split(',') if facility.strip()]
+        unknown = [facility for facility in facilities if facility not in FACILITIES]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown facilities: {', '.join(unknown)}")
+        return facilities
@@ -5,8 +5,14 @@ from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from django.db.models import Q
 from datetime import timedelta
-from .models import Room, RoomBooking, BookingStatus
+import math
+
+from apps.admin_ops import scheduling
+from apps.common.stats import Stats
+from .models import BLOCKING_STATUSES, Room, RoomBooking, BookingStatus
 from .serializers import (
+    FACILITIES,
+    FreeRoomQuerySerializer,
     RoomSerializer,
     RoomBookingSerializer,
     RoomBookingListSerializer,
@@ -37,7 +43,7 @@ class RoomViewSet(viewsets.ModelViewSet):
 
         bookings = RoomBooking.objects.filter(
             room=room,
-            status__in=[BookingStatus.PENDING, BookingStatus.APPROVED],
+            status__in=BLOCKING_STATUSES,
             start_time__date__lte=end_date,
             end_time__date__gte=start_date,
         ).values('id', 'title', 'start_time', 'end_time', 'status')
@@ -47,6 +53,30 @@ class RoomViewSet(viewsets.ModelViewSet):
             'bookings': list(bookings),
         })
 
+    @action(detail=False, methods=['get'])
+    def free(self, request):
+        """
+        Rooms free for the whole window start_time-end_time, in one query.
+
+        Optional: capacity (minimum), facilities (comma-separated, e.g.
+        projector,video_conference) and the list filters (room_type,
+        building, floor). Rooms whose max_booking_hours is shorter than the
+        window are left out.
+        """
+        params = FreeRoomQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+        start, end = query['start_time'], query['end_time']
+
+        rooms = self.filter_queryset(self.get_queryset()).filter(
+            max_booking_hours__gte=math.ceil((end - start).total_seconds() / 3600),
+            **{FACILITIES[facility]: True for facility in query.get('facilities', [])},
+        )
+        if 'capacity' in query:
+            rooms = rooms.filter(capacity__gte=query['capacity'])
+        rooms = scheduling.free(rooms, RoomBooking.objects.all(), 'room', BLOCKING_STATUSES, start, end)
+        return Response(self.get_serializer(rooms, many=True).data)
+
     @action(detail=False, methods=['get'])
     def by_capacity(self, request):
         """Filter rooms by minimum capacity."""
@@ -180,29 +210,13 @@ class RoomBookingViewSet(viewsets.ModelViewSet):
         from django.db.models import Count
         from django.db.models.functions import TruncMonth
 
-        # Monthly booking counts
-        monthly = RoomBooking.objects.filter(
-            status__in=[BookingStatus.APPROVED, BookingStatus.COMPLETED]
-        ).annotate(
-            month=TruncMonth('start_time')
-        ).values('month').annotate(
-            count=Count('id')
-        ).order_by('-month')[:12]
-
-        # By room
-        by_room = RoomBooking.objects.filter(
-            status__in=[BookingStatus.APPROVED, BookingStatus.COMPLETED]
-        ).values('room__name').annotate(
-            count=Count('id')
-        ).order_by('-count')[:10]
-
-        # Status summary
-        status_summary = RoomBooking.objects.values('status').annotate(
-            count=Count('id')
+        held = RoomBooking.objects.filter(status__in=[BookingStatus.APPROVED, BookingStatus.COMPLETED])
+        stats = (
+            Stats(RoomBooking.objects.all(), 'room_booking_statistics')
+            .group('monthly', {'month': TruncMonth('start_time')}, queryset=held,
+                   count=Count('id'), order_by='-month', limit=12)
+            .group('by_room', ['room__name'], queryset=held, count=Count('id'), order_by='-count', limit=10)
+            .group('status_summary', ['status'], count=Count('id'))
+            .get(cache_key='')
         )
-
-        return Response({
-            'monthly': list(monthly),
-            'by_room': list(by_room),
-            'status_summary': list(status_summary),
-        })
+        return Response(stats)
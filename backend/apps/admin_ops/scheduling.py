@@ -0,0 +1,134 @@
+"""
+Booking conflicts and free-resource search.
+
+Room and vehicle bookings keep their window in `period`, a `tstzrange`
+generated from start_time and end_time (half-open, so back-to-back bookings
+do not overlap). Double booking is prevented by the database: a GiST
+exclusion constraint per resource (`no_overlap`) rejects a row whose period
+overlaps another blocking booking of the same room, vehicle or driver, even
+when two requests race. `raise_conflicts` turns the violation into a
+ValidationError with the constraint's message; full_clean() (admin forms)
+reports the same conflict beforehand as an advisory form error
+(`constraint_exclusions`).
+
+GiST has no equality operator for uuid columns without the btree_gist
+extension; the resource id is compared as a single-value `uuidrange` (a range
+type created by migration admin_ops 0004) with the built-in range operator
+class instead.
+
+`free` selects the resources of a queryset with no blocking booking in a
+window, as one query with a NOT EXISTS on the bookings' periods.
+`WindowSerializer` parses the window of such a search and
+`ConflictSerializerMixin` reports a conflicting save as a 400 response.
+"""
+from contextlib import contextmanager
+
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import Exists, F, Func, OuterRef, Q, Value
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from rest_framework import serializers
+
+
+class TsTzRange(Func):
+    """tstzrange(start, end), half-open."""
+
+    function = 'TSTZRANGE'
+    output_field = DateTimeRangeField()
+
+
+class UuidRange(Func):
+    """uuidrange(id, id, '[]'): a resource id comparable in a GiST index."""
+
+    function = 'UUIDRANGE'
+    output_field = models.Field()
+
+    def __init__(self, field):
+        super().__init__(F(field), F(field), Value('[]'))
+
+
+def period_field():
+    """Generated `period` column of a booking model."""
+    return models.GeneratedField(
+        expression=TsTzRange('start_time', 'end_time'),
+        output_field=DateTimeRangeField(),
+        db_persist=True,
+    )
+
+
+def no_overlap(name, resource, statuses, message, condition=None):
+    """Exclusion constraint: no two blocking bookings of one `resource` overlap."""
+    blocking = Q(status__in=statuses)
+    return ExclusionConstraint(
+        name=name,
+        expressions=[(UuidRange(resource), RangeOperators.EQUAL), ('period', RangeOperators.OVERLAPS)],
+        condition=blocking & condition if condition else blocking,
+        violation_error_message=message,
+    )
+
+
+def constraint_exclusions(exclude):
+    """
+    `exclude` of Model.validate_constraints() with the generated period put
+    back whenever start_time and end_time are validated, so forms that do not
+    edit `period` (the admin) still get the no-overlap check as a form error.
+    """
+    if exclude and 'period' in exclude and not {'start_time', 'end_time'} & set(exclude):
+        return set(exclude) - {'period'}
+    return exclude
+
+
+@contextmanager
+def raise_conflicts(model):
+    """Raise ValidationError when the wrapped write violates one of `model`'s exclusion constraints."""
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as exc:
+        name = getattr(getattr(exc.__cause__, 'diag', None), 'constraint_name', None)
+        for constraint in model._meta.constraints:
+            if isinstance(constraint, ExclusionConstraint) and constraint.name == name:
+                raise ValidationError(constraint.violation_error_message, code='conflict') from exc
+        raise
+
+
+def window(start, end):
+    return DateTimeTZRange(start, end, '[)')
+
+
+def free(resources, bookings, resource, statuses, start, end):
+    """
+    Resources with no blocking booking overlapping [start, end).
+
+    Args:
+        resources: Queryset of rooms, vehicles or drivers
+        bookings: Queryset of their bookings
+        resource: Booking field pointing at the resource
+        statuses: Booking statuses that block the resource
+    """
+    busy = bookings.filter(**{resource: OuterRef('pk')}, status__in=statuses, period__overlap=window(start, end))
+    return resources.filter(~Exists(busy))
+
+
+class WindowSerializer(serializers.Serializer):
+    """Query parameters of a free-resource search."""
+
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+
+    def validate(self, data):
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError({'end_time': 'End time must be after start time.'})
+        return data
+
+
+class ConflictSerializerMixin:
+    """Booking serializer whose save() reports a no-overlap violation as a validation error."""
+
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        except ValidationError as exc:
+            raise serializers.ValidationError(serializers.as_serializer_error(exc))
@@ -1,4 +1,5 @@
-from django.test import TestCase
+from django.contrib.admin import site
+from django.test import RequestFactory, TestCase
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APITestCase
@@ -81,6 +82,28 @@ class RoomBookingModelTest(TestCase):
         )
         self.assertEqual(booking.status, RoomBookingStatus.PENDING)
 
+    def test_admin_form_reports_overlap(self):
+        start = timezone.now() + timedelta(hours=1)
+        RoomBooking.objects.create(
+            room=self.room, booked_by=self.user, title='Existing',
+            start_time=start, end_time=start + timedelta(hours=2),
+        )
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_superuser(
+            username='admin', email='admin@test.com', password='adminpass123',
+        )
+        form_class = site._registry[RoomBooking].get_form(request)
+        form = form_class(data={
+            'room': self.room.pk, 'title': 'Overlap', 'booked_by': self.user.pk,
+            'start_time_0': (start + timedelta(hours=1)).strftime('%Y-%m-%d'),
+            'start_time_1': (start + timedelta(hours=1)).strftime('%H:%M:%S'),
+            'end_time_0': (start + timedelta(hours=3)).strftime('%Y-%m-%d'),
+            'end_time_1': (start + timedelta(hours=3)).strftime('%H:%M:%S'),
+            'expected_attendees': 2, 'status': RoomBookingStatus.PENDING,
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('already booked', str(form.non_field_errors()))
+
 
 class RoomBookingAPITest(APITestCase):
     def setUp(self):
@@ -126,6 +149,53 @@ class RoomBookingAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
 
+    def test_overlap_rejected(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('api_v1:roombooking-list')
+        start = timezone.now() + timedelta(hours=1)
+        RoomBooking.objects.create(
+            room=self.room, booked_by=self.user, title='Existing',
+            start_time=start, end_time=start + timedelta(hours=2),
+        )
+        data = {'room': str(self.room.id), 'title': 'Overlap'}
+        response = self.client.post(url, {
+            **data,
+            'start_time': (start + timedelta(hours=1)).isoformat(),
+            'end_time': (start + timedelta(hours=3)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('already booked', response.data['non_field_errors'][0])
+
+        # Back-to-back bookings do not overlap
+        response = self.client.post(url, {
+            **data,
+            'start_time': (start + timedelta(hours=2)).isoformat(),
+            'end_time': (start + timedelta(hours=3)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_free_rooms(self):
+        self.client.force_authenticate(user=self.user)
+        hall = Room.objects.create(name='Aula', code='AU-01', capacity=50, has_projector=True)
+        Room.objects.create(name='Ruang Kecil', code='RK-01', capacity=4, has_projector=True)
+        start = timezone.now() + timedelta(hours=1)
+        end = start + timedelta(hours=2)
+        RoomBooking.objects.create(
+            room=self.room, booked_by=self.user, title='Busy', start_time=start, end_time=end,
+        )
+
+        url = reverse('api_v1:room-free')
+        window = {'start_time': start.isoformat(), 'end_time': end.isoformat()}
+        response = self.client.get(url, {**window, 'capacity': 8, 'facilities': 'projector'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([room['id'] for room in response.data], [str(hall.id)])
+
+        response = self.client.get(url, {**window, 'capacity': 8})
+        self.assertEqual([room['code'] for room in response.data], ['AU-01'])
+
+        response = self.client.get(url, {**window, 'facilities': 'sauna'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 # ============= Vehicle Management Tests =============
 
@@ -258,6 +328,42 @@ class VehicleBookingAPITest(APITestCase):
         self.assertEqual(booking.status, VehicleBookingStatus.COMPLETED)
         self.assertEqual(booking.distance_traveled, 100)
 
+    def test_free_vehicles_and_drivers(self):
+        self.client.force_authenticate(user=self.user)
+        driver_user = User.objects.create_user(username='driver', email='driver@test.com', password='driver123')
+        driver = Driver.objects.create(
+            user=driver_user, license_number='SIM-001', license_type='A',
+            license_expiry=timezone.localdate() + timedelta(days=365), phone='0811',
+        )
+        van = Vehicle.objects.create(
+            name='Hiace', plate_number='B 5678 DEF', vehicle_type=VehicleType.VAN,
+            brand='Toyota', model='Hiace', year=2021, capacity=12,
+        )
+        start = timezone.now() + timedelta(hours=1)
+        end = start + timedelta(hours=4)
+        VehicleBooking.objects.create(
+            vehicle=self.vehicle, booked_by=self.user, driver=driver,
+            purpose='Meeting', destination='Jakarta', start_time=start, end_time=end,
+        )
+
+        url = reverse('api_v1:vehicle-free')
+        response = self.client.get(url, {'start_time': start.isoformat(), 'end_time': end.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([vehicle['id'] for vehicle in response.data['vehicles']], [str(van.id)])
+        self.assertEqual(response.data['drivers'], [])
+
+        # The driver cannot take a second overlapping trip
+        response = self.client.post(reverse('api_v1:vehiclebooking-list'), {
+            'vehicle': str(van.id),
+            'driver': str(driver.id),
+            'purpose': 'Survey',
+            'destination': 'Bogor',
+            'start_time': (start + timedelta(hours=3)).isoformat(),
+            'end_time': (end + timedelta(hours=3)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('driver', response.data['non_field_errors'][0])
+
 
 # ============= Visitor Log Tests =============
 
@@ -5,6 +5,7 @@ from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from apps.core.models import TenantBaseModel, AuditMixin
+from apps.admin_ops import scheduling
 
 
 class VehicleType(models.TextChoices):
@@ -32,6 +33,10 @@ class BookingStatus(models.TextChoices):
     CANCELLED = 'cancelled', 'Dibatalkan'
 
 
+# Bookings that hold their vehicle and driver
+BLOCKING_STATUSES = [BookingStatus.PENDING, BookingStatus.APPROVED, BookingStatus.IN_PROGRESS]
+
+
 class Vehicle(TenantBaseModel):
     """Operational vehicles available for booking."""
     name = models.CharField(max_length=100)
@@ -134,6 +139,8 @@ class VehicleBooking(TenantBaseModel, AuditMixin):
 
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
+    # [start_time, end_time) as a tstzrange, for the no-overlap constraints
+    period = scheduling.period_field()
     actual_start_time = models.DateTimeField(null=True, blank=True)
     actual_end_time = models.DateTimeField(null=True, blank=True)
 
@@ -182,6 +189,17 @@ class VehicleBooking(TenantBaseModel, AuditMixin):
             models.Index(fields=['status']),
             models.Index(fields=['start_time']),
         ]
+        constraints = [
+            scheduling.no_overlap(
+                'vehicle_booking_no_overlap', 'vehicle', BLOCKING_STATUSES,
+                'This vehicle is already booked for the selected time.',
+            ),
+            scheduling.no_overlap(
+                'vehicle_booking_driver_no_overlap', 'driver', BLOCKING_STATUSES,
+                'This driver is already assigned to another trip at the selected time.',
+                condition=models.Q(driver__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.vehicle.plate_number} - {self.purpose} ({self.start_time.strftime('%Y-%m-%d')})"
@@ -193,20 +211,16 @@ class VehicleBooking(TenantBaseModel, AuditMixin):
         return None
 
     def clean(self):
-        if self.start_time and self.end_time:
-            if self.end_time <= self.start_time:
-                raise ValidationError('End time must be after start time.')
-
-            # Check for overlapping bookings
-            overlapping = VehicleBooking.objects.filter(
-                vehicle=self.vehicle,
-                status__in=[BookingStatus.PENDING, BookingStatus.APPROVED, BookingStatus.IN_PROGRESS],
-                start_time__lt=self.end_time,
-                end_time__gt=self.start_time,
-            ).exclude(pk=self.pk)
-
-            if overlapping.exists():
-                raise ValidationError('This vehicle is already booked for the selected time.')
+        # Overlaps are rejected by the vehicle_booking_*no_overlap constraints
+        if self.start_time and self.end_time and self.end_time <= self.start_time:
+            raise ValidationError('End time must be after start time.')
+
+    def validate_constraints(self, exclude=None):
+        super().validate_constraints(exclude=scheduling.constraint_exclusions(exclude))
+
+    def save(self, *args, **kwargs):
+        with scheduling.raise_conflicts(VehicleBooking):
+            super().save(*args, **kwargs)
 
 
 class VehicleMaintenance(TenantBaseModel):
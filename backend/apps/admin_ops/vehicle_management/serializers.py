@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Vehicle, Driver, VehicleBooking, VehicleMaintenance, BookingStatus
+from apps.admin_ops.scheduling import ConflictSerializerMixin, WindowSerializer
+from .models import Vehicle, Driver, VehicleBooking, VehicleMaintenance
 
 
 class DriverSerializer(serializers.ModelSerializer):
@@ -41,7 +42,7 @@ class VehicleSerializer(serializers.ModelSerializer):
         return None
 
 
-class VehicleBookingSerializer(serializers.ModelSerializer):
+class VehicleBookingSerializer(ConflictSerializerMixin, serializers.ModelSerializer):
     vehicle_name = serializers.CharField(source='vehicle.name', read_only=True)
     vehicle_plate = serializers.CharField(source='vehicle.plate_number', read_only=True)
     booked_by_name = serializers.SerializerMethodField()
@@ -85,28 +86,12 @@ class VehicleBookingSerializer(serializers.ModelSerializer):
     def validate(self, data):
         start_time = data.get('start_time')
         end_time = data.get('end_time')
-        vehicle = data.get('vehicle')
-
-        if start_time and end_time:
-            if end_time <= start_time:
-                raise serializers.ValidationError({
-                    'end_time': 'End time must be after start time.'
-                })
-
-            # Check for overlapping bookings
-            overlapping = VehicleBooking.objects.filter(
-                vehicle=vehicle,
-                status__in=[BookingStatus.PENDING, BookingStatus.APPROVED, BookingStatus.IN_PROGRESS],
-                start_time__lt=end_time,
-                end_time__gt=start_time,
-            )
-            if self.instance:
-                overlapping = overlapping.exclude(pk=self.instance.pk)
-
-            if overlapping.exists():
-                raise serializers.ValidationError({
-                    'start_time': 'This vehicle is already booked for the selected time.'
-                })
+
+        # Overlapping bookings are rejected on save by the no-overlap constraints
+        if start_time and end_time and end_time <= start_time:
+            raise serializers.ValidationError({
+                'end_time': 'End time must be after start time.'
+            })
 
         return data
 
@@ -163,3 +148,8 @@ class TripEndSerializer(serializers.Serializer):
     fuel_used = serializers.DecimalField(max_digits=6, decimal_places=2, required=False)
     fuel_cost = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
     notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class FreeVehicleQuerySerializer(WindowSerializer):
+    """Window and passenger count of a free vehicle and driver search."""
+    passengers = serializers.IntegerField(required=False, min_value=1)
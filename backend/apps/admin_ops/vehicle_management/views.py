@@ -5,8 +5,14 @@ from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from django.db.models import Sum, Count
 from datetime import timedelta
-from .models import Vehicle, Driver, VehicleBooking, VehicleMaintenance, BookingStatus, VehicleStatus
+
+from apps.admin_ops import scheduling
+from apps.common.stats import Stats
+from .models import (
+    BLOCKING_STATUSES, Vehicle, Driver, VehicleBooking, VehicleMaintenance, BookingStatus, VehicleStatus,
+)
 from .serializers import (
+    FreeVehicleQuerySerializer,
     VehicleSerializer,
     DriverSerializer,
     VehicleBookingSerializer,
@@ -50,7 +56,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
 
         bookings = VehicleBooking.objects.filter(
             vehicle=vehicle,
-            status__in=[BookingStatus.PENDING, BookingStatus.APPROVED, BookingStatus.IN_PROGRESS],
+            status__in=BLOCKING_STATUSES,
             start_time__date__lte=end_date,
             end_time__date__gte=start_date,
         ).values('id', 'purpose', 'destination', 'start_time', 'end_time', 'status')
@@ -60,6 +66,38 @@ class VehicleViewSet(viewsets.ModelViewSet):
             'bookings': list(bookings),
         })
 
+    @action(detail=False, methods=['get'])
+    def free(self, request):
+        """
+        Vehicles and drivers free for the whole window start_time-end_time.
+
+        Optional: passengers (minimum capacity) and the list filters
+        (vehicle_type, ...). Vehicles in maintenance or out of service and
+        drivers whose license expires before the trip are left out. One
+        query each.
+        """
+        params = FreeVehicleQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+        start, end = query['start_time'], query['end_time']
+
+        vehicles = self.filter_queryset(self.get_queryset()).filter(is_active=True).exclude(
+            status__in=[VehicleStatus.MAINTENANCE, VehicleStatus.UNAVAILABLE],
+        ).select_related('assigned_driver')
+        if 'passengers' in query:
+            vehicles = vehicles.filter(capacity__gte=query['passengers'])
+        drivers = Driver.objects.select_related('user').filter(
+            is_active=True, license_expiry__gte=timezone.localdate(end),
+        )
+
+        bookings = VehicleBooking.objects.all()
+        vehicles = scheduling.free(vehicles, bookings, 'vehicle', BLOCKING_STATUSES, start, end)
+        drivers = scheduling.free(drivers, bookings, 'driver', BLOCKING_STATUSES, start, end)
+        return Response({
+            'vehicles': VehicleSerializer(vehicles, many=True).data,
+            'drivers': DriverSerializer(drivers, many=True).data,
+        })
+
     @action(detail=False, methods=['get'])
     def expiring_documents(self, request):
         """Get vehicles with expiring documents (within 30 days)."""
@@ -258,28 +296,21 @@ class VehicleBookingViewSet(viewsets.ModelViewSet):
         """Get booking statistics."""
         from django.db.models.functions import TruncMonth
 
-        # Monthly stats
-        monthly = VehicleBooking.objects.filter(
-            status=BookingStatus.COMPLETED
-        ).annotate(
-            month=TruncMonth('start_time')
-        ).values('month').annotate(
-            count=Count('id'),
-            total_distance=Sum('end_odometer') - Sum('start_odometer'),
-            total_fuel_cost=Sum('fuel_cost'),
-        ).order_by('-month')[:12]
-
-        # By vehicle
-        by_vehicle = VehicleBooking.objects.filter(
-            status=BookingStatus.COMPLETED
-        ).values('vehicle__name', 'vehicle__plate_number').annotate(
-            count=Count('id'),
-        ).order_by('-count')[:10]
-
-        return Response({
-            'monthly': list(monthly),
-            'by_vehicle': list(by_vehicle),
-        })
+        completed = VehicleBooking.objects.filter(status=BookingStatus.COMPLETED)
+        stats = (
+            Stats(completed, 'vehicle_booking_statistics')
+            .group(
+                'monthly', {'month': TruncMonth('start_time')},
+                count=Count('id'),
+                total_distance=Sum('end_odometer') - Sum('start_odometer'),
+                total_fuel_cost=Sum('fuel_cost'),
+                order_by='-month', limit=12,
+            )
+            .group('by_vehicle', ['vehicle__name', 'vehicle__plate_number'],
+                   count=Count('id'), order_by='-count', limit=10)
+            .get(cache_key='')
+        )
+        return Response(stats)
 
 
 class VehicleMaintenanceViewSet(viewsets.ModelViewSet):
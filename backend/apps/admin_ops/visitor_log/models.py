@@ -169,6 +169,15 @@ class VisitLog(TenantBaseModel, AuditMixin):
     def __str__(self):
         return f"{self.visitor_name} - {self.get_purpose_display()} ({self.check_in_time or self.expected_arrival})"
 
+    # Status when loaded, to announce arrivals and departures
+    _loaded_status = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     def save(self, *args, **kwargs):
         # Copy visitor info if visitor is selected
         if self.visitor and not self.visitor_name:
@@ -179,6 +188,14 @@ class VisitLog(TenantBaseModel, AuditMixin):
             self.visitor_id_number = self.visitor.id_number
         super().save(*args, **kwargs)
 
+        if self.status != self._loaded_status and self.status in (VisitStatus.CHECKED_IN, VisitStatus.CHECKED_OUT):
+            from apps.core.services.events import publish
+            data = {'id': self.pk, 'visitor_name': self.visitor_name, 'host': self.host_id}
+            publish(f'visit.{self.status}', data, tenant_id=self.tenant_id)
+            if self.status == VisitStatus.CHECKED_IN and self.host_id:
+                publish('visitor.arrived', data, tenant_id=self.tenant_id, users=[self.host_id])
+        self._loaded_status = self.status
+
     @property
     def duration_minutes(self):
         if self.check_in_time and self.check_out_time:
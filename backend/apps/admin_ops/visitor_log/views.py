@@ -3,8 +3,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db.models import Count
+from django.db.models import Count, Q
 from datetime import timedelta
+
+from apps.common.stats import Stats
 from .models import Visitor, VisitLog, VisitorBadge, VisitStatus
 from .serializers import (
     VisitorSerializer,
@@ -247,44 +249,21 @@ class VisitLogViewSet(viewsets.ModelViewSet):
         today = timezone.now().date()
         week_ago = today - timedelta(days=7)
 
-        # Today's stats
-        today_visits = self.queryset.filter(check_in_time__date=today)
-        today_count = today_visits.count()
-        currently_in = today_visits.filter(status=VisitStatus.CHECKED_IN).count()
-
-        # Weekly by day
-        weekly = VisitLog.objects.filter(
-            check_in_time__date__gte=week_ago,
-            status__in=[VisitStatus.CHECKED_IN, VisitStatus.CHECKED_OUT],
-        ).annotate(
-            date=TruncDate('check_in_time')
-        ).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')
-
-        # By purpose
-        by_purpose = VisitLog.objects.filter(
-            check_in_time__date__gte=week_ago,
-        ).values('purpose').annotate(
-            count=Count('id')
-        ).order_by('-count')
-
-        # Monthly trend
-        monthly = VisitLog.objects.filter(
-            status__in=[VisitStatus.CHECKED_IN, VisitStatus.CHECKED_OUT],
-        ).annotate(
-            month=TruncMonth('check_in_time')
-        ).values('month').annotate(
-            count=Count('id')
-        ).order_by('-month')[:12]
-
-        return Response({
-            'today_count': today_count,
-            'currently_in': currently_in,
-            'weekly': list(weekly),
-            'by_purpose': list(by_purpose),
-            'monthly': list(monthly),
-        })
+        visited = VisitLog.objects.filter(status__in=[VisitStatus.CHECKED_IN, VisitStatus.CHECKED_OUT])
+        stats = (
+            Stats(VisitLog.objects.all(), 'visitor_statistics')
+            .count('today_count', Q(check_in_time__date=today))
+            .count('currently_in', Q(check_in_time__date=today, status=VisitStatus.CHECKED_IN))
+            .group('weekly', {'date': TruncDate('check_in_time')},
+                   queryset=visited.filter(check_in_time__date__gte=week_ago),
+                   count=Count('id'), order_by='date')
+            .group('by_purpose', ['purpose'], queryset=VisitLog.objects.filter(check_in_time__date__gte=week_ago),
+                   count=Count('id'), order_by='-count')
+            .group('monthly', {'month': TruncMonth('check_in_time')}, queryset=visited,
+                   count=Count('id'), order_by='-month', limit=12)
+            .get(cache_key=today.isoformat())
+        )
+        return Response(stats)
 
 
 class VisitorBadgeViewSet(viewsets.ModelViewSet):
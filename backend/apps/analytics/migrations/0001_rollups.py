@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:21
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('tenants', '0002_invoice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('metric', models.CharField(max_length=50)),
+                ('key', models.CharField(blank=True, max_length=100)),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Daily Rollup',
+                'verbose_name_plural': 'Daily Rollups',
+                'ordering': ['metric', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'metric', 'key', 'day'), name='unique_daily_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('metric', models.CharField(max_length=50)),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Monthly Rollup',
+                'verbose_name_plural': 'Monthly Rollups',
+                'ordering': ['metric', 'month'],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'metric', 'month'), name='unique_monthly_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Rollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('metric', models.CharField(max_length=50)),
+                ('key', models.CharField(blank=True, help_text="Dimension value ('' for none)", max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Rollup',
+                'verbose_name_plural': 'Rollups',
+                'ordering': ['metric', '-count'],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'metric', 'key'), name='unique_rollup')],
+            },
+        ),
+    ]
@@ -1 +1,64 @@
-# Analytics models
+from django.db import models
+from apps.core.models import TenantBaseModel
+
+
+class Rollup(TenantBaseModel):
+    """
+    Current count of one dimension value of a tenant, e.g. the number of
+    active employees with employment status 'active' (metric
+    'employee.status', key 'active'). Maintained by apps.analytics.rollup.
+    """
+
+    metric = models.CharField(max_length=50)
+    key = models.CharField(max_length=100, blank=True, help_text="Dimension value ('' for none)")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Rollup'
+        verbose_name_plural = 'Rollups'
+        ordering = ['metric', '-count']
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'metric', 'key'], name='unique_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.key or '-'}: {self.count}"
+
+
+class MonthlyRollup(TenantBaseModel):
+    """Count of records of a tenant per calendar month (joins, new publications)."""
+
+    metric = models.CharField(max_length=50)
+    month = models.DateField(help_text='First day of the month')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Monthly Rollup'
+        verbose_name_plural = 'Monthly Rollups'
+        ordering = ['metric', 'month']
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'metric', 'month'], name='unique_monthly_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.month:%Y-%m}: {self.count}"
+
+
+class DailyRollup(TenantBaseModel):
+    """Snapshot of a rollup count at the end of a day (headcount history)."""
+
+    metric = models.CharField(max_length=50)
+    key = models.CharField(max_length=100, blank=True)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Daily Rollup'
+        verbose_name_plural = 'Daily Rollups'
+        ordering = ['metric', 'day']
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'metric', 'key', 'day'], name='unique_daily_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.key or '-'} {self.day}: {self.count}"
@@ -0,0 +1,265 @@
+"""
+Dashboard rollups.
+
+The dashboard endpoints read pre-aggregated counts instead of scanning
+employees and publications on every view:
+
+- `Rollup`: current count per dimension value (employees by status, type,
+  gender and department; publications by type, status, indexation and year;
+  department and position totals);
+- `MonthlyRollup`: records per calendar month (employee joins, new
+  publications);
+- `DailyRollup`: end-of-day snapshots of employee headcount by status, the
+  only way to chart headcount history.
+
+Rows are maintained incrementally: after an employee, publication,
+department or position is saved or deleted, `refresh` recomputes only the
+counts of the dimension values and months the record had before and after
+the write (one small indexed GROUP BY per metric), so a status change moves
+one employee from one counter to the other. Counts are recomputed rather
+than incremented, which keeps them idempotent.
+
+Writes that bypass model signals (queryset `update()`, `bulk_create`, raw
+SQL) are corrected by `rebuild`, which `python manage.py
+rebuild_analytics_rollups` runs for every tenant before writing the daily
+snapshot; schedule it nightly.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import DailyRollup, MonthlyRollup, Rollup
+
+# Dimension metrics per source: metric -> field (None for a plain total)
+DIMENSIONS = {
+    'employee': {
+        'employee.status': 'employment_status',
+        'employee.type': 'employment_type',
+        'employee.gender': 'gender',
+        'employee.department': 'department_id',
+    },
+    'publication': {
+        'publication.type': 'publication_type',
+        'publication.status': 'status',
+        'publication.indexation': 'indexation',
+        'publication.year': 'year',
+    },
+    'department': {'department.total': None},
+    'position': {'position.total': None},
+}
+
+# Monthly metrics per source: metric -> date or datetime field
+MONTHLY = {
+    'employee': {'employee.joined': 'join_date'},
+    'publication': {'publication.created': 'created_at'},
+}
+
+# Rollup metrics snapshotted into DailyRollup
+DAILY = ('employee.status',)
+
+
+def _models():
+    from apps.hr.models import Employee
+    from apps.organization.models import Department, Position
+    from apps.research.publication.models import Publication
+    return {
+        'employee': Employee,
+        'publication': Publication,
+        'department': Department,
+        'position': Position,
+    }
+
+
+def month_start(value) -> date:
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date()
+    return value.replace(day=1)
+
+
+def _next_month(day) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _key(value) -> str:
+    return '' if value is None else str(value)
+
+
+def _counted(source, tenant_id):
+    return _models()[source].all_objects.filter(tenant_id=tenant_id, is_active=True)
+
+
+def state(source, instance) -> dict:
+    """The values of `instance` that rollups of `source` depend on."""
+    fields = [field for field in DIMENSIONS[source].values() if field]
+    fields += list(MONTHLY.get(source, {}).values())
+    return {name: instance.__dict__.get(name) for name in ['tenant_id', *fields]}
+
+
+# ==================== Incremental refresh ====================
+
+def _upsert(model, column, tenant_id, metric, counts) -> int:
+    """
+    Write `counts` ({`column` value: count}) of one metric; rows that
+    dropped to 0 are deleted. Returns the number of rows written.
+    """
+    rows = [
+        model(tenant_id=tenant_id, metric=metric, count=count, **{column: value})
+        for value, count in counts.items() if count
+    ]
+    if rows:
+        model.all_objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['tenant', 'metric', column],
+            update_fields=['count', 'updated_at'],
+        )
+    empty = [value for value, count in counts.items() if not count]
+    if empty:
+        model.all_objects.filter(tenant_id=tenant_id, metric=metric, **{f'{column}__in': empty}).delete()
+    return len(rows)
+
+
+def _month_range(model, field, month):
+    """Lookup of `field` falling in `month`."""
+    start, end = month, _next_month(month)
+    if model._meta.get_field(field).get_internal_type() == 'DateTimeField':
+        tz = timezone.get_current_timezone()
+        start = datetime.combine(start, time.min, tzinfo=tz)
+        end = datetime.combine(end, time.min, tzinfo=tz)
+    return Q(**{f'{field}__gte': start, f'{field}__lt': end})
+
+
+def _refresh_dimension(source, tenant_id, metric, field, values):
+    rows = _counted(source, tenant_id)
+    if field is None:
+        counts = {'': rows.count()}
+    else:
+        present = [value for value in values if value is not None]
+        condition = Q(**{f'{field}__in': present})
+        if None in values:
+            condition |= Q(**{f'{field}__isnull': True})
+        counts = {_key(value): 0 for value in values}
+        for row in rows.filter(condition).order_by().values(field).annotate(count=Count('pk')):
+            counts[_key(row[field])] = row['count']
+    _upsert(Rollup, 'key', tenant_id, metric, counts)
+
+
+def _refresh_months(source, tenant_id, metric, field, months):
+    model = _models()[source]
+    condition = Q()
+    for month in months:
+        condition |= _month_range(model, field, month)
+    counts = {month: 0 for month in months}
+    rows = (
+        _counted(source, tenant_id).filter(condition)
+        .annotate(month=TruncMonth(field)).order_by().values('month').annotate(count=Count('pk'))
+    )
+    for row in rows:
+        counts[month_start(row['month'])] = row['count']
+    _upsert(MonthlyRollup, 'month', tenant_id, metric, counts)
+
+
+def refresh(source, states):
+    """
+    Recompute the rollups a write to one record touched.
+
+    Args:
+        source: 'employee', 'publication', 'department' or 'position'
+        states: `state()` of the record before and after the write (None
+            for unknown); every dimension value and month in them is
+            recomputed
+    """
+    values = defaultdict(set)
+    months = defaultdict(set)
+    for snapshot in states:
+        if not snapshot or snapshot['tenant_id'] is None:
+            continue
+        tenant_id = snapshot['tenant_id']
+        for metric, field in DIMENSIONS[source].items():
+            values[tenant_id, metric].add(snapshot.get(field) if field else None)
+        for metric, field in MONTHLY.get(source, {}).items():
+            if snapshot.get(field):
+                months[tenant_id, metric].add(month_start(snapshot[field]))
+
+    for (tenant_id, metric), changed in values.items():
+        _refresh_dimension(source, tenant_id, metric, DIMENSIONS[source][metric], changed)
+    for (tenant_id, metric), changed in months.items():
+        _refresh_months(source, tenant_id, metric, MONTHLY[source][metric], changed)
+
+
+# ==================== Rebuild and snapshots ====================
+
+def rebuild(tenant_id) -> int:
+    """
+    Recompute every rollup of a tenant from scratch.
+
+    Returns:
+        Number of rollup rows written
+    """
+    written = 0
+    for source, metrics in DIMENSIONS.items():
+        for metric, field in metrics.items():
+            counts = {key: 0 for key in Rollup.all_objects.filter(
+                tenant_id=tenant_id, metric=metric).values_list('key', flat=True)}
+            rows = _counted(source, tenant_id)
+            if field is None:
+                counts[''] = rows.count()
+            else:
+                for row in rows.order_by().values(field).annotate(count=Count('pk')):
+                    counts[_key(row[field])] = row['count']
+            written += _upsert(Rollup, 'key', tenant_id, metric, counts)
+
+    for source, metrics in MONTHLY.items():
+        for metric, field in metrics.items():
+            counts = {month: 0 for month in MonthlyRollup.all_objects.filter(
+                tenant_id=tenant_id, metric=metric).values_list('month', flat=True)}
+            rows = (
+                _counted(source, tenant_id).filter(**{f'{field}__isnull': False})
+                .annotate(month=TruncMonth(field)).order_by().values('month').annotate(count=Count('pk'))
+            )
+            for row in rows:
+                counts[month_start(row['month'])] = row['count']
+            written += _upsert(MonthlyRollup, 'month', tenant_id, metric, counts)
+    return written
+
+
+def snapshot(tenant_id, day=None) -> int:
+    """Copy the tenant's current DAILY rollups into DailyRollup for `day`."""
+    day = day or timezone.localdate()
+    rows = [
+        DailyRollup(tenant_id=tenant_id, metric=row.metric, key=row.key, day=day, count=row.count)
+        for row in Rollup.all_objects.filter(tenant_id=tenant_id, metric__in=DAILY)
+    ]
+    DailyRollup.all_objects.filter(tenant_id=tenant_id, metric__in=DAILY, day=day).delete()
+    DailyRollup.all_objects.bulk_create(rows)
+    return len(rows)
+
+
+# ==================== Reading ====================
+
+def counts(tenant_id, metrics) -> dict:
+    """Current counts as {metric: {key: count}} (one query)."""
+    result = {metric: {} for metric in metrics}
+    rows = Rollup.all_objects.filter(tenant_id=tenant_id, metric__in=metrics).order_by()
+    for metric, key, count in rows.values_list('metric', 'key', 'count'):
+        result[metric][key] = count
+    return result
+
+
+def monthly(tenant_id, metric, since) -> list:
+    """(month, count) pairs from the month of `since` on, oldest first."""
+    return list(
+        MonthlyRollup.all_objects.filter(tenant_id=tenant_id, metric=metric, month__gte=month_start(since))
+        .order_by('month').values_list('month', 'count')
+    )
+
+
+def daily_totals(tenant_id, metric, days) -> list:
+    """(day, total over keys) pairs of the last `days` days, oldest first."""
+    since = timezone.localdate() - timedelta(days=days)
+    rows = (
+        DailyRollup.all_objects.filter(tenant_id=tenant_id, metric=metric, day__gt=since)
+        .values('day').annotate(total=Sum('count')).order_by('day')
+    )
+    return [(row['day'], row['total']) for row in rows]
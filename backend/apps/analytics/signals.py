@@ -0,0 +1,42 @@
+"""Signal handlers keeping the dashboard rollups in sync."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.hr.models import Employee
+from apps.organization.models import Department, Position
+from apps.research.publication.models import Publication
+from . import rollup
+
+
+def _refresh(source, instance):
+    current = rollup.state(source, instance)
+    rollup.refresh(source, [getattr(instance, '_loaded_rollup_state', None), current])
+    instance._loaded_rollup_state = current
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def refresh_employee_rollups(sender, instance, **kwargs):
+    """Recompute the headcount counters touched by an employee write."""
+    _refresh('employee', instance)
+
+
+@receiver(post_save, sender=Publication)
+@receiver(post_delete, sender=Publication)
+def refresh_publication_rollups(sender, instance, **kwargs):
+    """Recompute the publication counters touched by a publication write."""
+    _refresh('publication', instance)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def refresh_department_rollups(sender, instance, **kwargs):
+    """Recompute the department total of the tenant."""
+    _refresh('department', instance)
+
+
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+def refresh_position_rollups(sender, instance, **kwargs):
+    """Recompute the position total of the tenant."""
+    _refresh('position', instance)
@@ -0,0 +1,103 @@
+from datetime import date
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from apps.core.enums import EmploymentStatus, EmploymentType
+from apps.hr.models import Employee
+from apps.organization.models import Department
+from apps.research.publication.models import Publication, PublicationStatus
+from apps.tenants.models import Tenant, TenantUser
+from apps.users.models import User
+from . import rollup
+from .models import MonthlyRollup, Rollup
+
+
+class RollupTest(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Nalar', slug='nalar', subdomain='nalar', email='a@nalar.id')
+        self.department = Department.objects.create(tenant=self.tenant, name='Riset', code='RST')
+
+    def employee(self, number, **kwargs):
+        return Employee.objects.create(
+            tenant=self.tenant, employee_id=f'EMP{number}', first_name='Emp', last_name=str(number),
+            **kwargs,
+        )
+
+    def counts(self, metric):
+        return rollup.counts(self.tenant.pk, [metric])[metric]
+
+    def test_counters_follow_writes(self):
+        first = self.employee(1, department=self.department, join_date=date(2026, 3, 5))
+        self.employee(2, employment_type=EmploymentType.CONTRACT, join_date=date(2026, 3, 20))
+        self.assertEqual(self.counts('employee.status'), {EmploymentStatus.ACTIVE: 2})
+        self.assertEqual(self.counts('employee.department'), {'': 1, str(self.department.pk): 1})
+        self.assertEqual(self.counts('department.total'), {'': 1})
+
+        first = Employee.objects.get(pk=first.pk)
+        first.employment_status = EmploymentStatus.RESIGNED
+        first.join_date = date(2026, 4, 1)
+        first.save()
+        self.assertEqual(
+            self.counts('employee.status'), {EmploymentStatus.ACTIVE: 1, EmploymentStatus.RESIGNED: 1},
+        )
+        self.assertEqual(
+            list(MonthlyRollup.objects.filter(metric='employee.joined').values_list('month', 'count')),
+            [(date(2026, 3, 1), 1), (date(2026, 4, 1), 1)],
+        )
+
+        first.delete()
+        self.assertEqual(self.counts('employee.status'), {EmploymentStatus.ACTIVE: 1})
+        self.assertEqual(self.counts('employee.department'), {'': 1})
+
+    def test_rebuild_corrects_bulk_updates(self):
+        self.employee(1)
+        self.employee(2)
+        Employee.objects.update(employment_status=EmploymentStatus.TERMINATED)
+        self.assertEqual(self.counts('employee.status'), {EmploymentStatus.ACTIVE: 2})
+
+        rollup.rebuild(self.tenant.pk)
+        self.assertEqual(self.counts('employee.status'), {EmploymentStatus.TERMINATED: 2})
+        self.assertEqual(rollup.snapshot(self.tenant.pk), 1)
+        self.assertEqual(rollup.daily_totals(self.tenant.pk, 'employee.status', days=1)[0][1], 2)
+
+
+class DashboardAPITest(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Nalar', slug='nalar', subdomain='nalar', email='a@nalar.id')
+        self.user = User.objects.create_user(username='viewer', email='viewer@test.com', password='testpass123')
+        TenantUser.objects.create(tenant=self.tenant, user=self.user)
+        parent = Department.objects.create(tenant=self.tenant, name='Riset', code='RST')
+        child = Department.objects.create(tenant=self.tenant, name='Data', code='DAT', parent=parent)
+        for number, department in enumerate([parent, child, child]):
+            Employee.objects.create(
+                tenant=self.tenant, employee_id=f'EMP{number}', first_name='Emp', last_name=str(number),
+                department=department, gender='M',
+            )
+        Publication.objects.create(tenant=self.tenant, title='A', status=PublicationStatus.PUBLISHED, year=2026)
+        Publication.objects.create(tenant=self.tenant, title='B', year=2026)
+        self.client.force_authenticate(user=self.user)
+
+    def test_dashboard_reads_rollups(self):
+        with self.assertNumQueries(3):  # tenant user, rollups, snapshots
+            response = self.client.get(reverse('api_v1:dashboard-organization-overview'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_employees'], 3)
+        self.assertEqual(response.data['total_departments'], 2)
+        self.assertEqual(response.data['total_publications'], 1)
+
+        response = self.client.get(reverse('api_v1:dashboard-department-stats'))
+        self.assertEqual(response.data['top_departments'][0]['name'], 'Data')
+        hierarchy = response.data['department_hierarchy']
+        self.assertEqual((hierarchy[0]['employee_count'], hierarchy[0]['children'][0]['employee_count']), (1, 2))
+        self.assertEqual(
+            (hierarchy[0]['total_employee_count'], hierarchy[0]['children'][0]['total_employee_count']), (3, 2),
+        )
+
+        response = self.client.get(reverse('api_v1:dashboard-employee-demographics'))
+        self.assertEqual(response.data['employees_by_gender'], [{'gender': 'M', 'count': 3}])
+        self.assertEqual(response.data['employees_by_department'][0], {'department_name': 'Data', 'count': 2})
+
+        response = self.client.get(reverse('api_v1:dashboard-publications-stats'))
+        self.assertEqual(response.data['publications_by_year'], [{'year': 2026, 'count': 2}])
+        self.assertEqual(sum(row['count'] for row in response.data['monthly_trend']), 2)
@@ -4,15 +4,22 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Q, F, Sum
-from django.db.models.functions import TruncMonth, TruncYear
+from datetime import datetime, time, timedelta
 from django.utils import timezone
-from datetime import timedelta
 
-from apps.organization.models import Department, Position
-from apps.hr.models import Employee
-from apps.research.publication.models import Publication, PublicationType, PublicationStatus
+from apps.core.models.tree import subtree_totals
+from apps.organization.models import Department
+from apps.research.publication.models import Publication, PublicationStatus
 from apps.tenants.models import TenantUser
+from . import rollup
+
+
+def _breakdown(counts, name):
+    """Rollup counts as chart rows ({name: key, 'count': n}), largest first."""
+    return [
+        {name: key, 'count': count}
+        for key, count in sorted(counts.items(), key=lambda item: -item[1])
+    ]
 
 
 class DashboardViewSet(viewsets.ViewSet):
@@ -24,9 +31,24 @@ class DashboardViewSet(viewsets.ViewSet):
     - Publication statistics
     - Employee demographics
     - Department distribution
+
+    Counts are read from the rollup tables maintained by apps.analytics.rollup.
     """
     permission_classes = [IsAuthenticated]
 
+    def _tenant(self, request):
+        tenant_user = TenantUser.objects.filter(
+            user=request.user,
+            is_active=True
+        ).select_related('tenant').first()
+        return tenant_user.tenant if tenant_user else None
+
+    def _no_tenant(self):
+        return Response(
+            {'detail': 'User is not associated with any tenant.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
     @action(detail=False, methods=['get'])
     def organization_overview(self, request):
         """
@@ -39,54 +61,25 @@ class DashboardViewSet(viewsets.ViewSet):
             - total_publications
             - employees_by_status
             - employees_by_type
+            - headcount_trend (last 30 daily snapshots)
         """
-        # Get current tenant
-        tenant_user = TenantUser.objects.filter(
-            user=request.user,
-            is_active=True
-        ).select_related('tenant').first()
-
-        if not tenant_user:
-            return Response(
-                {'detail': 'User is not associated with any tenant.'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        tenant = self._tenant(request)
+        if not tenant:
+            return self._no_tenant()
 
-        tenant = tenant_user.tenant
-
-        # Total counts
-        total_employees = Employee.objects.filter(tenant=tenant, is_active=True).count()
-        total_departments = Department.objects.filter(tenant=tenant, is_active=True).count()
-        total_positions = Position.objects.filter(tenant=tenant, is_active=True).count()
-        total_publications = Publication.objects.filter(
-            tenant=tenant,
-            is_active=True,
-            status=PublicationStatus.PUBLISHED
-        ).count()
-
-        # Employees by status
-        employees_by_status = list(
-            Employee.objects.filter(tenant=tenant, is_active=True)
-            .values('employment_status')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
-
-        # Employees by type
-        employees_by_type = list(
-            Employee.objects.filter(tenant=tenant, is_active=True)
-            .values('employment_type')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
+        counts = rollup.counts(tenant.pk, [
+            'employee.status', 'employee.type', 'department.total', 'position.total', 'publication.status',
+        ])
+        headcount_trend = rollup.daily_totals(tenant.pk, 'employee.status', days=30)
 
         return Response({
-            'total_employees': total_employees,
-            'total_departments': total_departments,
-            'total_positions': total_positions,
-            'total_publications': total_publications,
-            'employees_by_status': employees_by_status,
-            'employees_by_type': employees_by_type,
+            'total_employees': sum(counts['employee.status'].values()),
+            'total_departments': counts['department.total'].get('', 0),
+            'total_positions': counts['position.total'].get('', 0),
+            'total_publications': counts['publication.status'].get(PublicationStatus.PUBLISHED, 0),
+            'employees_by_status': _breakdown(counts['employee.status'], 'employment_status'),
+            'employees_by_type': _breakdown(counts['employee.type'], 'employment_type'),
+            'headcount_trend': [{'day': day, 'count': count} for day, count in headcount_trend],
         })
 
     @action(detail=False, methods=['get'])
@@ -101,77 +94,35 @@ class DashboardViewSet(viewsets.ViewSet):
             - publications_by_indexation (bar chart data)
             - monthly_trend (area chart data - last 12 months)
         """
-        tenant_user = TenantUser.objects.filter(
-            user=request.user,
-            is_active=True
-        ).select_related('tenant').first()
+        tenant = self._tenant(request)
+        if not tenant:
+            return self._no_tenant()
 
-        if not tenant_user:
-            return Response(
-                {'detail': 'User is not associated with any tenant.'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        tenant = tenant_user.tenant
-
-        # Publications by type
-        publications_by_type = list(
-            Publication.objects.filter(tenant=tenant, is_active=True)
-            .values('publication_type')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
+        counts = rollup.counts(tenant.pk, [
+            'publication.type', 'publication.status', 'publication.indexation', 'publication.year',
+        ])
 
         # Publications by year (last 5 years)
         current_year = timezone.now().year
-        publications_by_year = list(
-            Publication.objects.filter(
-                tenant=tenant,
-                is_active=True,
-                year__gte=current_year - 4,
-                year__isnull=False
-            )
-            .values('year')
-            .annotate(count=Count('id'))
-            .order_by('year')
-        )
-
-        # Publications by status
-        publications_by_status = list(
-            Publication.objects.filter(tenant=tenant, is_active=True)
-            .values('status')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
-
-        # Publications by indexation
-        publications_by_indexation = list(
-            Publication.objects.filter(tenant=tenant, is_active=True)
-            .values('indexation')
-            .annotate(count=Count('id'))
-            .order_by('-count')
+        publications_by_year = sorted(
+            ({'year': int(key), 'count': count} for key, count in counts['publication.year'].items() if key),
+            key=lambda row: row['year'],
         )
+        publications_by_year = [row for row in publications_by_year if row['year'] >= current_year - 4]
 
         # Monthly trend (last 12 months)
-        twelve_months_ago = timezone.now() - timedelta(days=365)
-        monthly_trend = list(
-            Publication.objects.filter(
-                tenant=tenant,
-                is_active=True,
-                created_at__gte=twelve_months_ago
-            )
-            .annotate(month=TruncMonth('created_at'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
+        tz = timezone.get_current_timezone()
+        monthly_trend = [
+            {'month': datetime.combine(month, time.min, tzinfo=tz), 'count': count}
+            for month, count in rollup.monthly(tenant.pk, 'publication.created', timezone.now() - timedelta(days=365))
+        ]
 
         # Recent publications (last 10)
         recent_publications = Publication.objects.filter(
             tenant=tenant,
             is_active=True,
             status=PublicationStatus.PUBLISHED
-        ).select_related('created_by').order_by('-publication_date')[:10].values(
+        ).order_by('-publication_date')[:10].values(
             'id',
             'title',
             'publication_type',
@@ -182,10 +133,10 @@ class DashboardViewSet(viewsets.ViewSet):
         )
 
         return Response({
-            'publications_by_type': publications_by_type,
+            'publications_by_type': _breakdown(counts['publication.type'], 'publication_type'),
             'publications_by_year': publications_by_year,
-            'publications_by_status': publications_by_status,
-            'publications_by_indexation': publications_by_indexation,
+            'publications_by_status': _breakdown(counts['publication.status'], 'status'),
+            'publications_by_indexation': _breakdown(counts['publication.indexation'], 'indexation'),
             'monthly_trend': monthly_trend,
             'recent_publications': list(recent_publications),
         })
@@ -195,52 +146,48 @@ class DashboardViewSet(viewsets.ViewSet):
         """
         Get department statistics.
 
+        Counts are direct; `total_employee_count` includes sub-departments.
+
         Returns:
             - departments_by_employee_count (bar chart)
             - top_departments (list)
             - department_hierarchy
         """
-        tenant_user = TenantUser.objects.filter(
-            user=request.user,
-            is_active=True
-        ).select_related('tenant').first()
-
-        if not tenant_user:
-            return Response(
-                {'detail': 'User is not associated with any tenant.'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        tenant = tenant_user.tenant
+        tenant = self._tenant(request)
+        if not tenant:
+            return self._no_tenant()
 
-        # Departments by employee count
-        departments_with_counts = list(
+        employees = rollup.counts(tenant.pk, ['employee.department'])['employee.department']
+        departments = list(
             Department.objects.filter(tenant=tenant, is_active=True)
-            .annotate(employee_count=Count('employees', filter=Q(employees__is_active=True)))
-            .values('id', 'name', 'code', 'employee_count')
-            .order_by('-employee_count')[:10]
+            .order_by('name').values('id', 'name', 'code', 'parent_id', 'path')
+        )
+        for department in departments:
+            department['employee_count'] = employees.get(str(department['id']), 0)
+        totals = subtree_totals(
+            {department['id']: department['path'] for department in departments},
+            {department['id']: department['employee_count'] for department in departments},
         )
+        for department in departments:
+            department['total_employee_count'] = totals[department['id']]
+
+        # Departments by employee count
+        departments_with_counts = [
+            {key: department[key] for key in ('id', 'name', 'code', 'employee_count', 'total_employee_count')}
+            for department in sorted(departments, key=lambda department: -department['employee_count'])[:10]
+        ]
 
         # Top 5 departments
         top_departments = departments_with_counts[:5]
 
         # Department hierarchy (for tree visualization)
-        root_departments = Department.objects.filter(
-            tenant=tenant,
-            is_active=True,
-            parent__isnull=True
-        ).prefetch_related('children')
-
-        def build_hierarchy(dept):
-            return {
-                'id': str(dept.id),
-                'name': dept.name,
-                'code': dept.code,
-                'employee_count': dept.employees.filter(is_active=True).count(),
-                'children': [build_hierarchy(child) for child in dept.children.filter(is_active=True)]
-            }
-
-        department_hierarchy = [build_hierarchy(dept) for dept in root_departments]
+        department_hierarchy = Department.nest(departments, lambda dept: {
+            'id': str(dept['id']),
+            'name': dept['name'],
+            'code': dept['code'],
+            'employee_count': dept['employee_count'],
+            'total_employee_count': dept['total_employee_count'],
+        })
 
         return Response({
             'departments_by_employee_count': departments_with_counts,
@@ -255,53 +202,37 @@ class DashboardViewSet(viewsets.ViewSet):
 
         Returns:
             - employees_by_gender (pie chart)
-            - employees_by_age_group (bar chart)
-            - employees_by_tenure (area chart)
             - employees_by_department (bar chart)
+            - join_date_trend (area chart - last 24 months)
         """
-        tenant_user = TenantUser.objects.filter(
-            user=request.user,
-            is_active=True
-        ).select_related('tenant').first()
-
-        if not tenant_user:
-            return Response(
-                {'detail': 'User is not associated with any tenant.'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        tenant = self._tenant(request)
+        if not tenant:
+            return self._no_tenant()
 
-        tenant = tenant_user.tenant
+        counts = rollup.counts(tenant.pk, ['employee.gender', 'employee.department'])
 
         # Employees by gender
-        employees_by_gender = list(
-            Employee.objects.filter(tenant=tenant, is_active=True, gender__isnull=False)
-            .exclude(gender='')
-            .values('gender')
-            .annotate(count=Count('id'))
-        )
+        employees_by_gender = [
+            row for row in _breakdown(counts['employee.gender'], 'gender') if row['gender']
+        ]
 
         # Employees by department (top 10)
-        employees_by_department = list(
-            Employee.objects.filter(tenant=tenant, is_active=True, department__isnull=False)
-            .values(department_name=F('department__name'))
-            .annotate(count=Count('id'))
-            .order_by('-count')[:10]
-        )
+        top = [row for row in _breakdown(counts['employee.department'], 'department') if row['department']][:10]
+        names = {
+            str(pk): name for pk, name in Department.all_objects.filter(
+                tenant=tenant, pk__in=[row['department'] for row in top]
+            ).values_list('id', 'name')
+        }
+        employees_by_department = [
+            {'department_name': names.get(row['department']), 'count': row['count']}
+            for row in top
+        ]
 
         # Join date trend (last 24 months)
-        two_years_ago = timezone.now() - timedelta(days=730)
-        join_date_trend = list(
-            Employee.objects.filter(
-                tenant=tenant,
-                is_active=True,
-                join_date__gte=two_years_ago,
-                join_date__isnull=False
-            )
-            .annotate(month=TruncMonth('join_date'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
+        join_date_trend = [
+            {'month': month, 'count': count}
+            for month, count in rollup.monthly(tenant.pk, 'employee.joined', timezone.now() - timedelta(days=730))
+        ]
 
         return Response({
             'employees_by_gender': employees_by_gender,
@@ -7,6 +7,7 @@ from django.db.models import Sum, Count
 from datetime import timedelta
 
 from apps.common.cache import cache_api_response, invalidate_cache
+from apps.common.stats import Stats
 from .models import Asset, MaintenanceSchedule, MaintenanceRecord, AssetStatus, MaintenanceStatus
 from .serializers import (
     AssetSerializer, AssetListSerializer,
@@ -90,23 +91,15 @@ class AssetViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get asset statistics."""
-        total = Asset.objects.filter(is_active=True).count()
-        by_status = Asset.objects.filter(is_active=True).values('status').annotate(
-            count=Count('id')
-        )
-        by_category = Asset.objects.filter(is_active=True).values('category').annotate(
-            count=Count('id')
+        stats = (
+            Stats(Asset.objects.filter(is_active=True), 'asset_statistics')
+            .count('total')
+            .group('by_status', ['status'], count=Count('id'))
+            .group('by_category', ['category'], count=Count('id'))
+            .sum('total_purchase_value', 'purchase_price')
+            .get(cache_key='')
         )
-        total_value = Asset.objects.filter(
-            is_active=True, purchase_price__isnull=False
-        ).aggregate(total=Sum('purchase_price'))
-
-        return Response({
-            'total': total,
-            'by_status': list(by_status),
-            'by_category': list(by_category),
-            'total_purchase_value': total_value['total'] or 0,
-        })
+        return Response(stats)
 
 
 class MaintenanceScheduleViewSet(viewsets.ModelViewSet):
@@ -0,0 +1,140 @@
+"""
+Statistics endpoints in a fixed number of queries.
+
+`Stats` collects the numbers a statistics action returns and computes them
+together instead of one COUNT per status:
+
+    data = (
+        Stats(queryset, 'po_statistics')
+        .count('total')
+        .sum('total_value', 'total_amount')
+        .count('pending_delivery', Q(status__in=[POStatus.SENT, POStatus.PARTIAL]))
+        .count_by('by_status', 'status', POStatus.values)
+        .group('by_vendor', ['vendor__name'], count=Count('id'), order_by='-count', limit=10)
+        .get(cache_key=request.query_params)
+    )
+
+- `count`, `sum` and `count_by` become `Count/Sum(..., filter=Q(...))`
+  terms of a single `aggregate()` query; `count_by` expands to one term per
+  value and returns `{value: count}` (every value present, 0 when empty);
+- each `group` is one `GROUP BY` query returning a list of rows.
+
+With a `cache_key` (typically the request's query parameters), the result is
+cached for STATS_CACHE_TIMEOUT seconds under the builder's name, the current
+tenant and that key, so dashboard numbers are shared between users of the
+same tenant for a few seconds without leaking across tenants. Only pass a
+`cache_key` for querysets that do not depend on the requesting user.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+
+class Stats:
+    """Builder of one statistics response (see module docstring)."""
+
+    def __init__(self, queryset, name):
+        self.queryset = queryset
+        self.name = name
+        self._aggregates = {}
+        self._breakdowns = {}
+        self._groups = {}
+        self._order = []
+
+    def _add(self, name):
+        if name in self._order:
+            raise ValueError(f'Duplicate statistic: {name}')
+        self._order.append(name)
+
+    def count(self, name, condition=None):
+        """Number of rows (matching `condition`)."""
+        self._add(name)
+        self._aggregates[name] = Count('pk', filter=condition)
+        return self
+
+    def sum(self, name, field, condition=None):
+        """Sum of `field` over rows (matching `condition`); 0 when empty."""
+        self._add(name)
+        self._aggregates[name] = Sum(field, filter=condition)
+        return self
+
+    def count_by(self, name, field, values, condition=None, other=None):
+        """
+        Row counts per value of `field`, as `{value: count}`; with `other`,
+        rows with any other value are counted under that key.
+        """
+        self._add(name)
+        keys = {}
+        terms = [(value, Q(**{field: value})) for value in values]
+        if other is not None:
+            terms.append((other, ~Q(**{f'{field}__in': list(values)})))
+        for index, (value, term) in enumerate(terms):
+            key = f'{name}__{index}'
+            self._aggregates[key] = Count('pk', filter=term & condition if condition else term)
+            keys[getattr(value, 'value', value)] = key
+        self._breakdowns[name] = keys
+        return self
+
+    def group(self, name, fields, order_by=None, limit=None, queryset=None, **annotations):
+        """
+        Rows of a GROUP BY over `fields` (field names, or `name=expression`
+        pairs such as `month=TruncMonth('created_at')` passed in `fields` as
+        a dict) with `annotations` per group.
+        """
+        self._add(name)
+        self._groups[name] = (fields, annotations, order_by, limit, queryset)
+        return self
+
+    def _compute(self) -> dict:
+        totals = self.queryset.aggregate(**self._aggregates) if self._aggregates else {}
+        result = {}
+        for name in self._order:
+            if name in self._breakdowns:
+                result[name] = {value: totals[key] for value, key in self._breakdowns[name].items()}
+            elif name in self._groups:
+                fields, annotations, order_by, limit, queryset = self._groups[name]
+                rows = queryset if queryset is not None else self.queryset
+                if isinstance(fields, dict):
+                    rows = rows.annotate(**fields)
+                    fields = list(fields)
+                rows = rows.order_by().values(*fields).annotate(**annotations)
+                if order_by:
+                    rows = rows.order_by(*([order_by] if isinstance(order_by, str) else order_by))
+                if limit:
+                    rows = rows[:limit]
+                result[name] = list(rows)
+            else:
+                result[name] = totals[name] or 0
+        return result
+
+    def cache_key(self, key) -> str:
+        from apps.core.middleware import get_current_tenant
+
+        tenant = get_current_tenant()
+        if hasattr(key, 'urlencode'):
+            key = key.urlencode()
+        digest = hashlib.md5(str(key).encode()).hexdigest()
+        return f'stats:{self.name}:{tenant.pk if tenant else "-"}:{digest}'
+
+    def get(self, cache_key=None, cache_timeout=None) -> dict:
+        """
+        Compute the statistics.
+
+        Args:
+            cache_key: What else the numbers depend on (e.g.
+                request.query_params); None to skip the cache
+            cache_timeout: Seconds to cache (default STATS_CACHE_TIMEOUT;
+                0 disables caching)
+        """
+        if cache_timeout is None:
+            cache_timeout = settings.STATS_CACHE_TIMEOUT
+        if cache_key is None or not cache_timeout:
+            return self._compute()
+        key = self.cache_key(cache_key)
+        result = cache.get(key)
+        if result is None:
+            result = self._compute()
+            cache.set(key, result, timeout=cache_timeout)
+        return result
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomFieldDefinition, CustomFieldValue
+from .models import CustomFieldDefinition, CustomFieldValue, NumberSequence
 
 
 @admin.register(CustomFieldDefinition)
@@ -15,3 +15,10 @@ class CustomFieldValueAdmin(admin.ModelAdmin):
     list_display = ['field', 'value', 'content_type', 'object_id']
     list_filter = ['field', 'content_type']
     search_fields = ['value']
+
+
+@admin.register(NumberSequence)
+class NumberSequenceAdmin(admin.ModelAdmin):
+    list_display = ['key', 'period', 'tenant', 'last_value', 'updated_at']
+    list_filter = ['key']
+    search_fields = ['key', 'period']
@@ -0,0 +1,27 @@
+"""
+Abort direct uploads whose presigned URLs expired without a completion call.
+
+Discards the partial multipart data left in object storage. Run periodically
+(e.g. hourly from cron).
+
+Usage:
+    python manage.py abort_expired_uploads
+"""
+from django.core.management.base import BaseCommand
+from apps.core.services.uploads import upload_service
+
+
+class Command(BaseCommand):
+    help = 'Abort expired pending direct uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=500,
+            help='Maximum uploads aborted per run',
+        )
+
+    def handle(self, *args, **options):
+        count = upload_service.abort_expired(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Aborted {count} expired uploads'))
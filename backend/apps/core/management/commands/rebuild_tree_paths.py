@@ -0,0 +1,27 @@
+"""
+Recompute the materialized paths of every hierarchy (see
+apps.core.models.tree).
+
+Paths are kept in sync on save; run this after bulk imports, queryset
+updates or raw SQL that changed parent links without going through save().
+
+Usage:
+    python manage.py rebuild_tree_paths
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from apps.core.models.tree import TreeMixin, rebuild_paths
+
+
+class Command(BaseCommand):
+    help = 'Recompute materialized tree paths of hierarchical models'
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in apps.get_models():
+            if issubclass(model, TreeMixin):
+                count = rebuild_paths(model, model.tree_parent)
+                total += count
+                self.stdout.write(f'  {model._meta.label}: {count} paths updated')
+
+        self.stdout.write(self.style.SUCCESS(f'Updated {total} paths'))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:31
+
+import apps.core.models.previews
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_auditlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PreviewImage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('size', models.CharField(max_length=8)),
+                ('page', models.PositiveIntegerField(default=1)),
+                ('image', models.FileField(upload_to=apps.core.models.previews.preview_upload_to)),
+                ('width', models.PositiveIntegerField(default=0)),
+                ('height', models.PositiveIntegerField(default=0)),
+                ('byte_size', models.PositiveIntegerField(default=0)),
+                ('page_count', models.PositiveIntegerField(default=1)),
+                ('is_encrypted', models.BooleanField(default=False)),
+                ('encryption_nonce', models.CharField(blank=True, max_length=32)),
+            ],
+            options={
+                'verbose_name': 'Preview Image',
+                'verbose_name_plural': 'Preview Images',
+                'unique_together': {('content_hash', 'size', 'page')},
+            },
+        ),
+    ]
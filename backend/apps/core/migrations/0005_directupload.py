@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:36
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_previewimage'),
+        ('tenants', '0002_invoice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('target', models.CharField(max_length=50)),
+                ('object_id', models.UUIDField(blank=True, help_text='Record the file is attached to', null=True)),
+                ('key', models.CharField(max_length=512, unique=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('size', models.BigIntegerField(help_text='Declared size in bytes')),
+                ('upload_id', models.CharField(blank=True, max_length=255)),
+                ('part_size', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Menunggu'), ('completed', 'Selesai'), ('aborted', 'Dibatalkan'), ('failed', 'Gagal')], default='pending', max_length=20)),
+                ('stored_size', models.BigIntegerField(blank=True, null=True)),
+                ('result_id', models.UUIDField(blank=True, help_text='Record that received the file', null=True)),
+                ('expires_at', models.DateTimeField()),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='direct_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Direct Upload',
+                'verbose_name_plural': 'Direct Uploads',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='core_direct_status_325332_idx')],
+            },
+        ),
+    ]
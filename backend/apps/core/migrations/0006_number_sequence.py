@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:24
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_directupload'),
+        ('tenants', '0002_invoice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberSequence',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('key', models.CharField(help_text='Sequence name, e.g. purchase_order', max_length=50)),
+                ('period', models.CharField(blank=True, help_text='YYYY or YYYYMM, empty for continuous numbering', max_length=10)),
+                ('last_value', models.BigIntegerField(default=0)),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Number Sequence',
+                'verbose_name_plural': 'Number Sequences',
+                'ordering': ['key', '-period'],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'key', 'period'), name='unique_number_sequence', nulls_distinct=False)],
+            },
+        ),
+    ]
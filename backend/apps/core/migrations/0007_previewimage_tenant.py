@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_number_sequence'),
+        ('tenants', '0002_invoice'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='previewimage',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='previewimage',
+            name='tenant',
+            field=models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant'),
+        ),
+        migrations.AddConstraint(
+            model_name='previewimage',
+            constraint=models.UniqueConstraint(fields=('tenant', 'content_hash', 'size', 'page'), name='core_preview_unique_page', nulls_distinct=False),
+        ),
+    ]
@@ -1,6 +1,10 @@
 from .base import BaseModel, TenantMixin, TenantBaseModel
 from .audit import AuditMixin, AuditLog
 from .fields import CustomFieldDefinition, CustomFieldValue, CustomFieldMixin
+from .previews import PreviewImage
+from .uploads import DirectUpload, DirectUploadStatus
+from .sequences import NumberSequence
+from .tree import TreeMixin
 
 __all__ = [
     'BaseModel',
@@ -11,4 +15,9 @@ __all__ = [
     'CustomFieldDefinition',
     'CustomFieldValue',
     'CustomFieldMixin',
+    'PreviewImage',
+    'DirectUpload',
+    'DirectUploadStatus',
+    'NumberSequence',
+    'TreeMixin',
 ]
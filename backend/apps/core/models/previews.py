@@ -0,0 +1,47 @@
+from django.db import models
+from .base import TenantBaseModel
+
+
+def preview_upload_to(instance, filename):
+    """Content-addressed storage path: previews/<tenant>/ab/abcdef..._md_1.jpg"""
+    return (
+        f'previews/{instance.tenant_id or "shared"}/{instance.content_hash[:2]}/'
+        f'{instance.content_hash}_{instance.size}_{instance.page}.jpg'
+    )
+
+
+class PreviewImage(TenantBaseModel):
+    """
+    Cached thumbnail of one page of a file, keyed by tenant and the SHA-256
+    of the file's plaintext content. Shared by documents, policy files,
+    ticket attachments and the PDF tools of a tenant; see
+    `apps.core.services.previews`.
+    """
+
+    content_hash = models.CharField(max_length=64)
+    size = models.CharField(max_length=8)
+    page = models.PositiveIntegerField(default=1)
+    image = models.FileField(upload_to=preview_upload_to)
+    width = models.PositiveIntegerField(default=0)
+    height = models.PositiveIntegerField(default=0)
+    byte_size = models.PositiveIntegerField(default=0)
+    page_count = models.PositiveIntegerField(default=1)
+
+    # Previews of encrypted sources are stored encrypted as well
+    is_encrypted = models.BooleanField(default=False)
+    encryption_nonce = models.CharField(max_length=32, blank=True)
+
+    class Meta:
+        app_label = 'core'
+        verbose_name = 'Preview Image'
+        verbose_name_plural = 'Preview Images'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'content_hash', 'size', 'page'],
+                name='core_preview_unique_page',
+                nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} {self.size} p{self.page}"
@@ -0,0 +1,29 @@
+from django.db import models
+from .base import TenantBaseModel
+
+
+class NumberSequence(TenantBaseModel):
+    """
+    Counter behind a family of document numbers (e.g. PO-2025-0001), per
+    tenant and numbering period; see `apps.core.services.sequences`.
+    """
+
+    key = models.CharField(max_length=50, help_text='Sequence name, e.g. purchase_order')
+    period = models.CharField(max_length=10, blank=True, help_text='YYYY or YYYYMM, empty for continuous numbering')
+    last_value = models.BigIntegerField(default=0)
+
+    class Meta:
+        app_label = 'core'
+        verbose_name = 'Number Sequence'
+        verbose_name_plural = 'Number Sequences'
+        ordering = ['key', '-period']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'key', 'period'],
+                nulls_distinct=False,
+                name='unique_number_sequence',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.key} {self.period}: {self.last_value}"
@@ -0,0 +1,236 @@
+"""
+Materialized-path hierarchies.
+
+Models with a self-referencing parent (departments, folders, ticket
+categories, the employee supervisor chain) inherit `TreeMixin`, which keeps
+two extra columns in sync on save:
+
+- `path`: the ids of the node's ancestors and its own, root first, as
+  `/<hex>/<hex>/.../`; a node's subtree is every row whose path starts with
+  the node's path (indexed with text_pattern_ops for prefix scans);
+- `depth`: number of ancestors (0 for roots).
+
+So a whole tree is one query ordered by path (`nest` builds the nested
+structure from it), a subtree is one `path__startswith` query, ancestors are
+one `pk__in` query on the ids in the path, and subtree rollups (e.g.
+employees per department including sub-departments) are one GROUP BY over
+the flat rows (`subtree_totals`).
+
+Moving a node rewrites the paths of its descendants with a single UPDATE.
+Deleting a node whose children are kept (SET_NULL) turns them into roots
+the same way. Writes that bypass `save()` (queryset `update()`, raw SQL)
+leave paths stale: run `python manage.py rebuild_tree_paths` afterwards.
+
+    class Department(TreeMixin, TenantBaseModel):
+        parent = models.ForeignKey('self', null=True, related_name='children', ...)
+
+        class Meta:
+            indexes = [TreeMixin.path_index('organization_department_path')]
+"""
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+
+
+CYCLE_MESSAGE = 'Tidak bisa ditempatkan di bawah dirinya sendiri atau turunannya.'
+
+
+def _segment(pk) -> str:
+    return f'{pk.hex}/'
+
+
+class TreeMixin(models.Model):
+    """Materialized path over a self-referencing parent (see module docstring)."""
+
+    # Name of the ForeignKey to the parent node
+    tree_parent = 'parent'
+
+    path = models.TextField(
+        default='',
+        editable=False,
+        help_text='Ids from the root to this node, e.g. /<id>/<id>/',
+    )
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    _loaded_tree_parent = None
+
+    class Meta:
+        abstract = True
+
+    @staticmethod
+    def path_index(name):
+        """Index for subtree (path prefix) queries."""
+        return models.Index(fields=['path'], name=name, opclasses=['text_pattern_ops'])
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_tree_parent = instance.__dict__.get(f'{cls.tree_parent}_id')
+        return instance
+
+    @property
+    def tree_parent_id(self):
+        return getattr(self, f'{self.tree_parent}_id')
+
+    def ancestor_ids(self) -> list:
+        """Ids of the ancestors, root first (no query)."""
+        return [uuid.UUID(segment) for segment in self.path.strip('/').split('/')[:-1] if segment]
+
+    def ancestors(self):
+        """Ancestors, root first, in one query."""
+        return type(self)._base_manager.filter(pk__in=self.ancestor_ids()).order_by('depth')
+
+    def descendants(self, include_self=False):
+        """The node's subtree in one query."""
+        rows = type(self)._base_manager.filter(path__startswith=self.path)
+        return rows if include_self else rows.exclude(pk=self.pk)
+
+    def is_descendant_of(self, node, include_self=False) -> bool:
+        if not node.path or not self.path:
+            return False
+        return self.path.startswith(node.path) and (include_self or self.pk != node.pk)
+
+    def _locate(self):
+        """Compute path and depth from the parent row."""
+        parent_id = self.tree_parent_id
+        if parent_id is None:
+            return f'/{_segment(self.pk)}', 0
+        parent = type(self)._base_manager.only('path', 'depth').get(pk=parent_id)
+        if parent.pk == self.pk or (self.path and parent.path.startswith(self.path)):
+            raise ValidationError({self.tree_parent: CYCLE_MESSAGE})
+        return f'{parent.path or "/"}{_segment(self.pk)}', parent.depth + 1
+
+    def save(self, *args, **kwargs):
+        parent_id = self.tree_parent_id
+        moved = self._state.adding or not self.path or parent_id != self._loaded_tree_parent
+        old_path, old_depth = self.path, self.depth
+        if moved:
+            self.path, self.depth = self._locate()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'path', 'depth'}
+        super().save(*args, **kwargs)
+        self._loaded_tree_parent = parent_id
+        if moved and old_path and old_path != self.path:
+            self._rebase(old_path, self.path, self.depth - old_depth)
+
+    def delete(self, *args, **kwargs):
+        path, depth = self.path, self.depth
+        result = super().delete(*args, **kwargs)
+        if path:
+            # Children kept by SET_NULL are now roots
+            self._rebase(path, '/', -(depth + 1))
+        return result
+
+    def _rebase(self, old_prefix, new_prefix, depth_delta):
+        """Move every path under `old_prefix` to `new_prefix`."""
+        type(self)._base_manager.filter(path__startswith=old_prefix).exclude(path=old_prefix).update(
+            path=Concat(Value(new_prefix), Substr('path', len(old_prefix) + 1), output_field=models.TextField()),
+            depth=F('depth') + depth_delta,
+        )
+
+    @classmethod
+    def nest(cls, nodes, serialize, children_key='children', root=None) -> list:
+        """
+        Nest flat nodes (e.g. one query ordered by path) into trees.
+
+        Nodes whose parent is not among `nodes` are left out, unless they
+        are roots, so filtering out a node hides its subtree.
+
+        Args:
+            nodes: Model instances or dicts with 'id' and the parent id
+            serialize: Callable turning a node into a dict
+            children_key: Key of the list of children in each dict
+            root: Id of a node to return the subtree of instead of the roots
+
+        Returns:
+            List of root dicts (or the `root` dict), each with nested children
+        """
+        parent_key = f'{cls.tree_parent}_id'
+        rendered = {}
+        children = {}
+        for node in nodes:
+            node_id, parent_id = (
+                (node['id'], node[parent_key]) if isinstance(node, dict)
+                else (node.pk, getattr(node, parent_key))
+            )
+            rendered[node_id] = {**serialize(node), children_key: []}
+            children.setdefault(parent_id, []).append(node_id)
+
+        def attach(node_id):
+            item = rendered[node_id]
+            item[children_key] = [attach(child) for child in children.get(node_id, ())]
+            return item
+
+        if root is not None:
+            return [attach(root)] if root in rendered else []
+        return [attach(node_id) for node_id in children.get(None, ())]
+
+
+def subtree_totals(paths, counts) -> dict:
+    """
+    Roll per-node counts up to every ancestor.
+
+    Args:
+        paths: {node id: path} of the tree's nodes
+        counts: {node id: count of the node itself}
+
+    Returns:
+        {node id: count of the node and all of its descendants}
+    """
+    by_segment = {path.rstrip('/').rsplit('/', 1)[-1]: node_id for node_id, path in paths.items()}
+    totals = dict.fromkeys(paths, 0)
+    for node_id, count in counts.items():
+        path = paths.get(node_id)
+        if path is None:
+            continue
+        for segment in path.strip('/').split('/'):
+            ancestor = by_segment.get(segment)
+            if ancestor is not None:
+                totals[ancestor] += count
+    return totals
+
+
+def rebuild_paths(model, parent_field='parent') -> int:
+    """
+    Recompute `path` and `depth` of every row of `model` from its parent
+    links (also usable with historical models in migrations).
+
+    Returns:
+        Number of rows updated
+    """
+    rows = list(model._base_manager.values_list('pk', f'{parent_field}_id', 'path', 'depth'))
+    children = {}
+    for pk, parent_id, _, _ in rows:
+        children.setdefault(parent_id, []).append(pk)
+    current = {pk: (path, depth) for pk, _, path, depth in rows}
+
+    known = set(current)
+    located = {}
+
+    def walk(roots):
+        stack = [(pk, '/', 0) for pk in roots]
+        while stack:
+            pk, prefix, depth = stack.pop()
+            if pk in located:
+                continue
+            path = f'{prefix}{_segment(pk)}'
+            located[pk] = (path, depth)
+            stack += [(child, path, depth + 1) for child in children.get(pk, ())]
+
+    # Roots, and rows whose parent no longer exists
+    walk(pk for pk, parent_id, _, _ in rows if parent_id is None or parent_id not in known)
+    # Rows on a parent cycle never reach a root; each cycle is cut at one row
+    for pk in current:
+        if pk not in located:
+            walk([pk])
+
+    changed = [
+        model(pk=pk, path=path, depth=depth)
+        for pk, (path, depth) in located.items() if current[pk] != (path, depth)
+    ]
+    model._base_manager.bulk_update(changed, ['path', 'depth'], batch_size=1000)
+    return len(changed)
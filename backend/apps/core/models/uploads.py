@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import models
+from .base import TenantBaseModel
+
+
+class DirectUploadStatus(models.TextChoices):
+    PENDING = 'pending', 'Menunggu'
+    COMPLETED = 'completed', 'Selesai'
+    ABORTED = 'aborted', 'Dibatalkan'
+    FAILED = 'failed', 'Gagal'
+
+
+class DirectUpload(TenantBaseModel):
+    """
+    A file uploaded by the client straight to object storage with presigned
+    URLs. Created when the upload is requested and attached to its target
+    record by the completion callback; see `apps.core.services.uploads`.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='direct_uploads',
+    )
+    target = models.CharField(max_length=50)
+    object_id = models.UUIDField(null=True, blank=True, help_text='Record the file is attached to')
+    key = models.CharField(max_length=512, unique=True)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.BigIntegerField(help_text='Declared size in bytes')
+
+    # Multipart uploads only
+    upload_id = models.CharField(max_length=255, blank=True)
+    part_size = models.BigIntegerField(default=0)
+
+    status = models.CharField(
+        max_length=20,
+        choices=DirectUploadStatus.choices,
+        default=DirectUploadStatus.PENDING,
+    )
+    stored_size = models.BigIntegerField(null=True, blank=True)
+    result_id = models.UUIDField(null=True, blank=True, help_text='Record that received the file')
+    expires_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        app_label = 'core'
+        verbose_name = 'Direct Upload'
+        verbose_name_plural = 'Direct Uploads'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.target}: {self.filename} ({self.status})"
+
+    @property
+    def is_multipart(self) -> bool:
+        return bool(self.upload_id)
@@ -1,7 +1,21 @@
 """Core serializers for audit logs and shared functionality."""
 
 from rest_framework import serializers
-from .models import AuditLog
+from .models import AuditLog, DirectUpload
+from .models.tree import CYCLE_MESSAGE
+from .services.uploads import UPLOAD_TARGETS
+
+
+class TreeSerializerMixin:
+    """Rejects moving a TreeMixin node under itself or one of its descendants."""
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        field = self.Meta.model.tree_parent
+        parent = attrs.get(field)
+        if parent is not None and self.instance is not None and parent.is_descendant_of(self.instance, include_self=True):
+            raise serializers.ValidationError({field: CYCLE_MESSAGE})
+        return attrs
 
 
 class AuditLogUserSerializer(serializers.Serializer):
@@ -44,3 +58,44 @@ class AuditLogSerializer(serializers.ModelSerializer):
         if obj.user:
             return AuditLogUserSerializer(obj.user).data
         return None
+
+
+class DirectUploadSerializer(serializers.ModelSerializer):
+    """Serializer for direct upload records."""
+
+    class Meta:
+        model = DirectUpload
+        fields = [
+            'id',
+            'target',
+            'object_id',
+            'filename',
+            'content_type',
+            'size',
+            'status',
+            'stored_size',
+            'result_id',
+            'expires_at',
+            'completed_at',
+            'created_at',
+        ]
+        read_only_fields = fields
+
+
+class DirectUploadCreateSerializer(serializers.Serializer):
+    """Request body for starting a direct upload."""
+    target = serializers.ChoiceField(choices=sorted(UPLOAD_TARGETS))
+    object_id = serializers.UUIDField()
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+    size = serializers.IntegerField(min_value=1)
+
+
+class DirectUploadPartSerializer(serializers.Serializer):
+    part_number = serializers.IntegerField(min_value=1)
+    etag = serializers.CharField(max_length=255)
+
+
+class DirectUploadCompleteSerializer(serializers.Serializer):
+    """Completion callback body; `parts` only for multipart uploads."""
+    parts = DirectUploadPartSerializer(many=True, required=False)
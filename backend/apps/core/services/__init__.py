@@ -0,0 +1,9 @@
+from .previews import preview_service, PreviewService, PreviewUnavailable
+from .uploads import upload_service, DirectUploadService, DirectUploadError
+from .sequences import Sequence, allocate
+
+__all__ = [
+    'preview_service', 'PreviewService', 'PreviewUnavailable',
+    'upload_service', 'DirectUploadService', 'DirectUploadError',
+    'Sequence', 'allocate',
+]
@@ -0,0 +1,250 @@
+"""
+Server-push event stream (Server-Sent Events).
+
+Instead of every open tab polling "assigned to me", "pending my approval",
+dashboards and visitor lists, clients keep one `GET /api/v1/events/`
+connection open and refetch a list only when an event says it changed.
+
+Publishing:
+
+    publish('ticket.assigned', {'id': ticket.pk}, tenant_id=ticket.tenant_id,
+            users=[ticket.assignee_id])
+    publish('visit.checked_in', {...}, tenant_id=visit.tenant_id)  # whole tenant
+
+Events are sent once the surrounding transaction commits, to the users given
+(`events:user:<id>` channels) or, without `users`, to everyone in the tenant
+(`events:tenant:<id>`). Delivery is best effort: a failing broker is logged
+and never breaks the request that published.
+
+Delivery goes through a broker:
+
+- `RedisBroker` (EVENT_STREAM_REDIS_URL set): PUBLISH to Redis; each server
+  process keeps a single pattern subscription and fans messages out to its
+  own connections, so the number of Redis connections does not grow with
+  the number of open tabs;
+- `LocalBroker` (no URL): in-process delivery, for development and tests.
+
+Each connection has its own bounded queue (EVENT_STREAM_QUEUE_SIZE). A
+client that does not keep up never slows down the others: once its queue is
+full further events are dropped for it and it receives one `overflow` event,
+after which it should refetch what it displays. Idle connections get a
+keep-alive comment every EVENT_STREAM_HEARTBEAT seconds and are closed
+after EVENT_STREAM_MAX_AGE seconds (EventSource reconnects on its own).
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+RETRY_MS = 5000
+RECONNECT_DELAY = 5
+
+
+def tenant_channel(tenant_id) -> str:
+    return f'events:tenant:{tenant_id or "-"}'
+
+
+def user_channel(user_id) -> str:
+    return f'events:user:{user_id}'
+
+
+def frame(event, data) -> str:
+    """One SSE message."""
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'
+
+
+# ==================== Connections ====================
+
+class Subscription:
+    """Bounded queue of one client connection."""
+
+    def __init__(self, channels, maxsize):
+        self.channels = channels
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+
+class Hub:
+    """Per-process fan-out from channels to the connections subscribed to them."""
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.loop = None
+        self.listener = None
+
+    def attach(self, subscription):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # New event loop (first connection, or a restarted server/test loop)
+            self.loop, self.listener = loop, None
+            self.subscribers.clear()
+        if self.listener is None or self.listener.done():
+            self.listener = broker().start(self)
+        for channel in subscription.channels:
+            self.subscribers[channel].add(subscription)
+
+    def detach(self, subscription):
+        for channel in subscription.channels:
+            subscribers = self.subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[channel]
+
+    def dispatch(self, channel, message):
+        for subscription in list(self.subscribers.get(channel, ())):
+            subscription.offer(message)
+
+    def dispatch_threadsafe(self, channels, message):
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(lambda: [self.dispatch(channel, message) for channel in channels])
+
+
+hub = Hub()
+
+
+# ==================== Brokers ====================
+
+class LocalBroker:
+    """In-process delivery (single server process only)."""
+
+    def publish(self, channels, message):
+        hub.dispatch_threadsafe(channels, message)
+
+    def start(self, target):
+        return None
+
+
+class RedisBroker:
+    """Redis pub/sub delivery between server processes."""
+
+    def __init__(self, url):
+        self.url = url
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        if self._client is None:
+            import redis
+            with self._lock:
+                if self._client is None:
+                    self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def publish(self, channels, message):
+        pipe = self.client().pipeline(transaction=False)
+        for channel in channels:
+            pipe.publish(channel, message)
+        pipe.execute()
+
+    def start(self, target):
+        return asyncio.get_running_loop().create_task(self.listen(target))
+
+    async def listen(self, target):
+        import redis.asyncio as aioredis
+
+        while True:
+            client = aioredis.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe('events:*')
+                    async for message in pubsub.listen():
+                        if message['type'] == 'pmessage':
+                            target.dispatch(message['channel'].decode(), message['data'].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Event stream listener lost its Redis connection')
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                await client.aclose()
+
+
+_broker = None
+
+
+def broker():
+    global _broker
+    url = settings.EVENT_STREAM_REDIS_URL
+    if _broker is None or getattr(_broker, 'url', None) != (url or None):
+        _broker = RedisBroker(url) if url else LocalBroker()
+    return _broker
+
+
+# ==================== Publishing ====================
+
+def send(event, data=None, tenant_id=None, users=None):
+    """Deliver an event now (see `publish`)."""
+    if users is None:
+        channels = [tenant_channel(tenant_id)]
+    else:
+        channels = [user_channel(user_id) for user_id in {user_id for user_id in users if user_id}]
+    if not channels:
+        return
+    try:
+        broker().publish(channels, frame(event, data or {}))
+    except Exception:
+        logger.exception('Could not publish %s event', event)
+
+
+def publish(event, data=None, tenant_id=None, users=None):
+    """
+    Publish an event once the current transaction commits.
+
+    Args:
+        event: Event name, e.g. 'ticket.assigned'
+        data: JSON-serializable payload (ids, not whole records)
+        tenant_id: Tenant of the event
+        users: User ids to notify; None to notify the whole tenant
+    """
+    transaction.on_commit(lambda: send(event, data, tenant_id, users))
+
+
+# ==================== Streaming ====================
+
+async def stream(user_id, tenant_id, heartbeat=None, max_age=None):
+    """
+    SSE body for one connection: the user's and their tenant's events.
+
+    Yields SSE-formatted strings until `max_age` seconds have passed.
+    """
+    heartbeat = heartbeat or settings.EVENT_STREAM_HEARTBEAT
+    max_age = max_age or settings.EVENT_STREAM_MAX_AGE
+    subscription = Subscription(
+        [user_channel(user_id), tenant_channel(tenant_id)], settings.EVENT_STREAM_QUEUE_SIZE,
+    )
+    hub.attach(subscription)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_age
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), timeout=min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if subscription.dropped:
+                yield frame('overflow', {'dropped': subscription.dropped})
+                subscription.dropped = 0
+            yield message
+    finally:
+        hub.detach(subscription)
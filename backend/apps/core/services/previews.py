@@ -0,0 +1,451 @@
+"""
+Preview (thumbnail) generation and caching.
+
+Thumbnails are rendered for one page at a time in a shared thread pool and
+stored as `PreviewImage` rows keyed by (tenant, content hash, size, page), so
+a preview is generated once per distinct file content of a tenant and reused
+until the content changes.
+
+Rendered images are served from a signed URL (`api_v1:preview-image`) that
+names the source object and the user it was issued to and expires after
+`PREVIEW_URL_MAX_AGE` seconds. Serving checks again that this user may view
+the source (`register_source`), so revoking access also revokes outstanding
+URLs. Responses are private; previews of encrypted or restricted sources are
+not stored by caches at all.
+
+Supported sources: raster images (Pillow) and PDFs (pdf2image + PyPDF2,
+optional - same as the PDF tools).
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, close_old_connections, transaction
+from django.urls import reverse
+from PIL import Image, ImageOps
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.core.models import PreviewImage
+
+logger = logging.getLogger(__name__)
+
+# Bounding boxes (width, height) per size name
+SIZES = {
+    'sm': (160, 220),
+    'md': (320, 440),
+    'lg': (800, 1100),
+}
+DEFAULT_SIZE = 'md'
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+
+CACHE_CONTROL_NO_STORE = 'private, no-store'
+
+_signer = signing.TimestampSigner(salt='core.previews')
+
+
+class PreviewUnavailable(Exception):
+    """Raised when a file type cannot be previewed."""
+
+
+def hash_file(fileobj, chunk_size=64 * 1024) -> str:
+    """SHA-256 of a file-like object, read in chunks."""
+    digest = hashlib.sha256()
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+        digest.update(chunk)
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def preview_kind(filename: str, content_type: str = ''):
+    """Return 'image', 'pdf' or None for unsupported files."""
+    ext = os.path.splitext(filename or '')[1].lower()
+    content_type = (content_type or '').lower()
+    if ext == '.pdf' or content_type == 'application/pdf':
+        return 'pdf'
+    if ext in IMAGE_EXTENSIONS or content_type.startswith('image/'):
+        return 'image'
+    return None
+
+
+def _to_jpeg(image, size) -> tuple:
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    image.thumbnail(SIZES[size], Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=85, optimize=True)
+    return buffer.getvalue(), image.width, image.height
+
+
+def render_page(data: bytes, filename: str, content_type: str, size: str, page: int = 1) -> tuple:
+    """
+    Render a single page of a file as a JPEG thumbnail.
+
+    Returns:
+        Tuple of (jpeg_bytes, width, height, page_count)
+
+    Raises:
+        PreviewUnavailable: If the file type or page cannot be rendered
+    """
+    kind = preview_kind(filename, content_type)
+
+    if kind == 'image':
+        if page != 1:
+            raise PreviewUnavailable('Images have a single page')
+        with Image.open(io.BytesIO(data)) as image:
+            jpeg, width, height = _to_jpeg(image, size)
+        return jpeg, width, height, 1
+
+    if kind == 'pdf':
+        try:
+            from pdf2image import convert_from_bytes, pdfinfo_from_bytes
+        except ImportError:
+            raise PreviewUnavailable('pdf2image not installed')
+
+        page_count = int(pdfinfo_from_bytes(data).get('Pages', 1))
+        if page < 1 or page > page_count:
+            raise PreviewUnavailable(f'Page {page} out of range (1-{page_count})')
+
+        # Rasterize only the requested page, at roughly the target width
+        images = convert_from_bytes(
+            data, first_page=page, last_page=page,
+            size=(SIZES[size][0] * 2, None), fmt='jpeg',
+        )
+        jpeg, width, height = _to_jpeg(images[0], size)
+        return jpeg, width, height, page_count
+
+    raise PreviewUnavailable(f'No preview available for {filename or content_type}')
+
+
+class PreviewService:
+    """
+    Generates and caches previews.
+
+    Generation runs in a thread pool of `PREVIEW_WORKERS` threads (0 renders
+    inline). Concurrent requests for the same preview share one job.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._inflight = {}
+        self._lock = threading.RLock()
+        self._sources = {}
+
+    @property
+    def workers(self) -> int:
+        return getattr(settings, 'PREVIEW_WORKERS', 4)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(self.workers, 1),
+                thread_name_prefix='preview',
+            )
+        return self._executor
+
+    # ==================== Lookup & generation ====================
+
+    def get_cached(self, tenant_id, content_hash: str, size: str, page: int):
+        return PreviewImage.all_objects.filter(
+            tenant_id=tenant_id, content_hash=content_hash, size=size, page=page,
+        ).first()
+
+    def get_preview(self, tenant_id, content_hash, loader, filename, content_type='',
+                    size=DEFAULT_SIZE, page=1, protect=False, wait=None):
+        """
+        Return the cached preview, generating it if needed.
+
+        Args:
+            tenant_id: Tenant owning the source (None for shared files)
+            content_hash: SHA-256 of the plaintext content
+            loader: Callable returning the plaintext bytes (only called on a miss)
+            filename: Original filename, used to detect the file type
+            content_type: MIME type
+            size: Key of SIZES
+            page: 1-based page number
+            protect: Store the rendered image encrypted
+            wait: Seconds to wait for the worker (default PREVIEW_WAIT_SECONDS)
+
+        Returns:
+            PreviewImage, or None if generation is still running
+
+        Raises:
+            PreviewUnavailable: If the file cannot be previewed
+        """
+        if size not in SIZES:
+            raise PreviewUnavailable(f'Unknown size {size}')
+
+        cached = self.get_cached(tenant_id, content_hash, size, page)
+        if cached is not None:
+            return cached
+
+        args = (tenant_id, content_hash, loader, filename, content_type, size, page, protect)
+        if self.workers <= 0:
+            return self._generate(*args)
+
+        future = self._submit((tenant_id, content_hash, size, page), args)
+        if wait is None:
+            wait = getattr(settings, 'PREVIEW_WAIT_SECONDS', 5)
+        try:
+            return future.result(timeout=wait)
+        except FutureTimeout:
+            return None
+
+    def _submit(self, key, args):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._get_executor().submit(self._generate_in_thread, *args)
+                self._inflight[key] = future
+                future.add_done_callback(lambda f: self._discard(key))
+        return future
+
+    def _discard(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _generate_in_thread(self, *args):
+        close_old_connections()
+        try:
+            return self._generate(*args)
+        finally:
+            close_old_connections()
+
+    def _generate(self, tenant_id, content_hash, loader, filename, content_type, size, page, protect):
+        cached = self.get_cached(tenant_id, content_hash, size, page)
+        if cached is not None:
+            return cached
+
+        try:
+            jpeg, width, height, page_count = render_page(loader(), filename, content_type, size, page)
+        except PreviewUnavailable:
+            raise
+        except Exception as e:
+            raise PreviewUnavailable(f'Could not render preview: {e}')
+
+        preview = PreviewImage(
+            tenant_id=tenant_id,
+            content_hash=content_hash,
+            size=size,
+            page=page,
+            width=width,
+            height=height,
+            byte_size=len(jpeg),
+            page_count=page_count,
+        )
+        if protect:
+            # Same AES-256-GCM scheme as encrypted documents
+            from apps.documents.encryption import encrypt_file
+            import base64
+            jpeg, nonce = encrypt_file(jpeg)
+            preview.is_encrypted = True
+            preview.encryption_nonce = base64.b64encode(nonce).decode('utf-8')
+
+        preview.image.save('preview.jpg', ContentFile(jpeg), save=False)
+        try:
+            with transaction.atomic():
+                preview.save()
+        except IntegrityError:
+            # Another worker finished first
+            preview.image.delete(save=False)
+            return self.get_cached(tenant_id, content_hash, size, page)
+        return preview
+
+    def render_pages(self, tenant_id, data: bytes, content_hash: str, filename: str,
+                     page_count: int, size=DEFAULT_SIZE, wait=None) -> list:
+        """
+        Previews for every page of an in-memory PDF, rendered in parallel.
+
+        Pages that fail to render, or are not done within `wait` seconds
+        (default PREVIEW_PAGES_WAIT_SECONDS, for all pages together), are
+        returned as None.
+        """
+        results = [self.get_cached(tenant_id, content_hash, size, page) for page in range(1, page_count + 1)]
+        missing = [page for page, preview in enumerate(results, start=1) if preview is None]
+        if not missing:
+            return results
+
+        def args(page):
+            return (tenant_id, content_hash, lambda: data, filename, 'application/pdf', size, page, False)
+
+        if self.workers <= 0:
+            for page in missing:
+                try:
+                    results[page - 1] = self._generate(*args(page))
+                except Exception as e:
+                    logger.warning(f"Preview of page {page} failed: {e}")
+            return results
+
+        futures = {page: self._submit((tenant_id, content_hash, size, page), args(page)) for page in missing}
+        if wait is None:
+            wait = getattr(settings, 'PREVIEW_PAGES_WAIT_SECONDS', 30)
+        deadline = time.monotonic() + wait
+        for page, future in futures.items():
+            try:
+                results[page - 1] = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except FutureTimeout:
+                logger.warning(f"Preview of page {page} not ready after {wait}s")
+            except Exception as e:
+                logger.warning(f"Preview of page {page} failed: {e}")
+        return results
+
+    # ==================== Serving ====================
+
+    def read_image(self, preview) -> bytes:
+        with preview.image.open('rb') as f:
+            data = f.read()
+        if preview.is_encrypted:
+            from apps.documents.encryption import decrypt_file
+            import base64
+            data = decrypt_file(data, base64.b64decode(preview.encryption_nonce))
+        return data
+
+    def get_token(self, preview, source, user) -> str:
+        return _signer.sign_object({
+            'tenant': str(preview.tenant_id) if preview.tenant_id else None,
+            'hash': preview.content_hash,
+            'size': preview.size,
+            'page': preview.page,
+            'source': source._meta.label_lower,
+            'pk': str(source.pk),
+            'user': str(user.pk),
+        })
+
+    def resolve_token(self, token: str):
+        """
+        Preview and source behind a token, if it is valid and unexpired and
+        its user may still view the source.
+
+        Returns:
+            Tuple of (preview, source), or None
+        """
+        max_age = getattr(settings, 'PREVIEW_URL_MAX_AGE', 3600)
+        try:
+            value = _signer.unsign_object(token, max_age=max_age)
+            model = apps.get_model(value['source'])
+        except (signing.BadSignature, KeyError, LookupError, ValueError):
+            return None
+
+        from django.contrib.auth import get_user_model
+        source = model._base_manager.filter(pk=value['pk'], tenant_id=value['tenant']).first()
+        user = get_user_model()._default_manager.filter(pk=value['user'], is_active=True).first()
+        if source is None or user is None or not self.can_view(source, user):
+            return None
+
+        preview = self.get_cached(value['tenant'], value['hash'], value['size'], value['page'])
+        if preview is None:
+            return None
+        return preview, source
+
+    def get_url(self, preview, source, user) -> str:
+        return reverse('api_v1:preview-image', kwargs={'token': self.get_token(preview, source, user)})
+
+    # ==================== Access ====================
+
+    def register_source(self, model, can_view, restricted=None):
+        """
+        Access rules of a preview source model.
+
+        Args:
+            model: Source model (Document, Policy, TicketAttachment)
+            can_view: Callable (source, user) -> bool, checked whenever a
+                preview URL of the source is served
+            restricted: Callable (source) -> bool; previews of restricted
+                sources are never stored by caches
+        """
+        self._sources[model._meta.label_lower] = (can_view, restricted)
+
+    def can_view(self, source, user) -> bool:
+        can_view, _ = self._sources.get(source._meta.label_lower, (None, None))
+        if not self._is_member(source, user):
+            return False
+        return can_view is None or can_view(source, user)
+
+    def _is_member(self, source, user) -> bool:
+        if user.is_superuser or source.tenant_id is None:
+            return True
+        return user.tenant_memberships.filter(tenant_id=source.tenant_id, is_active=True).exists()
+
+    def cache_control(self, preview, source) -> str:
+        _, restricted = self._sources.get(source._meta.label_lower, (None, None))
+        if preview.is_encrypted or (restricted is not None and restricted(source)):
+            return CACHE_CONTROL_NO_STORE
+        return f"private, max-age={getattr(settings, 'PREVIEW_URL_MAX_AGE', 3600)}"
+
+    def source_hash(self, source, loader) -> str:
+        """
+        Content hash of a source object (Document, Policy, TicketAttachment).
+
+        Rows saved before hashing was introduced are hashed on first use and
+        the value stored, so later requests skip loading the file.
+        """
+        if not source.content_hash:
+            source.content_hash = hashlib.sha256(loader()).hexdigest()
+            type(source)._base_manager.filter(pk=source.pk).update(content_hash=source.content_hash)
+        return source.content_hash
+
+    def build_response(self, request, source, loader, filename, content_type='', protect=False):
+        """
+        Standard preview action response for a source object.
+
+        Query params: size (sm/md/lg, default md), page (default 1).
+        Returns 200 with the signed image URL, 202 while rendering, or
+        415 if the file type cannot be previewed.
+        """
+        size = request.query_params.get('size', DEFAULT_SIZE)
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+
+        if preview_kind(filename, content_type) is None:
+            return Response(
+                {'detail': 'Pratinjau tidak tersedia untuk jenis file ini.'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        # The loader may run twice (hash backfill, then render); read once
+        data = []
+
+        def load():
+            if not data:
+                data.append(loader())
+            return data[0]
+
+        try:
+            preview = self.get_preview(
+                source.tenant_id, self.source_hash(source, load), load, filename, content_type,
+                size=size, page=page, protect=protect,
+            )
+        except PreviewUnavailable as e:
+            return Response({'detail': str(e)}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        if preview is None:
+            return Response({'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+
+        return Response({
+            'status': 'ready',
+            'url': request.build_absolute_uri(self.get_url(preview, source, request.user)),
+            'size': preview.size,
+            'page': preview.page,
+            'page_count': preview.page_count,
+            'width': preview.width,
+            'height': preview.height,
+        })
+
+
+# Singleton instance
+preview_service = PreviewService()
@@ -0,0 +1,454 @@
+"""
+Direct-to-object-storage uploads and downloads.
+
+For unencrypted assets the client transfers file bytes straight to the S3
+bucket (RustFS in production) with presigned URLs instead of streaming them
+through the app servers:
+
+1. `create_upload` validates the request against the target's limits and
+   returns a presigned PUT URL, or presigned part URLs for a multipart upload
+   when the file is larger than `DIRECT_UPLOAD_MULTIPART_THRESHOLD`.
+2. The client uploads, then calls `complete_upload`, which finishes the
+   multipart upload, checks the stored object's size, and attaches
+   the object key to the target record.
+3. `download_response` redirects downloads to a short-lived presigned GET URL.
+
+Only available when the file field's storage is `S3Storage`; with the local
+filesystem storage (development) the regular multipart endpoints are used.
+Encrypted documents never go through this path - their objects are
+ciphertext and are served by the app.
+"""
+import math
+import os
+import posixpath
+import uuid
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import FileResponse, HttpResponseRedirect
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from django.utils.text import get_valid_filename
+
+from apps.core.models import DirectUpload, DirectUploadStatus
+
+MB = 1024 * 1024
+
+# S3 rejects multipart parts below 5MB (except the last) and above 10,000 parts
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10000
+
+IMAGE_TYPES = ('image/jpeg', 'image/png', 'image/webp', 'image/gif')
+
+
+def _is_employee_self(user, instance):
+    return user.is_staff or instance.user_id == user.pk
+
+
+def _is_tenant_admin(user, instance):
+    if user.is_staff:
+        return True
+    from apps.tenants.models import TenantUser
+    membership = TenantUser.objects.filter(tenant=instance, user=user, is_active=True).first()
+    return bool(membership and membership.can_manage_users)
+
+
+def _is_tenant_member(user, instance):
+    """Active member of the row's tenant (the scope of the owning viewset)."""
+    if user.is_staff or instance.tenant_id is None:
+        return True
+    from apps.tenants.models import TenantUser
+    return TenantUser.objects.filter(tenant_id=instance.tenant_id, user=user, is_active=True).exists()
+
+
+def _is_ticket_participant(user, ticket):
+    if not _is_tenant_member(user, ticket):
+        return False
+    return user.is_staff or user.pk in (ticket.requester_id, ticket.assignee_id)
+
+
+# Upload targets. `model.field` receives the object key. With `parent`, a new
+# row is created per upload with `object_id` as the parent FK; otherwise the
+# field of the existing row `object_id` is replaced.
+UPLOAD_TARGETS = {
+    'employee-avatar': {
+        'model': 'hr.Employee',
+        'field': 'avatar',
+        'max_size': 5 * MB,
+        'content_types': IMAGE_TYPES,
+        'permission': _is_employee_self,
+    },
+    'sku-image': {
+        'model': 'inventory.SKU',
+        'field': 'image',
+        'max_size': 10 * MB,
+        'content_types': IMAGE_TYPES,
+        'permission': _is_tenant_member,
+    },
+    'tenant-logo': {
+        'model': 'tenants.Tenant',
+        'field': 'logo',
+        'max_size': 5 * MB,
+        'content_types': IMAGE_TYPES,
+        'permission': _is_tenant_admin,
+    },
+    'ticket-attachment': {
+        'model': 'ticketing.TicketAttachment',
+        'field': 'file',
+        'parent': 'ticket',
+        'max_size': 100 * MB,
+        'content_types': (),
+        'permission': _is_ticket_participant,
+    },
+}
+
+
+class DirectUploadError(Exception):
+    """Raised for invalid direct upload requests; message is user-facing."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class DirectUploadService:
+    """Presigned URL issuing and completion for direct uploads."""
+
+    def __init__(self):
+        self._presign_clients = {}
+
+    # ==================== Storage ====================
+
+    def get_target(self, name):
+        target = UPLOAD_TARGETS.get(name)
+        if target is None:
+            raise DirectUploadError(f'Target upload tidak dikenal: {name}')
+        return target
+
+    def get_model(self, target):
+        return apps.get_model(target['model'])
+
+    def get_storage(self, target):
+        return self.get_model(target)._meta.get_field(target['field']).storage
+
+    def is_available(self, storage=None) -> bool:
+        """Whether presigned transfers are possible for the storage."""
+        if storage is None:
+            from django.core.files.storage import default_storage
+            storage = default_storage
+        try:
+            from storages.backends.s3 import S3Storage
+        except ImportError:
+            return False
+        return isinstance(storage, S3Storage)
+
+    def _client(self, storage):
+        """boto3 client for server-side calls (internal endpoint)."""
+        return storage.connection.meta.client
+
+    def _presign_client(self, storage):
+        """
+        boto3 client used only to sign URLs for the browser.
+
+        Signatures cover the host, so when the bucket is reached through a
+        different public endpoint (`DIRECT_UPLOAD_ENDPOINT_URL`) a separate
+        client is configured for it. Signing is local; it makes no requests.
+        """
+        endpoint = _setting('DIRECT_UPLOAD_ENDPOINT_URL', '') or storage.endpoint_url
+        if endpoint == storage.endpoint_url:
+            return self._client(storage)
+
+        client = self._presign_clients.get(endpoint)
+        if client is None:
+            import boto3
+            client = boto3.session.Session().client(
+                's3',
+                endpoint_url=endpoint,
+                region_name=storage.region_name,
+                aws_access_key_id=storage.access_key,
+                aws_secret_access_key=storage.secret_key,
+                config=storage.client_config,
+            )
+            self._presign_clients[endpoint] = client
+        return client
+
+    def _bucket_key(self, storage, name):
+        """Storage name -> bucket key (applies the storage `location`)."""
+        from storages.utils import clean_name
+        return storage._normalize_name(clean_name(name))
+
+    # ==================== Upload ====================
+
+    def _object_name(self, target, filename):
+        model = self.get_model(target)
+        upload_to = model._meta.get_field(target['field']).upload_to
+        prefix = timezone.now().strftime(upload_to) if isinstance(upload_to, str) else 'uploads/'
+        base, ext = os.path.splitext(get_valid_filename(os.path.basename(filename)) or 'file')
+        return posixpath.join(prefix, f'{base[:80]}_{uuid.uuid4().hex[:12]}{ext.lower()}')
+
+    def _get_instance(self, target, object_id, user):
+        """Row the upload will be attached to (the parent for `parent` targets)."""
+        model = self.get_model(target)
+        if target.get('parent'):
+            model = model._meta.get_field(target['parent']).related_model
+        try:
+            instance = model.objects.get(pk=object_id)
+        except (model.DoesNotExist, ValidationError, ValueError, TypeError):
+            raise DirectUploadError('Data tujuan tidak ditemukan.')
+        if not target['permission'](user, instance):
+            raise DirectUploadError('Anda tidak memiliki izin untuk mengunggah file ini.')
+        return instance
+
+    def _part_size(self, size) -> int:
+        part_size = max(_setting('DIRECT_UPLOAD_PART_SIZE', 8 * MB), MIN_PART_SIZE)
+        return max(part_size, math.ceil(size / MAX_PARTS))
+
+    def create_upload(self, user, target_name, object_id, filename, content_type, size) -> dict:
+        """
+        Register an upload and presign the transfer.
+
+        Returns:
+            Dict with the upload id and either `url` (single PUT) or `parts`
+            (multipart, one presigned URL per part)
+
+        Raises:
+            DirectUploadError: If the request violates the target's limits
+        """
+        target = self.get_target(target_name)
+        storage = self.get_storage(target)
+        if not self.is_available(storage):
+            raise DirectUploadError('Unggahan langsung tidak tersedia pada penyimpanan ini.')
+
+        if size <= 0 or size > target['max_size']:
+            raise DirectUploadError(
+                f'Ukuran file harus antara 1 byte dan {target["max_size"] // MB} MB.'
+            )
+        if target['content_types'] and content_type not in target['content_types']:
+            raise DirectUploadError(f'Jenis file {content_type} tidak diizinkan.')
+
+        instance = self._get_instance(target, object_id, user)
+        name = self._object_name(target, filename)
+        key = self._bucket_key(storage, name)
+        expiry = _setting('DIRECT_UPLOAD_URL_EXPIRY', 15 * 60)
+
+        upload = DirectUpload(
+            tenant_id=instance.pk if instance._meta.label == 'tenants.Tenant' else getattr(instance, 'tenant_id', None),
+            user=user,
+            target=target_name,
+            object_id=instance.pk,
+            key=name,
+            filename=os.path.basename(filename)[:255],
+            content_type=content_type,
+            size=size,
+            expires_at=timezone.now() + timedelta(seconds=expiry),
+        )
+
+        client = self._client(storage)
+        signer = self._presign_client(storage)
+        params = {'Bucket': storage.bucket_name, 'Key': key}
+
+        if size <= _setting('DIRECT_UPLOAD_MULTIPART_THRESHOLD', 64 * MB):
+            upload.save()
+            url = signer.generate_presigned_url(
+                'put_object',
+                Params={**params, 'ContentType': content_type},
+                ExpiresIn=expiry,
+            )
+            return {
+                'id': str(upload.pk),
+                'method': 'PUT',
+                'url': url,
+                'headers': {'Content-Type': content_type},
+                'expires_at': upload.expires_at,
+            }
+
+        response = client.create_multipart_upload(**params, ContentType=content_type)
+        upload.upload_id = response['UploadId']
+        upload.part_size = self._part_size(size)
+        upload.save()
+
+        part_count = math.ceil(size / upload.part_size)
+        parts = [
+            {
+                'part_number': number,
+                'url': signer.generate_presigned_url(
+                    'upload_part',
+                    Params={**params, 'UploadId': upload.upload_id, 'PartNumber': number},
+                    ExpiresIn=expiry,
+                ),
+            }
+            for number in range(1, part_count + 1)
+        ]
+        return {
+            'id': str(upload.pk),
+            'method': 'PUT',
+            'part_size': upload.part_size,
+            'parts': parts,
+            'expires_at': upload.expires_at,
+        }
+
+    def complete_upload(self, upload, parts=None):
+        """
+        Completion callback: finish the transfer and attach the object.
+
+        Args:
+            upload: DirectUpload in PENDING state
+            parts: For multipart uploads, list of {'part_number', 'etag'}
+
+        Returns:
+            The record that received the file
+
+        Raises:
+            DirectUploadError: If the object is missing or does not match
+        """
+        if upload.status != DirectUploadStatus.PENDING:
+            raise DirectUploadError('Unggahan ini sudah diproses.')
+
+        target = self.get_target(upload.target)
+        storage = self.get_storage(target)
+        client = self._client(storage)
+        key = self._bucket_key(storage, upload.key)
+        params = {'Bucket': storage.bucket_name, 'Key': key}
+
+        from botocore.exceptions import ClientError
+
+        if upload.is_multipart:
+            if not parts:
+                raise DirectUploadError('Daftar part wajib diisi untuk unggahan multipart.')
+            try:
+                client.complete_multipart_upload(
+                    **params,
+                    UploadId=upload.upload_id,
+                    MultipartUpload={'Parts': sorted(
+                        ({'PartNumber': int(p['part_number']), 'ETag': p['etag']} for p in parts),
+                        key=lambda p: p['PartNumber'],
+                    )},
+                )
+            except (ClientError, KeyError, TypeError, ValueError) as e:
+                raise DirectUploadError(f'Gagal menyelesaikan unggahan multipart: {e}')
+
+        try:
+            head = client.head_object(**params)
+        except ClientError:
+            raise DirectUploadError('File belum diunggah ke penyimpanan.')
+
+        stored_size = head['ContentLength']
+        if stored_size != upload.size or stored_size > target['max_size']:
+            client.delete_object(**params)
+            self._finish(upload, DirectUploadStatus.FAILED, stored_size)
+            raise DirectUploadError('Ukuran file tidak sesuai dengan yang dideklarasikan.')
+
+        with transaction.atomic():
+            record = self._attach(upload, target)
+            self._finish(upload, DirectUploadStatus.COMPLETED, stored_size, record.pk)
+        return record
+
+    def _attach(self, upload, target):
+        model = self.get_model(target)
+        field = target['field']
+
+        if target.get('parent'):
+            record = model(**{
+                f"{target['parent']}_id": upload.object_id,
+                'tenant_id': upload.tenant_id,
+            })
+            setattr(record, field, upload.key)
+            self._fill_metadata(record, upload)
+            record.save()
+            return record
+
+        record = model._base_manager.select_for_update().get(pk=upload.object_id)
+        old_name = getattr(record, field).name
+        setattr(record, field, upload.key)
+        record.save(update_fields=[field, 'updated_at'])
+        if old_name and old_name != upload.key:
+            storage = self.get_storage(target)
+            transaction.on_commit(lambda: storage.delete(old_name))
+        return record
+
+    def _fill_metadata(self, record, upload):
+        """Copy upload metadata onto the new row where the model has room for it."""
+        values = {
+            'uploaded_by_id': upload.user_id,
+            'filename': upload.filename,
+            'file_size': upload.size,
+            'content_type': upload.content_type,
+        }
+        field_names = {f.attname for f in record._meta.concrete_fields}
+        for name, value in values.items():
+            if name in field_names:
+                setattr(record, name, value)
+
+    def _finish(self, upload, status, stored_size=None, result_id=None):
+        upload.status = status
+        upload.stored_size = stored_size
+        upload.result_id = result_id
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=['status', 'stored_size', 'result_id', 'completed_at', 'updated_at'])
+
+    def abort_upload(self, upload):
+        """Abort a pending upload and discard any uploaded bytes."""
+        if upload.status != DirectUploadStatus.PENDING:
+            return
+        target = self.get_target(upload.target)
+        storage = self.get_storage(target)
+        client = self._client(storage)
+        params = {'Bucket': storage.bucket_name, 'Key': self._bucket_key(storage, upload.key)}
+
+        from botocore.exceptions import ClientError
+        try:
+            if upload.is_multipart:
+                client.abort_multipart_upload(**params, UploadId=upload.upload_id)
+            else:
+                client.delete_object(**params)
+        except ClientError:
+            pass
+        self._finish(upload, DirectUploadStatus.ABORTED)
+
+    def abort_expired(self, limit=500) -> int:
+        """Abort pending uploads past their URL expiry. Returns count."""
+        expired = DirectUpload.all_objects.filter(
+            status=DirectUploadStatus.PENDING,
+            expires_at__lt=timezone.now() - timedelta(hours=1),
+        ).order_by('expires_at')[:limit]
+        count = 0
+        for upload in expired:
+            self.abort_upload(upload)
+            count += 1
+        return count
+
+    # ==================== Download ====================
+
+    def download_url(self, fieldfile, filename=None, expiry=None) -> str:
+        storage = fieldfile.storage
+        params = {
+            'Bucket': storage.bucket_name,
+            'Key': self._bucket_key(storage, fieldfile.name),
+        }
+        if filename:
+            params['ResponseContentDisposition'] = content_disposition_header(True, filename)
+        return self._presign_client(storage).generate_presigned_url(
+            'get_object',
+            Params=params,
+            ExpiresIn=expiry or _setting('DIRECT_DOWNLOAD_URL_EXPIRY', 5 * 60),
+        )
+
+    def download_response(self, fieldfile, filename=None):
+        """
+        Redirect to a presigned GET URL, or stream the file when the
+        storage cannot presign (local filesystem).
+        """
+        if self.is_available(fieldfile.storage):
+            return HttpResponseRedirect(self.download_url(fieldfile, filename))
+        return FileResponse(
+            fieldfile.open('rb'),
+            as_attachment=True,
+            filename=filename or os.path.basename(fieldfile.name),
+        )
+
+
+# Singleton instance
+upload_service = DirectUploadService()
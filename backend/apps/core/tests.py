@@ -0,0 +1,194 @@
+import os
+import unittest
+import urllib.request
+from urllib.parse import parse_qs, urlparse
+from django.test import override_settings
+from django.urls import reverse
+from django.utils.http import content_disposition_header
+from rest_framework.test import APITestCase
+from rest_framework import status
+from apps.core.models import DirectUpload, DirectUploadStatus
+from apps.core.services.uploads import upload_service
+from apps.inventory.sku.models import SKU
+from apps.tenants.models import Tenant, TenantUser
+from apps.ticketing.models import Category, Ticket, TicketAttachment
+from apps.users.models import User
+
+
+try:
+    from moto.server import ThreadedMotoServer
+except ImportError:
+    ThreadedMotoServer = None
+
+S3_TEST_ENDPOINT_URL = os.environ.get('S3_TEST_ENDPOINT_URL', '')
+
+
+@unittest.skipUnless(
+    S3_TEST_ENDPOINT_URL or ThreadedMotoServer,
+    'Needs an S3-compatible endpoint (S3_TEST_ENDPOINT_URL) or moto',
+)
+class DirectUploadTest(APITestCase):
+    """Presigned upload flow against a local S3 stand-in (moto or RustFS/MinIO)."""
+
+    bucket = 'nalar-test-uploads'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = None
+        cls.endpoint = S3_TEST_ENDPOINT_URL
+        if not cls.endpoint:
+            cls.server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+            cls.server.start()
+            host, port = cls.server.get_host_and_port()
+            cls.endpoint = f'http://{host}:{port}'
+
+        options = {
+            'bucket_name': cls.bucket,
+            'endpoint_url': cls.endpoint,
+            'access_key': os.environ.get('S3_TEST_ACCESS_KEY', 'testing'),
+            'secret_key': os.environ.get('S3_TEST_SECRET_KEY', 'testing'),
+            'region_name': 'us-east-1',
+            'file_overwrite': False,
+        }
+        cls.storage_override = override_settings(
+            STORAGES={
+                'default': {'BACKEND': 'storages.backends.s3.S3Storage', 'OPTIONS': options},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+            DIRECT_UPLOAD_ENDPOINT_URL='',
+        )
+        cls.storage_override.enable()
+
+        from django.core.files.storage import default_storage
+        client = default_storage.connection.meta.client
+        try:
+            client.create_bucket(Bucket=cls.bucket)
+        except client.exceptions.BucketAlreadyOwnedByYou:
+            pass
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.storage_override.disable()
+        if cls.server:
+            cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='uploader',
+            email='uploader@test.com',
+            password='testpass123',
+        )
+        self.category = Category.objects.create(name='IT Support', code='IT-SUPPORT')
+        self.ticket = Ticket.objects.create(
+            title='Printer rusak',
+            description='Lihat foto terlampir',
+            requester=self.user,
+            category=self.category,
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def put(self, url, data, headers=None):
+        headers = headers or {'Content-Type': 'application/octet-stream'}
+        request = urllib.request.Request(url, data=data, method='PUT', headers=headers)
+        with urllib.request.urlopen(request) as response:
+            return response.headers.get('ETag')
+
+    def start(self, size, **extra):
+        payload = {
+            'target': 'ticket-attachment',
+            'object_id': str(self.ticket.id),
+            'filename': 'foto printer.jpg',
+            'content_type': 'image/jpeg',
+            'size': size,
+            **extra,
+        }
+        return self.client.post(reverse('api_v1:direct-upload-list'), payload, format='json')
+
+    def test_single_put_upload_and_download_redirect(self):
+        data = b'\xff\xd8' + b'x' * 2048
+        response = self.start(len(data))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['url'].startswith(self.endpoint))
+
+        self.put(response.data['url'], data, response.data['headers'])
+
+        complete = reverse('api_v1:direct-upload-complete', kwargs={'pk': response.data['id']})
+        result = self.client.post(complete, {}, format='json')
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(result.data['status'], DirectUploadStatus.COMPLETED)
+        self.assertEqual(result.data['stored_size'], len(data))
+
+        attachment = TicketAttachment.objects.get(pk=result.data['result_id'])
+        self.assertEqual(attachment.ticket, self.ticket)
+        self.assertEqual(attachment.file_size, len(data))
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.attachments_count, 1)
+
+        download = self.client.get(
+            reverse('api_v1:ticketattachment-download', kwargs={'pk': attachment.pk})
+        )
+        self.assertEqual(download.status_code, status.HTTP_302_FOUND)
+        with urllib.request.urlopen(download['Location']) as stored:
+            self.assertEqual(stored.read(), data)
+
+    @override_settings(DIRECT_UPLOAD_MULTIPART_THRESHOLD=1024, DIRECT_UPLOAD_PART_SIZE=0)
+    def test_multipart_upload(self):
+        part_size = 5 * 1024 * 1024
+        data = os.urandom(part_size + 1000)
+        response = self.start(len(data))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['part_size'], part_size)
+        self.assertEqual(len(response.data['parts']), 2)
+
+        parts = []
+        for part in response.data['parts']:
+            offset = (part['part_number'] - 1) * part_size
+            etag = self.put(part['url'], data[offset:offset + part_size])
+            parts.append({'part_number': part['part_number'], 'etag': etag})
+
+        complete = reverse('api_v1:direct-upload-complete', kwargs={'pk': response.data['id']})
+        result = self.client.post(complete, {'parts': parts}, format='json')
+        self.assertEqual(result.status_code, status.HTTP_200_OK)
+        self.assertEqual(result.data['stored_size'], len(data))
+
+    def test_size_mismatch_is_rejected(self):
+        response = self.start(10)
+        self.put(response.data['url'], b'0123456789ABCDEF', response.data['headers'])
+
+        complete = reverse('api_v1:direct-upload-complete', kwargs={'pk': response.data['id']})
+        result = self.client.post(complete, {}, format='json')
+        self.assertEqual(result.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(DirectUpload.objects.get(pk=response.data['id']).status, DirectUploadStatus.FAILED)
+        self.assertFalse(TicketAttachment.objects.exists())
+
+    def test_rejects_oversized_and_unknown_parent(self):
+        self.assertEqual(self.start(500 * 1024 * 1024).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.start(100, object_id='00000000-0000-0000-0000-000000000000')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rejects_targets_the_user_cannot_edit(self):
+        other = User.objects.create_user(username='other', email='other@test.com', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.start(100).status_code, status.HTTP_400_BAD_REQUEST)
+
+        tenant = Tenant.objects.create(name='Alpha', slug='alpha', subdomain='alpha', email='it@alpha.id')
+        sku = SKU.objects.create(name='Toner', tenant=tenant)
+        payload = {
+            'target': 'sku-image',
+            'object_id': str(sku.id),
+            'filename': 'toner.png',
+            'content_type': 'image/png',
+            'size': 100,
+        }
+        url = reverse('api_v1:direct-upload-list')
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        TenantUser.objects.create(tenant=tenant, user=other)
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, status.HTTP_201_CREATED)
+
+    def test_download_url_encodes_filename(self):
+        filename = 'laporan "akhir" é.pdf'
+        url = upload_service.download_url(TicketAttachment(file='tickets/laporan.pdf').file, filename)
+        params = parse_qs(urlparse(url).query)
+        self.assertEqual(params['response-content-disposition'], [content_disposition_header(True, filename)])
@@ -2,13 +2,16 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AuditLogViewSet
+from .views import AuditLogViewSet, DirectUploadViewSet, event_stream, preview_image
 from .health import health_check
 
 router = DefaultRouter()
 router.register(r'audit-logs', AuditLogViewSet, basename='audit-log')
+router.register(r'uploads', DirectUploadViewSet, basename='direct-upload')
 
 urlpatterns = [
     path('health/', health_check, name='health-check'),
+    path('previews/<str:token>/', preview_image, name='preview-image'),
+    path('events/', event_stream, name='event-stream'),
     path('', include(router.urls)),
 ]
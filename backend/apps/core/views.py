@@ -1,14 +1,23 @@
 """Core views for shared functionality."""
 
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, mixins, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-
-from .models import AuditLog
-from .serializers import AuditLogSerializer
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .models import AuditLog, DirectUpload
+from .serializers import (
+    AuditLogSerializer, DirectUploadSerializer,
+    DirectUploadCreateSerializer, DirectUploadCompleteSerializer,
+)
 from .pagination import DefaultPagePagination
+from .services import events
+from .services.previews import preview_service
+from .services.uploads import upload_service, DirectUploadError
 
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -103,3 +112,140 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 from django.db import models
+
+
+@require_GET
+def preview_image(request, token):
+    """
+    Serve a cached preview image by its signed token.
+
+    Tokens are handed out by the preview actions of the owning resources
+    after their own access checks and expire after PREVIEW_URL_MAX_AGE;
+    the access check of the source is repeated for the token's user here.
+    """
+    resolved = preview_service.resolve_token(token)
+    if resolved is None:
+        raise Http404
+    preview, source = resolved
+
+    etag = f'"{preview.content_hash[:16]}-{preview.size}-{preview.page}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(preview_service.read_image(preview), content_type='image/jpeg')
+    response['ETag'] = etag
+    response['Cache-Control'] = preview_service.cache_control(preview, source)
+    return response
+
+
+class DirectUploadViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Presigned uploads straight to object storage.
+
+    POST /uploads/ returns presigned URL(s); the client PUTs the bytes to
+    storage and then calls POST /uploads/{id}/complete/ so the file is
+    attached to its record. See `apps.core.services.uploads`.
+    """
+
+    serializer_class = DirectUploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return DirectUpload.objects.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = DirectUploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        storage = upload_service.get_storage(upload_service.get_target(data['target']))
+        if not upload_service.is_available(storage):
+            return Response(
+                {'detail': 'Unggahan langsung tidak tersedia, gunakan unggahan biasa.'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+
+        try:
+            result = upload_service.create_upload(
+                request.user, data['target'], data['object_id'],
+                data['filename'], data['content_type'], data['size'],
+            )
+        except DirectUploadError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Completion callback: register the uploaded object."""
+        upload = self.get_object()
+        serializer = DirectUploadCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            upload_service.complete_upload(upload, serializer.validated_data.get('parts'))
+        except DirectUploadError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload.refresh_from_db()
+        return Response(DirectUploadSerializer(upload).data)
+
+    @action(detail=True, methods=['post'])
+    def abort(self, request, pk=None):
+        upload = self.get_object()
+        upload_service.abort_upload(upload)
+        upload.refresh_from_db()
+        return Response(DirectUploadSerializer(upload).data)
+
+
+def _stream_identity(request):
+    """
+    (user, tenant id) of an event-stream request, or (None, None).
+
+    EventSource cannot send headers, so besides the session a JWT access
+    token is accepted in the `token` query parameter.
+    """
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    from apps.tenants.models import TenantStatus, TenantUser
+
+    user = request.user if request.user.is_authenticated else None
+    if user is None:
+        raw = request.GET.get('token')
+        header = request.headers.get('Authorization', '')
+        if not raw and header.startswith('Bearer '):
+            raw = header[len('Bearer '):]
+        if raw:
+            auth = JWTAuthentication()
+            try:
+                user = auth.get_user(auth.get_validated_token(raw))
+            except (InvalidToken, TokenError):
+                user = None
+    if user is None or not user.is_active:
+        return None, None
+
+    memberships = TenantUser.objects.filter(user=user, is_active=True, tenant__status=TenantStatus.ACTIVE)
+    tenant = getattr(request, 'tenant', None)
+    if tenant is not None:
+        if not user.is_superuser and not memberships.filter(tenant=tenant).exists():
+            return None, None
+        return user, tenant.pk
+    membership = memberships.order_by('-is_owner', '-role').first()
+    return user, membership.tenant_id if membership else None
+
+
+@require_GET
+async def event_stream(request):
+    """
+    Server-sent events of the current user and tenant.
+
+    See `apps.core.services.events` for the events and delivery guarantees.
+    """
+    user, tenant_id = await sync_to_async(_stream_identity)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    response = StreamingHttpResponse(events.stream(user.pk, tenant_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
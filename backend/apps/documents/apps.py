@@ -5,3 +5,16 @@ class DocumentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.documents'
     verbose_name = 'Documents'
+
+    def ready(self):
+        """Import signals and register document previews when app is ready."""
+        import apps.documents.signals  # noqa
+        from apps.core.services.previews import preview_service
+        from . import acl
+        from .models import AccessLevel, Document
+
+        preview_service.register_source(
+            Document,
+            lambda document, user: acl.user_can(document, user, acl.READ),
+            restricted=lambda document: document.access_level in (AccessLevel.CONFIDENTIAL, AccessLevel.RESTRICTED),
+        )
@@ -0,0 +1,342 @@
+"""
+Document content extraction pipeline and full-text search.
+
+Uploads enqueue a `DocumentContent` row for the document's current version.
+Extraction runs after the request has committed, in a small in-process
+thread pool; `process_document_content` drains anything left pending (for
+example after a worker restart). Each job streams the stored file through
+AES-GCM decryption into a spooled temp file, extracts and normalizes the
+text and stores it together with a `tsvector`.
+
+Encrypted documents keep their text encrypted at rest. A tsvector is a
+plaintext word list, so theirs holds blind tokens instead: a keyed HMAC of
+every word (`blind_tokens`, keyed from the document encryption key). A query
+is matched against them through the same tokens of its words, ANDed - exact
+words only, without the websearch operators and stemming of plaintext
+documents. Snippets of encrypted hits are cut from the decrypted text,
+which only happens for rows the caller can already see.
+
+Results always pass through the ACL index; snippets are HTML-escaped
+before matches are wrapped in <mark>.
+"""
+import hashlib
+import hmac
+import logging
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVector,
+)
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q, Value
+from django.utils import timezone
+from django.utils.html import escape
+
+from .encryption import decrypt_file_from_base64, decrypt_stream, encrypt_file_to_base64, get_encryption_key
+from .extraction import UnsupportedFormat, extract_text
+from .models import DocumentContent, ExtractionStatus
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = getattr(settings, 'DOCUMENT_SEARCH_CONFIG', 'simple')
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+MAX_ATTEMPTS = 3
+STALE_PROCESSING_AFTER = timedelta(minutes=15)
+SNIPPET_RADIUS = 120
+# Headline delimiters; normalize_text() strips control characters from the text.
+_START_SEL = '\x02'
+_STOP_SEL = '\x03'
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'DOCUMENT_EXTRACTION_WORKERS', 2),
+            thread_name_prefix='doc-extract',
+        )
+    return _executor
+
+
+# ==================== Queue ====================
+
+def enqueue_extraction(document, schedule=True):
+    """
+    Queue text extraction for the document's current version.
+
+    No-op when the stored file for this version was already queued. With
+    `schedule`, the job is handed to the thread pool once the surrounding
+    transaction commits.
+    """
+    if not document.file:
+        return None
+
+    content, created = DocumentContent.all_objects.get_or_create(
+        document_id=document.pk,
+        version=document.version,
+        defaults={
+            'tenant_id': document.tenant_id,
+            'source_name': document.file.name,
+        },
+    )
+    if not created:
+        if content.source_name == document.file.name:
+            return content
+        content.source_name = document.file.name
+        content.status = ExtractionStatus.PENDING
+        content.attempts = 0
+        content.save(update_fields=['source_name', 'status', 'attempts', 'updated_at'])
+
+    if schedule and getattr(settings, 'DOCUMENT_EXTRACTION_ASYNC', True):
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, content.pk))
+    return content
+
+
+def _run_in_thread(content_id):
+    close_old_connections()
+    try:
+        run_extraction(content_id)
+    except Exception:
+        logger.exception(f"Text extraction crashed for content {content_id}")
+    finally:
+        close_old_connections()
+
+
+def process_pending(limit=50) -> int:
+    """
+    Extract a batch of pending rows. Returns number processed.
+
+    Rows stuck in PROCESSING (worker died mid-job) are picked up again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            DocumentContent.all_objects.filter(
+                Q(status=ExtractionStatus.PENDING) |
+                Q(status=ExtractionStatus.PROCESSING, updated_at__lt=now - STALE_PROCESSING_AFTER),
+                attempts__lt=MAX_ATTEMPTS,
+            ).order_by('created_at').select_for_update(skip_locked=True).values_list('id', flat=True)[:limit]
+        )
+        DocumentContent.all_objects.filter(id__in=ids).update(
+            status=ExtractionStatus.PROCESSING,
+            updated_at=now,
+        )
+
+    for content_id in ids:
+        run_extraction(content_id, claimed=True)
+    return len(ids)
+
+
+# ==================== Extraction ====================
+
+def _spool_plaintext(document):
+    """Copy the stored file into a spooled temp file, decrypting on the fly."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    digest = hashlib.sha256()
+
+    with document.file.open('rb') as stored:
+        if document.is_encrypted and document.encryption_nonce:
+            chunks = decrypt_stream(stored, document.encryption_nonce)
+        else:
+            chunks = iter(lambda: stored.read(64 * 1024), b'')
+        for chunk in chunks:
+            digest.update(chunk)
+            spool.write(chunk)
+
+    spool.seek(0)
+    return spool, digest.hexdigest()
+
+
+def _copy_from_previous(content, source_hash) -> bool:
+    """Reuse text from another version with identical plaintext."""
+    previous = DocumentContent.all_objects.filter(
+        document_id=content.document_id,
+        source_hash=source_hash,
+        status=ExtractionStatus.DONE,
+        search_vector__isnull=False,
+    ).exclude(pk=content.pk).first()
+    if previous is None:
+        return False
+
+    DocumentContent.all_objects.filter(pk=content.pk).update(
+        status=ExtractionStatus.DONE,
+        source_hash=source_hash,
+        text=previous.text,
+        encrypted_text=previous.encrypted_text,
+        text_nonce=previous.text_nonce,
+        char_count=previous.char_count,
+        search_vector=previous.search_vector,
+        error='',
+        extracted_at=timezone.now(),
+    )
+    return True
+
+
+def run_extraction(content_id, claimed=False):
+    """Extract and index the text of one DocumentContent row."""
+    if not claimed:
+        updated = DocumentContent.all_objects.filter(
+            pk=content_id,
+            status=ExtractionStatus.PENDING,
+        ).update(status=ExtractionStatus.PROCESSING, updated_at=timezone.now())
+        if not updated:
+            return
+
+    content = DocumentContent.all_objects.select_related('document').get(pk=content_id)
+    document = content.document
+
+    try:
+        spool, source_hash = _spool_plaintext(document)
+    except Exception as e:
+        _mark_failed(content, f'Read/decrypt failed: {e}')
+        return
+
+    with spool:
+        if source_hash == content.source_hash and content.search_vector is not None:
+            DocumentContent.all_objects.filter(pk=content.pk).update(status=ExtractionStatus.DONE)
+            return
+        if _copy_from_previous(content, source_hash):
+            return
+
+        try:
+            text = extract_text(spool, document.original_filename, document.content_type)
+        except UnsupportedFormat as e:
+            DocumentContent.all_objects.filter(pk=content.pk).update(
+                status=ExtractionStatus.UNSUPPORTED,
+                source_hash=source_hash,
+                error=str(e),
+            )
+            return
+        except Exception as e:
+            _mark_failed(content, f'Extraction failed: {e}', source_hash)
+            return
+
+    fields = {
+        'status': ExtractionStatus.DONE,
+        'source_hash': source_hash,
+        'char_count': len(text),
+        'search_vector': SearchVector(Value(text), config=SEARCH_CONFIG),
+        'error': '',
+        'extracted_at': timezone.now(),
+        'text': '',
+        'encrypted_text': '',
+        'text_nonce': '',
+    }
+    if document.is_encrypted:
+        encrypted = encrypt_file_to_base64(text.encode('utf-8'))
+        fields['encrypted_text'] = encrypted['data']
+        fields['text_nonce'] = encrypted['nonce']
+        fields['search_vector'] = SearchVector(Value(' '.join(blind_tokens(text))), config='simple')
+    else:
+        fields['text'] = text
+
+    DocumentContent.all_objects.filter(pk=content.pk).update(**fields)
+
+
+def _mark_failed(content, error, source_hash=''):
+    logger.warning(f"Text extraction failed for document {content.document_id}: {error}")
+    attempts = content.attempts + 1
+    DocumentContent.all_objects.filter(pk=content.pk).update(
+        status=ExtractionStatus.PENDING if attempts < MAX_ATTEMPTS else ExtractionStatus.FAILED,
+        attempts=attempts,
+        source_hash=source_hash or content.source_hash,
+        error=error[:1000],
+    )
+
+
+def get_content_text(content) -> str:
+    """Return the plaintext of a content row, decrypting if needed."""
+    if content.encrypted_text:
+        return decrypt_file_from_base64(content.encrypted_text, content.text_nonce).decode('utf-8')
+    return content.text
+
+
+# ==================== Search ====================
+
+def _blind_key() -> bytes:
+    return hmac.new(get_encryption_key(), b'documents.search', hashlib.sha256).digest()
+
+
+def blind_tokens(text: str) -> list:
+    """Keyed tokens of the words of a text, in order (lowercased)."""
+    key = _blind_key()
+    return [
+        'b' + hmac.new(key, word.encode('utf-8'), hashlib.sha256).hexdigest()[:24]
+        for word in re.findall(r'\w+', text.lower())
+    ]
+
+
+def _query_terms(query: str) -> list:
+    return [t.lower() for t in re.findall(r'\w+', query) if t.lower() not in ('or', 'and')]
+
+
+def build_snippet(text: str, terms: list, radius: int = SNIPPET_RADIUS) -> str:
+    """Cut a window around the first matching term, escape it and wrap matches in <mark>."""
+    if not text:
+        return ''
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(t) for t in terms) + r')\b', re.IGNORECASE) if terms else None
+    match = pattern.search(text) if pattern else None
+    start = max((match.start() if match else 0) - radius, 0)
+    end = min((match.end() if match else 0) + radius, len(text))
+
+    window = text[start:end]
+    parts, position = [], 0
+    for found in (pattern.finditer(window) if pattern else ()):
+        parts.append(escape(window[position:found.start()]))
+        parts.append(f'<mark>{escape(found.group(0))}</mark>')
+        position = found.end()
+    parts.append(escape(window[position:]))
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
+
+
+def _mark(headline: str) -> str:
+    """Escape a headline and turn its delimiters into <mark> tags."""
+    return escape(headline).replace(_START_SEL, '<mark>').replace(_STOP_SEL, '</mark>')
+
+
+def search_content(documents, query: str, limit: int = 20) -> list:
+    """
+    Full-text search over the current version of the given documents.
+
+    Args:
+        documents: Document queryset, already access-filtered
+        query: User search string (websearch syntax)
+        limit: Maximum number of hits
+
+    Returns:
+        List of (document, rank, snippet) tuples ordered by rank
+    """
+    terms = _query_terms(query)
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    if terms:
+        search_query |= SearchQuery(' '.join(blind_tokens(' '.join(terms))), config='simple')
+    hits = DocumentContent.all_objects.filter(
+        document__in=documents,
+        version=F('document__version'),
+        status=ExtractionStatus.DONE,
+        search_vector=search_query,
+    ).annotate(
+        rank=SearchRank(F('search_vector'), search_query),
+        headline=SearchHeadline(
+            'text', search_query, config=SEARCH_CONFIG,
+            start_sel=_START_SEL, stop_sel=_STOP_SEL,
+            max_words=35, min_words=15,
+        ),
+    ).select_related(
+        'document', 'document__folder', 'document__owner',
+    ).defer('text').order_by('-rank')[:limit]
+
+    results = []
+    for hit in hits:
+        if hit.encrypted_text:
+            snippet = build_snippet(get_content_text(hit), terms)
+        else:
+            snippet = _mark(hit.headline)
+        results.append((hit.document, hit.rank, snippet))
+    return results
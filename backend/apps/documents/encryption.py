@@ -77,3 +77,44 @@ def decrypt_file_from_base64(encrypted_b64: str, nonce_b64: str) -> bytes:
     encrypted_data = base64.b64decode(encrypted_b64)
     nonce = base64.b64decode(nonce_b64)
     return decrypt_file(encrypted_data, nonce)
+
+
+GCM_TAG_SIZE = 16
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def decrypt_stream(fileobj, nonce_b64: str, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Decrypt an AES-256-GCM file chunk by chunk.
+
+    The ciphertext layout matches `encrypt_file` (ciphertext followed by the
+    16-byte tag), so the last 16 bytes are held back and used to finalize.
+    Plaintext chunks are yielded before the tag is verified; callers must
+    discard their output if the generator raises `InvalidTag`.
+
+    Args:
+        fileobj: Readable binary file-like object with the encrypted data
+        nonce_b64: Base64-encoded nonce
+        chunk_size: Bytes read per iteration
+
+    Yields:
+        bytes: Decrypted chunks
+    """
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+    nonce = base64.b64decode(nonce_b64)
+    decryptor = Cipher(algorithms.AES(get_encryption_key()), modes.GCM(nonce)).decryptor()
+
+    pending = b''
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        pending += chunk
+        if len(pending) > GCM_TAG_SIZE:
+            data, pending = pending[:-GCM_TAG_SIZE], pending[-GCM_TAG_SIZE:]
+            yield decryptor.update(data)
+
+    if len(pending) != GCM_TAG_SIZE:
+        raise ValueError('Encrypted data is truncated')
+    yield decryptor.finalize_with_tag(pending)
@@ -0,0 +1,154 @@
+"""
+Plain-text extraction for document content search.
+
+Supports PDF (PyPDF2, optional), DOCX and XLSX (parsed directly from the
+OOXML zip with the standard library) and plain-text formats.
+"""
+import os
+import re
+import unicodedata
+import zipfile
+from xml.etree import ElementTree
+
+# tsvector values are capped at 1MB; keep well below it
+MAX_TEXT_LENGTH = 500_000
+
+TEXT_EXTENSIONS = {'.txt', '.csv', '.md', '.json', '.xml', '.html', '.htm', '.log'}
+
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_S_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_WHITESPACE_RE = re.compile(r'[ \t\r\f\v]+')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+class UnsupportedFormat(Exception):
+    """Raised when no extractor handles the file type."""
+
+
+def detect_format(filename: str, content_type: str = '') -> str:
+    """Map a filename / MIME type to an extractor key."""
+    ext = os.path.splitext(filename or '')[1].lower()
+    content_type = (content_type or '').lower()
+
+    if ext == '.pdf' or content_type == 'application/pdf':
+        return 'pdf'
+    if ext == '.docx' or 'wordprocessingml' in content_type:
+        return 'docx'
+    if ext == '.xlsx' or 'spreadsheetml' in content_type:
+        return 'xlsx'
+    if ext in TEXT_EXTENSIONS or content_type.startswith('text/'):
+        return 'text'
+    raise UnsupportedFormat(f'No text extractor for {filename or content_type}')
+
+
+def extract_pdf(fileobj) -> str:
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError:
+        raise UnsupportedFormat('PyPDF2 not installed')
+
+    reader = PdfReader(fileobj)
+    parts = []
+    length = 0
+    for page in reader.pages:
+        text = page.extract_text() or ''
+        parts.append(text)
+        length += len(text)
+        if length >= MAX_TEXT_LENGTH:
+            break
+    return '\n\n'.join(parts)
+
+
+def extract_docx(fileobj) -> str:
+    paragraphs = []
+    with zipfile.ZipFile(fileobj) as archive:
+        with archive.open('word/document.xml') as xml:
+            current = []
+            for event, elem in ElementTree.iterparse(xml, events=('end',)):
+                if elem.tag == f'{_W_NS}t' and elem.text:
+                    current.append(elem.text)
+                elif elem.tag == f'{_W_NS}tab':
+                    current.append('\t')
+                elif elem.tag == f'{_W_NS}p':
+                    paragraphs.append(''.join(current))
+                    current = []
+                    elem.clear()
+    return '\n'.join(paragraphs)
+
+
+def extract_xlsx(fileobj) -> str:
+    lines = []
+    with zipfile.ZipFile(fileobj) as archive:
+        names = archive.namelist()
+
+        shared = []
+        if 'xl/sharedStrings.xml' in names:
+            with archive.open('xl/sharedStrings.xml') as xml:
+                for event, elem in ElementTree.iterparse(xml, events=('end',)):
+                    if elem.tag == f'{_S_NS}si':
+                        shared.append(''.join(t.text or '' for t in elem.iter(f'{_S_NS}t')))
+                        elem.clear()
+
+        sheets = sorted(n for n in names if n.startswith('xl/worksheets/sheet') and n.endswith('.xml'))
+        for sheet in sheets:
+            with archive.open(sheet) as xml:
+                row = []
+                for event, elem in ElementTree.iterparse(xml, events=('end',)):
+                    if elem.tag == f'{_S_NS}c':
+                        cell_type = elem.get('t')
+                        if cell_type == 'inlineStr':
+                            row.append(''.join(t.text or '' for t in elem.iter(f'{_S_NS}t')))
+                        else:
+                            value = elem.find(f'{_S_NS}v')
+                            if value is not None and value.text:
+                                if cell_type == 's':
+                                    index = int(value.text)
+                                    row.append(shared[index] if index < len(shared) else '')
+                                else:
+                                    row.append(value.text)
+                    elif elem.tag == f'{_S_NS}row':
+                        if row:
+                            lines.append('\t'.join(row))
+                        row = []
+                        elem.clear()
+    return '\n'.join(lines)
+
+
+def extract_plain(fileobj) -> str:
+    data = fileobj.read(MAX_TEXT_LENGTH * 4)
+    if isinstance(data, str):
+        return data
+    return data.decode('utf-8', errors='replace')
+
+
+EXTRACTORS = {
+    'pdf': extract_pdf,
+    'docx': extract_docx,
+    'xlsx': extract_xlsx,
+    'text': extract_plain,
+}
+
+
+def normalize_text(text: str) -> str:
+    """NFKC-normalize, drop control characters and collapse whitespace."""
+    text = unicodedata.normalize('NFKC', text).replace('\x00', '')
+    text = ''.join(
+        ch for ch in text
+        if ch in '\n\t' or unicodedata.category(ch)[0] != 'C'
+    )
+    text = _WHITESPACE_RE.sub(' ', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    text = _BLANK_LINES_RE.sub('\n\n', text).strip()
+    return text[:MAX_TEXT_LENGTH]
+
+
+def extract_text(fileobj, filename: str, content_type: str = '') -> str:
+    """
+    Extract normalized text from a seekable binary file.
+
+    Raises:
+        UnsupportedFormat: If the file type has no extractor
+    """
+    extractor = EXTRACTORS[detect_format(filename, content_type)]
+    fileobj.seek(0)
+    return normalize_text(extractor(fileobj))
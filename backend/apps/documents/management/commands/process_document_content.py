@@ -0,0 +1,49 @@
+"""
+Extract text for documents waiting in the content index queue.
+
+Uploads are normally extracted in-process right after commit; run this
+periodically (cron) to pick up anything left behind, or with --all to
+re-queue every document after changing extractors.
+
+Usage:
+    python manage.py process_document_content
+    python manage.py process_document_content --all
+"""
+from django.core.management.base import BaseCommand
+from apps.documents import content_index
+from apps.documents.models import Document
+
+
+class Command(BaseCommand):
+    help = 'Process pending document text extraction jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Jobs claimed per batch',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Queue every active document before processing',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            queued = 0
+            for document in Document.all_objects.filter(is_active=True).iterator():
+                if content_index.enqueue_extraction(document, schedule=False) is not None:
+                    queued += 1
+            self.stdout.write(f'Queued {queued} documents')
+
+        total = 0
+        while True:
+            processed = content_index.process_pending(limit=options['batch_size'])
+            if not processed:
+                break
+            total += processed
+            self.stdout.write(f'  Processed {total}...')
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {total} extraction jobs'))
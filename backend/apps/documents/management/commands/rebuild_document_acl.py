@@ -0,0 +1,28 @@
+"""
+Rebuild the materialized document ACL index.
+
+The index is maintained by signal handlers; run this after bulk imports or
+raw SQL changes that bypass model signals.
+
+Usage:
+    python manage.py rebuild_document_acl
+"""
+from django.core.management.base import BaseCommand
+from apps.documents import acl
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the document ACL index from access levels and grants'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Documents fetched per database round trip',
+        )
+
+    def handle(self, *args, **options):
+        count = acl.rebuild_all(batch_size=options['batch_size'])
+        acl.bump_roles_generation()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt ACL index for {count} documents'))
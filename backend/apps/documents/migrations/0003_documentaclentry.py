@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+READ, DOWNLOAD, EDIT, DELETE, SHARE = 1, 2, 4, 8, 16
+ALL = READ | DOWNLOAD | EDIT | DELETE | SHARE
+
+
+def grant_capabilities(grant):
+    return (
+        (READ if grant.can_read else 0) |
+        (DOWNLOAD if grant.can_download else 0) |
+        (EDIT if grant.can_edit else 0) |
+        (DELETE if grant.can_delete else 0) |
+        (SHARE if grant.can_share else 0)
+    )
+
+
+def backfill_acl(apps, schema_editor):
+    """Populate the ACL index from existing access levels and grants."""
+    Document = apps.get_model('documents', 'Document')
+    DocumentUserAccess = apps.get_model('documents', 'DocumentUserAccess')
+    DocumentAccessPermission = apps.get_model('documents', 'DocumentAccessPermission')
+    DocumentACLEntry = apps.get_model('documents', 'DocumentACLEntry')
+
+    entries = {}
+    for doc in Document.objects.only('id', 'tenant_id', 'owner_id', 'access_level').iterator():
+        if doc.access_level == 'public':
+            entries[(doc.id, 'public')] = [doc.tenant_id, READ, None]
+        elif doc.access_level == 'internal':
+            entries[(doc.id, 'authenticated')] = [doc.tenant_id, READ, None]
+        if doc.owner_id:
+            entries[(doc.id, f'user:{doc.owner_id}')] = [doc.tenant_id, ALL, None]
+
+    for grant in DocumentUserAccess.objects.select_related('document').iterator():
+        key = (grant.document_id, f'user:{grant.user_id}')
+        caps = grant_capabilities(grant)
+        if caps and key not in entries:
+            entries[key] = [grant.document.tenant_id, caps, grant.expires_at]
+
+    for grant in DocumentAccessPermission.objects.select_related('document').iterator():
+        caps = grant_capabilities(grant)
+        if caps:
+            entries[(grant.document_id, f'role:{grant.role}')] = [grant.document.tenant_id, caps, None]
+
+    DocumentACLEntry.objects.bulk_create([
+        DocumentACLEntry(
+            document_id=document_id,
+            principal=principal,
+            tenant_id=tenant_id,
+            capabilities=caps,
+            expires_at=expires_at,
+        )
+        for (document_id, principal), (tenant_id, caps, expires_at) in entries.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_document_tenant_documentaccesslog_tenant_and_more'),
+        ('tenants', '0002_invoice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentACLEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('principal', models.CharField(max_length=64)),
+                ('capabilities', models.PositiveSmallIntegerField(default=0, help_text='Bitmask of acl.READ/DOWNLOAD/EDIT/DELETE/SHARE')),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='acl_entries', to='documents.document')),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Document ACL Entry',
+                'verbose_name_plural': 'Document ACL Entries',
+                'indexes': [models.Index(fields=['tenant', 'principal', 'document'], include=('capabilities', 'expires_at'), name='documents_acl_principal_idx')],
+                'unique_together': {('document', 'principal')},
+            },
+        ),
+        migrations.RunPython(backfill_acl, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:24
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_documentaclentry'),
+        ('tenants', '0002_invoice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentContent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('status', models.CharField(choices=[('pending', 'Menunggu'), ('processing', 'Diproses'), ('done', 'Selesai'), ('failed', 'Gagal'), ('unsupported', 'Tidak Didukung')], default='pending', max_length=20)),
+                ('source_name', models.CharField(blank=True, max_length=255)),
+                ('source_hash', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('text', models.TextField(blank=True)),
+                ('encrypted_text', models.TextField(blank=True, help_text='Base64 AES-GCM ciphertext of text')),
+                ('text_nonce', models.CharField(blank=True, max_length=32)),
+                ('char_count', models.PositiveIntegerField(default=0)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('extracted_at', models.DateTimeField(blank=True, null=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contents', to='documents.document')),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Document Content',
+                'verbose_name_plural': 'Document Contents',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='documents_content_search_idx'), models.Index(fields=['status', 'created_at'], name='documents_d_status_b8fb6b_idx')],
+                'unique_together': {('document', 'version')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_documentcontent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the plaintext, keys the preview cache', max_length=64),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.core.models.tree import rebuild_paths
+
+
+def backfill_paths(apps, schema_editor):
+    """Compute materialized paths of existing folders."""
+    rebuild_paths(apps.get_model('documents', 'Folder'), 'parent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0005_document_content_hash'),
+        ('tenants', '0002_invoice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='folder',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='folder',
+            name='path',
+            field=models.TextField(default='', editable=False, help_text='Ids from the root to this node, e.g. /<id>/<id>/'),
+        ),
+        migrations.AddIndex(
+            model_name='folder',
+            index=models.Index(fields=['path'], name='documents_folder_path', opclasses=['text_pattern_ops']),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def clear_encrypted_vectors(apps, schema_editor):
+    """Drop the plaintext search vectors indexed for encrypted documents."""
+    DocumentContent = apps.get_model('documents', 'DocumentContent')
+    DocumentContent.objects.filter(document__is_encrypted=True).update(search_vector=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0006_tree_paths'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_encrypted_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def requeue_encrypted(apps, schema_editor):
+    """Queue encrypted documents for extraction again to build their blind-token vectors."""
+    DocumentContent = apps.get_model('documents', 'DocumentContent')
+    DocumentContent.objects.filter(
+        document__is_encrypted=True, status='done', search_vector__isnull=True,
+    ).update(status='pending', attempts=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0007_clear_encrypted_search_vectors'),
+    ]
+
+    operations = [
+        migrations.RunPython(requeue_encrypted, migrations.RunPython.noop),
+    ]
@@ -3,8 +3,11 @@ Document management models with encryption and role-based access control.
 """
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.files.base import ContentFile
-from apps.core.models import TenantBaseModel, AuditMixin
+from apps.core.models import TenantBaseModel, TenantMixin, AuditMixin, TreeMixin
+from apps.core.models.managers import TenantManager
 
 
 class DocumentCategory(models.TextChoices):
@@ -52,7 +55,7 @@ class DocumentRole(models.TextChoices):
     STAFF = 'staff', 'Staff'
 
 
-class Folder(TenantBaseModel):
+class Folder(TreeMixin, TenantBaseModel):
     """Hierarchical folder structure for organizing documents."""
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -85,6 +88,7 @@ class Folder(TenantBaseModel):
             models.Index(fields=['parent']),
             models.Index(fields=['owner']),
             models.Index(fields=['access_level']),
+            TreeMixin.path_index('documents_folder_path'),
         ]
 
     def __str__(self):
@@ -92,9 +96,7 @@ class Folder(TenantBaseModel):
 
     def get_full_path(self):
         """Get full folder path from root."""
-        if self.parent:
-            return f"{self.parent.get_full_path()}/{self.name}"
-        return self.name
+        return '/'.join([*self.ancestors().values_list('name', flat=True), self.name])
 
 
 class Document(TenantBaseModel, AuditMixin):
@@ -120,6 +122,11 @@ class Document(TenantBaseModel, AuditMixin):
     original_filename = models.CharField(max_length=255)
     file_size = models.PositiveIntegerField(default=0)
     content_type = models.CharField(max_length=100, blank=True)
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text='SHA-256 of the plaintext, keys the preview cache'
+    )
 
     # Encryption
     is_encrypted = models.BooleanField(default=True)
@@ -197,6 +204,7 @@ class Document(TenantBaseModel, AuditMixin):
         """
         from .encryption import encrypt_file_to_base64
         import base64
+        import hashlib
 
         if self.is_encrypted:
             encrypted = encrypt_file_to_base64(file_data)
@@ -208,6 +216,7 @@ class Document(TenantBaseModel, AuditMixin):
 
         self.original_filename = filename
         self.file_size = len(file_data)
+        self.content_hash = hashlib.sha256(file_data).hexdigest()
 
     def get_decrypted_content(self) -> bytes:
         """
@@ -231,73 +240,80 @@ class Document(TenantBaseModel, AuditMixin):
         """
         Check if user can access this document based on access level and permissions.
 
+        Resolved against the materialized ACL index (see `acl.py`).
+
         Args:
             user: User instance to check
 
         Returns:
             bool: True if user can access
         """
-        # Owner always has access
-        if self.owner == user:
-            return True
-
-        # Superuser always has access
-        if user.is_superuser:
-            return True
-
-        # Public documents - everyone can access
-        if self.access_level == AccessLevel.PUBLIC:
-            return True
-
-        # Internal documents - any authenticated user
-        if self.access_level == AccessLevel.INTERNAL:
-            return user.is_authenticated
-
-        # Confidential and Restricted - check explicit permissions
-        # Check user-specific access
-        if self.user_access.filter(user=user, can_read=True).exists():
-            return True
-
-        # Check role-based access
-        user_roles = self.get_user_roles(user)
-        if self.role_permissions.filter(role__in=user_roles, can_read=True).exists():
-            return True
-
-        return False
+        from . import acl
+        return acl.user_can(self, user, acl.READ)
 
     def get_user_roles(self, user) -> list:
         """
         Get document roles for a user based on their groups/permissions.
-        This should be customized based on your user role implementation.
+        Mapping lives in `acl.GROUP_ROLE_MAP`; results are cached per user.
         """
-        roles = []
+        from . import acl
+        return acl.get_user_roles(user)
+
+
+class ExtractionStatus(models.TextChoices):
+    """Text extraction state of a document version."""
+    PENDING = 'pending', 'Menunggu'
+    PROCESSING = 'processing', 'Diproses'
+    DONE = 'done', 'Selesai'
+    FAILED = 'failed', 'Gagal'
+    UNSUPPORTED = 'unsupported', 'Tidak Didukung'
 
-        if user.is_superuser:
-            roles.append(DocumentRole.ADMIN)
 
-        # Map user groups to document roles
-        user_groups = user.groups.values_list('name', flat=True)
+class DocumentContent(TenantBaseModel):
+    """
+    Extracted, normalized text of one document version for content search.
+
+    Text of encrypted documents is stored encrypted (`encrypted_text`) and only
+    the search vector is kept in clear; see `content_index.py`.
+    """
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name='contents',
+    )
+    version = models.PositiveIntegerField(default=1)
+    status = models.CharField(
+        max_length=20,
+        choices=ExtractionStatus.choices,
+        default=ExtractionStatus.PENDING,
+    )
+
+    # Source fingerprint, used to skip unchanged files
+    source_name = models.CharField(max_length=255, blank=True)
+    source_hash = models.CharField(max_length=64, blank=True, db_index=True)
 
-        group_role_map = {
-            'HR': DocumentRole.HR,
-            'Finance': DocumentRole.FINANCE,
-            'Legal': DocumentRole.LEGAL,
-            'IT': DocumentRole.IT,
-            'Research': DocumentRole.RESEARCH,
-            'Operations': DocumentRole.OPERATIONS,
-            'Executive': DocumentRole.EXECUTIVE,
-            'Manager': DocumentRole.MANAGER,
-        }
+    # Extracted text
+    text = models.TextField(blank=True)
+    encrypted_text = models.TextField(blank=True, help_text='Base64 AES-GCM ciphertext of text')
+    text_nonce = models.CharField(max_length=32, blank=True)
+    char_count = models.PositiveIntegerField(default=0)
+    search_vector = SearchVectorField(null=True, blank=True)
 
-        for group_name, role in group_role_map.items():
-            if group_name in user_groups:
-                roles.append(role)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    extracted_at = models.DateTimeField(null=True, blank=True)
 
-        # Default role for all authenticated users
-        if not roles:
-            roles.append(DocumentRole.STAFF)
+    class Meta:
+        verbose_name = 'Document Content'
+        verbose_name_plural = 'Document Contents'
+        unique_together = ['document', 'version']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='documents_content_search_idx'),
+            models.Index(fields=['status', 'created_at']),
+        ]
 
-        return roles
+    def __str__(self):
+        return f"{self.document_id} v{self.version} ({self.status})"
 
 
 class DocumentAccessPermission(TenantBaseModel):
@@ -376,6 +392,47 @@ class DocumentUserAccess(TenantBaseModel):
         return f"{self.document.title} - {self.user.email}"
 
 
+class DocumentACLEntry(TenantMixin):
+    """
+    Materialized access-control index for documents.
+
+    One row per (document, principal) holding the OR of every grant that
+    applies to that principal: access level (`public` / `authenticated`),
+    ownership and explicit user grants (`user:<id>`) and role permissions
+    (`role:<role>`). Maintained by signal handlers in `signals.py`; never
+    edit directly.
+    """
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name='acl_entries',
+    )
+    principal = models.CharField(max_length=64)
+    capabilities = models.PositiveSmallIntegerField(
+        default=0,
+        help_text='Bitmask of acl.READ/DOWNLOAD/EDIT/DELETE/SHARE'
+    )
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        verbose_name = 'Document ACL Entry'
+        verbose_name_plural = 'Document ACL Entries'
+        unique_together = ['document', 'principal']
+        indexes = [
+            models.Index(
+                fields=['tenant', 'principal', 'document'],
+                include=['capabilities', 'expires_at'],
+                name='documents_acl_principal_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.document_id} - {self.principal} ({self.capabilities})"
+
+
 class DocumentAccessLog(TenantBaseModel):
     """
     Audit log for document access attempts.
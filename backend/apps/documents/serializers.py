@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from django.utils import timezone
+from apps.core.serializers import TreeSerializerMixin
+from . import acl
 from .models import (
     Folder, Document, DocumentAccessPermission,
     DocumentUserAccess, DocumentAccessLog,
@@ -7,7 +8,7 @@ from .models import (
 )
 
 
-class FolderSerializer(serializers.ModelSerializer):
+class FolderSerializer(TreeSerializerMixin, serializers.ModelSerializer):
     full_path = serializers.SerializerMethodField()
     children_count = serializers.SerializerMethodField()
     documents_count = serializers.SerializerMethodField()
@@ -36,19 +37,16 @@ class FolderSerializer(serializers.ModelSerializer):
 
 
 class FolderTreeSerializer(serializers.ModelSerializer):
-    """Serializer for folder tree view with nested children."""
-    children = serializers.SerializerMethodField()
+    """Serializer for one node of the folder tree (children are nested by Folder.nest)."""
     documents_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Folder
-        fields = ['id', 'name', 'access_level', 'children', 'documents_count']
-
-    def get_children(self, obj):
-        children = obj.children.filter(is_active=True)
-        return FolderTreeSerializer(children, many=True).data
+        fields = ['id', 'name', 'access_level', 'documents_count']
 
     def get_documents_count(self, obj):
+        if hasattr(obj, 'active_documents'):
+            return obj.active_documents
         return obj.documents.filter(is_active=True).count()
 
 
@@ -145,29 +143,16 @@ class DocumentDetailSerializer(serializers.ModelSerializer):
             'last_accessed_at', 'created_at', 'updated_at', 'created_by', 'updated_by',
         ]
 
+    def _get_capabilities(self, obj):
+        if not hasattr(obj, '_user_capabilities'):
+            obj._user_capabilities = acl.get_user_capabilities(obj, self.context['request'].user)
+        return obj._user_capabilities
+
     def get_can_download(self, obj):
-        user = self.context['request'].user
-        if obj.owner == user or user.is_superuser:
-            return True
-        user_access = obj.user_access.filter(user=user, can_download=True).first()
-        if user_access:
-            if user_access.expires_at and user_access.expires_at < timezone.now():
-                return False
-            return True
-        user_roles = obj.get_user_roles(user)
-        return obj.role_permissions.filter(role__in=user_roles, can_download=True).exists()
+        return bool(self._get_capabilities(obj) & acl.DOWNLOAD)
 
     def get_can_edit(self, obj):
-        user = self.context['request'].user
-        if obj.owner == user or user.is_superuser:
-            return True
-        user_access = obj.user_access.filter(user=user, can_edit=True).first()
-        if user_access:
-            if user_access.expires_at and user_access.expires_at < timezone.now():
-                return False
-            return True
-        user_roles = obj.get_user_roles(user)
-        return obj.role_permissions.filter(role__in=user_roles, can_edit=True).exists()
+        return bool(self._get_capabilities(obj) & acl.EDIT)
 
 
 class DocumentCreateSerializer(serializers.ModelSerializer):
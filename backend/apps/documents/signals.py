@@ -0,0 +1,61 @@
+"""Signal handlers keeping the document ACL index in sync."""
+
+from django.contrib.auth.models import Group
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from apps.users.models import User
+from .models import Document, DocumentAccessPermission, DocumentUserAccess
+from . import acl, content_index
+
+# Document fields that feed the ACL index
+ACL_FIELDS = {'access_level', 'owner', 'tenant'}
+
+
+@receiver(post_save, sender=Document)
+def sync_document_acl(sender, instance, created, update_fields=None, **kwargs):
+    """Rebuild the document's ACL rows when access-relevant fields may have changed."""
+    if not created and update_fields is not None and not ACL_FIELDS & set(update_fields):
+        return
+    acl.rebuild_document_acl(instance)
+
+
+@receiver(post_save, sender=Document)
+def queue_content_extraction(sender, instance, created, update_fields=None, **kwargs):
+    """Queue text extraction when a document's file may have changed."""
+    if not created and update_fields is not None and not {'file', 'version'} & set(update_fields):
+        return
+    content_index.enqueue_extraction(instance)
+
+
+@receiver(post_save, sender=DocumentUserAccess)
+@receiver(post_delete, sender=DocumentUserAccess)
+@receiver(post_save, sender=DocumentAccessPermission)
+@receiver(post_delete, sender=DocumentAccessPermission)
+def sync_grant_acl(sender, instance, **kwargs):
+    """Rebuild the parent document's ACL rows after a grant changes."""
+    document = Document.all_objects.filter(pk=instance.document_id).first()
+    if document is not None:
+        acl.rebuild_document_acl(document)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_roles_on_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached role sets when group membership changes."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        acl.invalidate_user_roles(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            acl.invalidate_user_roles(user_id)
+    else:
+        # group.user_set.clear() does not report which users were affected
+        acl.bump_roles_generation()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_roles_on_group_change(sender, instance, **kwargs):
+    """A renamed or deleted group can change the role of every member."""
+    acl.bump_roles_generation()
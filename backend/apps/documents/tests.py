@@ -1,13 +1,27 @@
-from django.test import TestCase
+import io
+import time
+import zipfile
+from unittest import mock
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from PIL import Image
+from apps.core.models import PreviewImage
+from apps.core.services.previews import preview_service
+from apps.tenants.models import Tenant
 from apps.users.models import User
+from . import acl, content_index
+from .extraction import extract_text, normalize_text
 from .models import (
     Folder, Document, DocumentAccessPermission,
-    DocumentUserAccess, DocumentAccessLog,
-    AccessLevel, DocumentCategory, DocumentStatus, DocumentRole,
+    DocumentUserAccess, DocumentAccessLog, DocumentACLEntry, DocumentContent,
+    AccessLevel, ExtractionStatus, DocumentCategory, DocumentStatus, DocumentRole,
 )
 from .encryption import encrypt_file, decrypt_file, encrypt_file_to_base64, decrypt_file_from_base64
 
@@ -72,6 +86,25 @@ class FolderModelTest(TestCase):
         self.assertIn(child, parent.children.all())
         self.assertEqual(child.get_full_path(), 'Root/Subfolder')
 
+    def test_move_rewrites_subtree_paths(self):
+        first = Folder.objects.create(name='First', owner=self.user)
+        second = Folder.objects.create(name='Second', owner=self.user)
+        child = Folder.objects.create(name='Child', parent=first, owner=self.user)
+        leaf = Folder.objects.create(name='Leaf', parent=child, owner=self.user)
+
+        child.parent = second
+        child.save()
+        leaf.refresh_from_db()
+        self.assertEqual(leaf.depth, 2)
+        self.assertTrue(leaf.is_descendant_of(second))
+        self.assertEqual(list(second.descendants().order_by('depth')), [child, leaf])
+        with self.assertNumQueries(1):
+            self.assertEqual(leaf.get_full_path(), 'Second/Child/Leaf')
+
+        second.parent = leaf
+        with self.assertRaises(ValidationError):
+            second.save()
+
 
 class DocumentModelTest(TestCase):
     def setUp(self):
@@ -200,6 +233,212 @@ class DocumentAccessPermissionTest(TestCase):
         self.assertTrue(self.doc.can_user_access(self.other_user))
 
 
+class DocumentACLIndexTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123',
+        )
+        self.other_user = User.objects.create_user(
+            username='other',
+            email='other@test.com',
+            password='testpass123',
+        )
+        self.doc = Document.objects.create(
+            title='Indexed Doc',
+            original_filename='indexed.txt',
+            owner=self.owner,
+            access_level=AccessLevel.CONFIDENTIAL,
+        )
+
+    def principals(self):
+        return set(self.doc.acl_entries.values_list('principal', flat=True))
+
+    def test_index_built_on_create(self):
+        self.assertEqual(self.principals(), {acl.user_principal(self.owner.pk)})
+        entry = self.doc.acl_entries.get()
+        self.assertEqual(entry.capabilities, acl.ALL)
+
+    def test_access_level_change_updates_index(self):
+        self.doc.access_level = AccessLevel.INTERNAL
+        self.doc.save()
+        self.assertIn(acl.PRINCIPAL_AUTHENTICATED, self.principals())
+        self.assertTrue(self.doc.can_user_access(self.other_user))
+
+    def test_grant_and_revoke_update_index(self):
+        access = DocumentUserAccess.objects.create(
+            document=self.doc,
+            user=self.other_user,
+            can_read=True,
+            can_download=True,
+        )
+        caps = acl.get_user_capabilities(self.doc, self.other_user)
+        self.assertEqual(caps, acl.READ | acl.DOWNLOAD)
+
+        access.delete()
+        self.assertFalse(self.doc.can_user_access(self.other_user))
+
+    def test_expired_grant_ignored(self):
+        DocumentUserAccess.objects.create(
+            document=self.doc,
+            user=self.other_user,
+            can_read=True,
+            expires_at=timezone.now() - timedelta(days=1),
+        )
+        self.assertFalse(self.doc.can_user_access(self.other_user))
+
+    def test_group_membership_invalidates_roles(self):
+        DocumentAccessPermission.objects.create(
+            document=self.doc,
+            role=DocumentRole.FINANCE,
+            can_read=True,
+        )
+        self.assertFalse(self.doc.can_user_access(self.other_user))
+
+        group = Group.objects.create(name='Finance')
+        self.other_user.groups.add(group)
+        user = User.objects.get(pk=self.other_user.pk)
+        self.assertEqual(acl.get_user_roles(user), [DocumentRole.FINANCE])
+        self.assertTrue(self.doc.can_user_access(user))
+
+    def test_filter_accessible(self):
+        Document.objects.create(
+            title='Internal',
+            original_filename='internal.txt',
+            owner=self.owner,
+            access_level=AccessLevel.INTERNAL,
+        )
+        visible = acl.filter_accessible(Document.objects.all(), self.other_user)
+        self.assertEqual(list(visible.values_list('title', flat=True)), ['Internal'])
+
+        self.assertEqual(
+            acl.filter_accessible(Document.objects.all(), self.owner).count(), 2
+        )
+
+
+class TextExtractionTest(TestCase):
+    def test_normalize_text(self):
+        self.assertEqual(normalize_text('  Halo\x00   dunia \n\n\n\nlagi '), 'Halo dunia\n\nlagi')
+
+    def test_extract_docx(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('word/document.xml', (
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                '<w:body><w:p><w:r><w:t>Kebijakan</w:t></w:r><w:r><w:t> cuti</w:t></w:r></w:p>'
+                '<w:p><w:r><w:t>Tahunan</w:t></w:r></w:p></w:body></w:document>'
+            ))
+        self.assertEqual(extract_text(buffer, 'policy.docx'), 'Kebijakan cuti\nTahunan')
+
+    def test_extract_xlsx(self):
+        ns = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('xl/sharedStrings.xml', f'<sst {ns}><si><t>Anggaran</t></si></sst>')
+            archive.writestr('xl/worksheets/sheet1.xml', (
+                f'<worksheet {ns}><sheetData><row r="1">'
+                '<c r="A1" t="s"><v>0</v></c><c r="B1"><v>1500</v></c>'
+                '</row></sheetData></worksheet>'
+            ))
+        self.assertEqual(extract_text(buffer, 'budget.xlsx'), 'Anggaran 1500')
+
+
+class DocumentContentIndexTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123',
+        )
+
+    def create_document(self, content, encrypted=True, access_level=AccessLevel.INTERNAL):
+        doc = Document(
+            title='Searchable',
+            owner=self.user,
+            is_encrypted=encrypted,
+            content_type='text/plain',
+            access_level=access_level,
+        )
+        doc.save_encrypted_file(content, 'notes.txt')
+        doc.save()
+        return doc
+
+    def test_extraction_encrypted_document(self):
+        doc = self.create_document(b'Laporan audit keuangan triwulan ketiga')
+        content = DocumentContent.objects.get(document=doc, version=1)
+        content_index.run_extraction(content.pk)
+
+        content.refresh_from_db()
+        self.assertEqual(content.status, ExtractionStatus.DONE)
+        self.assertEqual(content.text, '')
+        self.assertTrue(content.encrypted_text)
+        self.assertEqual(content_index.get_content_text(content), 'Laporan audit keuangan triwulan ketiga')
+
+        # Only blind tokens are stored in clear
+        self.assertNotIn('keuangan', content.search_vector)
+        self.assertIn(content_index.blind_tokens('keuangan')[0], content.search_vector)
+
+        results = content_index.search_content(Document.objects.all(), 'Audit keuangan')
+        self.assertEqual(len(results), 1)
+        self.assertIn('<mark>audit</mark> <mark>keuangan</mark>', results[0][2].lower())
+        self.assertEqual(content_index.search_content(Document.objects.all(), 'keuangan bulanan'), [])
+
+    def test_encrypted_snippet_is_escaped(self):
+        doc = self.create_document(b'Memo <b>rapat</b> & anggaran')
+        content_index.run_extraction(DocumentContent.objects.get(document=doc).pk)
+
+        snippet = content_index.search_content(Document.objects.all(), 'anggaran')[0][2]
+        self.assertEqual(snippet, 'Memo &lt;b&gt;rapat&lt;/b&gt; &amp; <mark>anggaran</mark>')
+
+    def test_search_headline_is_escaped(self):
+        doc = self.create_document(b'Syarat & ketentuan keuangan <img src=x onerror=alert(1)>', encrypted=False)
+        content_index.run_extraction(DocumentContent.objects.get(document=doc).pk)
+
+        results = content_index.search_content(Document.objects.all(), 'keuangan')
+        self.assertEqual(len(results), 1)
+        self.assertNotIn('<img', results[0][2])
+        self.assertIn('&lt;img', results[0][2])
+        self.assertIn('&amp;', results[0][2])
+        self.assertIn('<mark>keuangan</mark>', results[0][2])
+
+    def test_new_version_reuses_identical_text(self):
+        doc = self.create_document(b'Prosedur pengadaan barang', encrypted=False)
+        content_index.run_extraction(DocumentContent.objects.get(document=doc).pk)
+
+        doc.version = 2
+        doc.save_encrypted_file(b'Prosedur pengadaan barang', 'notes.txt')
+        doc.save()
+        second = DocumentContent.objects.get(document=doc, version=2)
+        content_index.run_extraction(second.pk)
+
+        second.refresh_from_db()
+        self.assertEqual(second.status, ExtractionStatus.DONE)
+        self.assertEqual(second.text, 'Prosedur pengadaan barang')
+
+    def test_search_content_endpoint_respects_acl(self):
+        doc = self.create_document(b'Kontrak rahasia vendor', encrypted=False, access_level=AccessLevel.CONFIDENTIAL)
+        content_index.process_pending()
+
+        other = User.objects.create_user(
+            username='other',
+            email='other@test.com',
+            password='testpass123',
+        )
+        url = reverse('api_v1:document-search-content')
+        client = APIClient()
+
+        client.force_authenticate(user=other)
+        response = client.get(url, {'q': 'vendor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+        client.force_authenticate(user=self.user)
+        response = client.get(url, {'q': 'vendor'})
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['document']['id'], str(doc.id))
+
+
 class DocumentAPITest(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -371,3 +610,95 @@ class FolderAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)  # One root
         self.assertEqual(len(response.data[0]['children']), 2)  # Two children
+
+
+@override_settings(PREVIEW_WORKERS=0)
+class DocumentPreviewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123',
+        )
+        buffer = io.BytesIO()
+        Image.new('RGB', (1200, 900), color=(200, 30, 30)).save(buffer, format='PNG')
+        self.doc = Document(
+            title='Denah Kantor',
+            owner=self.user,
+            content_type='image/png',
+            access_level=AccessLevel.CONFIDENTIAL,
+        )
+        self.doc.save_encrypted_file(buffer.getvalue(), 'denah.png')
+        self.doc.save()
+
+    def test_preview_is_generated_once_and_served_cacheable(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('api_v1:document-preview', kwargs={'pk': self.doc.id})
+
+        response = self.client.get(url, {'size': 'sm'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'ready')
+        self.assertLessEqual(response.data['width'], 160)
+
+        # Second request hits the cache
+        self.client.get(url, {'size': 'sm'})
+        self.assertEqual(PreviewImage.objects.filter(content_hash=self.doc.content_hash).count(), 1)
+        preview = PreviewImage.objects.get(content_hash=self.doc.content_hash)
+        self.assertTrue(preview.is_encrypted)
+
+        image = self.client.get(response.data['url'])
+        self.assertEqual(image.status_code, status.HTTP_200_OK)
+        self.assertEqual(image['Content-Type'], 'image/jpeg')
+        self.assertEqual(image['Cache-Control'], 'private, no-store')
+        self.assertEqual(Image.open(io.BytesIO(image.content)).format, 'JPEG')
+
+        not_modified = self.client.get(response.data['url'], HTTP_IF_NONE_MATCH=image['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_preview_requires_read_access(self):
+        other = User.objects.create_user(username='other', email='o@test.com', password='x')
+        self.client.force_authenticate(user=other)
+        url = reverse('api_v1:document-preview', kwargs={'pk': self.doc.id})
+        response = self.client.get(url)
+        self.assertIn(response.status_code, (status.HTTP_403_FORBIDDEN, status.HTTP_404_NOT_FOUND))
+        self.assertFalse(PreviewImage.objects.exists())
+
+    def test_unsupported_type_and_bad_token(self):
+        self.doc.content_type = 'application/zip'
+        self.doc.original_filename = 'arsip.zip'
+        self.doc.save()
+        self.client.force_authenticate(user=self.user)
+        url = reverse('api_v1:document-preview', kwargs={'pk': self.doc.id})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        bad = reverse('api_v1:preview-image', kwargs={'token': 'abc.sm.1:forged'})
+        self.assertEqual(self.client.get(bad).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_preview_url_expires_and_rechecks_access(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('api_v1:document-preview', kwargs={'pk': self.doc.id}))
+        url = response.data['url']
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 7200):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        # Access revoked after the URL was handed out
+        self.doc.owner = User.objects.create_user(username='baru', email='baru@test.com', password='x')
+        self.doc.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_previews_are_tenant_scoped(self):
+        tenants = [
+            Tenant.objects.create(name=name, slug=name, subdomain=name, email=f'it@{name}.id')
+            for name in ('alpha', 'beta')
+        ]
+        data = self.doc.get_decrypted_content()
+        previews = [
+            preview_service.get_preview(tenant.pk, self.doc.content_hash, lambda: data, 'denah.png', size='sm')
+            for tenant in tenants
+        ]
+        self.assertNotEqual(previews[0].pk, previews[1].pk)
+        self.assertEqual([p.tenant_id for p in previews], [t.pk for t in tenants])
+        self.assertEqual(PreviewImage.objects.filter(content_hash=self.doc.content_hash).count(), 2)
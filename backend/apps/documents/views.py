@@ -5,9 +5,11 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.http import HttpResponse
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Count, Q
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.core.services.previews import preview_service
 from apps.users.models import User
+from . import acl, content_index
 from .models import (
     Folder, Document, DocumentAccessPermission,
     DocumentUserAccess, DocumentAccessLog,
@@ -71,25 +73,19 @@ class FolderViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def tree(self, request):
         """Get folder tree structure."""
-        root_folders = self.get_queryset().filter(parent__isnull=True)
-        serializer = FolderTreeSerializer(root_folders, many=True)
-        return Response(serializer.data)
+        folders = self.get_queryset().annotate(
+            active_documents=Count('documents', filter=Q(documents__is_active=True)),
+        )
+        return Response(Folder.nest(folders, lambda folder: FolderTreeSerializer(folder).data))
 
     @action(detail=True, methods=['get'])
     def documents(self, request, pk=None):
         """Get documents in a folder."""
         folder = self.get_object()
-        documents = folder.documents.filter(is_active=True)
-
-        # Apply access filtering
-        user = request.user
-        if not user.is_superuser:
-            documents = documents.filter(
-                Q(access_level=AccessLevel.PUBLIC) |
-                Q(access_level=AccessLevel.INTERNAL) |
-                Q(owner=user) |
-                Q(user_access__user=user, user_access__can_read=True)
-            ).distinct()
+        documents = acl.filter_accessible(
+            folder.documents.filter(is_active=True),
+            request.user,
+        ).select_related('folder', 'owner')
 
         serializer = DocumentListSerializer(documents, many=True)
         return Response(serializer.data)
@@ -106,34 +102,11 @@ class DocumentViewSet(viewsets.ModelViewSet):
     ordering = ['-created_at']
 
     def get_queryset(self):
-        user = self.request.user
-        qs = Document.objects.filter(is_active=True)
-
-        if not user.is_superuser:
-            # Get user's roles
-            user_roles = []
-            if user.is_authenticated:
-                # Simplified role extraction - customize as needed
-                user_groups = user.groups.values_list('name', flat=True)
-                role_map = {
-                    'HR': 'hr', 'Finance': 'finance', 'Legal': 'legal',
-                    'IT': 'it', 'Research': 'research', 'Operations': 'operations',
-                    'Executive': 'executive', 'Manager': 'manager',
-                }
-                for group_name, role in role_map.items():
-                    if group_name in user_groups:
-                        user_roles.append(role)
-                if not user_roles:
-                    user_roles.append('staff')
-
-            qs = qs.filter(
-                Q(access_level=AccessLevel.PUBLIC) |
-                Q(access_level=AccessLevel.INTERNAL) |
-                Q(owner=user) |
-                Q(user_access__user=user, user_access__can_read=True) |
-                Q(role_permissions__role__in=user_roles, role_permissions__can_read=True)
-            ).distinct()
-
+        # Semi-join against the materialized ACL index (see acl.py)
+        qs = acl.filter_accessible(
+            Document.objects.filter(is_active=True),
+            self.request.user,
+        )
         return qs.select_related('folder', 'owner', 'created_by', 'updated_by')
 
     def get_serializer_class(self):
@@ -167,13 +140,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
 
         # Check delete permission
         user = request.user
-        can_delete = (
-            instance.owner == user or
-            user.is_superuser or
-            instance.user_access.filter(user=user, can_delete=True).exists()
-        )
-
-        if not can_delete:
+        if not acl.user_can(instance, user, acl.DELETE):
             log_access(instance, user, 'access_denied', request, success=False, notes='Delete attempt')
             return Response(
                 {'detail': 'Anda tidak memiliki izin untuk menghapus dokumen ini.'},
@@ -192,7 +159,8 @@ class DocumentViewSet(viewsets.ModelViewSet):
         user = request.user
 
         # Check access
-        if not document.can_user_access(user):
+        capabilities = acl.get_user_capabilities(document, user)
+        if not capabilities & acl.READ:
             log_access(document, user, 'access_denied', request, success=False, notes='Download attempt')
             return Response(
                 {'detail': 'Anda tidak memiliki akses ke dokumen ini.'},
@@ -200,17 +168,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
             )
 
         # Check download permission
-        can_download = (
-            document.owner == user or
-            user.is_superuser or
-            document.user_access.filter(user=user, can_download=True).exists() or
-            document.role_permissions.filter(
-                role__in=document.get_user_roles(user),
-                can_download=True
-            ).exists()
-        )
-
-        if not can_download:
+        if not capabilities & acl.DOWNLOAD:
             log_access(document, user, 'access_denied', request, success=False, notes='Download denied - no permission')
             return Response(
                 {'detail': 'Anda tidak memiliki izin untuk mengunduh dokumen ini.'},
@@ -239,6 +197,23 @@ class DocumentViewSet(viewsets.ModelViewSet):
         response['Content-Disposition'] = f'attachment; filename="{document.original_filename}"'
         return response
 
+    @action(detail=True, methods=['get'])
+    def preview(self, request, pk=None):
+        """Thumbnail of a document page (?size=sm|md|lg&page=N)."""
+        document = self.get_object()
+
+        if not acl.user_can(document, request.user, acl.READ):
+            return Response(
+                {'detail': 'Anda tidak memiliki akses ke dokumen ini.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        return preview_service.build_response(
+            request, document, document.get_decrypted_content,
+            document.original_filename, document.content_type,
+            protect=document.is_encrypted,
+        )
+
     @action(detail=True, methods=['post'])
     def grant_access(self, request, pk=None):
         """Grant access to a specific user."""
@@ -246,13 +221,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
         user = request.user
 
         # Check if user can share
-        can_share = (
-            document.owner == user or
-            user.is_superuser or
-            document.user_access.filter(user=user, can_share=True).exists()
-        )
-
-        if not can_share:
+        if not acl.user_can(document, user, acl.SHARE):
             return Response(
                 {'detail': 'Anda tidak memiliki izin untuk membagikan dokumen ini.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -398,6 +367,38 @@ class DocumentViewSet(viewsets.ModelViewSet):
         serializer = DocumentAccessLogSerializer(logs, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def search_content(self, request):
+        """
+        Full-text search inside document content.
+
+        Query params: q (required, websearch syntax), limit (default 20, max 50).
+        Only the current version of documents the user can read is searched.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'detail': 'Parameter q diperlukan.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 50)
+        except ValueError:
+            limit = 20
+
+        documents = self.filter_queryset(self.get_queryset())
+        results = content_index.search_content(documents, query, limit=limit)
+
+        return Response([
+            {
+                'document': DocumentListSerializer(document).data,
+                'rank': rank,
+                'snippet': snippet,
+            }
+            for document, rank, snippet in results
+        ])
+
     @action(detail=False, methods=['get'])
     def my_documents(self, request):
         """Get documents owned by current user."""
@@ -7,6 +7,7 @@ from django.core.validators import MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
 from apps.core.models import TenantBaseModel, AuditMixin
+from apps.core.services.sequences import Sequence
 
 
 class ExpenseCategory(models.TextChoices):
@@ -43,6 +44,11 @@ class PaymentMethod(models.TextChoices):
     PETTY_CASH = 'petty_cash', 'Kas Kecil'
 
 
+EXPENSE_NUMBERS = Sequence(
+    'expense_request', 'EXP-{year}-{seq:04d}', model='finance.ExpenseRequest', field='request_number',
+)
+
+
 class ExpenseRequest(TenantBaseModel, AuditMixin):
     """
     Expense request/reimbursement header.
@@ -146,20 +152,7 @@ class ExpenseRequest(TenantBaseModel, AuditMixin):
 
     def generate_request_number(self):
         """Generate request number like EXP-2024-0001."""
-        year = timezone.now().year
-        prefix = f'EXP-{year}-'
-        last = ExpenseRequest.objects.filter(
-            request_number__startswith=prefix
-        ).order_by('-request_number').first()
-
-        if last:
-            try:
-                num = int(last.request_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                num = 1
-        else:
-            num = 1
-        return f'{prefix}{num:04d}'
+        return EXPENSE_NUMBERS.next()
 
     def calculate_total(self):
         """Recalculate total from items."""
@@ -281,6 +274,11 @@ class ExpenseItem(TenantBaseModel):
         self.expense_request.calculate_total()
 
 
+ADVANCE_NUMBERS = Sequence(
+    'expense_advance', 'ADV-{year}-{seq:04d}', model='finance.ExpenseAdvance', field='advance_number',
+)
+
+
 class ExpenseAdvance(TenantBaseModel, AuditMixin):
     """
     Cash advance for expenses (uang muka).
@@ -356,20 +354,7 @@ class ExpenseAdvance(TenantBaseModel, AuditMixin):
 
     def generate_advance_number(self):
         """Generate advance number like ADV-2024-0001."""
-        year = timezone.now().year
-        prefix = f'ADV-{year}-'
-        last = ExpenseAdvance.objects.filter(
-            advance_number__startswith=prefix
-        ).order_by('-advance_number').first()
-
-        if last:
-            try:
-                num = int(last.advance_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                num = 1
-        else:
-            num = 1
-        return f'{prefix}{num:04d}'
+        return ADVANCE_NUMBERS.next()
 
     @property
     def balance(self):
@@ -7,9 +7,11 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.db.models import Q
 from django.utils import timezone
 
 from apps.common.cache import cache_api_response, invalidate_cache
+from apps.common.stats import Stats
 from .models import ExpenseRequest, ExpenseItem, ExpenseAdvance, ExpenseStatus
 from .serializers import (
     ExpenseRequestListSerializer,
@@ -202,28 +204,20 @@ class ExpenseRequestViewSet(viewsets.ModelViewSet):
         if end_date:
             queryset = queryset.filter(expense_date__lte=end_date)
 
-        total_requested = sum(e.total_amount for e in queryset)
-        total_approved = sum(
-            e.approved_amount for e in queryset.filter(status=ExpenseStatus.APPROVED)
+        summary = (
+            Stats(queryset, 'expense_summary')
+            .count('total_requests')
+            .sum('total_requested_amount', 'total_amount')
+            .sum('total_approved_amount', 'approved_amount', Q(status=ExpenseStatus.APPROVED))
+            .sum('total_paid_amount', 'approved_amount', Q(status=ExpenseStatus.PAID))
+            .count_by('by_status', 'status', [
+                ExpenseStatus.DRAFT, ExpenseStatus.SUBMITTED, ExpenseStatus.APPROVED,
+                ExpenseStatus.REJECTED, ExpenseStatus.PROCESSING, ExpenseStatus.PAID,
+            ])
+            # ?my_requests=true narrows the queryset to the requesting user
+            .get(cache_key=(request.user.pk, request.query_params.urlencode()))
         )
-        total_paid = sum(
-            e.approved_amount for e in queryset.filter(status=ExpenseStatus.PAID)
-        )
-
-        return Response({
-            'total_requests': queryset.count(),
-            'total_requested_amount': total_requested,
-            'total_approved_amount': total_approved,
-            'total_paid_amount': total_paid,
-            'by_status': {
-                'draft': queryset.filter(status=ExpenseStatus.DRAFT).count(),
-                'submitted': queryset.filter(status=ExpenseStatus.SUBMITTED).count(),
-                'approved': queryset.filter(status=ExpenseStatus.APPROVED).count(),
-                'rejected': queryset.filter(status=ExpenseStatus.REJECTED).count(),
-                'processing': queryset.filter(status=ExpenseStatus.PROCESSING).count(),
-                'paid': queryset.filter(status=ExpenseStatus.PAID).count(),
-            }
-        })
+        return Response(summary)
 
 
 class ExpenseItemViewSet(viewsets.ModelViewSet):
@@ -5,3 +5,8 @@ class HrConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.hr'
     verbose_name = 'Human Resources'
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.hr.signals  # noqa
+        import apps.hr.attendance.signals  # noqa
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Attendance, AttendanceSummary
+from .models import Attendance, AttendanceDevice, AttendanceSummary, AttendanceSyncEvent
 
 
 @admin.register(Attendance)
@@ -42,3 +42,19 @@ class AttendanceSummaryAdmin(admin.ModelAdmin):
     list_filter = ['year', 'month']
     search_fields = ['employee__first_name', 'employee__last_name', 'employee__employee_id']
     raw_id_fields = ['employee']
+
+
+@admin.register(AttendanceDevice)
+class AttendanceDeviceAdmin(admin.ModelAdmin):
+    list_display = ['name', 'device_id', 'location', 'last_synced_at', 'is_active']
+    list_filter = ['is_active']
+    search_fields = ['name', 'device_id', 'location']
+    readonly_fields = ['last_synced_at']
+
+
+@admin.register(AttendanceSyncEvent)
+class AttendanceSyncEventAdmin(admin.ModelAdmin):
+    list_display = ['device', 'idempotency_key', 'event_type', 'employee', 'occurred_at', 'result', 'error']
+    list_filter = ['result', 'event_type', 'device']
+    search_fields = ['idempotency_key', 'employee__employee_id']
+    raw_id_fields = ['employee', 'attendance']
@@ -75,6 +75,13 @@ class Attendance(TenantBaseModel, AuditMixin):
     def __str__(self):
         return f"{self.employee.full_name} - {self.date} ({self.get_status_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a change of employee or date also refreshes the old rollup
+        instance._loaded_rollup_key = (instance.__dict__.get('employee_id'), instance.__dict__.get('date'))
+        return instance
+
     def calculate_work_hours(self):
         """Calculate work hours from check_in and check_out."""
         if self.check_in and self.check_out:
@@ -118,3 +125,79 @@ class AttendanceSummary(TenantBaseModel):
 
     def __str__(self):
         return f"{self.employee.full_name} - {self.month}/{self.year}"
+
+
+class AttendanceDevice(TenantBaseModel):
+    """
+    Attendance kiosk or mobile client allowed to push event batches.
+
+    Batches are authenticated with an HMAC-SHA256 signature of the request
+    body using the device secret (see `sync.py`).
+    """
+
+    name = models.CharField(max_length=100)
+    device_id = models.CharField(max_length=64, unique=True)
+    secret = models.CharField(max_length=128)
+    location = models.CharField(max_length=255, blank=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Attendance Device'
+        verbose_name_plural = 'Attendance Devices'
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} ({self.device_id})"
+
+
+class SyncEventType(models.TextChoices):
+    CHECK_IN = 'check_in', 'Check In'
+    CHECK_OUT = 'check_out', 'Check Out'
+
+
+class SyncEventResult(models.TextChoices):
+    APPLIED = 'applied', 'Diterapkan'
+    REJECTED = 'rejected', 'Ditolak'
+
+
+class AttendanceSyncEvent(TenantBaseModel):
+    """
+    Idempotency ledger for device events.
+
+    One row per (device, idempotency key); a replayed event returns the
+    stored outcome instead of being applied again.
+    """
+
+    device = models.ForeignKey(
+        AttendanceDevice,
+        on_delete=models.CASCADE,
+        related_name='sync_events',
+    )
+    idempotency_key = models.CharField(max_length=64)
+    event_type = models.CharField(max_length=20, choices=SyncEventType.choices)
+    employee = models.ForeignKey(
+        'hr.Employee',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='attendance_sync_events',
+    )
+    occurred_at = models.DateTimeField()
+    result = models.CharField(max_length=20, choices=SyncEventResult.choices)
+    error = models.CharField(max_length=100, blank=True)
+    attendance = models.ForeignKey(
+        Attendance,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='sync_events',
+    )
+
+    class Meta:
+        verbose_name = 'Attendance Sync Event'
+        verbose_name_plural = 'Attendance Sync Events'
+        ordering = ['-occurred_at']
+        unique_together = ['device', 'idempotency_key']
+
+    def __str__(self):
+        return f"{self.device_id} {self.idempotency_key} ({self.result})"
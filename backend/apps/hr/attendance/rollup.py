@@ -0,0 +1,190 @@
+"""
+AttendanceSummary rollups.
+
+Each summary row is the aggregate of one employee's attendance in one month.
+Rows are maintained by a single `INSERT ... SELECT ... GROUP BY ... ON
+CONFLICT DO UPDATE` statement scoped to the affected employee-months:
+
+- `refresh_months` is called from the Attendance signal handlers (and by bulk
+  writers such as device sync) for the employee-months a write touched;
+- `rebuild_month` recomputes a whole tenant-month in one statement, for
+  backfills and after raw SQL changes (see `rebuild_attendance_summaries`).
+
+Employee-months left without attendance rows lose their summary row.
+"""
+from datetime import date
+
+from django.db import connection
+
+from .models import Attendance, AttendanceStatus, AttendanceSummary
+
+
+def month_start(day) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _tables():
+    from apps.hr.models import Employee
+    return AttendanceSummary._meta.db_table, Attendance._meta.db_table, Employee._meta.db_table
+
+
+def _upsert_sql(join='', where='TRUE'):
+    summary, attendance, employee = _tables()
+    return f"""
+        INSERT INTO {summary} (
+            id, created_at, updated_at, is_active, tenant_id, employee_id, year, month,
+            total_days, present_days, absent_days, late_days, leave_days, sick_days, wfh_days,
+            total_work_hours, total_overtime_hours
+        )
+        SELECT
+            gen_random_uuid(), now(), now(), TRUE, e.tenant_id, a.employee_id,
+            EXTRACT(YEAR FROM a.date)::int, EXTRACT(MONTH FROM a.date)::int,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE a.status = %(present)s),
+            COUNT(*) FILTER (WHERE a.status = %(absent)s),
+            COUNT(*) FILTER (WHERE a.status = %(late)s),
+            COUNT(*) FILTER (WHERE a.status = %(leave)s),
+            COUNT(*) FILTER (WHERE a.status = %(sick)s),
+            COUNT(*) FILTER (WHERE a.status = %(wfh)s),
+            COALESCE(SUM(a.work_hours), 0),
+            COALESCE(SUM(a.overtime_hours), 0)
+        FROM {attendance} a
+        JOIN {employee} e ON e.id = a.employee_id
+        {join}
+        WHERE a.is_active AND {where}
+        GROUP BY e.tenant_id, a.employee_id, EXTRACT(YEAR FROM a.date), EXTRACT(MONTH FROM a.date)
+        ON CONFLICT (employee_id, year, month) DO UPDATE SET
+            tenant_id = EXCLUDED.tenant_id,
+            total_days = EXCLUDED.total_days,
+            present_days = EXCLUDED.present_days,
+            absent_days = EXCLUDED.absent_days,
+            late_days = EXCLUDED.late_days,
+            leave_days = EXCLUDED.leave_days,
+            sick_days = EXCLUDED.sick_days,
+            wfh_days = EXCLUDED.wfh_days,
+            total_work_hours = EXCLUDED.total_work_hours,
+            total_overtime_hours = EXCLUDED.total_overtime_hours,
+            updated_at = EXCLUDED.updated_at
+    """
+
+
+def _status_params():
+    return {
+        'present': AttendanceStatus.PRESENT.value,
+        'absent': AttendanceStatus.ABSENT.value,
+        'late': AttendanceStatus.LATE.value,
+        'leave': AttendanceStatus.LEAVE.value,
+        'sick': AttendanceStatus.SICK.value,
+        'wfh': AttendanceStatus.WORK_FROM_HOME.value,
+    }
+
+
+def refresh_months(keys):
+    """
+    Recompute the summaries of the given employee-months.
+
+    Args:
+        keys: Iterable of (employee_id, date) pairs; any day of the month works
+    """
+    months = sorted({(str(employee_id), month_start(day)) for employee_id, day in keys if employee_id and day})
+    if not months:
+        return
+
+    summary, attendance, _ = _tables()
+    values = _values_list(len(months))
+    pairs = {f'k{i}': value for i, value in enumerate(v for pair in months for v in pair)}
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _upsert_sql(
+                join=f'JOIN (VALUES {values}) AS k(employee_id, month_start) '
+                     'ON a.employee_id = k.employee_id AND a.date >= k.month_start '
+                     "AND a.date < k.month_start + interval '1 month'",
+            ),
+            {**_status_params(), **pairs},
+        )
+
+        # Employee-months whose last attendance row was deleted
+        cursor.execute(
+            f"""
+            DELETE FROM {summary} s
+            USING (VALUES {values}) AS k(employee_id, month_start)
+            WHERE s.employee_id = k.employee_id
+              AND s.year = EXTRACT(YEAR FROM k.month_start)
+              AND s.month = EXTRACT(MONTH FROM k.month_start)
+              AND NOT EXISTS (
+                  SELECT 1 FROM {attendance} a
+                  WHERE a.employee_id = k.employee_id AND a.is_active
+                    AND a.date >= k.month_start AND a.date < k.month_start + interval '1 month'
+              )
+            """,
+            pairs,
+        )
+
+
+def _values_list(count):
+    return ', '.join(f'(%(k{2 * i})s::uuid, %(k{2 * i + 1})s::date)' for i in range(count))
+
+
+def rebuild_month(tenant_id, year, month) -> int:
+    """
+    Recompute every summary of one tenant-month in a single statement.
+
+    Returns:
+        Number of summary rows written
+    """
+    summary, attendance, employee = _tables()
+    start = date(year, month, 1)
+    params = {
+        **_status_params(),
+        'tenant': tenant_id,
+        'start': start,
+        'end': _next_month(start),
+        'year': year,
+        'month': month,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _upsert_sql(where='e.tenant_id IS NOT DISTINCT FROM %(tenant)s '
+                              'AND a.date >= %(start)s AND a.date < %(end)s'),
+            params,
+        )
+        written = cursor.rowcount
+        cursor.execute(
+            f"""
+            DELETE FROM {summary} s
+            WHERE s.tenant_id IS NOT DISTINCT FROM %(tenant)s
+              AND s.year = %(year)s AND s.month = %(month)s
+              AND NOT EXISTS (
+                  SELECT 1 FROM {attendance} a
+                  WHERE a.employee_id = s.employee_id AND a.is_active
+                    AND a.date >= %(start)s AND a.date < %(end)s
+              )
+            """,
+            params,
+        )
+    return written
+
+
+def attendance_months(tenant_id=None, year=None, month=None):
+    """Distinct (tenant_id, year, month) combinations that have attendance."""
+    rows = Attendance.all_objects.filter(is_active=True)
+    if tenant_id is not None:
+        rows = rows.filter(employee__tenant_id=tenant_id)
+    if year:
+        rows = rows.filter(date__year=year)
+    if month:
+        rows = rows.filter(date__month=month)
+    return sorted(
+        rows.values_list('employee__tenant_id', 'date__year', 'date__month').distinct().order_by(),
+        key=lambda row: (str(row[0]), row[1], row[2]),
+    )
+
+
+def rebuild_all(tenant_id=None, year=None, month=None) -> int:
+    """Rebuild summaries for every tenant-month that has attendance."""
+    return sum(rebuild_month(*key) for key in attendance_months(tenant_id, year, month))
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Attendance, AttendanceSummary
+from .models import Attendance, AttendanceSummary, SyncEventType
+from .sync import MAX_BATCH_SIZE
 
 
 class AttendanceSerializer(serializers.ModelSerializer):
@@ -31,6 +32,25 @@ class AttendanceCheckOutSerializer(serializers.Serializer):
     location = serializers.CharField(max_length=255, required=False)
 
 
+class AttendanceSyncEventSerializer(serializers.Serializer):
+    idempotency_key = serializers.CharField(max_length=64)
+    type = serializers.ChoiceField(choices=SyncEventType.choices)
+    employee_id = serializers.CharField(max_length=50)
+    timestamp = serializers.DateTimeField()
+    latitude = serializers.DecimalField(max_digits=10, decimal_places=7, required=False, allow_null=True)
+    longitude = serializers.DecimalField(max_digits=10, decimal_places=7, required=False, allow_null=True)
+    location = serializers.CharField(max_length=255, required=False, allow_blank=True)
+
+
+class AttendanceSyncBatchSerializer(serializers.Serializer):
+    events = AttendanceSyncEventSerializer(many=True, allow_empty=False)
+
+    def validate_events(self, value):
+        if len(value) > MAX_BATCH_SIZE:
+            raise serializers.ValidationError(f'Maksimal {MAX_BATCH_SIZE} event per batch.')
+        return value
+
+
 class AttendanceSummarySerializer(serializers.ModelSerializer):
     employee_name = serializers.CharField(source='employee.full_name', read_only=True)
 
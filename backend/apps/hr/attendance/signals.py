@@ -0,0 +1,18 @@
+"""Signal handlers keeping attendance rollups in sync."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Attendance
+from . import rollup
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def refresh_attendance_summary(sender, instance, **kwargs):
+    """Recompute the employee-month summaries touched by an attendance write."""
+    keys = {(instance.employee_id, instance.date)}
+    loaded = getattr(instance, '_loaded_rollup_key', None)
+    if loaded is not None:
+        keys.add(loaded)
+    rollup.refresh_months(keys)
+    instance._loaded_rollup_key = (instance.employee_id, instance.date)
@@ -0,0 +1,232 @@
+"""
+Batched attendance sync for kiosks and offline-capable mobile clients.
+
+Devices queue check-in/check-out events locally and push them as one signed
+batch:
+
+    POST /api/v1/hr/attendance/attendances/sync/
+    X-Device-Id: <device_id>
+    X-Signature: sha256=<hex HMAC-SHA256 of the raw body with the device secret>
+
+    {"events": [{"idempotency_key": "...", "type": "check_in",
+                 "employee_id": "EMP001", "timestamp": "2025-01-06T07:58:12+07:00",
+                 "latitude": ..., "longitude": ..., "location": "..."}]}
+
+A batch is applied with a fixed number of queries regardless of its size:
+replayed idempotency keys are answered from the ledger, employees are
+resolved in one query, the affected `Attendance` rows are locked and merged
+(earliest check-in, latest check-out) and written back with a single
+`bulk_create(update_conflicts=True)` on `(employee, date)`.
+"""
+import hashlib
+import hmac
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.hr.models import Employee
+from . import rollup
+from .models import (
+    Attendance, AttendanceDevice, AttendanceStatus,
+    AttendanceSyncEvent, SyncEventResult, SyncEventType,
+)
+
+MAX_BATCH_SIZE = 500
+
+# Result statuses returned per event
+APPLIED = 'applied'
+DUPLICATE = 'duplicate'
+REJECTED = 'rejected'
+
+_CHECK_IN_FIELDS = ('check_in', 'check_in_latitude', 'check_in_longitude', 'check_in_location')
+_CHECK_OUT_FIELDS = ('check_out', 'check_out_latitude', 'check_out_longitude', 'check_out_location')
+
+
+class SyncAuthenticationError(Exception):
+    """Raised when the device is unknown or the batch signature is invalid."""
+
+
+def sign_batch(secret: str, body: bytes) -> str:
+    """Signature header value for a batch body."""
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def authenticate_device(device_id: str, signature: str, body: bytes):
+    """
+    Resolve the device for a signed batch.
+
+    Raises:
+        SyncAuthenticationError: Unknown or inactive device, or bad signature
+    """
+    device = AttendanceDevice.all_objects.filter(device_id=device_id or '', is_active=True).first()
+    if device is None:
+        raise SyncAuthenticationError('Unknown device')
+    if not hmac.compare_digest(sign_batch(device.secret, body), signature or ''):
+        raise SyncAuthenticationError('Invalid signature')
+    return device
+
+
+def _validate_time(occurred_at, now):
+    max_age = timedelta(days=getattr(settings, 'ATTENDANCE_SYNC_MAX_AGE_DAYS', 7))
+    max_skew = timedelta(seconds=getattr(settings, 'ATTENDANCE_SYNC_MAX_CLOCK_SKEW', 300))
+    if occurred_at > now + max_skew:
+        return 'timestamp_in_future'
+    if occurred_at < now - max_age:
+        return 'timestamp_too_old'
+    return ''
+
+
+def _apply(record, event):
+    """Merge one event into an attendance row. Returns an error code or ''."""
+    occurred_at = event['timestamp']
+    geo = (event.get('latitude'), event.get('longitude'), event.get('location', ''))
+
+    if event['type'] == SyncEventType.CHECK_IN:
+        if record.check_out and occurred_at > record.check_out:
+            return 'check_in_after_check_out'
+        # Keep the earliest check-in when events arrive out of order
+        if record.check_in is None or occurred_at < record.check_in:
+            for field, value in zip(_CHECK_IN_FIELDS, (occurred_at,) + geo):
+                setattr(record, field, value)
+        return ''
+
+    if record.check_in is None:
+        return 'no_check_in'
+    if occurred_at < record.check_in:
+        return 'check_out_before_check_in'
+    if record.check_out is None or occurred_at > record.check_out:
+        for field, value in zip(_CHECK_OUT_FIELDS, (occurred_at,) + geo):
+            setattr(record, field, value)
+    return ''
+
+
+def sync_events(device, events: list) -> list:
+    """
+    Apply a batch of validated events from a device.
+
+    Args:
+        device: Authenticated AttendanceDevice
+        events: Dicts with idempotency_key, type, employee_id, timestamp
+            (aware datetime) and optional latitude/longitude/location
+
+    Returns:
+        One result dict per input event, in input order
+    """
+    now = timezone.now()
+    results = {}
+
+    with transaction.atomic():
+        # Serializes batches from the same device so a retried batch racing
+        # the original cannot apply an event twice
+        AttendanceDevice.all_objects.select_for_update().filter(pk=device.pk).first()
+
+        keys = [event['idempotency_key'] for event in events]
+        for seen in AttendanceSyncEvent.all_objects.filter(device=device, idempotency_key__in=keys):
+            results[seen.idempotency_key] = {
+                'idempotency_key': seen.idempotency_key,
+                'status': DUPLICATE,
+                'result': seen.result,
+                'error': seen.error or None,
+                'attendance_id': str(seen.attendance_id) if seen.attendance_id else None,
+            }
+
+        # Later copies of a key within the same batch are duplicates too
+        pending = []
+        for event in events:
+            key = event['idempotency_key']
+            if key not in results:
+                results[key] = None
+                pending.append(event)
+
+        employees = {
+            employee.employee_id: employee
+            for employee in Employee.all_objects.filter(
+                tenant_id=device.tenant_id,
+                employee_id__in={event['employee_id'] for event in pending},
+                is_active=True,
+            ).only('id', 'employee_id', 'tenant_id')
+        }
+
+        # Lock and load every attendance row the batch touches in one query
+        slots = {}
+        for event in pending:
+            employee = employees.get(event['employee_id'])
+            if employee is not None:
+                slots[(employee.pk, timezone.localdate(event['timestamp']))] = None
+        if slots:
+            existing = Attendance.all_objects.select_for_update().filter(
+                employee_id__in={employee_id for employee_id, _ in slots},
+                date__in={day for _, day in slots},
+            )
+            for record in existing:
+                if (record.employee_id, record.date) in slots:
+                    slots[(record.employee_id, record.date)] = record
+
+        # Check-ins before check-outs for the same moment ordering
+        ledger = []
+        outcome = {}
+        touched = {}
+        for event in sorted(pending, key=lambda e: (e['timestamp'], e['type'] != SyncEventType.CHECK_IN)):
+            employee = employees.get(event['employee_id'])
+            error = 'unknown_employee' if employee is None else _validate_time(event['timestamp'], now)
+
+            slot = None
+            if not error:
+                slot = (employee.pk, timezone.localdate(event['timestamp']))
+                record = slots[slot]
+                if record is None:
+                    record = Attendance(
+                        tenant_id=device.tenant_id,
+                        employee_id=employee.pk,
+                        date=slot[1],
+                        status=AttendanceStatus.PRESENT,
+                    )
+                    slots[slot] = record
+                error = _apply(record, event)
+                if not error:
+                    touched[slot] = record
+
+            outcome[event['idempotency_key']] = (slot if not error else None, error)
+            ledger.append(AttendanceSyncEvent(
+                tenant_id=device.tenant_id,
+                device=device,
+                idempotency_key=event['idempotency_key'],
+                event_type=event['type'],
+                employee=employee,
+                occurred_at=event['timestamp'],
+                result=SyncEventResult.REJECTED if error else SyncEventResult.APPLIED,
+                error=error,
+            ))
+
+        if touched:
+            records = list(touched.values())
+            for record in records:
+                record.calculate_work_hours()
+                record.updated_at = now
+            Attendance.all_objects.bulk_create(
+                records,
+                update_conflicts=True,
+                unique_fields=['employee', 'date'],
+                update_fields=list(_CHECK_IN_FIELDS + _CHECK_OUT_FIELDS) + ['work_hours', 'updated_at'],
+            )
+            # bulk_create skips the signal that maintains the rollups
+            rollup.refresh_months(touched)
+
+        for entry in ledger:
+            slot, error = outcome[entry.idempotency_key]
+            if slot is not None:
+                entry.attendance_id = touched[slot].pk
+        AttendanceSyncEvent.all_objects.bulk_create(ledger)
+
+        AttendanceDevice.all_objects.filter(pk=device.pk).update(last_synced_at=now)
+
+    for entry in ledger:
+        results[entry.idempotency_key] = {
+            'idempotency_key': entry.idempotency_key,
+            'status': REJECTED if entry.error else APPLIED,
+            'error': entry.error or None,
+            'attendance_id': str(entry.attendance_id) if entry.attendance_id else None,
+        }
+    return [results[event['idempotency_key']] for event in events]
@@ -1,9 +1,11 @@
 from datetime import date
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import AllowAny
 from drf_spectacular.utils import extend_schema
 from drf_spectacular.types import OpenApiTypes
 
@@ -13,9 +15,12 @@ from .serializers import (
     AttendanceCheckInSerializer,
     AttendanceCheckOutSerializer,
     AttendanceSummarySerializer,
+    AttendanceSyncBatchSerializer,
 )
+from .sync import SyncAuthenticationError, authenticate_device, sync_events
 from apps.hr.serializers import FaceAttendanceSerializer
 from apps.hr.services.face_recognition import face_service
+from apps.hr.services.face_index import face_index
 from apps.hr.models import Employee
 
 
@@ -166,7 +171,8 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             verification_bytes = face_service.read_image_file(face_image)
 
             # Detect face first
-            detection = face_service.detect_faces(verification_bytes)
+            detector = face_index if face_index.enabled else face_service
+            detection = detector.detect_faces(verification_bytes)
             if not detection['success'] or detection['face_count'] == 0:
                 return Response({
                     'error': 'No face detected',
@@ -180,11 +186,14 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             # Find matching employee
-            result = face_service.find_matching_employee(
-                verification_bytes,
-                Employee.objects.all(),
-                threshold=90.0
-            )
+            if face_index.enabled:
+                result = face_index.identify(verification_bytes)
+            else:
+                result = face_service.find_matching_employee(
+                    verification_bytes,
+                    Employee.objects.all(),
+                    threshold=90.0
+                )
 
             if not result:
                 return Response({
@@ -281,7 +290,8 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             verification_bytes = face_service.read_image_file(face_image)
 
             # Detect face first
-            detection = face_service.detect_faces(verification_bytes)
+            detector = face_index if face_index.enabled else face_service
+            detection = detector.detect_faces(verification_bytes)
             if not detection['success'] or detection['face_count'] == 0:
                 return Response({
                     'error': 'No face detected',
@@ -295,11 +305,14 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             # Find matching employee
-            result = face_service.find_matching_employee(
-                verification_bytes,
-                Employee.objects.all(),
-                threshold=90.0
-            )
+            if face_index.enabled:
+                result = face_index.identify(verification_bytes)
+            else:
+                result = face_service.find_matching_employee(
+                    verification_bytes,
+                    Employee.objects.all(),
+                    threshold=90.0
+                )
 
             if not result:
                 return Response({
@@ -356,9 +369,157 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @extend_schema(
+        summary="Batch sync from attendance devices",
+        description="""
+        Apply a batch of check-in/check-out events queued by a kiosk or
+        offline mobile client.
+
+        **Headers:**
+        - X-Device-Id: registered device id
+        - X-Signature: `sha256=<hex>` HMAC-SHA256 of the raw body with the device secret
+
+        Each event carries an idempotency key; replayed keys return
+        `duplicate` with the original outcome, so a device can resend a
+        batch until it gets a response. Results are returned per event in
+        request order.
+        """,
+        request=AttendanceSyncBatchSerializer,
+        responses={
+            200: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+            403: OpenApiTypes.OBJECT,
+        },
+        tags=["HR - Attendance"],
+    )
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='sync',
+        permission_classes=[AllowAny],
+        authentication_classes=[],
+    )
+    def sync(self, request):
+        """Apply a signed batch of device events."""
+        # The signature covers the raw body, read it before parsing
+        body = request.body
+        try:
+            device = authenticate_device(
+                request.headers.get('X-Device-Id', ''),
+                request.headers.get('X-Signature', ''),
+                body,
+            )
+        except SyncAuthenticationError:
+            return Response(
+                {'error': 'Perangkat atau tanda tangan tidak valid'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        serializer = AttendanceSyncBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = sync_events(device, serializer.validated_data['events'])
+        return Response({
+            'device': device.device_id,
+            'applied': sum(1 for r in results if r['status'] == 'applied'),
+            'duplicates': sum(1 for r in results if r['status'] == 'duplicate'),
+            'rejected': sum(1 for r in results if r['status'] == 'rejected'),
+            'results': results,
+        })
+
 
 class AttendanceSummaryViewSet(viewsets.ModelViewSet):
     queryset = AttendanceSummary.objects.select_related('employee').all()
     serializer_class = AttendanceSummarySerializer
     filterset_fields = ['employee', 'year', 'month']
     search_fields = ['employee__first_name', 'employee__last_name', 'employee__employee_id']
+
+    @extend_schema(
+        summary="Monthly attendance dashboard",
+        description="""
+        Attendance totals for a month, overall and per department, plus the
+        trend of the preceding months. Served entirely from the
+        AttendanceSummary rollup table.
+
+        **Query params:** year, month (default: current month),
+        department (optional), months (trend length, default 6)
+        """,
+        responses={200: OpenApiTypes.OBJECT},
+        tags=["HR - Attendance"],
+    )
+    @action(detail=False, methods=['get'])
+    def dashboard(self, request):
+        """Monthly attendance dashboard from the rollup table."""
+        today = timezone.localdate()
+        try:
+            year = int(request.query_params.get('year', today.year))
+            month = int(request.query_params.get('month', today.month))
+            months = min(max(int(request.query_params.get('months', 6)), 1), 24)
+        except ValueError:
+            return Response(
+                {'error': 'year, month dan months harus berupa angka'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= month <= 12:
+            return Response({'error': 'month harus 1-12'}, status=status.HTTP_400_BAD_REQUEST)
+
+        summaries = AttendanceSummary.objects.all()
+        department = request.query_params.get('department')
+        if department:
+            summaries = summaries.filter(employee__department_id=department)
+
+        totals = {field: Sum(field) for field in DASHBOARD_FIELDS}
+        current = summaries.filter(year=year, month=month)
+
+        overall = current.aggregate(employees=Count('id'), **totals)
+        departments = current.values(
+            'employee__department_id', 'employee__department__name',
+        ).annotate(employees=Count('id'), **totals).order_by('employee__department__name')
+
+        # Months ending at the requested one, oldest first
+        index = year * 12 + month - 1
+        window = [divmod(i, 12) for i in range(index - months + 1, index + 1)]
+        trend_filter = Q()
+        for y, m in window:
+            trend_filter |= Q(year=y, month=m + 1)
+        trend = {
+            (row['year'], row['month']): row
+            for row in summaries.filter(trend_filter).values('year', 'month').annotate(
+                employees=Count('id'), **totals,
+            ).order_by()
+        }
+
+        return Response({
+            'year': year,
+            'month': month,
+            **_dashboard_row(overall),
+            'departments': [
+                {
+                    'department': row['employee__department_id'],
+                    'department_name': row['employee__department__name'] or 'Tanpa Departemen',
+                    **_dashboard_row(row),
+                }
+                for row in departments
+            ],
+            'trend': [
+                {'year': y, 'month': m + 1, **_dashboard_row(trend.get((y, m + 1), {}))}
+                for y, m in window
+            ],
+        })
+
+
+DASHBOARD_FIELDS = (
+    'total_days', 'present_days', 'absent_days', 'late_days', 'leave_days',
+    'sick_days', 'wfh_days', 'total_work_hours', 'total_overtime_hours',
+)
+
+
+def _dashboard_row(row):
+    """Totals of one dashboard bucket with the attendance rate (present + late + WFH)."""
+    values = {field: row.get(field) or 0 for field in DASHBOARD_FIELDS}
+    attended = values['present_days'] + values['late_days'] + values['wfh_days']
+    return {
+        'employees': row.get('employees') or 0,
+        **values,
+        'attendance_rate': round(attended / values['total_days'] * 100, 2) if values['total_days'] else 0,
+    }
@@ -0,0 +1,59 @@
+"""
+Compute face embeddings for employees registered before the face index.
+
+Reads each registered face image once and stores its embedding in
+`Employee.face_encoding` for the configured FACE_EMBEDDING_BACKEND.
+Employees that already have an embedding from that backend are skipped.
+
+Usage:
+    python manage.py build_face_index
+    python manage.py build_face_index --force
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.hr.models import Employee
+from apps.hr.services.face_index import face_index
+
+
+class Command(BaseCommand):
+    help = 'Compute face embeddings for registered employees'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recompute embeddings that already exist',
+        )
+
+    def handle(self, *args, **options):
+        if not face_index.enabled:
+            raise CommandError('FACE_EMBEDDING_BACKEND is not configured (or numpy is missing)')
+
+        employees = Employee.all_objects.filter(face_registered=True).exclude(face_image='')
+        done = skipped = failed = 0
+        tenants = set()
+
+        for employee in employees.iterator(chunk_size=100):
+            if not options['force'] and face_index.decode(employee.face_encoding) is not None:
+                skipped += 1
+                continue
+            try:
+                with employee.face_image.open('rb') as f:
+                    registered = face_index.register(employee, f.read())
+            except Exception as e:
+                self.stderr.write(f'{employee.employee_id}: {e}')
+                failed += 1
+                continue
+            if not registered:
+                self.stderr.write(f'{employee.employee_id}: expected exactly one face')
+                failed += 1
+                continue
+            employee.save(update_fields=['face_encoding', 'updated_at'])
+            tenants.add(employee.tenant_id)
+            done += 1
+
+        for tenant_id in tenants:
+            face_index.invalidate(tenant_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Embedded {done} faces ({skipped} up to date, {failed} failed)'
+        ))
@@ -0,0 +1,34 @@
+"""
+Rebuild the AttendanceSummary rollup table from attendance records.
+
+Summaries are kept in sync by signal handlers; run this to backfill them or
+after bulk imports and raw SQL changes that bypass model signals. Each
+tenant-month is recomputed with one set-based upsert.
+
+Usage:
+    python manage.py rebuild_attendance_summaries
+    python manage.py rebuild_attendance_summaries --year 2025 --month 1
+"""
+from django.core.management.base import BaseCommand
+from apps.hr.attendance import rollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild monthly attendance summaries from attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Only rebuild this tenant id')
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--month', type=int)
+
+    def handle(self, *args, **options):
+        months = rollup.attendance_months(options['tenant'], options['year'], options['month'])
+        written = 0
+        for tenant_id, year, month in months:
+            count = rollup.rebuild_month(tenant_id, year, month)
+            written += count
+            self.stdout.write(f'  {tenant_id or "-"} {month:02d}/{year}: {count} summaries')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {written} summaries across {len(months)} tenant-months'
+        ))
@@ -0,0 +1,55 @@
+"""
+Generate and/or calculate the payslips of a payroll period.
+
+Runs the same set-based engine as the period API actions, printing progress
+as it goes; intended for large periods.
+
+Usage:
+    python manage.py run_payroll --year 2025 --month 1
+    python manage.py run_payroll --period <uuid> --calculate-only
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.hr.payroll_light.engine import PayrollEngine
+from apps.hr.payroll_light.models import PayrollPeriod, PayrollStatus
+
+
+class Command(BaseCommand):
+    help = 'Generate and calculate payslips for a payroll period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', help='Payroll period id')
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--month', type=int)
+        parser.add_argument(
+            '--calculate-only',
+            action='store_true',
+            help='Skip payslip generation',
+        )
+
+    def handle(self, *args, **options):
+        periods = PayrollPeriod.all_objects.all()
+        if options['period']:
+            periods = periods.filter(pk=options['period'])
+        elif options['year'] and options['month']:
+            periods = periods.filter(year=options['year'], month=options['month'])
+        else:
+            raise CommandError('Pass --period, or --year and --month')
+
+        period = periods.first()
+        if period is None:
+            raise CommandError('Payroll period not found')
+
+        def progress(stage, done, total):
+            self.stdout.write(f'  {stage}: {done}/{total}')
+
+        engine = PayrollEngine(period, progress=progress)
+        if not options['calculate_only']:
+            if period.status != PayrollStatus.DRAFT:
+                raise CommandError('Can only generate payslips for draft periods')
+            result = engine.generate()
+            self.stdout.write(f"Generated {result['created']} payslips ({result['total']} total)")
+
+        period = engine.calculate()
+        self.stdout.write(self.style.SUCCESS(
+            f'{period}: {period.total_employees} payslips, net Rp {period.total_net:,.0f}'
+        ))
@@ -297,29 +297,7 @@ class Command(BaseCommand):
                         notes=f'Tidak hadir - {status}',
                     )
 
-        # Create monthly summary for current month
-        current_month = today.month
-        current_year = today.year
-        for employee in employees:
-            attendances = Attendance.objects.filter(
-                employee=employee,
-                date__year=current_year,
-                date__month=current_month,
-            )
-            AttendanceSummary.objects.create(
-                employee=employee,
-                year=current_year,
-                month=current_month,
-                total_days=attendances.count(),
-                present_days=attendances.filter(status=AttendanceStatus.PRESENT).count(),
-                absent_days=attendances.filter(status=AttendanceStatus.ABSENT).count(),
-                late_days=attendances.filter(status=AttendanceStatus.LATE).count(),
-                leave_days=attendances.filter(status=AttendanceStatus.LEAVE).count(),
-                sick_days=attendances.filter(status=AttendanceStatus.SICK).count(),
-                wfh_days=attendances.filter(status=AttendanceStatus.WORK_FROM_HOME).count(),
-                total_work_hours=sum(a.work_hours or 0 for a in attendances),
-                total_overtime_hours=sum(a.overtime_hours or 0 for a in attendances),
-            )
+        # Monthly AttendanceSummary rows are maintained by the attendance rollup signals
 
     def create_leave_data(self, employees):
         """Create leave policies, balances, and some requests."""
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0008_alter_employee_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employee',
+            name='face_encoding',
+            field=models.TextField(blank=True, help_text='Face embedding for recognition (JSON: backend name and vector)'),
+        ),
+    ]
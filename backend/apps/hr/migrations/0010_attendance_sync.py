@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:56
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0009_alter_employee_face_encoding'),
+        ('tenants', '0002_invoice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDevice',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('name', models.CharField(max_length=100)),
+                ('device_id', models.CharField(max_length=64, unique=True)),
+                ('secret', models.CharField(max_length=128)),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Attendance Device',
+                'verbose_name_plural': 'Attendance Devices',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceSyncEvent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('idempotency_key', models.CharField(max_length=64)),
+                ('event_type', models.CharField(choices=[('check_in', 'Check In'), ('check_out', 'Check Out')], max_length=20)),
+                ('occurred_at', models.DateTimeField()),
+                ('result', models.CharField(choices=[('applied', 'Diterapkan'), ('rejected', 'Ditolak')], max_length=20)),
+                ('error', models.CharField(blank=True, max_length=100)),
+                ('attendance', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sync_events', to='hr.attendance')),
+                ('device', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_events', to='hr.attendancedevice')),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_sync_events', to='hr.employee')),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Attendance Sync Event',
+                'verbose_name_plural': 'Attendance Sync Events',
+                'ordering': ['-occurred_at'],
+                'unique_together': {('device', 'idempotency_key')},
+            },
+        ),
+    ]
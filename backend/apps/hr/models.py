@@ -1,6 +1,6 @@
 from django.db import models
 from django.conf import settings
-from apps.core.models import TenantBaseModel, AuditMixin
+from apps.core.models import TenantBaseModel, AuditMixin, TreeMixin
 from apps.core.enums import (
     EmploymentType,
     EmploymentStatus,
@@ -10,9 +10,22 @@ from apps.core.enums import (
 )
 
 
-class Employee(TenantBaseModel, AuditMixin):
+class Employee(TreeMixin, TenantBaseModel, AuditMixin):
     """Employee model containing all staff details."""
 
+    # The reporting line is the tree (see TreeMixin)
+    tree_parent = 'supervisor'
+
+    # Fields shown in an org chart node or deciding where it sits
+    # (apps.organization.org_chart)
+    ORG_CHART_FIELDS = (
+        'tenant_id', 'path', 'supervisor_id', 'department_id', 'avatar',
+        'first_name', 'last_name', 'position', 'job_title', 'employee_id', 'is_active',
+    )
+    # Fields deciding the employee's entry in the face index
+    # (apps.hr.services.face_index)
+    FACE_INDEX_FIELDS = ('tenant_id', 'is_active', 'face_registered', 'face_encoding')
+
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -96,7 +109,7 @@ class Employee(TenantBaseModel, AuditMixin):
     )
     face_encoding = models.TextField(
         blank=True,
-        help_text='Encoded face data for recognition (JSON array)'
+        help_text='Face embedding for recognition (JSON: backend name and vector)'
     )
     face_registered = models.BooleanField(
         default=False,
@@ -124,15 +137,38 @@ class Employee(TenantBaseModel, AuditMixin):
             models.Index(fields=['employment_type', 'employment_status']),
             models.Index(fields=['first_name', 'last_name']),
             models.Index(fields=['national_id']),
+            TreeMixin.path_index('hr_employee_path'),
         ]
 
     def __str__(self):
         return f"{self.employee_id} - {self.full_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a change also refreshes the dashboard rollups of the old values
+        instance._loaded_rollup_state = {
+            name: instance.__dict__.get(name)
+            for name in ('tenant_id', 'employment_status', 'employment_type', 'gender', 'department_id', 'join_date')
+        }
+        # Remembered so a change drops the cached org chart subtrees along the old reporting line
+        instance._loaded_org_chart_state = instance.org_chart_state()
+        # Remembered so deactivating or moving a registered face refreshes the face index
+        instance._loaded_face_state = instance.face_index_state()
+        return instance
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
 
+    def org_chart_state(self) -> dict:
+        """The values the employee's org chart nodes depend on."""
+        return {name: self.__dict__.get(name) for name in self.ORG_CHART_FIELDS}
+
+    def face_index_state(self) -> dict:
+        """The values the employee's entry in the face index depends on."""
+        return {name: self.__dict__.get(name) for name in self.FACE_INDEX_FIELDS}
+
 
 class EmployeeFamily(TenantBaseModel):
     """Family members of an employee."""
@@ -0,0 +1,286 @@
+"""
+Set-based payroll generation and calculation.
+
+A run touches every employee of a period with a fixed number of queries:
+active employees, existing payslips, effective salary components, item
+totals and attendance are each loaded in one query; totals are computed in
+memory column by column; payslips and items are written with
+`bulk_create`/`bulk_update` in chunks, and the period totals are updated in
+the same transaction.
+
+Progress of a run is published in the cache (see `get_progress`) so clients
+can poll long runs, and optionally passed to a callback.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.core.enums import EmploymentStatus
+from apps.hr.attendance.models import Attendance, AttendanceStatus
+from apps.hr.models import Employee
+from .models import PayrollPeriod, PayrollStatus, Payslip, PayslipItem, SalaryComponent
+
+BATCH_SIZE = 1000
+PROGRESS_TIMEOUT = 60 * 60
+
+_PROGRESS_KEY = 'hr:payroll:progress:{}'
+_CENT = Decimal('0.01')
+
+# Attendance statuses counted as days present
+_PRESENT_STATUSES = [AttendanceStatus.PRESENT, AttendanceStatus.LATE, AttendanceStatus.WORK_FROM_HOME]
+
+
+def component_item_type(component) -> str:
+    """Payslip item type ('allowance' or 'deduction') for a salary component."""
+    if 'allowance' in component.component_type.lower() or 'tunjangan' in component.component_name.lower():
+        return 'allowance'
+    return 'deduction'
+
+
+def get_progress(period_id):
+    """Last reported progress of a run for a period, or None."""
+    return cache.get(_PROGRESS_KEY.format(period_id))
+
+
+def _chunks(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class PayrollEngine:
+    """
+    Generates and calculates the payslips of one payroll period.
+
+    Args:
+        period: PayrollPeriod to process
+        user: User recorded as creator/updater of written rows
+        progress: Optional callable(stage, done, total)
+    """
+
+    def __init__(self, period, user=None, progress=None):
+        self.period = period
+        self.user = user if user is not None and user.is_authenticated else None
+        self.callback = progress
+
+    # ==================== Progress ====================
+
+    def report(self, stage, done, total):
+        cache.set(_PROGRESS_KEY.format(self.period.pk), {
+            'stage': stage,
+            'done': done,
+            'total': total,
+            'updated_at': timezone.now().isoformat(),
+        }, timeout=PROGRESS_TIMEOUT)
+        if self.callback is not None:
+            self.callback(stage, done, total)
+
+    def _lock_period(self):
+        # Serializes concurrent runs for the same period
+        self.period = PayrollPeriod.all_objects.select_for_update().get(pk=self.period.pk)
+
+    # ==================== Generation ====================
+
+    def _employees(self):
+        return Employee.all_objects.filter(
+            tenant_id=self.period.tenant_id,
+            employment_status=EmploymentStatus.ACTIVE,
+        )
+
+    def _components(self, employee_ids):
+        """Effective fixed components grouped by employee."""
+        period = self.period
+        components = SalaryComponent.all_objects.filter(
+            employee__in=self._employees(),
+            is_fixed=True,
+            effective_date__lte=period.end_date,
+        ).filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=period.start_date)
+        ).only('employee_id', 'component_type', 'component_name', 'amount').order_by('employee_id')
+
+        grouped = {}
+        for component in components.iterator(chunk_size=BATCH_SIZE):
+            if component.employee_id in employee_ids:
+                grouped.setdefault(component.employee_id, []).append(component)
+        return grouped
+
+    def generate(self) -> dict:
+        """
+        Create draft payslips, with their fixed component items, for active
+        employees that do not have one in the period yet.
+
+        Returns:
+            Dict with `created` and `total` payslip counts
+        """
+        with transaction.atomic():
+            self._lock_period()
+            period = self.period
+
+            existing = set(
+                Payslip.all_objects.filter(payroll_period=period).values_list('employee_id', flat=True).order_by()
+            )
+            missing = [
+                pk for pk in self._employees().values_list('id', flat=True).order_by('employee_id')
+                if pk not in existing
+            ]
+            components = self._components(set(missing))
+
+            total = len(missing)
+            self.report('generate', 0, total)
+            done = 0
+            for chunk in _chunks(missing):
+                payslips = [
+                    Payslip(
+                        tenant_id=period.tenant_id,
+                        payroll_period=period,
+                        employee_id=employee_id,
+                        basic_salary=0,  # Set manually or through the payslip API
+                        status=PayrollStatus.DRAFT,
+                        created_by=self.user,
+                    )
+                    for employee_id in chunk
+                ]
+                Payslip.all_objects.bulk_create(payslips)
+
+                items = [
+                    PayslipItem(
+                        tenant_id=period.tenant_id,
+                        payslip=payslip,
+                        item_type=component_item_type(component),
+                        name=component.component_name,
+                        amount=component.amount,
+                    )
+                    for payslip in payslips
+                    for component in components.get(payslip.employee_id, ())
+                ]
+                PayslipItem.all_objects.bulk_create(items, batch_size=BATCH_SIZE)
+
+                done += len(chunk)
+                self.report('generate', done, total)
+
+            period.total_employees = len(existing) + total
+            period.updated_by = self.user
+            period.save(update_fields=['total_employees', 'updated_by', 'updated_at'])
+
+        return {'created': total, 'total': period.total_employees}
+
+    # ==================== Calculation ====================
+
+    def _item_totals(self):
+        """{payslip_id: (allowances, deductions)} in one grouped query."""
+        totals = {}
+        rows = PayslipItem.all_objects.filter(
+            payslip__payroll_period=self.period,
+        ).values('payslip_id', 'item_type').annotate(total=Sum('amount')).order_by()
+        for row in rows:
+            allowances, deductions = totals.get(row['payslip_id'], (Decimal('0'), Decimal('0')))
+            if row['item_type'] == 'allowance':
+                allowances = row['total']
+            else:
+                deductions = row['total']
+            totals[row['payslip_id']] = (allowances, deductions)
+        return totals
+
+    def _attendance(self):
+        """{employee_id: (present_days, absent_days, overtime_hours)} for the period."""
+        period = self.period
+        rows = Attendance.all_objects.filter(
+            employee__payslips__payroll_period=period,
+            date__range=(period.start_date, period.end_date),
+            is_active=True,
+        ).values('employee_id').annotate(
+            present=Count('id', filter=Q(status__in=_PRESENT_STATUSES)),
+            absent=Count('id', filter=Q(status=AttendanceStatus.ABSENT)),
+            overtime=Sum('overtime_hours'),
+        ).order_by()
+        return {
+            row['employee_id']: (row['present'], row['absent'], row['overtime'] or Decimal('0'))
+            for row in rows
+        }
+
+    def calculate(self):
+        """
+        Recalculate every payslip of the period and the period totals.
+
+        Present/absent days, overtime hours and overtime pay are taken from
+        attendance when the employee has attendance records in the period,
+        otherwise the values entered on the payslip are kept. Overtime pay
+        from attendance is `basic / PAYROLL_MONTHLY_HOURS *
+        PAYROLL_OVERTIME_MULTIPLIER` per hour.
+
+        Returns:
+            The updated PayrollPeriod
+        """
+        monthly_hours = Decimal(str(getattr(settings, 'PAYROLL_MONTHLY_HOURS', 176)))
+        multiplier = Decimal(str(getattr(settings, 'PAYROLL_OVERTIME_MULTIPLIER', 1.5)))
+
+        with transaction.atomic():
+            self._lock_period()
+            period = self.period
+
+            payslips = list(
+                Payslip.all_objects.filter(payroll_period=period).only(
+                    'id', 'employee_id', 'basic_salary', 'present_days',
+                    'absent_days', 'overtime_hours', 'overtime_pay', 'payroll_period_id',
+                )
+            )
+            total = len(payslips)
+            self.report('calculate', 0, total)
+
+            item_totals = self._item_totals()
+            attendance = self._attendance()
+            zero = (Decimal('0'), Decimal('0'))
+
+            # Column-wise: each column is a list aligned with `payslips`
+            basic = [p.basic_salary for p in payslips]
+            allowances = [item_totals.get(p.pk, zero)[0] for p in payslips]
+            deductions = [item_totals.get(p.pk, zero)[1] for p in payslips]
+            worked = [attendance.get(p.employee_id) for p in payslips]
+            overtime_hours = [w[2] if w else p.overtime_hours for p, w in zip(payslips, worked)]
+            overtime_pay = [
+                (b / monthly_hours * multiplier * h).quantize(_CENT) if w else p.overtime_pay
+                for p, w, b, h in zip(payslips, worked, basic, overtime_hours)
+            ]
+            gross = [b + a + o for b, a, o in zip(basic, allowances, overtime_pay)]
+            net = [g - d for g, d in zip(gross, deductions)]
+
+            now = timezone.now()
+            for i, payslip in enumerate(payslips):
+                if worked[i]:
+                    payslip.present_days, payslip.absent_days = worked[i][0], worked[i][1]
+                payslip.overtime_hours = overtime_hours[i]
+                payslip.total_allowances = allowances[i]
+                payslip.total_deductions = deductions[i]
+                payslip.overtime_pay = overtime_pay[i]
+                payslip.gross_salary = gross[i]
+                payslip.net_salary = net[i]
+                payslip.status = PayrollStatus.CALCULATED
+                payslip.updated_by = self.user
+                payslip.updated_at = now
+
+            fields = [
+                'present_days', 'absent_days', 'overtime_hours', 'total_allowances',
+                'total_deductions', 'overtime_pay', 'gross_salary', 'net_salary',
+                'status', 'updated_by', 'updated_at',
+            ]
+            done = 0
+            for chunk in _chunks(payslips):
+                Payslip.all_objects.bulk_update(chunk, fields)
+                done += len(chunk)
+                self.report('calculate', done, total)
+
+            period.total_employees = total
+            period.total_gross = sum(gross, Decimal('0'))
+            period.total_deductions = sum(deductions, Decimal('0'))
+            period.total_net = sum(net, Decimal('0'))
+            period.status = PayrollStatus.CALCULATED
+            period.updated_by = self.user
+            period.save(update_fields=[
+                'total_employees', 'total_gross', 'total_deductions', 'total_net',
+                'status', 'updated_by', 'updated_at',
+            ])
+
+        return period
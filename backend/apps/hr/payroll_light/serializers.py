@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from apps.core.enums import EmploymentType
 from .models import SalaryComponent, PayrollPeriod, Payslip, PayslipItem
+from .simulation import RULE_TYPES
 
 
 class SalaryComponentSerializer(serializers.ModelSerializer):
@@ -74,3 +76,37 @@ class PayslipSummarySerializer(serializers.ModelSerializer):
 
     def get_period_display(self, obj):
         return f"{obj.payroll_period.month}/{obj.payroll_period.year}"
+
+
+class SimulationFilterSerializer(serializers.Serializer):
+    department = serializers.ListField(child=serializers.UUIDField(), required=False)
+    employment_type = serializers.ListField(
+        child=serializers.ChoiceField(choices=EmploymentType.choices), required=False,
+    )
+    employee = serializers.ListField(child=serializers.UUIDField(), required=False)
+
+
+class SimulationRuleSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=RULE_TYPES)
+    name = serializers.CharField(max_length=100, required=False)
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=False)
+    percent = serializers.DecimalField(max_digits=6, decimal_places=3, required=False)
+    value = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    base = serializers.ChoiceField(choices=['basic', 'gross'], default='basic')
+    filter = SimulationFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        kind = attrs['type']
+        if kind in ('raise', 'allowance', 'deduction'):
+            if (attrs.get('amount') is None) == (attrs.get('percent') is None):
+                raise serializers.ValidationError('Isi salah satu: amount atau percent.')
+        if kind in ('allowance', 'deduction', 'remove_component') and not attrs.get('name'):
+            raise serializers.ValidationError({'name': 'Nama komponen wajib diisi.'})
+        if kind == 'overtime_multiplier' and attrs.get('value') is None:
+            raise serializers.ValidationError({'value': 'Nilai pengali lembur wajib diisi.'})
+        return attrs
+
+
+class PayrollSimulationSerializer(serializers.Serializer):
+    rules = SimulationRuleSerializer(many=True)
+    refresh = serializers.BooleanField(default=False, help_text='Abaikan hasil cache')
@@ -0,0 +1,303 @@
+"""
+Read-only payroll what-if simulation.
+
+The workforce of a period is loaded once into columns (one list per field,
+aligned by employee): basic salary from the latest payslip up to the period,
+fixed allowances/deductions from effective salary components, and overtime
+hours from attendance (or the latest payslip when the period has none yet).
+A scenario is a list of declarative rules applied to copies of those
+columns; nothing is written to the database.
+
+Rules (applied in order, each optionally restricted by `filter`):
+
+    {"type": "raise", "percent": 5}                           basic salary +5%
+    {"type": "raise", "amount": 250000}                       basic salary +Rp
+    {"type": "allowance", "name": "Tunjangan Internet", "amount": 200000}
+    {"type": "allowance", "name": "...", "percent": 10}       % of basic
+    {"type": "deduction", "name": "PPh 21", "percent": 5, "base": "gross"}
+    {"type": "remove_component", "name": "Tunjangan Makan"}
+    {"type": "overtime_multiplier", "value": 2}
+
+    filter: {"department": [<uuid>, ...], "employment_type": [...], "employee": [<uuid>, ...]}
+
+Results are cached per (tenant, period, scenario) hash for
+PAYROLL_SIMULATION_CACHE_TIMEOUT seconds.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, Sum
+
+from apps.core.enums import EmploymentStatus
+from apps.hr.attendance.models import Attendance
+from apps.hr.models import Employee
+from .engine import component_item_type
+from .models import Payslip, SalaryComponent
+
+RULE_TYPES = ('raise', 'allowance', 'deduction', 'remove_component', 'overtime_multiplier')
+
+_CACHE_KEY = 'hr:payroll:simulation:{}'
+_ZERO = Decimal('0')
+_CENT = Decimal('0.01')
+_TOTAL_FIELDS = ('basic', 'allowances', 'deductions', 'overtime', 'gross', 'net')
+
+
+def scenario_hash(period, rules) -> str:
+    """Stable hash of a scenario for a period."""
+    payload = json.dumps(
+        {'tenant': str(period.tenant_id), 'period': str(period.pk), 'rules': rules},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class Workforce:
+    """Columnar snapshot of the payroll inputs of a period."""
+
+    def __init__(self, period):
+        self.period = period
+        employees = list(
+            Employee.all_objects.filter(
+                tenant_id=period.tenant_id,
+                employment_status=EmploymentStatus.ACTIVE,
+            ).values_list('id', 'department_id', 'employment_type').order_by('employee_id')
+        )
+        self.ids = [row[0] for row in employees]
+        self.department = [row[1] for row in employees]
+        self.employment_type = [row[2] for row in employees]
+        self.index = {pk: i for i, pk in enumerate(self.ids)}
+
+        size = len(self.ids)
+        self.basic = [_ZERO] * size
+        self.overtime_hours = [_ZERO] * size
+        self.components = [[] for _ in range(size)]  # (item_type, name, amount)
+
+        self._load_payslips()
+        self._load_components()
+        self._load_overtime()
+
+    def _employees(self):
+        return Employee.all_objects.filter(
+            tenant_id=self.period.tenant_id,
+            employment_status=EmploymentStatus.ACTIVE,
+        )
+
+    def _load_payslips(self):
+        # Latest payslip per employee, up to and including this period
+        period = self.period
+        latest = Payslip.all_objects.filter(
+            employee__in=self._employees(),
+        ).filter(
+            Q(payroll_period__year__lt=period.year) |
+            Q(payroll_period__year=period.year, payroll_period__month__lte=period.month)
+        ).order_by(
+            'employee_id', '-payroll_period__year', '-payroll_period__month',
+        ).distinct('employee_id').values_list('employee_id', 'basic_salary', 'overtime_hours')
+
+        for employee_id, basic, overtime_hours in latest:
+            i = self.index.get(employee_id)
+            if i is not None:
+                self.basic[i] = basic
+                self.overtime_hours[i] = overtime_hours
+
+    def _load_components(self):
+        period = self.period
+        components = SalaryComponent.all_objects.filter(
+            employee__in=self._employees(),
+            is_fixed=True,
+            effective_date__lte=period.end_date,
+        ).filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=period.start_date)
+        ).only('employee_id', 'component_type', 'component_name', 'amount')
+
+        for component in components.iterator(chunk_size=2000):
+            i = self.index.get(component.employee_id)
+            if i is not None:
+                self.components[i].append(
+                    (component_item_type(component), component.component_name, component.amount)
+                )
+
+    def _load_overtime(self):
+        period = self.period
+        rows = Attendance.all_objects.filter(
+            employee__in=self._employees(),
+            date__range=(period.start_date, period.end_date),
+        ).values('employee_id').annotate(hours=Sum('overtime_hours')).order_by()
+        for row in rows:
+            i = self.index.get(row['employee_id'])
+            if i is not None:
+                self.overtime_hours[i] = row['hours'] or _ZERO
+
+
+def _mask(workforce, rule_filter):
+    """Boolean column selecting the employees a rule applies to."""
+    if not rule_filter:
+        return [True] * len(workforce.ids)
+    departments = {str(d) for d in rule_filter.get('department') or []}
+    types = set(rule_filter.get('employment_type') or [])
+    employees = {str(e) for e in rule_filter.get('employee') or []}
+    return [
+        (not departments or str(dept) in departments)
+        and (not types or emp_type in types)
+        and (not employees or str(pk) in employees)
+        for pk, dept, emp_type in zip(workforce.ids, workforce.department, workforce.employment_type)
+    ]
+
+
+def _compute(basic, allowances, deductions, overtime_hours, multiplier, extra_gross_deductions=()):
+    monthly_hours = Decimal(str(getattr(settings, 'PAYROLL_MONTHLY_HOURS', 176)))
+    overtime = [
+        (b / monthly_hours * m * h).quantize(_CENT)
+        for b, m, h in zip(basic, multiplier, overtime_hours)
+    ]
+    gross = [b + a + o for b, a, o in zip(basic, allowances, overtime)]
+    deductions = list(deductions)
+    # Percent-of-gross deductions can only be applied once gross is known
+    for percent, mask in extra_gross_deductions:
+        deductions = [
+            d + (g * percent / 100).quantize(_CENT) if selected else d
+            for d, g, selected in zip(deductions, gross, mask)
+        ]
+    net = [g - d for g, d in zip(gross, deductions)]
+    return {
+        'basic': basic, 'allowances': allowances, 'deductions': deductions,
+        'overtime': overtime, 'gross': gross, 'net': net,
+    }
+
+
+def _component_totals(components, item_type):
+    return [sum((amount for kind, _, amount in items if kind == item_type), _ZERO) for items in components]
+
+
+def run_simulation(workforce, rules):
+    """
+    Apply rules to a workforce.
+
+    Returns:
+        Tuple of (baseline columns, scenario columns)
+    """
+    default_multiplier = Decimal(str(getattr(settings, 'PAYROLL_OVERTIME_MULTIPLIER', 1.5)))
+    size = len(workforce.ids)
+    multiplier = [default_multiplier] * size
+
+    baseline = _compute(
+        workforce.basic,
+        _component_totals(workforce.components, 'allowance'),
+        _component_totals(workforce.components, 'deduction'),
+        workforce.overtime_hours,
+        multiplier,
+    )
+
+    basic = list(workforce.basic)
+    components = [list(items) for items in workforce.components]
+    multiplier = list(multiplier)
+    added_allowances = [_ZERO] * size
+    added_deductions = [_ZERO] * size
+    gross_deductions = []
+
+    for rule in rules:
+        mask = _mask(workforce, rule.get('filter'))
+        kind = rule['type']
+        percent = Decimal(str(rule['percent'])) if rule.get('percent') is not None else None
+        amount = Decimal(str(rule['amount'])) if rule.get('amount') is not None else None
+
+        if kind == 'raise':
+            if percent is not None:
+                basic = [(b * (1 + percent / 100)).quantize(_CENT) if s else b for b, s in zip(basic, mask)]
+            else:
+                basic = [b + amount if s else b for b, s in zip(basic, mask)]
+        elif kind in ('allowance', 'deduction'):
+            if kind == 'deduction' and percent is not None and rule.get('base') == 'gross':
+                gross_deductions.append((percent, mask))
+                continue
+            target = added_allowances if kind == 'allowance' else added_deductions
+            for i, selected in enumerate(mask):
+                if selected:
+                    target[i] += (basic[i] * percent / 100).quantize(_CENT) if percent is not None else amount
+        elif kind == 'remove_component':
+            name = rule['name'].lower()
+            components = [
+                [item for item in items if item[1].lower() != name] if selected else items
+                for items, selected in zip(components, mask)
+            ]
+        elif kind == 'overtime_multiplier':
+            value = Decimal(str(rule['value']))
+            multiplier = [value if selected else m for m, selected in zip(multiplier, mask)]
+
+    scenario = _compute(
+        basic,
+        [a + extra for a, extra in zip(_component_totals(components, 'allowance'), added_allowances)],
+        [d + extra for d, extra in zip(_component_totals(components, 'deduction'), added_deductions)],
+        workforce.overtime_hours,
+        multiplier,
+        gross_deductions,
+    )
+    return baseline, scenario
+
+
+def _totals(columns, rows=None):
+    if rows is None:
+        return {field: sum(columns[field], _ZERO) for field in _TOTAL_FIELDS}
+    return {field: sum((columns[field][i] for i in rows), _ZERO) for field in _TOTAL_FIELDS}
+
+
+def _delta(baseline, scenario):
+    return {field: scenario[field] - baseline[field] for field in _TOTAL_FIELDS}
+
+
+def simulate(period, rules, use_cache=True) -> dict:
+    """
+    Aggregate and per-department impact of a scenario on a period.
+
+    Args:
+        period: PayrollPeriod providing the workforce and date range
+        rules: List of validated rule dicts (see module docstring)
+        use_cache: Return a cached result for the same scenario if available
+    """
+    from apps.organization.models import Department
+
+    key = scenario_hash(period, rules)
+    cache_key = _CACHE_KEY.format(key)
+    if use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+    workforce = Workforce(period)
+    baseline, scenario = run_simulation(workforce, rules)
+
+    by_department = {}
+    for i, department_id in enumerate(workforce.department):
+        by_department.setdefault(department_id, []).append(i)
+    names = dict(
+        Department.all_objects.filter(pk__in=[d for d in by_department if d]).values_list('id', 'name')
+    )
+
+    departments = []
+    for department_id, rows in by_department.items():
+        base, new = _totals(baseline, rows), _totals(scenario, rows)
+        departments.append({
+            'department': str(department_id) if department_id else None,
+            'department_name': names.get(department_id, 'Tanpa Departemen'),
+            'employees': len(rows),
+            'baseline': base,
+            'scenario': new,
+            'delta': _delta(base, new),
+        })
+    departments.sort(key=lambda d: d['delta']['gross'], reverse=True)
+
+    base, new = _totals(baseline), _totals(scenario)
+    result = {
+        'scenario_hash': key,
+        'period': str(period.pk),
+        'employees': len(workforce.ids),
+        'baseline': base,
+        'scenario': new,
+        'delta': _delta(base, new),
+        'departments': departments,
+    }
+    cache.set(cache_key, result, timeout=getattr(settings, 'PAYROLL_SIMULATION_CACHE_TIMEOUT', 10 * 60))
+    return {**result, 'cached': False}
@@ -1,13 +1,17 @@
+import json
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from .engine import PayrollEngine, get_progress
 from .models import SalaryComponent, PayrollPeriod, Payslip, PayslipItem, PayrollStatus
 from .serializers import (
     SalaryComponentSerializer,
     PayrollPeriodSerializer,
     PayslipSerializer,
     PayslipSummarySerializer,
+    PayrollSimulationSerializer,
 )
+from .simulation import simulate
 
 
 class SalaryComponentViewSet(viewsets.ModelViewSet):
@@ -26,9 +30,6 @@ class PayrollPeriodViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def generate_payslips(self, request, pk=None):
         """Generate payslips for all active employees in this period."""
-        from apps.hr.models import Employee
-        from apps.core.enums import EmploymentStatus
-
         period = self.get_object()
         if period.status != PayrollStatus.DRAFT:
             return Response(
@@ -36,86 +37,41 @@ class PayrollPeriodViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get all active employees
-        employees = Employee.objects.filter(
-            employment_status=EmploymentStatus.ACTIVE
-        ).select_related('user')
-
-        created_count = 0
-        for employee in employees:
-            payslip, created = Payslip.objects.get_or_create(
-                payroll_period=period,
-                employee=employee,
-                defaults={
-                    'basic_salary': 0,  # Should be set from salary component or manual
-                    'status': PayrollStatus.DRAFT,
-                }
-            )
-            if created:
-                created_count += 1
-
-                # Add fixed salary components as payslip items
-                components = SalaryComponent.objects.filter(
-                    employee=employee,
-                    is_fixed=True,
-                    effective_date__lte=period.end_date,
-                ).filter(
-                    models.Q(end_date__isnull=True) | models.Q(end_date__gte=period.start_date)
-                )
-
-                for component in components:
-                    PayslipItem.objects.create(
-                        payslip=payslip,
-                        item_type='allowance' if 'allowance' in component.component_type.lower() or 'tunjangan' in component.component_name.lower() else 'deduction',
-                        name=component.component_name,
-                        amount=component.amount,
-                    )
-
-        period.total_employees = Payslip.objects.filter(payroll_period=period).count()
-        period.save()
+        result = PayrollEngine(period, user=request.user).generate()
 
         return Response({
-            'message': f'Generated {created_count} payslips',
-            'total_payslips': period.total_employees,
+            'message': f"Generated {result['created']} payslips",
+            'total_payslips': result['total'],
         })
 
     @action(detail=True, methods=['post'])
     def calculate_all(self, request, pk=None):
         """Calculate all payslips in this period."""
+        period = PayrollEngine(self.get_object(), user=request.user).calculate()
+        return Response(PayrollPeriodSerializer(period).data)
+
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        """Progress of the last generate/calculate run for this period."""
         period = self.get_object()
-        payslips = Payslip.objects.filter(payroll_period=period)
-
-        total_gross = 0
-        total_deductions = 0
-        total_net = 0
-
-        for payslip in payslips:
-            # Sum allowances and deductions from items
-            allowances = PayslipItem.objects.filter(
-                payslip=payslip, item_type='allowance'
-            ).aggregate(total=models.Sum('amount'))['total'] or 0
-
-            deductions = PayslipItem.objects.filter(
-                payslip=payslip, item_type='deduction'
-            ).aggregate(total=models.Sum('amount'))['total'] or 0
-
-            payslip.total_allowances = allowances
-            payslip.total_deductions = deductions
-            payslip.calculate()
-            payslip.status = PayrollStatus.CALCULATED
-            payslip.save()
-
-            total_gross += payslip.gross_salary
-            total_deductions += payslip.total_deductions
-            total_net += payslip.net_salary
-
-        period.total_gross = total_gross
-        period.total_deductions = total_deductions
-        period.total_net = total_net
-        period.status = PayrollStatus.CALCULATED
-        period.save()
+        return Response(get_progress(period.pk) or {'stage': None, 'done': 0, 'total': 0})
 
-        return Response(PayrollPeriodSerializer(period).data)
+    @action(detail=True, methods=['post'])
+    def simulate(self, request, pk=None):
+        """
+        Preview the cost impact of a rule set on this period.
+
+        Read-only: nothing is written. Returns aggregate and per-department
+        baseline, scenario and delta totals.
+        """
+        period = self.get_object()
+        serializer = PayrollSimulationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Normalize to plain JSON types so equal scenarios hash equally
+        rules = json.loads(json.dumps(serializer.validated_data['rules'], default=str))
+        result = simulate(period, rules, use_cache=not serializer.validated_data['refresh'])
+        return Response(result)
 
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
@@ -196,7 +152,3 @@ class PayslipViewSet(viewsets.ModelViewSet):
         )
 
         return Response(PayslipSerializer(payslip).data)
-
-
-# Need to import models at the top for aggregate
-from django.db import models
@@ -1,7 +1,9 @@
 from rest_framework import serializers
+from apps.core.serializers import TreeSerializerMixin
 from django.contrib.auth import get_user_model
 from .models import Employee, EmployeeFamily, EmployeeEducation, EmployeeWorkHistory
 from .services.face_recognition import face_service
+from .services.face_index import face_index
 
 User = get_user_model()
 
@@ -89,7 +91,7 @@ class EmployeeDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class EmployeeCreateUpdateSerializer(serializers.ModelSerializer):
+class EmployeeCreateUpdateSerializer(TreeSerializerMixin, serializers.ModelSerializer):
     """Serializer for creating/updating employees."""
 
     user = serializers.PrimaryKeyRelatedField(
@@ -151,7 +153,8 @@ class FaceRegistrationSerializer(serializers.Serializer):
         """Validate that the image contains exactly one face using AWS Rekognition."""
         try:
             image_bytes = face_service.read_image_file(value)
-            detection = face_service.detect_faces(image_bytes)
+            detector = face_index if face_index.enabled else face_service
+            detection = detector.detect_faces(image_bytes)
 
             if not detection['success']:
                 raise serializers.ValidationError(
@@ -173,14 +176,21 @@ class FaceRegistrationSerializer(serializers.Serializer):
             raise serializers.ValidationError(f"Face validation failed: {str(e)}")
 
     def save(self, employee):
-        """Save face image to employee (AWS Rekognition doesn't need encoding storage)."""
+        """Save face image to employee, with its embedding when the face index is enabled."""
         face_image = self.validated_data['face_image']
 
         try:
-            # Save to employee (AWS Rekognition will compare on-demand, no need to store encoding)
+            if face_index.enabled:
+                if not face_index.register(employee, face_service.read_image_file(face_image)):
+                    raise serializers.ValidationError("Could not compute face embedding.")
+            else:
+                # AWS Rekognition compares on demand, no encoding to store
+                employee.face_encoding = ''
+
             employee.face_image = face_image
             employee.face_registered = True
             employee.save()
+            face_index.invalidate(employee.tenant_id)
 
             return employee
         except Exception as e:
@@ -199,7 +209,8 @@ class FaceVerificationSerializer(serializers.Serializer):
         """Validate that the image contains a face using AWS Rekognition."""
         try:
             image_bytes = face_service.read_image_file(value)
-            detection = face_service.detect_faces(image_bytes)
+            detector = face_index if face_index.enabled else face_service
+            detection = detector.detect_faces(image_bytes)
 
             if not detection['success']:
                 raise serializers.ValidationError(
@@ -1,3 +1,4 @@
 from .face_recognition import face_service, FaceRecognitionService
+from .face_index import face_index, FaceIndex
 
-__all__ = ['face_service', 'FaceRecognitionService']
+__all__ = ['face_service', 'FaceRecognitionService', 'face_index', 'FaceIndex']
@@ -0,0 +1,327 @@
+"""
+Local face-embedding index for attendance matching.
+
+An embedding backend turns a photo into one vector per detected face. The
+vector of the registered face is computed once at registration and stored in
+`Employee.face_encoding`; identification then embeds the probe photo and runs
+a single cosine-similarity top-k against an in-memory matrix of the tenant's
+embeddings, instead of one Rekognition `compare_faces` call (and one storage
+read) per registered employee.
+
+Backends (`FACE_EMBEDDING_BACKEND`, dotted path; empty disables the index
+and the Rekognition flow is used):
+
+    apps.hr.services.face_index.DeepFaceBackend   - deepface (optional `ml` extra)
+    apps.hr.services.face_index.PixelBackend      - deterministic, tests only
+
+Each process keeps the matrix per tenant and rebuilds it when the tenant's
+generation number in the shared cache changes, which happens whenever a face
+is registered or removed, and after an employee with a face is deactivated,
+reactivated, moved or deleted (`employee_changed`, from the hr signals).
+"""
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from apps.core.middleware import get_current_tenant
+
+try:
+    import numpy as np
+except ImportError:  # optional, part of the `ml` extra
+    np = None
+
+_GENERATION_KEY = 'hr:face_index:generation:{}'
+
+
+class FaceEmbeddingBackend:
+    """
+    Base class for embedding backends.
+
+    Subclasses set `name` (stored with each embedding so vectors from
+    different models are never compared) and `match_threshold` (minimum
+    cosine similarity for a match), and implement `embed_faces`.
+    """
+
+    name = ''
+    match_threshold = 0.6
+
+    def embed_faces(self, image_bytes: bytes) -> list:
+        """Return one 1-D float vector per face found in the image."""
+        raise NotImplementedError
+
+
+class DeepFaceBackend(FaceEmbeddingBackend):
+    """Embeddings from deepface (Facenet512 by default)."""
+
+    match_threshold = 0.7
+
+    def __init__(self):
+        self.model_name = getattr(settings, 'FACE_DEEPFACE_MODEL', 'Facenet512')
+        self.name = f'deepface:{self.model_name}'
+
+    def embed_faces(self, image_bytes):
+        from deepface import DeepFace
+        from PIL import Image
+
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            # deepface expects BGR arrays
+            pixels = np.asarray(image.convert('RGB'))[:, :, ::-1]
+        try:
+            faces = DeepFace.represent(
+                img_path=pixels,
+                model_name=self.model_name,
+                enforce_detection=True,
+            )
+        except ValueError:
+            # Raised by deepface when no face is detected
+            return []
+        return [np.asarray(face['embedding'], dtype=np.float32) for face in faces]
+
+
+class PixelBackend(FaceEmbeddingBackend):
+    """
+    Deterministic stand-in for tests and local development.
+
+    Treats the whole image as one face and uses its 16x16 grayscale
+    thumbnail, mean-centred, as the embedding: identical photos score 1.0
+    and different photos score low. Not a face model.
+    """
+
+    name = 'pixel:16'
+    match_threshold = 0.9
+
+    def embed_faces(self, image_bytes):
+        from PIL import Image
+
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            pixels = np.asarray(image.convert('L').resize((16, 16)), dtype=np.float32).ravel()
+        pixels -= pixels.mean()
+        if not pixels.any():
+            return []
+        return [pixels]
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class FaceIndex:
+    """Per-tenant in-memory embedding matrices with cosine top-k search."""
+
+    def __init__(self):
+        self._backend = None
+        self._backend_path = None
+        self._matrices = {}
+        self._analysis = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ==================== Backend ====================
+
+    @property
+    def backend(self):
+        path = getattr(settings, 'FACE_EMBEDDING_BACKEND', '')
+        if path != self._backend_path:
+            self._backend = import_string(path)() if path else None
+            self._backend_path = path
+            with self._lock:
+                self._matrices.clear()
+                self._analysis.clear()
+        return self._backend
+
+    @property
+    def enabled(self) -> bool:
+        return np is not None and self.backend is not None
+
+    def analyze(self, image_bytes: bytes) -> list:
+        """
+        Embeddings of all faces in a photo.
+
+        The last few results are memoized, so validating and then registering
+        or matching the same upload only runs the model once.
+        """
+        digest = hashlib.sha256(image_bytes).digest()
+        with self._lock:
+            if digest in self._analysis:
+                self._analysis.move_to_end(digest)
+                return self._analysis[digest]
+
+        embeddings = self.backend.embed_faces(image_bytes)
+
+        with self._lock:
+            self._analysis[digest] = embeddings
+            while len(self._analysis) > 16:
+                self._analysis.popitem(last=False)
+        return embeddings
+
+    def detect_faces(self, image_bytes: bytes) -> dict:
+        """Same result shape as `FaceRecognitionService.detect_faces`."""
+        try:
+            faces = self.analyze(image_bytes)
+        except Exception as e:
+            return {'success': False, 'error': str(e), 'face_count': 0, 'faces': []}
+        return {'success': True, 'face_count': len(faces), 'faces': []}
+
+    # ==================== Encoding ====================
+
+    def encode(self, vector) -> str:
+        """Serialize an embedding for `Employee.face_encoding`."""
+        return json.dumps({
+            'backend': self.backend.name,
+            'vector': [round(float(v), 6) for v in vector],
+        })
+
+    def decode(self, encoding: str):
+        """Embedding from `face_encoding`, or None if missing or from another backend."""
+        if not encoding:
+            return None
+        try:
+            data = json.loads(encoding)
+        except ValueError:
+            return None
+        if not isinstance(data, dict) or data.get('backend') != self.backend.name:
+            return None
+        return np.asarray(data['vector'], dtype=np.float32)
+
+    def register(self, employee, image_bytes: bytes) -> bool:
+        """
+        Compute and store the embedding of an employee's face photo.
+
+        Does not save the employee. Returns False if the photo does not
+        contain exactly one face.
+        """
+        faces = self.analyze(image_bytes)
+        if len(faces) != 1:
+            return False
+        employee.face_encoding = self.encode(faces[0])
+        return True
+
+    # ==================== Matrix cache ====================
+
+    def _tenant_key(self, tenant_id=None):
+        if tenant_id is None:
+            tenant = get_current_tenant()
+            tenant_id = tenant.pk if tenant else None
+        return str(tenant_id) if tenant_id else 'global'
+
+    def _generation(self, key) -> int:
+        return cache.get(_GENERATION_KEY.format(key), 0)
+
+    def invalidate(self, tenant_id=None):
+        """Mark a tenant's matrix stale in every process."""
+        keys = {self._tenant_key(tenant_id), 'global'}
+        for key in keys:
+            try:
+                cache.incr(_GENERATION_KEY.format(key))
+            except ValueError:
+                cache.set(_GENERATION_KEY.format(key), 1, timeout=None)
+        with self._lock:
+            for key in keys:
+                self._matrices.pop(key, None)
+
+    def employee_changed(self, employee, deleted=False):
+        """Invalidate after commit when a write changes the employee's place in the index."""
+        before = getattr(employee, '_loaded_face_state', None)
+        after = None if deleted else employee.face_index_state()
+        employee._loaded_face_state = after
+        if before == after:
+            return
+        tenants = {state['tenant_id'] for state in (before, after) if state and state['face_registered']}
+        for tenant_id in tenants:
+            transaction.on_commit(lambda tenant_id=tenant_id: self.invalidate(tenant_id))
+
+    def _load(self, key):
+        from apps.hr.models import Employee
+
+        employees = Employee.all_objects.filter(face_registered=True, is_active=True).exclude(face_encoding='')
+        if key != 'global':
+            employees = employees.filter(tenant_id=key)
+
+        ids, vectors = [], []
+        for pk, encoding in employees.values_list('id', 'face_encoding').iterator():
+            vector = self.decode(encoding)
+            if vector is not None and (not vectors or vector.shape == vectors[0].shape):
+                ids.append(pk)
+                vectors.append(vector)
+
+        matrix = _normalize(np.vstack(vectors)) if vectors else None
+        return ids, matrix
+
+    def get_matrix(self, tenant_id=None):
+        """(employee ids, normalized embedding matrix) for a tenant."""
+        key = self._tenant_key(tenant_id)
+        generation = self._generation(key)
+        with self._lock:
+            entry = self._matrices.get(key)
+        if entry is None or entry[0] != generation:
+            # Loaded outside the lock; an entry stored after a newer
+            # invalidation is tagged with the old generation and reloaded
+            ids, matrix = self._load(key)
+            entry = (generation, ids, matrix)
+            with self._lock:
+                self._matrices[key] = entry
+        return entry[1], entry[2]
+
+    # ==================== Search ====================
+
+    def search(self, vector, k=5, tenant_id=None) -> list:
+        """
+        Top-k employees by cosine similarity.
+
+        Returns:
+            List of (employee_id, similarity) sorted best first
+        """
+        ids, matrix = self.get_matrix(tenant_id)
+        if matrix is None or vector.shape[0] != matrix.shape[1]:
+            return []
+
+        scores = matrix @ _normalize(np.asarray(vector, dtype=np.float32))
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], float(scores[i])) for i in top]
+
+    def identify(self, image_bytes: bytes, threshold=None, tenant_id=None):
+        """
+        Find the employee in a photo.
+
+        Returns:
+            Tuple of (employee, similarity percent) or None if no match
+        """
+        from apps.hr.models import Employee
+
+        faces = self.analyze(image_bytes)
+        if len(faces) != 1:
+            return None
+
+        matches = self.search(faces[0], k=1, tenant_id=tenant_id)
+        if threshold is None:
+            threshold = self.backend.match_threshold
+        if not matches or matches[0][1] < threshold:
+            return None
+
+        employee_id, score = matches[0]
+        employee = Employee.all_objects.select_related('department').filter(pk=employee_id, is_active=True).first()
+        if employee is None:
+            return None
+        return employee, round(score * 100, 2)
+
+    def compare(self, employee, image_bytes: bytes):
+        """Similarity (0-1) of a photo to one employee's stored embedding, or None."""
+        stored = self.decode(employee.face_encoding)
+        faces = self.analyze(image_bytes)
+        if stored is None or len(faces) != 1 or faces[0].shape != stored.shape:
+            return None
+        return float(_normalize(stored) @ _normalize(faces[0]))
+
+
+# Singleton instance
+face_index = FaceIndex()
@@ -0,0 +1,18 @@
+"""Signal handlers keeping the face index in sync."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Employee
+from .services.face_index import face_index
+
+
+@receiver(post_save, sender=Employee)
+def refresh_face_index(sender, instance, **kwargs):
+    """Rebuild the tenant's face matrix when a registered face is deactivated or moved."""
+    face_index.employee_changed(instance)
+
+
+@receiver(post_delete, sender=Employee)
+def refresh_face_index_on_delete(sender, instance, **kwargs):
+    """Drop a deleted employee's face from the index."""
+    face_index.employee_changed(instance, deleted=True)
@@ -1,9 +1,30 @@
-from django.test import TestCase
+import io
+import json
+import random
+import unittest
+import unittest.mock
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from .models import Employee, EmployeeFamily, EmployeeEducation, EmployeeWorkHistory
+from .attendance import rollup
+from .attendance.models import (
+    Attendance, AttendanceDevice, AttendanceStatus, AttendanceSummary, AttendanceSyncEvent,
+)
+from .attendance.sync import sign_batch
+from .payroll_light.engine import PayrollEngine
+from .payroll_light.models import PayrollPeriod, PayrollStatus, Payslip, PayslipItem, SalaryComponent
+from .services.face_index import face_index, np
 from apps.core.enums import EmploymentType, EmploymentStatus, Gender, FamilyRelation
+from apps.core.models.tree import rebuild_paths
+from apps.organization import org_chart
+from apps.organization.models import Department
 
 User = get_user_model()
 
@@ -40,6 +61,102 @@ class EmployeeModelTest(TestCase):
         """Test full_name property."""
         self.assertEqual(self.employee.full_name, 'John Doe')
 
+    def test_reporting_line_paths(self):
+        """Supervisor chain is kept as a materialized path."""
+        manager = Employee.objects.create(
+            employee_id='EMP002', first_name='Jane', last_name='Roe', supervisor=self.employee,
+        )
+        staff = Employee.objects.create(
+            employee_id='EMP003', first_name='Jim', last_name='Poe', supervisor=manager,
+        )
+        self.assertEqual(staff.ancestor_ids(), [self.employee.pk, manager.pk])
+        self.assertEqual(list(staff.ancestors()), [self.employee, manager])
+
+        # Subordinates of a deleted supervisor become roots
+        self.employee.delete()
+        staff.refresh_from_db()
+        self.assertEqual((staff.depth, staff.ancestor_ids()), (1, [manager.pk]))
+
+        Employee.objects.filter(pk=staff.pk).update(supervisor=None)
+        self.assertEqual(rebuild_paths(Employee, 'supervisor'), 1)
+        staff.refresh_from_db()
+        self.assertEqual((staff.depth, staff.path), (0, f'/{staff.pk.hex}/'))
+
+
+@override_settings(ORG_CHART_CACHE_TIMEOUT=60)
+class OrgChartAPITest(APITestCase):
+    """Depth-limited org chart with cached subtrees."""
+
+    url = '/api/v1/organization/org-chart/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='chart@example.com',
+            username='chart',
+            password='chart123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.director = Employee.objects.create(employee_id='EMP700', first_name='Direktur', last_name='Utama')
+        self.manager = Employee.objects.create(
+            employee_id='EMP701', first_name='Manajer', last_name='Riset', supervisor=self.director,
+        )
+        self.staff = Employee.objects.create(
+            employee_id='EMP702', first_name='Staf', last_name='Riset', supervisor=self.manager,
+        )
+
+    def test_depth_and_child_counts(self):
+        response = self.client.get(self.url, {'depth': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [director] = response.data
+        [manager] = director['children']
+        self.assertEqual((director['child_count'], manager['child_count']), (1, 1))
+        self.assertEqual(manager['children'], [])
+
+        response = self.client.get(self.url, {'root': str(self.manager.pk), 'depth': 2})
+        [manager] = response.data
+        self.assertEqual(manager['children'][0]['id'], str(self.staff.pk))
+
+        self.assertEqual(self.client.get(self.url, {'root': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalidates_along_reporting_line(self):
+        other = Employee.objects.create(employee_id='EMP703', first_name='Lain', last_name='Cabang')
+        self.client.get(self.url)
+        self.client.get(self.url, {'root': str(other.pk)})
+        # Bypasses signals: only visible once the subtree is rebuilt
+        Employee.objects.filter(pk=other.pk).update(last_name='Diubah')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.staff.first_name = 'Analis'
+            self.staff.save()
+        director, _ = self.client.get(self.url).data
+        self.assertEqual(director['children'][0]['children'][0]['name'], 'Analis Riset')
+        [cached] = self.client.get(self.url, {'root': str(other.pk)}).data
+        self.assertEqual(cached['name'], 'Lain Cabang')
+
+        # Moving drops both the old and the new reporting line
+        with self.captureOnCommitCallbacks(execute=True):
+            self.staff.supervisor = other
+            self.staff.save()
+        [other_node] = self.client.get(self.url, {'root': str(other.pk)}).data
+        self.assertEqual((other_node['name'], other_node['child_count']), ('Lain Diubah', 1))
+        [manager] = self.client.get(self.url, {'root': str(self.manager.pk)}).data
+        self.assertEqual((manager['child_count'], manager['children']), (0, []))
+
+    def test_build_racing_invalidation_is_not_cached(self):
+        build = org_chart._build
+
+        def racing_build(root, depth):
+            nodes = build(root, depth)
+            # A write commits while the tree is being rendered
+            org_chart.invalidate(None, [self.staff.path])
+            return nodes
+
+        with unittest.mock.patch.object(org_chart, '_build', side_effect=racing_build) as mocked:
+            org_chart.subtree(None)
+            org_chart.subtree(None)
+        self.assertEqual(mocked.call_count, 2)
+
 
 class EmployeeFamilyModelTest(TestCase):
     """Tests for EmployeeFamily model."""
@@ -240,3 +357,418 @@ class EmploymentTypeTest(TestCase):
         fellows = Employee.objects.filter(employment_type=EmploymentType.RESEARCH_FELLOW)
         self.assertEqual(fellows.count(), 1)
         self.assertEqual(fellows.first().first_name, 'Research')
+
+
+def make_face(seed):
+    """Random grayscale pattern standing in for a face photo."""
+    rng = random.Random(seed)
+    image = Image.frombytes('L', (32, 32), bytes(rng.randrange(256) for _ in range(32 * 32)))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    buffer.seek(0)
+    buffer.name = f'face{seed}.png'
+    return buffer
+
+
+@unittest.skipIf(np is None, 'numpy not installed')
+@override_settings(FACE_EMBEDDING_BACKEND='apps.hr.services.face_index.PixelBackend')
+class FaceIndexTest(APITestCase):
+    """Face matching through the local embedding index."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='hr@example.com',
+            username='hr',
+            password='hrpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP10{i}',
+                first_name='Karyawan',
+                last_name=str(i),
+                employment_type=EmploymentType.STAFF,
+                employment_status=EmploymentStatus.ACTIVE,
+            )
+            for i in range(3)
+        ]
+        for i, employee in enumerate(self.employees):
+            response = self.client.post(
+                f'/api/v1/hr/employees/{employee.id}/register-face/',
+                {'face_image': make_face(i)},
+                format='multipart',
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_registration_stores_embedding(self):
+        employee = Employee.objects.get(pk=self.employees[1].pk)
+        self.assertTrue(employee.face_registered)
+        self.assertEqual(face_index.decode(employee.face_encoding).shape, (256,))
+
+        ids, matrix = face_index.get_matrix()
+        self.assertEqual(matrix.shape, (3, 256))
+        self.assertEqual(face_index.search(face_index.decode(employee.face_encoding), k=2)[0][0], employee.pk)
+
+    def test_face_check_in_identifies_employee(self):
+        response = self.client.post(
+            '/api/v1/hr/attendance/attendances/face-check-in/',
+            {'face_image': make_face(2)},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['employee']['employee_id'], 'EMP102')
+        self.assertTrue(Attendance.objects.filter(employee=self.employees[2]).exists())
+
+        unknown = self.client.post(
+            '/api/v1/hr/attendance/attendances/face-check-in/',
+            {'face_image': make_face(99)},
+            format='multipart',
+        )
+        self.assertEqual(unknown.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_removal_invalidates_index(self):
+        response = self.client.post('/api/v1/hr/employees/verify-face/', {'face_image': make_face(0)}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['employee']['employee_id'], 'EMP100')
+
+        self.client.delete(f'/api/v1/hr/employees/{self.employees[0].id}/remove-face/')
+        response = self.client.post('/api/v1/hr/employees/verify-face/', {'face_image': make_face(0)}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(len(face_index.get_matrix()[0]), 2)
+
+    def test_deactivation_and_deletion_invalidate_index(self):
+        self.assertEqual(len(face_index.get_matrix()[0]), 3)
+
+        employee = Employee.objects.get(pk=self.employees[0].pk)
+        employee.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            employee.save()
+        self.assertNotIn(employee.pk, face_index.get_matrix()[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.get(pk=self.employees[1].pk).delete()
+        self.assertEqual(face_index.get_matrix()[0], [self.employees[2].pk])
+
+
+class AttendanceSyncTest(APITestCase):
+    """Signed batch sync from attendance devices."""
+
+    url = '/api/v1/hr/attendance/attendances/sync/'
+
+    def setUp(self):
+        self.device = AttendanceDevice.objects.create(
+            name='Kiosk Lobby',
+            device_id='kiosk-01',
+            secret='s3cret',
+        )
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP20{i}',
+                first_name='Karyawan',
+                last_name=str(i),
+                employment_type=EmploymentType.STAFF,
+                employment_status=EmploymentStatus.ACTIVE,
+            )
+            for i in range(2)
+        ]
+        self.morning = timezone.localtime().replace(hour=8, minute=0, second=0, microsecond=0)
+        if self.morning > timezone.now():
+            self.morning -= timedelta(days=1)
+
+    def post(self, events, secret='s3cret'):
+        body = json.dumps({'events': events}).encode()
+        return self.client.post(
+            self.url,
+            data=body,
+            content_type='application/json',
+            HTTP_X_DEVICE_ID=self.device.device_id,
+            HTTP_X_SIGNATURE=sign_batch(secret, body),
+        )
+
+    def event(self, key, employee, event_type='check_in', minutes=0):
+        return {
+            'idempotency_key': key,
+            'type': event_type,
+            'employee_id': employee.employee_id,
+            'timestamp': (self.morning + timedelta(minutes=minutes)).isoformat(),
+        }
+
+    def test_batch_applied_and_replay_is_duplicate(self):
+        events = [
+            self.event('a1', self.employees[0]),
+            self.event('a2', self.employees[1], minutes=5),
+            self.event('a3', self.employees[0], 'check_out', minutes=8 * 60),
+        ]
+        response = self.post(events)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['applied'], 3)
+        self.assertEqual([r['idempotency_key'] for r in response.data['results']], ['a1', 'a2', 'a3'])
+
+        attendance = Attendance.objects.get(employee=self.employees[0])
+        self.assertEqual(attendance.check_in, self.morning)
+        self.assertEqual(float(attendance.work_hours), 8.0)
+        self.assertEqual(Attendance.objects.count(), 2)
+
+        replay = self.post(events)
+        self.assertEqual(replay.data['duplicates'], 3)
+        self.assertEqual(replay.data['results'][0]['attendance_id'], str(attendance.pk))
+        self.assertEqual(AttendanceSyncEvent.objects.count(), 3)
+
+    def test_merges_with_existing_attendance(self):
+        self.post([self.event('b1', self.employees[0], minutes=10)])
+        response = self.post([
+            self.event('b2', self.employees[0], 'check_out', minutes=4 * 60),
+            self.event('b3', self.employees[0], minutes=-15),
+            self.event('b4', self.employees[1], 'check_out', minutes=60),
+            {**self.event('b5', self.employees[1]), 'employee_id': 'UNKNOWN'},
+        ])
+        statuses = [r['status'] for r in response.data['results']]
+        self.assertEqual(statuses, ['applied', 'applied', 'rejected', 'rejected'])
+        self.assertEqual(response.data['results'][2]['error'], 'no_check_in')
+
+        attendance = Attendance.objects.get(employee=self.employees[0])
+        self.assertEqual(attendance.check_in, self.morning - timedelta(minutes=15))
+        self.assertEqual(float(attendance.work_hours), 4.25)
+
+    def test_invalid_signature_rejected(self):
+        response = self.post([self.event('c1', self.employees[0])], secret='wrong')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Attendance.objects.exists())
+
+
+class PayrollEngineTest(APITestCase):
+    """Set-based payslip generation and calculation."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='payroll@example.com',
+            username='payroll',
+            password='payroll123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.period = PayrollPeriod.objects.create(
+            year=2025, month=1,
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 1, 31),
+        )
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP30{i}',
+                first_name='Karyawan',
+                last_name=str(i),
+                employment_type=EmploymentType.STAFF,
+                employment_status=EmploymentStatus.ACTIVE,
+            )
+            for i in range(3)
+        ]
+        for employee in self.employees:
+            SalaryComponent.objects.create(
+                employee=employee, component_type='allowance',
+                component_name='Tunjangan Makan', amount=Decimal('750000'),
+                effective_date=date(2024, 1, 1),
+            )
+            SalaryComponent.objects.create(
+                employee=employee, component_type='deduction',
+                component_name='BPJS Kesehatan', amount=Decimal('100000'),
+                effective_date=date(2024, 1, 1),
+            )
+        # Ended before the period, must not be copied
+        SalaryComponent.objects.create(
+            employee=self.employees[0], component_type='allowance',
+            component_name='Tunjangan Lama', amount=Decimal('1'),
+            effective_date=date(2024, 1, 1), end_date=date(2024, 12, 31),
+        )
+
+    def url(self, action):
+        return f'/api/v1/hr/payroll/periods/{self.period.id}/{action}/'
+
+    def test_generate_and_calculate(self):
+        response = self.client.post(self.url('generate_payslips'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_payslips'], 3)
+        self.assertEqual(PayslipItem.objects.count(), 6)
+
+        # Re-running only fills in missing employees
+        response = self.client.post(self.url('generate_payslips'))
+        self.assertEqual(response.data['total_payslips'], 3)
+        self.assertEqual(PayslipItem.objects.count(), 6)
+
+        Payslip.objects.update(basic_salary=Decimal('8800000'))
+        Attendance.objects.create(
+            employee=self.employees[1], date=date(2025, 1, 6),
+            status=AttendanceStatus.PRESENT, overtime_hours=Decimal('2'),
+        )
+
+        response = self.client.post(self.url('calculate_all'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.data['total_net']), Decimal('28350000') + Decimal('150000'))
+
+        payslip = Payslip.objects.get(employee=self.employees[1])
+        self.assertEqual(payslip.overtime_pay, Decimal('150000'))
+        self.assertEqual(payslip.present_days, 1)
+        self.assertEqual(payslip.net_salary, Decimal('9600000'))
+        self.assertEqual(payslip.status, PayrollStatus.CALCULATED)
+
+        progress = self.client.get(self.url('progress'))
+        self.assertEqual(progress.data['stage'], 'calculate')
+        self.assertEqual(progress.data['done'], 3)
+
+    def test_calculate_keeps_entered_overtime_without_attendance(self):
+        PayrollEngine(self.period).generate()
+        Payslip.objects.update(basic_salary=Decimal('8800000'))
+        Payslip.objects.filter(employee=self.employees[0]).update(overtime_pay=Decimal('200000'))
+        # Soft-deleted attendance does not count
+        Attendance.objects.create(
+            employee=self.employees[0], date=date(2025, 1, 6),
+            status=AttendanceStatus.PRESENT, overtime_hours=Decimal('2'), is_active=False,
+        )
+
+        PayrollEngine(self.period).calculate()
+        payslip = Payslip.objects.get(employee=self.employees[0])
+        self.assertEqual(payslip.overtime_pay, Decimal('200000'))
+        self.assertEqual(payslip.present_days, 0)
+        self.assertEqual(payslip.net_salary, Decimal('9650000'))
+
+    def test_query_count_independent_of_employees(self):
+        with self.assertNumQueries(9):
+            PayrollEngine(self.period).generate()
+        for i in range(3, 10):
+            Employee.objects.create(
+                employee_id=f'EMP30{i}', first_name='Karyawan', last_name=str(i),
+                employment_type=EmploymentType.STAFF, employment_status=EmploymentStatus.ACTIVE,
+            )
+        Payslip.objects.all().delete()
+        with self.assertNumQueries(9):
+            PayrollEngine(self.period).generate()
+        self.assertEqual(Payslip.objects.count(), 10)
+
+
+class PayrollSimulationTest(APITestCase):
+    """What-if simulation over a period's workforce."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='sim@example.com',
+            username='sim',
+            password='sim12345'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.research = Department.objects.create(name='Riset', code='RES')
+        self.ops = Department.objects.create(name='Operasional', code='OPS')
+        self.period = PayrollPeriod.objects.create(
+            year=2025, month=2,
+            start_date=date(2025, 2, 1),
+            end_date=date(2025, 2, 28),
+        )
+        previous = PayrollPeriod.objects.create(
+            year=2025, month=1,
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 1, 31),
+        )
+        for i, department in enumerate([self.research, self.research, self.ops]):
+            employee = Employee.objects.create(
+                employee_id=f'EMP40{i}',
+                first_name='Karyawan',
+                last_name=str(i),
+                department=department,
+                employment_type=EmploymentType.STAFF,
+                employment_status=EmploymentStatus.ACTIVE,
+            )
+            Payslip.objects.create(payroll_period=previous, employee=employee, basic_salary=Decimal('10000000'))
+            SalaryComponent.objects.create(
+                employee=employee, component_type='allowance',
+                component_name='Tunjangan Makan', amount=Decimal('500000'),
+                effective_date=date(2024, 1, 1),
+            )
+        self.url = f'/api/v1/hr/payroll/periods/{self.period.id}/simulate/'
+
+    def test_simulation_deltas_and_cache(self):
+        rules = [
+            {'type': 'raise', 'percent': 10, 'filter': {'department': [str(self.research.id)]}},
+            {'type': 'allowance', 'name': 'Tunjangan Internet', 'amount': 200000},
+            {'type': 'deduction', 'name': 'PPh 21', 'percent': 5, 'base': 'gross'},
+        ]
+        response = self.client.post(self.url, {'rules': rules}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['cached'])
+        self.assertEqual(response.data['employees'], 3)
+        self.assertEqual(response.data['baseline']['gross'], Decimal('31500000'))
+        self.assertEqual(response.data['delta']['gross'], Decimal('2600000'))
+        self.assertEqual(response.data['delta']['deductions'], Decimal('1705000'))
+
+        research = next(d for d in response.data['departments'] if d['department_name'] == 'Riset')
+        self.assertEqual(research['delta']['basic'], Decimal('2000000'))
+
+        again = self.client.post(self.url, {'rules': rules}, format='json')
+        self.assertTrue(again.data['cached'])
+        self.assertEqual(again.data['scenario_hash'], response.data['scenario_hash'])
+        self.assertFalse(Payslip.objects.filter(payroll_period=self.period).exists())
+
+    def test_invalid_rule(self):
+        response = self.client.post(self.url, {'rules': [{'type': 'raise'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AttendanceRollupTest(APITestCase):
+    """AttendanceSummary kept in sync with attendance writes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='rollup@example.com',
+            username='rollup',
+            password='rollup123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Riset', code='RES')
+        self.employee = Employee.objects.create(
+            employee_id='EMP500',
+            first_name='Karyawan',
+            last_name='Rollup',
+            department=self.department,
+            employment_type=EmploymentType.STAFF,
+            employment_status=EmploymentStatus.ACTIVE,
+        )
+
+    def summary(self, year=2025, month=3):
+        return AttendanceSummary.objects.filter(employee=self.employee, year=year, month=month).first()
+
+    def test_incremental_updates(self):
+        first = Attendance.objects.create(
+            employee=self.employee, date=date(2025, 3, 3),
+            status=AttendanceStatus.PRESENT, work_hours=Decimal('8'),
+        )
+        Attendance.objects.create(
+            employee=self.employee, date=date(2025, 3, 4),
+            status=AttendanceStatus.LATE, work_hours=Decimal('7.5'), overtime_hours=Decimal('1'),
+        )
+        summary = self.summary()
+        self.assertEqual((summary.total_days, summary.present_days, summary.late_days), (2, 1, 1))
+        self.assertEqual(summary.total_work_hours, Decimal('15.5'))
+
+        # Moving a record to another month refreshes both months
+        first = Attendance.objects.get(pk=first.pk)
+        first.date = date(2025, 4, 1)
+        first.status = AttendanceStatus.SICK
+        first.save()
+        self.assertEqual(self.summary().total_days, 1)
+        self.assertEqual(self.summary(month=4).sick_days, 1)
+
+        first.delete()
+        self.assertIsNone(self.summary(month=4))
+
+    def test_rebuild_and_dashboard(self):
+        Attendance.objects.bulk_create([
+            Attendance(employee=self.employee, date=date(2025, 3, day), status=AttendanceStatus.PRESENT)
+            for day in range(3, 8)
+        ])
+        self.assertIsNone(self.summary())
+
+        self.assertEqual(rollup.rebuild_all(), 1)
+        self.assertEqual(self.summary().present_days, 5)
+
+        response = self.client.get('/api/v1/hr/attendance/attendance-summaries/dashboard/?year=2025&month=3&months=3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['present_days'], 5)
+        self.assertEqual(response.data['attendance_rate'], 100)
+        self.assertEqual(response.data['departments'][0]['department_name'], 'Riset')
+        self.assertEqual([(t['month'], t['total_days']) for t in response.data['trend']], [(1, 0), (2, 0), (3, 5)])
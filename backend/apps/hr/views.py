@@ -20,7 +20,7 @@ from .serializers import (
     FaceRegistrationSerializer,
     FaceVerificationSerializer,
 )
-from .services import face_service
+from .services import face_service, face_index
 
 
 @extend_schema_view(
@@ -281,6 +281,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         employee.face_encoding = ''
         employee.face_registered = False
         employee.save()
+        face_index.invalidate(employee.tenant_id)
 
         invalidate_cache('employees:*')
         invalidate_cache('employee_detail:*')
@@ -349,8 +350,22 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_400_BAD_REQUEST
                     )
 
-                # Read both images
                 verification_bytes = face_service.read_image_file(face_image)
+
+                if face_index.enabled and employee.face_encoding:
+                    score = face_index.compare(employee, verification_bytes)
+                    if score is not None:
+                        similarity = round(score * 100, 2)
+                        match = score >= face_index.backend.match_threshold
+                        return Response({
+                            'match': match,
+                            'similarity': similarity,
+                            'confidence': similarity,
+                            'message': f'Faces match with {similarity:.2f}% similarity' if match else 'Faces do not match',
+                            'employee': EmployeeListSerializer(employee).data if match else None
+                        })
+
+                # Read the stored image
                 employee_image_bytes = employee.face_image.read()
 
                 # Compare using AWS Rekognition
@@ -379,6 +394,23 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 best_match = None
                 best_similarity = 0
 
+                if face_index.enabled:
+                    # One vectorized search over the tenant's embeddings
+                    found = face_index.identify(verification_bytes)
+                    if found:
+                        employee, similarity = found
+                        return Response({
+                            'match': True,
+                            'similarity': similarity,
+                            'confidence': similarity,
+                            'message': f"Matched with {employee.full_name}",
+                            'employee': EmployeeListSerializer(employee).data
+                        })
+                    return Response({
+                        'match': False,
+                        'message': 'No matching employee found'
+                    }, status=status.HTTP_404_NOT_FOUND)
+
                 # Compare against all employees with face registration
                 for employee in Employee.objects.filter(face_registered=True):
                     if not employee.face_image:
@@ -402,7 +434,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                         'match': True,
                         'similarity': match_result['similarity'],
                         'confidence': match_result['confidence'],
-                        'message': f"Matched with {employee.get_full_name()}",
+                        'message': f"Matched with {employee.full_name}",
                         'employee': EmployeeListSerializer(employee).data
                     })
                 else:
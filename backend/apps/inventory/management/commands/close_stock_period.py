@@ -0,0 +1,37 @@
+"""
+Snapshot every stock balance at a period close.
+
+Point-in-time valuation replays movements from the latest snapshot before
+the requested date, so closing each month keeps as-of queries fast. Defaults
+to the end of the previous month.
+
+Usage:
+    python manage.py close_stock_period
+    python manage.py close_stock_period --date 2025-01-31
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.inventory.sku.valuation import end_of_day, take_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Snapshot stock balances as of a period close'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=date.fromisoformat,
+            help='Close date (YYYY-MM-DD), default: last day of previous month',
+        )
+
+    def handle(self, *args, **options):
+        close_date = options['date'] or timezone.localdate().replace(day=1) - timedelta(days=1)
+        as_of = end_of_day(close_date)
+        if as_of > timezone.now():
+            raise CommandError('Close date must not be in the future')
+
+        count = take_snapshots(as_of)
+        self.stdout.write(self.style.SUCCESS(f'Stored {count} stock snapshots as of {close_date}'))
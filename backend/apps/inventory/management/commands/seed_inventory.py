@@ -5,8 +5,9 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from decimal import Decimal
 from apps.users.models import User
+from apps.inventory.sku.ledger import StockLine, apply_movements
 from apps.inventory.sku.models import (
-    SKU, Warehouse, StockRecord, StockMovement,
+    SKU, Warehouse, StockRecord,
     ItemCategory, UnitOfMeasure,
 )
 from apps.inventory.stock_opname.models import StockOpname, OpnameStatus
@@ -113,29 +114,14 @@ class Command(BaseCommand):
             # Random initial stock
             initial_qty = Decimal(str(random.randint(20, 100)))
 
-            record, created = StockRecord.objects.get_or_create(
-                sku=sku,
-                warehouse=main_warehouse,
-                defaults={
-                    'quantity': initial_qty,
-                    'created_by': admin,
-                    'updated_by': admin,
-                }
-            )
-
-            if created:
-                # Create initial stock movement
-                StockMovement.objects.create(
-                    sku=sku,
-                    warehouse=main_warehouse,
-                    movement_type='in',
-                    quantity=initial_qty,
-                    quantity_before=Decimal('0'),
-                    quantity_after=initial_qty,
+            if not StockRecord.objects.filter(sku=sku, warehouse=main_warehouse).exists():
+                # Initial stock goes through the ledger like any receipt
+                apply_movements(
+                    [StockLine(sku.id, main_warehouse.id, quantity=initial_qty)],
+                    'in',
                     reference_type='initial_stock',
                     notes='Stok awal',
-                    created_by=admin,
-                    updated_by=admin,
+                    user=admin,
                 )
 
         self.stdout.write(f'  Created stock records for {SKU.objects.count()} SKUs')
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:13
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_sku_tenant_stockmovement_tenant_stockopname_tenant_and_more'),
+        ('tenants', '0002_invoice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Harga per unit saat pergerakan (untuk valuasi)', max_digits=15, null=True),
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('as_of', models.DateTimeField()),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('average_value', models.DecimalField(decimal_places=2, default=0, help_text='Nilai persediaan metode rata-rata tertimbang', max_digits=18)),
+                ('fifo_value', models.DecimalField(decimal_places=2, default=0, help_text='Nilai persediaan metode FIFO', max_digits=18)),
+                ('fifo_layers', models.JSONField(blank=True, default=list, help_text='Sisa lapisan FIFO: [[quantity, unit_cost], ...]')),
+                ('sku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.sku')),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Stock Snapshot',
+                'verbose_name_plural': 'Stock Snapshots',
+                'ordering': ['-as_of'],
+                'indexes': [models.Index(fields=['sku', 'warehouse', 'as_of'], name='inventory_s_sku_id_075f95_idx'), models.Index(fields=['as_of'], name='inventory_s_as_of_97939b_idx')],
+                'unique_together': {('sku', 'warehouse', 'as_of')},
+            },
+        ),
+    ]
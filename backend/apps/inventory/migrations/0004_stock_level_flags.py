@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_valuation_snapshots'),
+        ('tenants', '0002_invoice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sku',
+            name='is_low_stock',
+            field=models.GeneratedField(db_persist=True, expression=models.Q(('current_stock__lte', models.F('minimum_stock'))), output_field=models.BooleanField()),
+        ),
+        migrations.AddField(
+            model_name='sku',
+            name='needs_reorder',
+            field=models.GeneratedField(db_persist=True, expression=models.Q(('current_stock__lte', models.F('reorder_point'))), output_field=models.BooleanField()),
+        ),
+        migrations.AddIndex(
+            model_name='sku',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_low_stock', True)), fields=['tenant', 'name'], name='sku_low_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sku',
+            index=models.Index(condition=models.Q(('is_active', True), ('needs_reorder', True)), fields=['tenant', 'name'], name='sku_needs_reorder_idx'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SKU, Warehouse, StockRecord, StockMovement
+from .models import SKU, Warehouse, StockRecord, StockMovement, StockSnapshot
 
 
 @admin.register(SKU)
@@ -62,3 +62,12 @@ class StockMovementAdmin(admin.ModelAdmin):
     search_fields = ['sku__sku_code', 'sku__name', 'reference_id']
     raw_id_fields = ['sku', 'warehouse']
     readonly_fields = ['movement_date', 'created_at']
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['sku', 'warehouse', 'as_of', 'quantity', 'average_value', 'fifo_value']
+    list_filter = ['warehouse', 'as_of']
+    search_fields = ['sku__sku_code', 'sku__name']
+    raw_id_fields = ['sku', 'warehouse']
+    readonly_fields = ['created_at', 'updated_at']
@@ -0,0 +1,260 @@
+"""
+Stock ledger: the single write path for stock quantities.
+
+`apply_movements` applies a batch of movements (a manual adjustment, every
+line of a transfer, every counted line of an opname) in one transaction:
+
+1. missing `StockRecord` rows are created, then all affected rows are
+   locked with `select_for_update` in (sku, warehouse) order, so concurrent
+   batches serialize per record instead of losing updates or deadlocking;
+2. before/after quantities are computed from the locked values and
+   availability is checked before anything is written;
+3. records are written with one `bulk_update`, movements with one
+   `bulk_create`, and `SKU.current_stock` is moved by the net delta per SKU
+   with a single `UPDATE ... SET current_stock = current_stock + CASE ...`.
+
+Each movement records its unit cost (the line's, or the SKU's current
+`unit_price`) so stock can later be valued as of any date (see `valuation`).
+
+Quantities written to `StockRecord` without a movement (rows from before the
+ledger, imports, direct edits) are booked by `book_opening_balances` as an
+adjustment dated at the record's creation, but never before its latest
+snapshot nor after the close being taken, so the movements of every record add up to its quantity again.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .models import SKU, StockMovement, StockRecord, StockSnapshot
+
+
+class InsufficientStock(ValueError):
+    """Raised when a movement would take more than the available quantity."""
+
+
+class StockLine:
+    """
+    One movement in a batch.
+
+    Pass either `quantity` (signed change) or `set_to` (counted quantity,
+    the change is derived from the locked record). `unit_cost` defaults to
+    the SKU's unit price.
+    """
+
+    __slots__ = ('sku_id', 'warehouse_id', 'quantity', 'set_to', 'notes', 'label', 'unit_cost')
+
+    def __init__(self, sku_id, warehouse_id, quantity=None, set_to=None, notes=None, label='',
+                 unit_cost=None):
+        if (quantity is None) == (set_to is None):
+            raise ValueError('Pass exactly one of quantity or set_to')
+        self.sku_id = sku_id
+        self.warehouse_id = warehouse_id
+        self.quantity = quantity
+        self.set_to = set_to
+        self.notes = notes
+        self.label = label
+        self.unit_cost = unit_cost
+
+    @property
+    def key(self):
+        return (self.sku_id, self.warehouse_id)
+
+
+def _lock_records(keys, tenant_id):
+    """Create missing stock records, then lock and return all of them by key."""
+    sku_ids = {sku_id for sku_id, _ in keys}
+    warehouse_ids = {warehouse_id for _, warehouse_id in keys}
+
+    existing = set(
+        StockRecord.all_objects.filter(sku_id__in=sku_ids, warehouse_id__in=warehouse_ids)
+        .values_list('sku_id', 'warehouse_id')
+    )
+    missing = [key for key in keys if key not in existing]
+    if missing:
+        if tenant_id is None:
+            tenants = dict(SKU.all_objects.filter(pk__in={k[0] for k in missing}).values_list('id', 'tenant_id'))
+        StockRecord.all_objects.bulk_create(
+            [
+                StockRecord(
+                    sku_id=sku_id,
+                    warehouse_id=warehouse_id,
+                    quantity=0,
+                    tenant_id=tenant_id if tenant_id is not None else tenants.get(sku_id),
+                )
+                for sku_id, warehouse_id in missing
+            ],
+            ignore_conflicts=True,
+        )
+
+    records = StockRecord.all_objects.select_for_update().filter(
+        sku_id__in=sku_ids, warehouse_id__in=warehouse_ids,
+    ).order_by('sku_id', 'warehouse_id')
+    return {(r.sku_id, r.warehouse_id): r for r in records if (r.sku_id, r.warehouse_id) in keys}
+
+
+def apply_movements(lines, movement_type, *, reference_type='', reference_id='', notes='',
+                    user=None, tenant_id=None, check_available=False):
+    """
+    Apply a batch of stock movements atomically.
+
+    Args:
+        lines: Iterable of StockLine
+        movement_type: One of StockMovement.MOVEMENT_TYPES
+        reference_type, reference_id: Source document of the movements
+        notes: Default movement notes (a line's own notes take precedence)
+        user: Recorded as created_by/updated_by
+        tenant_id: Tenant of newly created stock records (default: the SKU's)
+        check_available: Reject outflows above quantity - reserved_quantity
+
+    Returns:
+        List of created StockMovement rows, in line order
+
+    Raises:
+        InsufficientStock: If check_available and a line would overdraw;
+            nothing is written in that case
+    """
+    lines = list(lines)
+    if not lines:
+        return []
+
+    with transaction.atomic():
+        records = _lock_records({line.key for line in lines}, tenant_id)
+        now = timezone.now()
+        prices = dict(
+            SKU.all_objects.filter(pk__in={line.sku_id for line in lines if line.unit_cost is None})
+            .values_list('id', 'unit_price')
+        ) if any(line.unit_cost is None for line in lines) else {}
+
+        movements = []
+        sku_deltas = {}
+        for line in lines:
+            record = records[line.key]
+            before = record.quantity
+            change = line.quantity if line.quantity is not None else line.set_to - before
+
+            if check_available and change < 0 and record.available_quantity < -change:
+                raise InsufficientStock(f'Insufficient stock for {line.label or record.sku_id}')
+
+            record.quantity = before + change
+            if record.is_active:
+                sku_deltas[line.sku_id] = sku_deltas.get(line.sku_id, Decimal('0')) + change
+
+            movements.append(StockMovement(
+                tenant_id=record.tenant_id,
+                sku_id=line.sku_id,
+                warehouse_id=line.warehouse_id,
+                movement_type=movement_type,
+                quantity=change,
+                quantity_before=before,
+                quantity_after=record.quantity,
+                unit_cost=line.unit_cost if line.unit_cost is not None else prices.get(line.sku_id),
+                reference_type=reference_type,
+                reference_id=reference_id,
+                notes=line.notes if line.notes is not None else notes,
+                created_by=user,
+                updated_by=user,
+            ))
+
+        for record in records.values():
+            record.updated_by = user
+            record.updated_at = now
+            record.sync_loaded_stock()
+        StockRecord.all_objects.bulk_update(records.values(), ['quantity', 'updated_by', 'updated_at'])
+        StockMovement.all_objects.bulk_create(movements)
+        adjust_current_stock(sku_deltas)
+
+    return movements
+
+
+def adjust_current_stock(deltas):
+    """Move `SKU.current_stock` by a net delta per SKU in one UPDATE."""
+    deltas = {sku_id: delta for sku_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    output = DecimalField(max_digits=12, decimal_places=2)
+    SKU.all_objects.filter(pk__in=deltas).update(
+        current_stock=F('current_stock') + Case(
+            *[When(pk=sku_id, then=Value(delta, output_field=output)) for sku_id, delta in deltas.items()],
+            default=Value(Decimal('0'), output_field=output),
+            output_field=output,
+        ),
+    )
+
+
+def book_opening_balances(as_of=None, user=None) -> int:
+    """
+    Book the stock of records whose movements do not add up to their
+    quantity as an adjustment (at the SKU's unit price).
+
+    The adjustment is dated at the record's creation (at most `as_of`, so
+    the close being taken matches the records), or just after the record's
+    latest snapshot before it if that is later: replays start from the
+    snapshot, so an earlier date would never be read.
+
+    Uses the (tenant-filtered) default manager. Record quantities and
+    `SKU.current_stock` are left as they are.
+
+    Args:
+        as_of: Period close the balances are booked for (None: now)
+        user: Recorded as created_by/updated_by
+
+    Returns:
+        Number of movements created
+    """
+    output = DecimalField(max_digits=12, decimal_places=2)
+    moved = StockMovement.all_objects.filter(
+        sku_id=OuterRef('sku_id'), warehouse_id=OuterRef('warehouse_id'), is_active=True,
+    ).order_by().values('sku_id').annotate(total=Sum('quantity')).values('total')
+    records = StockRecord.objects.annotate(
+        moved=Coalesce(Subquery(moved), Value(Decimal('0')), output_field=output),
+    ).exclude(quantity=F('moved')).values_list(
+        'tenant_id', 'sku_id', 'warehouse_id', 'quantity', 'moved', 'sku__unit_price',
+    )
+
+    movements = [
+        StockMovement(
+            tenant_id=tenant_id,
+            sku_id=sku_id,
+            warehouse_id=warehouse_id,
+            movement_type='adjustment',
+            quantity=quantity - moved,
+            quantity_before=moved,
+            quantity_after=quantity,
+            unit_cost=unit_price,
+            reference_type='opening_balance',
+            notes='Saldo awal',
+            created_by=user,
+            updated_by=user,
+        )
+        for tenant_id, sku_id, warehouse_id, quantity, moved, unit_price in records
+    ]
+    if not movements:
+        return 0
+
+    with transaction.atomic():
+        StockMovement.all_objects.bulk_create(movements)
+        # movement_date is auto_now_add; GREATEST skips a missing snapshot
+        created_at = Subquery(
+            StockRecord.all_objects.filter(
+                sku_id=OuterRef('sku_id'), warehouse_id=OuterRef('warehouse_id'),
+            ).values('created_at')[:1]
+        )
+        snapshots = StockSnapshot.all_objects.filter(sku_id=OuterRef('sku_id'), warehouse_id=OuterRef('warehouse_id'))
+        if as_of is not None:
+            created_at = Least(created_at, Value(as_of))
+            snapshots = snapshots.filter(as_of__lt=as_of)
+        StockMovement.all_objects.filter(pk__in=[m.pk for m in movements]).update(
+            movement_date=Greatest(
+                created_at,
+                Subquery(
+                    snapshots.order_by('-as_of').annotate(
+                        after=F('as_of') + timedelta(microseconds=1),
+                    ).values('after')[:1]
+                ),
+            ),
+        )
+    return len(movements)
@@ -6,6 +6,7 @@ from django.conf import settings
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from apps.core.models import TenantBaseModel, AuditMixin
+from apps.core.services.sequences import Sequence
 
 
 class ItemCategory(models.TextChoices):
@@ -37,6 +38,9 @@ class UnitOfMeasure(models.TextChoices):
     CARTON = 'carton', 'Karton'
 
 
+SKU_CODES = Sequence('sku', 'SKU-{seq:04d}', model='inventory.SKU', field='sku_code')
+
+
 class SKU(TenantBaseModel, AuditMixin):
     """
     Stock Keeping Unit - master data for inventory items.
@@ -102,6 +106,20 @@ class SKU(TenantBaseModel, AuditMixin):
         default=0,
     )
 
+    # Stock level flags, computed by the database whenever current_stock or a
+    # threshold changes (including the stock ledger's bulk updates) and served
+    # by partial indexes
+    is_low_stock = models.GeneratedField(
+        expression=models.Q(current_stock__lte=models.F('minimum_stock')),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
+    needs_reorder = models.GeneratedField(
+        expression=models.Q(current_stock__lte=models.F('reorder_point')),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
+
     # Location
     default_location = models.ForeignKey(
         'Warehouse',
@@ -133,6 +151,16 @@ class SKU(TenantBaseModel, AuditMixin):
             models.Index(fields=['name']),
             models.Index(fields=['category']),
             models.Index(fields=['current_stock']),
+            models.Index(
+                fields=['tenant', 'name'],
+                condition=models.Q(is_low_stock=True, is_active=True),
+                name='sku_low_stock_idx',
+            ),
+            models.Index(
+                fields=['tenant', 'name'],
+                condition=models.Q(needs_reorder=True, is_active=True),
+                name='sku_needs_reorder_idx',
+            ),
         ]
 
     def __str__(self):
@@ -142,29 +170,21 @@ class SKU(TenantBaseModel, AuditMixin):
         if not self.sku_code:
             self.sku_code = self.generate_sku_code()
         super().save(*args, **kwargs)
+        # Generated flags are computed by the database; reload them on access
+        for field in ('is_low_stock', 'needs_reorder'):
+            self.__dict__.pop(field, None)
 
     def generate_sku_code(self):
         """Generate SKU code like SKU-0001."""
-        last = SKU.objects.order_by('-created_at').first()
-        if last and last.sku_code.startswith('SKU-'):
-            try:
-                num = int(last.sku_code.split('-')[1]) + 1
-            except (ValueError, IndexError):
-                num = 1
-        else:
-            num = 1
-        return f'SKU-{num:04d}'
-
-    @property
-    def is_low_stock(self):
-        return self.current_stock <= self.minimum_stock
-
-    @property
-    def needs_reorder(self):
-        return self.current_stock <= self.reorder_point
+        return SKU_CODES.next()
 
     def update_stock(self):
-        """Recalculate current stock from stock records."""
+        """
+        Recalculate current stock from stock records.
+
+        Normally kept in sync incrementally by the stock ledger; use this to
+        repair a drifted value.
+        """
         from django.db.models import Sum
         total = self.stock_records.filter(is_active=True).aggregate(
             total=Sum('quantity')
@@ -249,10 +269,52 @@ class StockRecord(TenantBaseModel, AuditMixin):
     def available_quantity(self):
         return self.quantity - self.reserved_quantity
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.sync_loaded_stock()
+        return instance
+
+    def _stock_contribution(self):
+        """Stock counted in `SKU.current_stock`, or None if a field is deferred."""
+        values = self.__dict__
+        if 'quantity' not in values or 'is_active' not in values:
+            return None
+        return values['quantity'] if values['is_active'] else Decimal('0')
+
+    def _stored_contribution(self):
+        row = StockRecord.all_objects.filter(pk=self.pk).values_list('quantity', 'is_active').first()
+        return row[0] if row and row[1] else Decimal('0')
+
+    def sync_loaded_stock(self):
+        """Remember the quantity already counted in `SKU.current_stock`."""
+        self._loaded_stock = self._stock_contribution()
+
     def save(self, *args, **kwargs):
+        from .ledger import adjust_current_stock
+
+        before = getattr(self, '_loaded_stock', Decimal('0'))
+        if before is None:
+            # Loaded with deferred fields: read what is counted from the row
+            before = self._stored_contribution()
         super().save(*args, **kwargs)
-        # Update SKU's denormalized current_stock
-        self.sku.update_stock()
+        # Move SKU's denormalized current_stock by the change only. Quantity
+        # changes that must not lose concurrent updates go through the ledger.
+        after = self._stock_contribution()
+        if after is None:
+            after = self._stored_contribution()
+        adjust_current_stock({self.sku_id: after - before})
+        self.sync_loaded_stock()
+
+    def delete(self, *args, **kwargs):
+        from .ledger import adjust_current_stock
+
+        contribution = getattr(self, '_loaded_stock', Decimal('0'))
+        if contribution is None:
+            contribution = self._stored_contribution()
+        result = super().delete(*args, **kwargs)
+        adjust_current_stock({self.sku_id: -contribution})
+        return result
 
 
 class StockMovement(TenantBaseModel, AuditMixin):
@@ -293,6 +355,13 @@ class StockMovement(TenantBaseModel, AuditMixin):
         decimal_places=2,
         default=0,
     )
+    unit_cost = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text='Harga per unit saat pergerakan (untuk valuasi)'
+    )
 
     # Reference
     reference_type = models.CharField(max_length=50, blank=True)
@@ -313,3 +382,58 @@ class StockMovement(TenantBaseModel, AuditMixin):
 
     def __str__(self):
         return f"{self.sku.name} - {self.get_movement_type_display()} - {self.quantity}"
+
+
+class StockSnapshot(TenantBaseModel):
+    """
+    Closing balance of a SKU in a warehouse at a period close.
+
+    Point-in-time valuation starts from the latest snapshot before the
+    requested date and replays only later movements (see `valuation`).
+    """
+    sku = models.ForeignKey(
+        SKU,
+        on_delete=models.CASCADE,
+        related_name='snapshots',
+    )
+    warehouse = models.ForeignKey(
+        Warehouse,
+        on_delete=models.CASCADE,
+        related_name='snapshots',
+    )
+    as_of = models.DateTimeField()
+    quantity = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+    )
+    average_value = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=0,
+        help_text='Nilai persediaan metode rata-rata tertimbang'
+    )
+    fifo_value = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=0,
+        help_text='Nilai persediaan metode FIFO'
+    )
+    fifo_layers = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='Sisa lapisan FIFO: [[quantity, unit_cost], ...]'
+    )
+
+    class Meta:
+        verbose_name = 'Stock Snapshot'
+        verbose_name_plural = 'Stock Snapshots'
+        ordering = ['-as_of']
+        unique_together = ['sku', 'warehouse', 'as_of']
+        indexes = [
+            models.Index(fields=['sku', 'warehouse', 'as_of']),
+            models.Index(fields=['as_of']),
+        ]
+
+    def __str__(self):
+        return f"{self.sku.name} @ {self.warehouse.name} ({self.as_of:%Y-%m-%d}): {self.quantity}"
@@ -0,0 +1,98 @@
+"""
+Reorder suggestion feed.
+
+Candidates are SKUs whose `needs_reorder` flag is set; the flag is a stored
+generated column kept current by the database and served by a partial index,
+so the feed reads only flagged SKUs no matter how large the catalogue is.
+
+Quantities already on order are aggregated from open purchase-order lines
+(matched on `POItem.item_code` = `SKU.sku_code` within the SKU's tenant) in
+a correlated subquery of the same statement, which also filters, orders by
+shortfall and applies the limit. A SKU whose stock plus open orders is back
+above its reorder point is dropped; the others get a suggested order
+quantity that tops stock up to `maximum_stock` (or reorder point + reorder
+quantity when no maximum is set), never less than `reorder_quantity`.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import IsNull
+
+from .models import SKU
+
+_ZERO = Decimal('0')
+
+
+def open_po_statuses():
+    from apps.procurement.purchase_order.models import POStatus
+    return [POStatus.APPROVED, POStatus.SENT, POStatus.PARTIAL]
+
+
+def on_order_subquery():
+    """
+    Open PO quantity not yet received for the outer SKU.
+
+    Lines are matched within the SKU's tenant; rows without a tenant (still
+    being migrated) only match each other.
+    """
+    from apps.procurement.purchase_order.models import POItem
+
+    output = DecimalField(max_digits=14, decimal_places=2)
+    same_tenant = (
+        Q(purchase_order__tenant=OuterRef('tenant'))
+        | Q(IsNull(OuterRef('tenant'), True), purchase_order__tenant__isnull=True)
+    )
+    pending = POItem.all_objects.filter(
+        same_tenant,
+        item_code=OuterRef('sku_code'),
+        is_active=True,
+        purchase_order__is_active=True,
+        purchase_order__status__in=open_po_statuses(),
+    ).order_by().values('item_code').annotate(
+        total=Sum(F('quantity') - F('received_quantity'), output_field=output),
+    ).values('total')
+    return Coalesce(Subquery(pending, output_field=output), Value(_ZERO, output_field=output))
+
+
+def reorder_feed(tenant=None, limit=None) -> list:
+    """
+    Reorder suggestions for a tenant's flagged SKUs.
+
+    Args:
+        tenant: Tenant to report on (None: every SKU, like the unscoped
+            default managers)
+        limit: Maximum number of suggestions
+
+    Returns:
+        List of dicts ordered by shortfall (largest first)
+    """
+    skus = SKU.all_objects.filter(is_active=True, needs_reorder=True)
+    if tenant is not None:
+        skus = skus.filter(tenant=tenant)
+
+    output = DecimalField(max_digits=14, decimal_places=2)
+    rows = skus.annotate(
+        on_order=on_order_subquery(),
+    ).annotate(
+        projected_stock=ExpressionWrapper(F('current_stock') + F('on_order'), output_field=output),
+    ).annotate(
+        shortfall=ExpressionWrapper(F('reorder_point') - F('projected_stock'), output_field=output),
+    ).filter(shortfall__gte=0).values(
+        'id', 'sku_code', 'name', 'unit', 'current_stock', 'minimum_stock',
+        'reorder_point', 'reorder_quantity', 'maximum_stock', 'is_low_stock', 'on_order',
+        'projected_stock', 'shortfall',
+    ).order_by('-shortfall', 'name')
+    if limit:
+        rows = rows[:limit]
+
+    suggestions = []
+    for row in rows:
+        projected = row['projected_stock']
+        target = row['maximum_stock'] or row['reorder_point'] + row['reorder_quantity']
+        suggestions.append({
+            **row,
+            'id': str(row['id']),
+            'suggested_quantity': max(target - projected, row['reorder_quantity'], _ZERO),
+        })
+    return suggestions
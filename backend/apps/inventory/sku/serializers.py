@@ -102,7 +102,7 @@ class StockMovementSerializer(serializers.ModelSerializer):
             'id', 'sku', 'sku_code', 'sku_name',
             'warehouse', 'warehouse_name',
             'movement_type', 'movement_type_display',
-            'quantity', 'quantity_before', 'quantity_after',
+            'quantity', 'quantity_before', 'quantity_after', 'unit_cost',
             'reference_type', 'reference_id', 'notes',
             'movement_date', 'created_at',
         ]
@@ -115,3 +115,17 @@ class StockAdjustmentSerializer(serializers.Serializer):
     warehouse_id = serializers.UUIDField()
     adjustment_quantity = serializers.DecimalField(max_digits=12, decimal_places=2)
     reason = serializers.CharField(max_length=500)
+
+
+class StockValuationQuerySerializer(serializers.Serializer):
+    """Query parameters of the point-in-time valuation report."""
+    as_of = serializers.DateField()
+    method = serializers.ChoiceField(choices=['average', 'fifo'], default='average')
+    sku = serializers.UUIDField(required=False)
+    warehouse = serializers.UUIDField(required=False)
+    include_zero = serializers.BooleanField(default=False)
+
+
+class StockPeriodCloseSerializer(serializers.Serializer):
+    """Serializer for closing a stock period (taking snapshots)."""
+    as_of = serializers.DateField()
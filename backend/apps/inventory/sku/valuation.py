@@ -0,0 +1,273 @@
+"""
+Point-in-time stock quantity and valuation.
+
+The balance of a SKU in a warehouse as of a date is rebuilt from the latest
+`StockSnapshot` at or before that date, replaying only the movements after
+it. A report over every SKU takes a fixed number of queries:
+
+1. latest snapshot per (sku, warehouse) (`DISTINCT ON`);
+2. movements after that snapshot up to the date, in replay order (the
+   snapshot cut-off is a correlated subquery on the snapshot index);
+3. SKU and warehouse labels.
+
+Two valuation methods are tracked side by side while replaying:
+
+- `average`: weighted average cost; receipts add `quantity * unit_cost`,
+  issues remove quantity at the running average;
+- `fifo`: receipts add a cost layer, issues consume the oldest layers first.
+
+Receipts are valued at the movement's `unit_cost` (falling back to the SKU's
+current unit price for movements recorded before costs were stored). Issues
+beyond the available layers leave a negative layer at the last known cost,
+which later receipts offset first.
+
+`take_snapshots` stores the replayed state at a period close, so later
+as-of queries only replay movements of the periods after it. Only movements
+are replayed: a close first books stock that was written to `StockRecord`
+without a movement as an opening balance (`ledger.book_opening_balances`).
+"""
+from collections import deque
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .ledger import book_opening_balances
+from .models import SKU, StockMovement, StockSnapshot, Warehouse
+
+METHODS = ('average', 'fifo')
+
+_ZERO = Decimal('0')
+_CENT = Decimal('0.01')
+
+
+def end_of_day(day) -> datetime:
+    """Aware datetime at the end of a date, in the current timezone."""
+    return timezone.make_aware(datetime.combine(day, time.max))
+
+
+class Position:
+    """Replayed balance of one SKU in one warehouse."""
+
+    __slots__ = ('tenant_id', 'quantity', 'average_value', 'layers', 'last_cost')
+
+    def __init__(self, tenant_id=None, quantity=_ZERO, average_value=_ZERO, layers=(), last_cost=_ZERO):
+        self.tenant_id = tenant_id
+        self.quantity = quantity
+        self.average_value = average_value
+        self.layers = deque([Decimal(q), Decimal(c)] for q, c in layers)
+        self.last_cost = last_cost
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        layers = snapshot.fifo_layers or []
+        return cls(
+            tenant_id=snapshot.tenant_id,
+            quantity=snapshot.quantity,
+            average_value=snapshot.average_value,
+            layers=layers,
+            last_cost=Decimal(layers[-1][1]) if layers else _ZERO,
+        )
+
+    @property
+    def average_cost(self) -> Decimal:
+        if self.quantity > 0:
+            return self.average_value / self.quantity
+        return self.last_cost
+
+    @property
+    def fifo_value(self) -> Decimal:
+        return sum((q * c for q, c in self.layers), _ZERO)
+
+    def value(self, method) -> Decimal:
+        value = self.fifo_value if method == 'fifo' else self.average_value
+        return value.quantize(_CENT)
+
+    def apply(self, quantity, unit_cost):
+        """Replay one movement (signed quantity)."""
+        if quantity > 0:
+            self._receive(quantity, unit_cost if unit_cost is not None else self.last_cost)
+        elif quantity < 0:
+            self._issue(-quantity)
+
+    def _receive(self, quantity, cost):
+        self.average_value += quantity * cost
+        self.quantity += quantity
+        self.last_cost = cost
+        if self.quantity == 0:
+            self.average_value = _ZERO
+
+        # A negative layer is stock issued before it was received
+        if self.layers and self.layers[0][0] < 0:
+            offset = min(quantity, -self.layers[0][0])
+            self.layers[0][0] += offset
+            quantity -= offset
+            if self.layers[0][0] == 0:
+                self.layers.popleft()
+        if quantity > 0:
+            self.layers.append([quantity, cost])
+
+    def _issue(self, quantity):
+        self.average_value -= quantity * self.average_cost
+        self.quantity -= quantity
+        if self.quantity == 0:
+            self.average_value = _ZERO
+
+        while quantity > 0 and self.layers and self.layers[0][0] > 0:
+            layer = self.layers[0]
+            taken = min(quantity, layer[0])
+            layer[0] -= taken
+            quantity -= taken
+            if layer[0] == 0:
+                self.layers.popleft()
+        if quantity > 0:
+            if self.layers:
+                self.layers[0][0] -= quantity
+            else:
+                self.layers.append([-quantity, self.last_cost])
+
+
+def _filter(queryset, sku_ids=None, warehouse_ids=None):
+    if sku_ids is not None:
+        queryset = queryset.filter(sku_id__in=sku_ids)
+    if warehouse_ids is not None:
+        queryset = queryset.filter(warehouse_id__in=warehouse_ids)
+    return queryset
+
+
+def positions_as_of(as_of, sku_ids=None, warehouse_ids=None, rebuild=False) -> dict:
+    """
+    Replay balances up to `as_of`.
+
+    Uses the (tenant-filtered) default managers, so inside a request only
+    the current tenant's stock is included.
+
+    Args:
+        rebuild: Ignore snapshots taken at `as_of` itself and replay from
+            the one before (to take them again)
+
+    Returns:
+        {(sku_id, warehouse_id): Position}
+    """
+    cutoff = Q(as_of__lt=as_of) if rebuild else Q(as_of__lte=as_of)
+    snapshots = _filter(StockSnapshot.objects.filter(cutoff), sku_ids, warehouse_ids)
+    positions = {
+        (s.sku_id, s.warehouse_id): Position.from_snapshot(s)
+        for s in snapshots.order_by('sku_id', 'warehouse_id', '-as_of').distinct('sku_id', 'warehouse_id')
+    }
+
+    snapshot_at = StockSnapshot.objects.filter(
+        cutoff,
+        sku_id=OuterRef('sku_id'),
+        warehouse_id=OuterRef('warehouse_id'),
+    ).order_by('-as_of').values('as_of')[:1]
+    movements = _filter(
+        StockMovement.objects.filter(is_active=True, movement_date__lte=as_of), sku_ids, warehouse_ids,
+    ).annotate(
+        snapshot_at=Subquery(snapshot_at),
+    ).filter(
+        Q(snapshot_at__isnull=True) | Q(movement_date__gt=F('snapshot_at'))
+    ).order_by(
+        'sku_id', 'warehouse_id', 'movement_date', 'created_at',
+    ).values_list(
+        'sku_id', 'warehouse_id', 'tenant_id', 'quantity', Coalesce('unit_cost', 'sku__unit_price'),
+    )
+
+    for sku_id, warehouse_id, tenant_id, quantity, unit_cost in movements.iterator(chunk_size=5000):
+        position = positions.get((sku_id, warehouse_id))
+        if position is None:
+            position = positions[(sku_id, warehouse_id)] = Position(tenant_id=tenant_id)
+        position.apply(quantity, unit_cost)
+    return positions
+
+
+def valuation_report(as_of, method='average', sku_ids=None, warehouse_ids=None, include_zero=False) -> dict:
+    """
+    Quantity and value of every SKU per warehouse as of a datetime.
+
+    Args:
+        as_of: Aware datetime (see `end_of_day`)
+        method: 'average' or 'fifo'
+        sku_ids, warehouse_ids: Optional restrictions
+        include_zero: Include balances that are zero in quantity and value
+    """
+    if method not in METHODS:
+        raise ValueError(f'Unknown valuation method: {method}')
+
+    positions = positions_as_of(as_of, sku_ids, warehouse_ids)
+    skus = {
+        row[0]: row[1:]
+        for row in SKU.all_objects.filter(pk__in={k[0] for k in positions}).values_list('id', 'sku_code', 'name')
+    }
+    warehouses = dict(
+        Warehouse.all_objects.filter(pk__in={k[1] for k in positions}).values_list('id', 'name')
+    )
+
+    items = []
+    total_quantity = total_value = _ZERO
+    for (sku_id, warehouse_id), position in positions.items():
+        value = position.value(method)
+        if not include_zero and position.quantity == 0 and value == 0:
+            continue
+        sku_code, sku_name = skus.get(sku_id, ('', ''))
+        items.append({
+            'sku': str(sku_id),
+            'sku_code': sku_code,
+            'sku_name': sku_name,
+            'warehouse': str(warehouse_id),
+            'warehouse_name': warehouses.get(warehouse_id, ''),
+            'quantity': position.quantity,
+            'unit_cost': (value / position.quantity).quantize(_CENT) if position.quantity else _ZERO,
+            'value': value,
+        })
+        total_quantity += position.quantity
+        total_value += value
+    items.sort(key=lambda item: (item['sku_code'], item['warehouse_name']))
+
+    return {
+        'as_of': as_of,
+        'method': method,
+        'total_quantity': total_quantity,
+        'total_value': total_value,
+        'items': items,
+    }
+
+
+def take_snapshots(as_of) -> int:
+    """
+    Store the balance of every SKU per warehouse as of a period close.
+
+    The balances are replayed from the snapshots strictly before `as_of`, so
+    re-running a close overwrites its snapshots with movements booked into
+    the period since.
+
+    Returns:
+        Number of snapshots written
+    """
+    with transaction.atomic():
+        book_opening_balances(as_of)
+        positions = positions_as_of(as_of, rebuild=True)
+        snapshots = [
+            StockSnapshot(
+                tenant_id=position.tenant_id,
+                sku_id=sku_id,
+                warehouse_id=warehouse_id,
+                as_of=as_of,
+                quantity=position.quantity,
+                average_value=position.value('average'),
+                fifo_value=position.value('fifo'),
+                fifo_layers=[[str(q), str(c)] for q, c in position.layers],
+            )
+            for (sku_id, warehouse_id), position in positions.items()
+        ]
+        StockSnapshot.all_objects.bulk_create(
+            snapshots,
+            batch_size=2000,
+            update_conflicts=True,
+            unique_fields=['sku', 'warehouse', 'as_of'],
+            update_fields=['quantity', 'average_value', 'fifo_value', 'fifo_layers', 'updated_at'],
+        )
+    return len(snapshots)
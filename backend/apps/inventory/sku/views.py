@@ -2,16 +2,21 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, F
+from django.db.models import Sum
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 
 from apps.common.cache import cache_api_response, invalidate_cache
+from apps.core.middleware import get_current_tenant
+from .ledger import StockLine, apply_movements
 from .models import SKU, Warehouse, StockRecord, StockMovement
 from .serializers import (
     SKUListSerializer, SKUDetailSerializer, SKUCreateSerializer,
     WarehouseSerializer, StockRecordSerializer, StockMovementSerializer,
-    StockAdjustmentSerializer,
+    StockAdjustmentSerializer, StockValuationQuerySerializer, StockPeriodCloseSerializer,
 )
+from .reorder import reorder_feed
+from .valuation import end_of_day, take_snapshots, valuation_report
 
 
 class WarehouseViewSet(viewsets.ModelViewSet):
@@ -114,21 +119,30 @@ class SKUViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
         """Get items with low stock."""
-        skus = self.get_queryset().filter(
-            current_stock__lte=F('minimum_stock')
-        )
+        skus = self.get_queryset().filter(is_low_stock=True)
         serializer = SKUListSerializer(skus, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def needs_reorder(self, request):
         """Get items that need reorder."""
-        skus = self.get_queryset().filter(
-            current_stock__lte=F('reorder_point')
-        )
+        skus = self.get_queryset().filter(needs_reorder=True)
         serializer = SKUListSerializer(skus, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def reorder_suggestions(self, request):
+        """
+        Reorder suggestions: flagged SKUs net of open purchase orders.
+
+        Query params: limit (default 100)
+        """
+        try:
+            limit = min(max(int(request.query_params.get('limit', 100)), 1), 1000)
+        except ValueError:
+            limit = 100
+        return Response(reorder_feed(tenant=get_current_tenant(), limit=limit))
+
     @action(detail=True, methods=['get'])
     def stock_by_warehouse(self, request, pk=None):
         """Get stock levels by warehouse for a SKU."""
@@ -160,35 +174,53 @@ class SKUViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        adjustment_qty = serializer.validated_data['adjustment_quantity']
-        reason = serializer.validated_data['reason']
-
-        # Get or create stock record
-        stock_record, _ = StockRecord.objects.get_or_create(
-            sku=sku,
-            warehouse=warehouse,
-            defaults={'quantity': 0}
+        apply_movements(
+            [StockLine(sku.id, warehouse.id, quantity=serializer.validated_data['adjustment_quantity'])],
+            'adjustment',
+            notes=serializer.validated_data['reason'],
+            user=request.user,
         )
+        invalidate_cache('skus:*')
+        invalidate_cache('sku_detail:*')
 
-        # Create movement
-        StockMovement.objects.create(
-            sku=sku,
-            warehouse=warehouse,
-            movement_type='adjustment',
-            quantity=adjustment_qty,
-            quantity_before=stock_record.quantity,
-            quantity_after=stock_record.quantity + adjustment_qty,
-            notes=reason,
-            created_by=request.user,
-            updated_by=request.user,
+        return Response({'detail': 'Stok berhasil disesuaikan.'})
+
+    @action(detail=False, methods=['get'])
+    def valuation(self, request):
+        """
+        Stock quantity and value per SKU and warehouse as of the end of a date.
+
+        Query params: as_of (YYYY-MM-DD), method (average|fifo), sku, warehouse,
+        include_zero.
+        """
+        serializer = StockValuationQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        report = valuation_report(
+            end_of_day(data['as_of']),
+            method=data['method'],
+            sku_ids=[data['sku']] if data.get('sku') else None,
+            warehouse_ids=[data['warehouse']] if data.get('warehouse') else None,
+            include_zero=data['include_zero'],
         )
+        return Response(report)
 
-        # Update stock
-        stock_record.quantity += adjustment_qty
-        stock_record.updated_by = request.user
-        stock_record.save()
+    @action(detail=False, methods=['post'])
+    def close_period(self, request):
+        """Snapshot every stock balance as of the end of a date (period close)."""
+        serializer = StockPeriodCloseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        return Response({'detail': 'Stok berhasil disesuaikan.'})
+        as_of = end_of_day(serializer.validated_data['as_of'])
+        if as_of > timezone.now():
+            return Response(
+                {'detail': 'Tanggal tutup periode tidak boleh di masa depan.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        count = take_snapshots(as_of)
+        return Response({'as_of': as_of, 'snapshots': count})
 
 
 class StockRecordViewSet(viewsets.ReadOnlyModelViewSet):
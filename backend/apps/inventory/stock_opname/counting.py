@@ -0,0 +1,243 @@
+"""
+Set-based stock opname operations.
+
+A full warehouse count can cover tens of thousands of SKUs, so nothing here
+touches items one by one:
+
+- `generate_items` copies the warehouse's stock records into opname items
+  with one `INSERT ... SELECT ... ON CONFLICT DO NOTHING`;
+- `refresh_summary` recomputes the header counters with one aggregate query
+  (the variance value is summed in SQL, joined to the SKU price);
+- `record_counts` applies a batch of barcode scans: codes are resolved in one
+  query, SKUs found in the warehouse without an item get one, and all counts
+  are written with a single `UPDATE ... CASE` (scans add to the running
+  count, or set it in `set` mode).
+
+Scanners retry on flaky networks; a batch sent with a `batch_id` is applied
+at most once per opname (remembered in the cache for
+OPNAME_SCAN_BATCH_TTL seconds).
+
+Adjustments after approval go through the stock ledger in one bulk
+operation (`StockOpname.apply_adjustments`).
+"""
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.inventory.sku.models import SKU, StockRecord
+from .models import StockOpname, StockOpnameItem
+
+MAX_SCAN_BATCH = 1000
+SCAN_MODES = ('add', 'set')
+
+_BATCH_KEY = 'inventory:opname:scan:{}:{}'
+
+
+class DuplicateBatch(Exception):
+    """Raised when a scan batch with the same id was already applied."""
+
+
+# ==================== Generation ====================
+
+def generate_items(opname) -> int:
+    """
+    Create an item for every active stock record in the opname's warehouse
+    (restricted to `category_filter` when set).
+
+    Returns:
+        Number of items created
+    """
+    params = {
+        'tenant': opname.tenant_id,
+        'opname': opname.pk,
+        'warehouse': opname.warehouse_id,
+        'category': opname.category_filter,
+    }
+    category = 'AND s.category = %(category)s' if opname.category_filter else ''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {StockOpnameItem._meta.db_table} (
+                id, created_at, updated_at, is_active, tenant_id, opname_id, sku_id,
+                system_quantity, actual_quantity, is_counted, has_variance,
+                variance_reason, notes
+            )
+            SELECT
+                gen_random_uuid(), now(), now(), TRUE, %(tenant)s, %(opname)s, r.sku_id,
+                r.quantity, NULL, FALSE, FALSE, '', ''
+            FROM {StockRecord._meta.db_table} r
+            JOIN {SKU._meta.db_table} s ON s.id = r.sku_id
+            WHERE r.warehouse_id = %(warehouse)s AND r.is_active {category}
+            ON CONFLICT (opname_id, sku_id) DO NOTHING
+            """,
+            params,
+        )
+        return cursor.rowcount
+
+
+# ==================== Summary ====================
+
+def refresh_summary(opname):
+    """Recompute the header counters of an opname in one aggregate query."""
+    output = DecimalField(max_digits=15, decimal_places=2)
+    totals = StockOpnameItem.all_objects.filter(opname=opname, is_active=True).aggregate(
+        total=Count('id'),
+        counted=Count('id', filter=Q(is_counted=True)),
+        variance=Count('id', filter=Q(has_variance=True)),
+        value=Coalesce(
+            Sum(
+                (F('actual_quantity') - F('system_quantity')) * F('sku__unit_price'),
+                filter=Q(has_variance=True),
+                output_field=output,
+            ),
+            Value(Decimal('0'), output_field=output),
+        ),
+    )
+    opname.total_items = totals['total']
+    opname.counted_items = totals['counted']
+    opname.variance_items = totals['variance']
+    opname.total_variance_value = totals['value']
+    StockOpname.all_objects.filter(pk=opname.pk).update(
+        total_items=opname.total_items,
+        counted_items=opname.counted_items,
+        variance_items=opname.variance_items,
+        total_variance_value=opname.total_variance_value,
+        updated_at=timezone.now(),
+    )
+    return opname
+
+
+# ==================== Counting ====================
+
+def _resolve_codes(opname, codes):
+    """{code: sku_id} for barcodes and SKU codes, in one query."""
+    resolved = {}
+    rows = SKU.all_objects.filter(
+        Q(barcode__in=codes) | Q(sku_code__in=codes),
+        tenant_id=opname.tenant_id,
+    ).values_list('id', 'barcode', 'sku_code')
+    for sku_id, barcode, sku_code in rows:
+        if barcode in codes:
+            resolved[barcode] = sku_id
+        # Explicit SKU codes win over a barcode that happens to match
+        if sku_code in codes:
+            resolved[sku_code] = sku_id
+    return resolved
+
+
+def record_counts(opname, scans, user=None, mode='add', batch_id=None) -> dict:
+    """
+    Apply a batch of scans to an in-progress opname.
+
+    Args:
+        opname: StockOpname in progress
+        scans: Iterable of {'code': barcode or SKU code, 'quantity': Decimal}
+        user: Recorded as counted_by
+        mode: 'add' adds scanned quantities to the running count,
+            'set' replaces it
+        batch_id: Optional client batch id; a repeated id raises DuplicateBatch
+
+    Returns:
+        Dict with `counted` (SKUs updated), `unknown` (codes not resolved)
+        and the refreshed header counters
+    """
+    if mode not in SCAN_MODES:
+        raise ValueError(f'Unknown scan mode: {mode}')
+
+    # Repeated scans of one code in a batch are summed (add) or the last wins (set)
+    quantities = OrderedDict()
+    for scan in scans:
+        code = scan['code']
+        quantity = Decimal(str(scan.get('quantity', 1)))
+        quantities[code] = quantities.get(code, Decimal('0')) + quantity if mode == 'add' else quantity
+
+    batch_key = _BATCH_KEY.format(opname.pk, batch_id) if batch_id else None
+    if batch_key and not cache.add(batch_key, True, timeout=getattr(settings, 'OPNAME_SCAN_BATCH_TTL', 24 * 60 * 60)):
+        raise DuplicateBatch(batch_id)
+
+    try:
+        with transaction.atomic():
+            resolved = _resolve_codes(opname, set(quantities))
+            unknown = [code for code in quantities if code not in resolved]
+
+            per_sku = {}
+            for code, quantity in quantities.items():
+                sku_id = resolved.get(code)
+                if sku_id is not None:
+                    per_sku[sku_id] = per_sku.get(sku_id, Decimal('0')) + quantity if mode == 'add' else quantity
+
+            if per_sku:
+                _ensure_items(opname, per_sku)
+                _write_counts(opname, per_sku, user, mode)
+            refresh_summary(opname)
+    except Exception:
+        if batch_key:
+            cache.delete(batch_key)
+        raise
+
+    return {
+        'counted': len(per_sku),
+        'unknown': unknown,
+        'total_items': opname.total_items,
+        'counted_items': opname.counted_items,
+        'variance_items': opname.variance_items,
+        'total_variance_value': opname.total_variance_value,
+    }
+
+
+def _ensure_items(opname, per_sku):
+    """Create items for scanned SKUs not in the opname (found stock)."""
+    existing = set(
+        StockOpnameItem.all_objects.filter(opname=opname, sku_id__in=per_sku).values_list('sku_id', flat=True)
+    )
+    missing = [sku_id for sku_id in per_sku if sku_id not in existing]
+    if not missing:
+        return
+    system = dict(
+        StockRecord.all_objects.filter(
+            warehouse_id=opname.warehouse_id, sku_id__in=missing, is_active=True,
+        ).values_list('sku_id', 'quantity')
+    )
+    StockOpnameItem.all_objects.bulk_create(
+        [
+            StockOpnameItem(
+                tenant_id=opname.tenant_id,
+                opname=opname,
+                sku_id=sku_id,
+                system_quantity=system.get(sku_id, Decimal('0')),
+            )
+            for sku_id in missing
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _write_counts(opname, per_sku, user, mode):
+    output = DecimalField(max_digits=12, decimal_places=2)
+    scanned = Case(
+        *[When(sku_id=sku_id, then=Value(quantity, output_field=output)) for sku_id, quantity in per_sku.items()],
+        output_field=output,
+    )
+    if mode == 'add':
+        actual = Coalesce(F('actual_quantity'), Value(Decimal('0'), output_field=output)) + scanned
+    else:
+        actual = scanned
+
+    now = timezone.now()
+    items = StockOpnameItem.all_objects.filter(opname=opname, sku_id__in=per_sku)
+    items.update(
+        actual_quantity=actual,
+        is_counted=True,
+        counted_at=Coalesce(F('counted_at'), Value(now)),
+        counted_by=user,
+        updated_at=now,
+    )
+    items.update(
+        has_variance=Case(When(actual_quantity=F('system_quantity'), then=Value(False)), default=Value(True)),
+    )
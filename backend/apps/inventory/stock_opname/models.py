@@ -1,12 +1,14 @@
 """
 Stock Opname (Physical Inventory Count) models.
 """
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
 from apps.core.models import TenantBaseModel, AuditMixin
-from apps.inventory.sku.models import SKU, Warehouse, StockRecord, StockMovement
+from apps.core.services.sequences import Sequence
+from apps.inventory.sku.ledger import StockLine, apply_movements
+from apps.inventory.sku.models import SKU, Warehouse
 
 
 class OpnameStatus(models.TextChoices):
@@ -20,6 +22,11 @@ class OpnameStatus(models.TextChoices):
     CANCELLED = 'cancelled', 'Dibatalkan'
 
 
+OPNAME_NUMBERS = Sequence(
+    'stock_opname', 'SO-{year}-{seq:04d}', model='inventory.StockOpname', field='opname_number',
+)
+
+
 class StockOpname(TenantBaseModel, AuditMixin):
     """
     Stock Opname header - physical inventory count session.
@@ -104,91 +111,47 @@ class StockOpname(TenantBaseModel, AuditMixin):
 
     def generate_opname_number(self):
         """Generate opname number like SO-2024-0001."""
-        year = timezone.now().year
-        prefix = f'SO-{year}-'
-        last = StockOpname.objects.filter(
-            opname_number__startswith=prefix
-        ).order_by('-opname_number').first()
-
-        if last:
-            try:
-                num = int(last.opname_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                num = 1
-        else:
-            num = 1
-        return f'{prefix}{num:04d}'
+        return OPNAME_NUMBERS.next()
 
     def generate_items(self):
-        """Generate opname items from current stock records."""
+        """Generate opname items from current stock records (one INSERT ... SELECT)."""
+        from .counting import generate_items, refresh_summary
+
         if self.status != OpnameStatus.DRAFT:
             return
 
-        stock_records = StockRecord.objects.filter(
-            warehouse=self.warehouse,
-            is_active=True,
-        )
-
-        if self.category_filter:
-            stock_records = stock_records.filter(sku__category=self.category_filter)
-
-        for record in stock_records:
-            StockOpnameItem.objects.get_or_create(
-                opname=self,
-                sku=record.sku,
-                defaults={
-                    'system_quantity': record.quantity,
-                }
-            )
-
-        self.total_items = self.items.count()
-        self.save(update_fields=['total_items'])
+        generate_items(self)
+        refresh_summary(self)
 
     def calculate_summary(self):
-        """Calculate opname summary."""
-        items = self.items.filter(is_active=True)
-        self.counted_items = items.filter(is_counted=True).count()
-        self.variance_items = items.filter(has_variance=True).count()
-        self.total_variance_value = sum(
-            item.variance_value for item in items if item.has_variance
-        )
-        self.save(update_fields=['counted_items', 'variance_items', 'total_variance_value'])
+        """Calculate opname summary (one aggregate query)."""
+        from .counting import refresh_summary
+
+        refresh_summary(self)
 
     def apply_adjustments(self):
         """Apply stock adjustments after approval."""
         if self.status != OpnameStatus.APPROVED:
             return
 
-        for item in self.items.filter(is_counted=True, has_variance=True):
-            # Get or create stock record
-            stock_record, _ = StockRecord.objects.get_or_create(
-                sku=item.sku,
-                warehouse=self.warehouse,
-                defaults={'quantity': 0}
-            )
-
-            # Record movement
-            StockMovement.objects.create(
-                sku=item.sku,
-                warehouse=self.warehouse,
-                movement_type='opname',
-                quantity=item.variance_quantity,
-                quantity_before=stock_record.quantity,
-                quantity_after=item.actual_quantity,
+        with transaction.atomic():
+            items = self.items.filter(is_counted=True, has_variance=True, is_active=True)
+            apply_movements(
+                [
+                    StockLine(sku_id, self.warehouse_id, set_to=actual_quantity)
+                    for sku_id, actual_quantity in items.values_list('sku_id', 'actual_quantity')
+                ],
+                'opname',
                 reference_type='stock_opname',
                 reference_id=str(self.id),
                 notes=f'Stock Opname: {self.opname_number}',
-                created_by=self.approved_by,
-                updated_by=self.approved_by,
+                user=self.approved_by,
+                tenant_id=self.tenant_id,
             )
 
-            # Update stock record
-            stock_record.quantity = item.actual_quantity
-            stock_record.save()
-
-        self.status = OpnameStatus.COMPLETED
-        self.end_date = timezone.now()
-        self.save(update_fields=['status', 'end_date'])
+            self.status = OpnameStatus.COMPLETED
+            self.end_date = timezone.now()
+            self.save(update_fields=['status', 'end_date'])
 
 
 class StockOpnameItem(TenantBaseModel):
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .counting import MAX_SCAN_BATCH, SCAN_MODES
 from .models import StockOpname, StockOpnameItem, OpnameStatus
 
 
@@ -105,3 +106,16 @@ class CountItemSerializer(serializers.Serializer):
     actual_quantity = serializers.DecimalField(max_digits=12, decimal_places=2)
     variance_reason = serializers.CharField(required=False, allow_blank=True)
     notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class ScanSerializer(serializers.Serializer):
+    """One scan: a barcode or SKU code and the quantity counted."""
+    code = serializers.CharField(max_length=50)
+    quantity = serializers.DecimalField(max_digits=12, decimal_places=2, default=1, min_value=0)
+
+
+class ScanBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of barcode scans."""
+    batch_id = serializers.CharField(max_length=64, required=False, allow_blank=True)
+    mode = serializers.ChoiceField(choices=SCAN_MODES, default='add')
+    scans = ScanSerializer(many=True, allow_empty=False, max_length=MAX_SCAN_BATCH)
@@ -8,8 +8,9 @@ from .models import StockOpname, StockOpnameItem, OpnameStatus
 from .serializers import (
     StockOpnameListSerializer, StockOpnameDetailSerializer,
     StockOpnameCreateSerializer, StockOpnameItemSerializer,
-    CountItemSerializer,
+    CountItemSerializer, ScanBatchSerializer,
 )
+from .counting import DuplicateBatch, record_counts
 
 
 class StockOpnameViewSet(viewsets.ModelViewSet):
@@ -132,6 +133,40 @@ class StockOpnameViewSet(viewsets.ModelViewSet):
         serializer = StockOpnameItemSerializer(items, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'])
+    def scan(self, request, pk=None):
+        """
+        Record a batch of barcode scans.
+
+        Body: {"batch_id": "...", "mode": "add"|"set",
+               "scans": [{"code": "<barcode or SKU code>", "quantity": 1}, ...]}
+        """
+        opname = self.get_object()
+        if opname.status != OpnameStatus.IN_PROGRESS:
+            return Response(
+                {'detail': 'Opname harus dalam status In Progress untuk menghitung.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = ScanBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            result = record_counts(
+                opname,
+                data['scans'],
+                user=request.user,
+                mode=data['mode'],
+                batch_id=data.get('batch_id') or None,
+            )
+        except DuplicateBatch:
+            return Response(
+                {'detail': 'Batch ini sudah diproses.', 'duplicate': True},
+                status=status.HTTP_200_OK
+            )
+        return Response(result)
+
 
 class StockOpnameItemViewSet(viewsets.ModelViewSet):
     serializer_class = StockOpnameItemSerializer
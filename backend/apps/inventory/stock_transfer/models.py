@@ -1,12 +1,14 @@
 """
 Stock Transfer models for moving inventory between warehouses.
 """
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
 from apps.core.models import TenantBaseModel, AuditMixin
-from apps.inventory.sku.models import SKU, Warehouse, StockRecord, StockMovement
+from apps.core.services.sequences import Sequence
+from apps.inventory.sku.ledger import StockLine, apply_movements
+from apps.inventory.sku.models import SKU, Warehouse
 
 
 class TransferStatus(models.TextChoices):
@@ -29,6 +31,11 @@ class TransferPriority(models.TextChoices):
     URGENT = 'urgent', 'Urgent'
 
 
+TRANSFER_NUMBERS = Sequence(
+    'stock_transfer', 'ST-{year}-{seq:04d}', model='inventory.StockTransfer', field='transfer_number',
+)
+
+
 class StockTransfer(TenantBaseModel, AuditMixin):
     """
     Stock Transfer header - transfer between warehouses.
@@ -121,116 +128,81 @@ class StockTransfer(TenantBaseModel, AuditMixin):
 
     def generate_transfer_number(self):
         """Generate transfer number like ST-2024-0001."""
-        year = timezone.now().year
-        prefix = f'ST-{year}-'
-        last = StockTransfer.objects.filter(
-            transfer_number__startswith=prefix
-        ).order_by('-transfer_number').first()
-
-        if last:
-            try:
-                num = int(last.transfer_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                num = 1
-        else:
-            num = 1
-        return f'{prefix}{num:04d}'
+        return TRANSFER_NUMBERS.next()
 
     def ship(self, user):
         """Ship the transfer - deduct from source warehouse."""
-        if self.status != TransferStatus.APPROVED:
-            raise ValueError('Transfer must be approved before shipping')
-
-        for item in self.items.filter(is_active=True):
-            # Get source stock record
-            source_record = StockRecord.objects.get(
-                sku=item.sku,
-                warehouse=self.source_warehouse,
-            )
-
-            if source_record.available_quantity < item.quantity:
-                raise ValueError(f'Insufficient stock for {item.sku.name}')
-
-            # Record movement out
-            StockMovement.objects.create(
-                sku=item.sku,
-                warehouse=self.source_warehouse,
-                movement_type='transfer_out',
-                quantity=-item.quantity,
-                quantity_before=source_record.quantity,
-                quantity_after=source_record.quantity - item.quantity,
+        with transaction.atomic():
+            # Locking the header makes a double submit wait, then fail the status check
+            locked = StockTransfer.all_objects.select_for_update().get(pk=self.pk)
+            if locked.status != TransferStatus.APPROVED:
+                raise ValueError('Transfer must be approved before shipping')
+
+            items = self.items.filter(is_active=True).select_related('sku')
+            apply_movements(
+                [
+                    StockLine(item.sku_id, self.source_warehouse_id, quantity=-item.quantity, label=item.sku.name)
+                    for item in items
+                ],
+                'transfer_out',
                 reference_type='stock_transfer',
                 reference_id=str(self.id),
                 notes=f'Transfer ke {self.destination_warehouse.name}',
-                created_by=user,
-                updated_by=user,
+                user=user,
+                tenant_id=self.tenant_id,
+                check_available=True,
             )
 
-            # Update source stock
-            source_record.quantity -= item.quantity
-            source_record.save()
-
-        self.status = TransferStatus.IN_TRANSIT
-        self.shipped_date = timezone.now()
-        self.shipped_by = user
-        self.save(update_fields=['status', 'shipped_date', 'shipped_by'])
+            self.status = TransferStatus.IN_TRANSIT
+            self.shipped_date = timezone.now()
+            self.shipped_by = user
+            self.save(update_fields=['status', 'shipped_date', 'shipped_by'])
 
     def receive(self, user, items_received=None):
         """
         Receive the transfer - add to destination warehouse.
         items_received: dict of {item_id: received_quantity} for partial receipt
         """
-        if self.status not in [TransferStatus.IN_TRANSIT, TransferStatus.PARTIAL]:
-            raise ValueError('Transfer must be in transit to receive')
-
-        all_received = True
-
-        for item in self.items.filter(is_active=True):
-            received_qty = item.quantity
-            if items_received and str(item.id) in items_received:
-                received_qty = Decimal(str(items_received[str(item.id)]))
-
-            if received_qty <= 0:
-                all_received = False
-                continue
-
-            # Get or create destination stock record
-            dest_record, _ = StockRecord.objects.get_or_create(
-                sku=item.sku,
-                warehouse=self.destination_warehouse,
-                defaults={'quantity': 0}
-            )
-
-            # Record movement in
-            StockMovement.objects.create(
-                sku=item.sku,
-                warehouse=self.destination_warehouse,
-                movement_type='transfer_in',
-                quantity=received_qty,
-                quantity_before=dest_record.quantity,
-                quantity_after=dest_record.quantity + received_qty,
+        with transaction.atomic():
+            locked = StockTransfer.all_objects.select_for_update().get(pk=self.pk)
+            if locked.status not in [TransferStatus.IN_TRANSIT, TransferStatus.PARTIAL]:
+                raise ValueError('Transfer must be in transit to receive')
+
+            all_received = True
+            lines = []
+            received_items = []
+
+            for item in self.items.filter(is_active=True):
+                received_qty = item.quantity
+                if items_received and str(item.id) in items_received:
+                    received_qty = Decimal(str(items_received[str(item.id)]))
+
+                if received_qty <= 0:
+                    all_received = False
+                    continue
+
+                lines.append(StockLine(item.sku_id, self.destination_warehouse_id, quantity=received_qty))
+                item.received_quantity += received_qty
+                received_items.append(item)
+
+                if item.received_quantity < item.quantity:
+                    all_received = False
+
+            apply_movements(
+                lines,
+                'transfer_in',
                 reference_type='stock_transfer',
                 reference_id=str(self.id),
                 notes=f'Transfer dari {self.source_warehouse.name}',
-                created_by=user,
-                updated_by=user,
+                user=user,
+                tenant_id=self.tenant_id,
             )
+            StockTransferItem.all_objects.bulk_update(received_items, ['received_quantity'])
 
-            # Update destination stock
-            dest_record.quantity += received_qty
-            dest_record.save()
-
-            # Update item received quantity
-            item.received_quantity += received_qty
-            item.save(update_fields=['received_quantity'])
-
-            if item.received_quantity < item.quantity:
-                all_received = False
-
-        self.status = TransferStatus.RECEIVED if all_received else TransferStatus.PARTIAL
-        self.received_date = timezone.now()
-        self.received_by = user
-        self.save(update_fields=['status', 'received_date', 'received_by'])
+            self.status = TransferStatus.RECEIVED if all_received else TransferStatus.PARTIAL
+            self.received_date = timezone.now()
+            self.received_by = user
+            self.save(update_fields=['status', 'received_date', 'received_by'])
 
 
 class StockTransferItem(TenantBaseModel):
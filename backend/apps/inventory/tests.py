@@ -1,14 +1,18 @@
+from django.db.models import Sum
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from datetime import date, timedelta
 from decimal import Decimal
 from django.utils import timezone
 from apps.users.models import User
 from apps.inventory.sku.models import (
-    SKU, Warehouse, StockRecord, StockMovement,
+    SKU, Warehouse, StockRecord, StockMovement, StockSnapshot,
     ItemCategory, UnitOfMeasure,
 )
+from apps.inventory.sku.ledger import InsufficientStock, StockLine, apply_movements
+from apps.inventory.sku.valuation import end_of_day, take_snapshots, valuation_report
 from apps.inventory.stock_opname.models import (
     StockOpname, StockOpnameItem, OpnameStatus,
 )
@@ -88,6 +92,16 @@ class StockRecordTest(TestCase):
         )
         self.assertEqual(record.available_quantity, Decimal('80'))
 
+    def test_deferred_fields_load_and_save(self):
+        StockRecord.objects.create(sku=self.sku, warehouse=self.warehouse, quantity=Decimal('100'))
+        record, = StockRecord.objects.only('id', 'sku_id')
+        self.assertIsNone(record._loaded_stock)
+
+        record.is_active = False
+        record.save()
+        self.sku.refresh_from_db()
+        self.assertEqual(self.sku.current_stock, Decimal('0'))
+
 
 class StockOpnameTest(TestCase):
     def setUp(self):
@@ -138,6 +152,79 @@ class StockOpnameTest(TestCase):
         self.assertEqual(item.variance_value, Decimal('-50000'))
 
 
+class OpnameCountingTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='counter',
+            email='counter@test.com',
+            password='testpass123',
+        )
+        self.warehouse = Warehouse.objects.create(code='WH-CNT', name='Count')
+        self.skus = [
+            SKU.objects.create(name=f'Item {i}', barcode=f'89900000{i}', unit_price=Decimal('1000'))
+            for i in range(3)
+        ]
+        apply_movements(
+            [StockLine(sku.id, self.warehouse.id, quantity=Decimal('10')) for sku in self.skus[:2]],
+            'in',
+        )
+        self.opname = StockOpname.objects.create(
+            warehouse=self.warehouse,
+            scheduled_date=timezone.now().date(),
+        )
+        self.opname.generate_items()
+        self.opname.status = OpnameStatus.IN_PROGRESS
+        self.opname.save(update_fields=['status'])
+        self.client.force_authenticate(user=self.user)
+
+    def scan(self, scans, **extra):
+        return self.client.post(
+            f'/api/v1/inventory/opname/opnames/{self.opname.id}/scan/',
+            {'scans': scans, **extra},
+            format='json',
+        )
+
+    def test_generate_items_in_one_statement(self):
+        opname = StockOpname.objects.create(
+            warehouse=self.warehouse,
+            scheduled_date=timezone.now().date(),
+        )
+        with self.assertNumQueries(3):
+            opname.generate_items()
+        self.assertEqual(opname.total_items, 2)
+        self.assertEqual(
+            set(opname.items.values_list('system_quantity', flat=True)), {Decimal('10')},
+        )
+
+    def test_scan_batches(self):
+        first, second, found = (sku.barcode for sku in self.skus)
+        response = self.scan(
+            [{'code': first}] * 4 + [{'code': self.skus[1].sku_code, 'quantity': '10'}, {'code': 'UNKNOWN'}],
+            batch_id='b1',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['counted'], 2)
+        self.assertEqual(response.data['unknown'], ['UNKNOWN'])
+
+        # A retried batch is not applied twice
+        response = self.scan([{'code': first}] * 4, batch_id='b1')
+        self.assertTrue(response.data['duplicate'])
+
+        response = self.scan([{'code': first, 'quantity': '5'}, {'code': found}], batch_id='b2')
+        self.assertEqual(response.data['total_items'], 3)
+        self.assertEqual(response.data['counted_items'], 3)
+        self.assertEqual(response.data['variance_items'], 2)
+
+        items = {item.sku_id: item for item in self.opname.items.all()}
+        self.assertEqual(items[self.skus[0].id].actual_quantity, Decimal('9'))
+        self.assertFalse(items[self.skus[1].id].has_variance)
+        self.assertEqual(items[self.skus[2].id].system_quantity, Decimal('0'))
+
+        self.opname.refresh_from_db()
+        # (9 - 10) * 1000 + (1 - 0) * 1000
+        self.assertEqual(self.opname.total_variance_value, Decimal('0'))
+
+
 class StockTransferTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -185,6 +272,268 @@ class StockTransferTest(TestCase):
         self.assertEqual(source_record.quantity, Decimal('50'))
 
 
+class StockLedgerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='ledger',
+            email='ledger@test.com',
+            password='testpass123',
+        )
+        self.source = Warehouse.objects.create(code='WH-SRC', name='Source')
+        self.dest = Warehouse.objects.create(code='WH-DST', name='Destination')
+        self.sku = SKU.objects.create(name='Kertas A4')
+        self.other = SKU.objects.create(name='Tinta')
+        apply_movements(
+            [
+                StockLine(self.sku.id, self.source.id, quantity=Decimal('100')),
+                StockLine(self.other.id, self.source.id, quantity=Decimal('10')),
+            ],
+            'in',
+        )
+
+    def test_movements_record_before_and_after(self):
+        movements = apply_movements(
+            [
+                StockLine(self.sku.id, self.source.id, quantity=Decimal('-30')),
+                StockLine(self.sku.id, self.source.id, quantity=Decimal('-20')),
+                StockLine(self.sku.id, self.dest.id, set_to=Decimal('7')),
+            ],
+            'adjustment',
+            user=self.user,
+        )
+        self.assertEqual(
+            [(m.quantity_before, m.quantity_after) for m in movements],
+            [(Decimal('100'), Decimal('70')), (Decimal('70'), Decimal('50')), (Decimal('0'), Decimal('7'))],
+        )
+        self.sku.refresh_from_db()
+        self.assertEqual(self.sku.current_stock, Decimal('57'))
+
+    def test_transfer_is_all_or_nothing(self):
+        transfer = StockTransfer.objects.create(
+            source_warehouse=self.source,
+            destination_warehouse=self.dest,
+            requested_by=self.user,
+            status=TransferStatus.APPROVED,
+        )
+        StockTransferItem.objects.create(transfer=transfer, sku=self.sku, quantity=Decimal('40'))
+        StockTransferItem.objects.create(transfer=transfer, sku=self.other, quantity=Decimal('11'))
+
+        with self.assertRaises(InsufficientStock):
+            transfer.ship(self.user)
+        self.assertEqual(StockRecord.objects.get(sku=self.sku, warehouse=self.source).quantity, Decimal('100'))
+        self.assertFalse(StockMovement.objects.filter(reference_type='stock_transfer').exists())
+
+        transfer.items.filter(sku=self.other).update(quantity=Decimal('10'))
+        transfer.ship(self.user)
+        transfer.receive(self.user)
+
+        self.assertEqual(transfer.status, TransferStatus.RECEIVED)
+        self.assertEqual(StockRecord.objects.get(sku=self.other, warehouse=self.dest).quantity, Decimal('10'))
+        self.sku.refresh_from_db()
+        self.assertEqual(self.sku.current_stock, Decimal('100'))
+        self.assertEqual(self.sku.current_stock, self.sku.stock_records.aggregate(total=Sum('quantity'))['total'])
+
+    def test_opname_adjustments(self):
+        opname = StockOpname.objects.create(
+            warehouse=self.source,
+            scheduled_date=timezone.now().date(),
+        )
+        opname.generate_items()
+        opname.items.filter(sku=self.sku).update(actual_quantity=Decimal('90'), is_counted=True, has_variance=True)
+        opname.status = OpnameStatus.APPROVED
+        opname.apply_adjustments()
+
+        movement = StockMovement.objects.get(reference_type='stock_opname')
+        self.assertEqual((movement.quantity, movement.quantity_after), (Decimal('-10'), Decimal('90')))
+        self.sku.refresh_from_db()
+        self.assertEqual(self.sku.current_stock, Decimal('90'))
+
+
+class StockValuationTest(APITestCase):
+    def setUp(self):
+        self.warehouse = Warehouse.objects.create(code='WH-VAL', name='Valuation')
+        self.sku = SKU.objects.create(name='Toner', unit_price=Decimal('100'))
+        self.year = timezone.now().year - 1
+        self.receive(date(self.year, 1, 5), '10', '100')
+        self.receive(date(self.year, 1, 20), '10', '200')
+        self.receive(date(self.year, 2, 10), '-15')
+
+    def receive(self, day, quantity, unit_cost=None):
+        movement, = apply_movements(
+            [StockLine(self.sku.id, self.warehouse.id, quantity=Decimal(quantity),
+                       unit_cost=Decimal(unit_cost) if unit_cost else None)],
+            'in' if Decimal(quantity) > 0 else 'out',
+        )
+        StockMovement.objects.filter(pk=movement.pk).update(
+            movement_date=end_of_day(day) - timedelta(hours=12),
+        )
+        return movement
+
+    def test_average_and_fifo_as_of(self):
+        january = valuation_report(end_of_day(date(self.year, 1, 31)))
+        self.assertEqual(january['total_quantity'], Decimal('20'))
+        self.assertEqual(january['total_value'], Decimal('3000'))
+
+        average = valuation_report(end_of_day(date(self.year, 2, 28)))
+        fifo = valuation_report(end_of_day(date(self.year, 2, 28)), method='fifo')
+        self.assertEqual(average['total_quantity'], Decimal('5'))
+        self.assertEqual(average['total_value'], Decimal('750.00'))
+        self.assertEqual(fifo['total_value'], Decimal('1000.00'))
+
+    def test_replays_from_snapshot(self):
+        self.assertEqual(take_snapshots(end_of_day(date(self.year, 1, 31))), 1)
+        snapshot = StockSnapshot.objects.get()
+        self.assertEqual(snapshot.fifo_layers, [['10.00', '100.00'], ['10.00', '200.00']])
+
+        # Movements before the close are no longer read
+        StockMovement.objects.filter(movement_date__month=1).update(quantity=0)
+        with self.assertNumQueries(4):
+            fifo = valuation_report(end_of_day(date(self.year, 2, 28)), method='fifo')
+        self.assertEqual(fifo['items'][0]['quantity'], Decimal('5'))
+        self.assertEqual(fifo['items'][0]['value'], Decimal('1000.00'))
+
+    def test_reclose_replays_from_previous_snapshot(self):
+        close = end_of_day(date(self.year, 1, 31))
+        take_snapshots(close)
+        # Booked into January after it was closed
+        self.receive(date(self.year, 1, 25), '5', '100')
+
+        take_snapshots(close)
+        snapshot = StockSnapshot.objects.get()
+        self.assertEqual(snapshot.quantity, Decimal('25'))
+        self.assertEqual(valuation_report(close)['total_value'], Decimal('3500.00'))
+
+    def test_close_books_stock_written_outside_the_ledger(self):
+        other = Warehouse.objects.create(code='WH-OLD', name='Gudang Lama')
+        StockRecord.objects.create(sku=self.sku, warehouse=other, quantity=Decimal('8'))
+
+        take_snapshots(end_of_day(timezone.localdate()))
+        movement = StockMovement.objects.get(reference_type='opening_balance')
+        self.assertEqual((movement.quantity, movement.unit_cost), (Decimal('8'), Decimal('100')))
+        snapshot = StockSnapshot.objects.get(warehouse=other)
+        self.assertEqual((snapshot.quantity, snapshot.average_value), (Decimal('8'), Decimal('800')))
+
+    def test_reclose_includes_direct_record_edits(self):
+        close = end_of_day(date(self.year, 1, 31))
+        take_snapshots(close)
+        StockRecord.objects.filter(sku=self.sku, warehouse=self.warehouse).update(quantity=Decimal('12'))
+
+        take_snapshots(end_of_day(date(self.year, 2, 28)))
+        snapshot = StockSnapshot.objects.get(as_of__gt=close)
+        self.assertEqual(snapshot.quantity, Decimal('12'))
+
+        # Re-taking the same close books nothing twice
+        take_snapshots(end_of_day(date(self.year, 2, 28)))
+        self.assertEqual(StockMovement.objects.filter(reference_type='opening_balance').count(), 1)
+        self.assertEqual(StockSnapshot.objects.get(as_of__gt=close).quantity, Decimal('12'))
+
+    def test_valuation_api(self):
+        user = User.objects.create_user(username='finance', email='finance@test.com', password='testpass123')
+        self.client.force_authenticate(user=user)
+        response = self.client.get(
+            reverse('api_v1:sku-valuation'),
+            {'as_of': date(self.year, 2, 28).isoformat(), 'method': 'fifo'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(str(response.data['total_value'])), Decimal('1000'))
+
+        response = self.client.post(reverse('api_v1:sku-close-period'), {'as_of': date(self.year, 1, 31).isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['snapshots'], 1)
+
+
+class ReorderFeedTest(APITestCase):
+    def setUp(self):
+        from apps.procurement.purchase_order.models import POItem, POStatus, PurchaseOrder
+        from apps.procurement.vendor.models import Vendor
+
+        self.user = User.objects.create_user(
+            username='buyer',
+            email='buyer@test.com',
+            password='testpass123',
+        )
+        self.warehouse = Warehouse.objects.create(code='WH-RO', name='Reorder')
+        self.paper = SKU.objects.create(
+            name='Kertas', minimum_stock=Decimal('5'), reorder_point=Decimal('20'),
+            reorder_quantity=Decimal('50'), maximum_stock=Decimal('100'),
+        )
+        self.pens = SKU.objects.create(name='Pulpen', reorder_point=Decimal('10'), reorder_quantity=Decimal('30'))
+        self.stapler = SKU.objects.create(name='Stapler', reorder_point=Decimal('2'))
+        apply_movements(
+            [
+                StockLine(self.paper.id, self.warehouse.id, quantity=Decimal('15')),
+                StockLine(self.pens.id, self.warehouse.id, quantity=Decimal('4')),
+                StockLine(self.stapler.id, self.warehouse.id, quantity=Decimal('9')),
+            ],
+            'in',
+        )
+
+        vendor = Vendor.objects.create(
+            name='Vendor', address='Address', city='Jakarta', province='DKI Jakarta',
+            phone='021-111', email='vendor@test.com', contact_person='Contact', contact_phone='08111',
+        )
+        po = PurchaseOrder.objects.create(
+            vendor=vendor, order_date=timezone.now().date(), requested_by=self.user, status=POStatus.SENT,
+        )
+        POItem.objects.create(
+            purchase_order=po, item_code=self.pens.sku_code, item_name='Pulpen',
+            quantity=Decimal('6'), received_quantity=Decimal('2'), unit_price=Decimal('1000'),
+        )
+
+    def test_flags_follow_ledger(self):
+        self.paper.refresh_from_db()
+        self.assertTrue(self.paper.needs_reorder)
+        self.assertFalse(self.paper.is_low_stock)
+
+        apply_movements([StockLine(self.paper.id, self.warehouse.id, quantity=Decimal('-12'))], 'out')
+        self.assertEqual(
+            list(SKU.objects.filter(is_low_stock=True).values_list('name', flat=True)), ['Kertas'],
+        )
+
+    def test_reorder_suggestions(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('api_v1:sku-reorder-suggestions'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = {row['name']: row for row in response.data}
+        self.assertEqual(set(rows), {'Kertas', 'Pulpen'})
+        self.assertEqual(rows['Pulpen']['on_order'], Decimal('4'))
+        # Reorder point + reorder quantity - (stock + on order)
+        self.assertEqual(rows['Pulpen']['suggested_quantity'], Decimal('32'))
+        # Topped up to maximum stock
+        self.assertEqual(rows['Kertas']['suggested_quantity'], Decimal('85'))
+
+    def test_feed_ordered_and_limited_in_sql(self):
+        from apps.procurement.purchase_order.models import POItem, POStatus, PurchaseOrder
+        from apps.procurement.vendor.models import Vendor
+        from apps.tenants.models import Tenant
+
+        from .sku.reorder import reorder_feed
+
+        # An open order of another tenant for the same item code is not on order here.
+        other = Tenant.objects.create(name='Lain', slug='lain', subdomain='lain', email='a@lain.id')
+        vendor = Vendor.objects.create(
+            tenant=other, name='Vendor Lain', address='Address', city='Bandung', province='Jawa Barat',
+            phone='022-111', email='lain@test.com', contact_person='Contact', contact_phone='08222',
+        )
+        po = PurchaseOrder.objects.create(
+            tenant=other, vendor=vendor, order_date=timezone.now().date(), requested_by=self.user,
+            status=POStatus.SENT,
+        )
+        POItem.objects.create(
+            tenant=other, purchase_order=po, item_code=self.pens.sku_code, item_name='Pulpen',
+            quantity=Decimal('100'), unit_price=Decimal('1000'),
+        )
+
+        with self.assertNumQueries(1):
+            rows = reorder_feed(limit=1)
+        self.assertEqual([(row['name'], row['shortfall']) for row in rows], [('Kertas', Decimal('5'))])
+        self.assertEqual(
+            [(row['name'], row['on_order'], row['shortfall']) for row in reorder_feed()],
+            [('Kertas', Decimal('0'), Decimal('5')), ('Pulpen', Decimal('4'), Decimal('2'))],
+        )
+
+
 class InventoryAPITest(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -5,3 +5,7 @@ class OrganizationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.organization'
     verbose_name = 'Organization'
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.organization.signals  # noqa
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.core.models.tree import rebuild_paths
+
+
+def backfill_paths(apps, schema_editor):
+    """Compute materialized paths of existing departments."""
+    rebuild_paths(apps.get_model('organization', 'Department'), 'parent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0005_department_tenant_position_tenant_team_tenant'),
+        ('tenants', '0002_invoice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='path',
+            field=models.TextField(default='', editable=False, help_text='Ids from the root to this node, e.g. /<id>/<id>/'),
+        ),
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['path'], name='organization_department_path', opclasses=['text_pattern_ops']),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
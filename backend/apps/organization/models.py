@@ -1,8 +1,8 @@
 from django.db import models
-from apps.core.models import TenantBaseModel, AuditMixin
+from apps.core.models import TenantBaseModel, AuditMixin, TreeMixin
 
 
-class Department(TenantBaseModel, AuditMixin):
+class Department(TreeMixin, TenantBaseModel, AuditMixin):
     """Department model for organizational structure."""
 
     name = models.CharField(max_length=100)
@@ -30,6 +30,7 @@ class Department(TenantBaseModel, AuditMixin):
         indexes = [
             models.Index(fields=['name']),
             models.Index(fields=['parent']),
+            TreeMixin.path_index('organization_department_path'),
         ]
 
     def __str__(self):
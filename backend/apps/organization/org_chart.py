@@ -0,0 +1,125 @@
+"""
+Lazy org chart.
+
+The chart is the employee supervisor tree (see TreeMixin). Instead of the
+whole tree, a client asks for a few levels under a node (`subtree`); every
+node carries `child_count`, its number of direct reports, so deeper levels
+can be loaded on demand with the node as the new root. A subtree is one
+query: the rows under the root's path down to the requested depth, with the
+direct reports counted in the same GROUP BY.
+
+Rendered subtrees are cached per tenant, root and depth. Each root has a
+version counter that is part of its entry keys. When an employee is
+created, deleted, moved or changes what a node shows (name, position,
+department, avatar), only the versions of the employee's ancestors (old and
+new reporting line), of the employee itself and of the top of the chart are
+bumped; subtrees elsewhere stay cached. A build that read the old version
+before the bump writes its result under the old key, which is never read
+again, so a stale tree cannot be cached over a newer write. Renaming or
+deleting a department bumps a per-tenant generation instead, since its name
+appears in nodes all over the chart.
+
+Writes that bypass model signals are picked up when the entries expire
+(ORG_CHART_CACHE_TIMEOUT).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+_TOP = 'top'
+
+
+def _tenant_key(tenant_id) -> str:
+    return str(tenant_id) if tenant_id else '-'
+
+
+def _generation_key(tenant_id) -> str:
+    return f'org_chart:{_tenant_key(tenant_id)}:generation'
+
+
+def _version_keys(tenant_id, roots) -> list:
+    generation = cache.get(_generation_key(tenant_id), 0)
+    return [f'org_chart:{_tenant_key(tenant_id)}:{generation}:{root}:version' for root in roots]
+
+
+def render(employee) -> dict:
+    return {
+        'id': str(employee.id),
+        'name': employee.full_name,
+        'position': employee.position or employee.job_title or '',
+        'department': employee.department.name if employee.department else '',
+        'avatar': employee.avatar.url if employee.avatar else None,
+        'employee_id': employee.employee_id,
+        'child_count': employee.child_count,
+    }
+
+
+def _build(root, depth) -> list:
+    from apps.hr.models import Employee
+
+    rows = Employee.objects.filter(is_active=True)
+    if root is not None:
+        rows = rows.filter(path__startswith=root.path)
+    if depth:
+        rows = rows.filter(depth__lt=(root.depth if root else 0) + depth)
+    rows = rows.select_related('department').annotate(
+        child_count=Count('subordinates', filter=Q(subordinates__is_active=True)),
+    ).order_by('employee_id')
+    return Employee.nest(rows, render, root=root.pk if root else None)
+
+
+def subtree(tenant_id, root=None, depth=None) -> list:
+    """
+    Chart nodes under `root`, cached.
+
+    Args:
+        tenant_id: Tenant the current manager is scoped to
+        root: Employee to start from (None for the top of the chart)
+        depth: Levels to include, counting the root level (None for all);
+            nodes on the last level have no children but their child_count
+
+    Returns:
+        List of nested node dicts: the roots, or just `root`
+    """
+    timeout = settings.ORG_CHART_CACHE_TIMEOUT
+    if not timeout:
+        return _build(root, depth)
+
+    version_key = _version_keys(tenant_id, [root.pk.hex if root else _TOP])[0]
+    key = f'{version_key}:{cache.get(version_key, 0)}:{depth or "all"}'
+    nodes = cache.get(key)
+    if nodes is None:
+        nodes = _build(root, depth)
+        cache.set(key, nodes, timeout=timeout)
+    return nodes
+
+
+def invalidate(tenant_id, paths):
+    """Retire the cached subtrees of every node on `paths` and of the top."""
+    roots = {_TOP}
+    for path in paths:
+        roots.update(segment for segment in path.strip('/').split('/') if segment)
+    for key in _version_keys(tenant_id, roots):
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def bump_generation(tenant_id):
+    """Invalidate every cached subtree of a tenant."""
+    key = _generation_key(tenant_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def employee_changed(employee, deleted=False):
+    """Invalidate what a write to `employee` changed (after commit)."""
+    before = getattr(employee, '_loaded_org_chart_state', None)
+    after = None if deleted else employee.org_chart_state()
+    employee._loaded_org_chart_state = after
+    if before == after:
+        return
+    paths = [snapshot['path'] for snapshot in (before, after) if snapshot and snapshot['path']]
+    transaction.on_commit(lambda: invalidate(employee.tenant_id, paths))
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from apps.core.serializers import TreeSerializerMixin
 from .models import Department, Position, Team
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(TreeSerializerMixin, serializers.ModelSerializer):
     parent_name = serializers.CharField(source='parent.name', read_only=True)
     head_name = serializers.SerializerMethodField()
     children_count = serializers.SerializerMethodField()
@@ -31,16 +32,11 @@ class DepartmentSerializer(serializers.ModelSerializer):
 
 
 class DepartmentTreeSerializer(serializers.ModelSerializer):
-    """Serializer for department hierarchy."""
-    children = serializers.SerializerMethodField()
+    """Serializer for one node of the department hierarchy (children are nested by Department.nest)."""
 
     class Meta:
         model = Department
-        fields = ['id', 'name', 'code', 'children']
-
-    def get_children(self, obj):
-        children = obj.children.filter(is_active=True)
-        return DepartmentTreeSerializer(children, many=True).data
+        fields = ['id', 'name', 'code']
 
 
 class PositionSerializer(serializers.ModelSerializer):
@@ -0,0 +1,28 @@
+"""Signal handlers keeping the cached org chart in sync."""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.hr.models import Employee
+from . import org_chart
+from .models import Department
+
+
+@receiver(post_save, sender=Employee)
+def refresh_org_chart(sender, instance, **kwargs):
+    """Drop the cached subtrees along the employee's reporting lines."""
+    org_chart.employee_changed(instance)
+
+
+@receiver(post_delete, sender=Employee)
+def refresh_org_chart_on_delete(sender, instance, **kwargs):
+    """Drop the cached subtrees above a deleted employee."""
+    org_chart.employee_changed(instance, deleted=True)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def refresh_org_chart_departments(sender, instance, created=False, **kwargs):
+    """Department names appear throughout the chart: drop all of it."""
+    if not created:
+        transaction.on_commit(lambda: org_chart.bump_generation(instance.tenant_id))
@@ -1,8 +1,13 @@
-from rest_framework import viewsets
+import uuid
+
+from django.conf import settings
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema, extend_schema_view
+from apps.core.middleware import get_current_tenant
+from . import org_chart
 from .models import Department, Position, Team
 from .serializers import (
     DepartmentSerializer,
@@ -60,12 +65,8 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def tree(self, request):
         """Get department hierarchy as tree."""
-        root_departments = Department.objects.filter(
-            parent__isnull=True,
-            is_active=True,
-        )
-        serializer = DepartmentTreeSerializer(root_departments, many=True)
-        return Response(serializer.data)
+        departments = Department.objects.filter(is_active=True)
+        return Response(Department.nest(departments, lambda department: DepartmentTreeSerializer(department).data))
 
     @action(detail=True, methods=['get'])
     def employees(self, request, pk=None):
@@ -139,34 +140,32 @@ class TeamViewSet(viewsets.ModelViewSet):
 
 
 class OrgChartView(APIView):
-    """Get organizational chart based on employee supervisor hierarchy."""
+    """
+    Get organizational chart based on employee supervisor hierarchy.
+
+    Query params: root (employee id, default the top of the chart) and depth
+    (levels to return, default all). Each node has child_count, so deeper
+    levels can be fetched lazily with ?root=<node id>.
+    """
 
     def get(self, request):
         from apps.hr.models import Employee
 
-        def build_employee_node(employee):
-            """Build a node for an employee with their subordinates."""
-            subordinates = Employee.objects.filter(
-                supervisor=employee,
-                is_active=True,
-            ).select_related('department')
-
-            return {
-                'id': str(employee.id),
-                'name': employee.full_name,
-                'position': employee.position or employee.job_title or '',
-                'department': employee.department.name if employee.department else '',
-                'avatar': employee.avatar.url if employee.avatar else None,
-                'employee_id': employee.employee_id,
-                'children': [build_employee_node(sub) for sub in subordinates],
-            }
-
-        # Get top-level employees (those without supervisors)
-        top_employees = Employee.objects.filter(
-            supervisor__isnull=True,
-            is_active=True,
-        ).select_related('department')
-
-        org_chart = [build_employee_node(emp) for emp in top_employees]
-
-        return Response(org_chart)
+        root = request.query_params.get('root')
+        depth = request.query_params.get('depth')
+        try:
+            root = uuid.UUID(root) if root else None
+            depth = min(max(int(depth), 1), settings.ORG_CHART_MAX_DEPTH) if depth else None
+        except ValueError:
+            return Response(
+                {'error': 'root harus berupa ID karyawan dan depth berupa angka'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if root is not None:
+            root = Employee.objects.filter(pk=root, is_active=True).only('id', 'path', 'depth').first()
+            if root is None:
+                return Response({'error': 'Karyawan tidak ditemukan'}, status=status.HTTP_404_NOT_FOUND)
+
+        tenant = get_current_tenant()
+        return Response(org_chart.subtree(tenant.pk if tenant else None, root, depth))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0002_policy_tenant_policyacknowledgment_tenant_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policy',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the file, keys the preview cache', max_length=64),
+        ),
+    ]
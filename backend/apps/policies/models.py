@@ -1,5 +1,6 @@
 from django.db import models
 from apps.core.models import TenantBaseModel
+from apps.core.services.previews import hash_file
 from apps.users.models import User
 
 
@@ -46,6 +47,7 @@ class Policy(TenantBaseModel):
     )
     file_size = models.IntegerField(null=True, blank=True, help_text="File size in bytes")
     file_name = models.CharField(max_length=255, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the file, keys the preview cache")
 
     # Versioning
     version = models.CharField(max_length=50, default="1.0")
@@ -76,6 +78,13 @@ class Policy(TenantBaseModel):
     def __str__(self):
         return f"{self.title} (v{self.version})"
 
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            self.content_hash = hash_file(self.file)
+        elif not self.file:
+            self.content_hash = ''
+        super().save(*args, **kwargs)
+
 
 class PolicyApproval(TenantBaseModel):
     """Approval workflow for policies"""
@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
+from apps.core.services.previews import preview_service
 from .models import Policy, PolicyCategory, PolicyApproval, PolicyAcknowledgment
 from .serializers import (
     PolicyListSerializer, PolicyDetailSerializer, PolicyCategorySerializer,
@@ -80,6 +81,19 @@ class PolicyViewSet(viewsets.ModelViewSet):
         serializer = PolicyApprovalSerializer(approvals, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def preview(self, request, pk=None):
+        """Thumbnail of the attached policy file (?size=sm|md|lg&page=N)"""
+        policy = self.get_object()
+        if not policy.file:
+            return Response({'detail': 'Kebijakan ini tidak memiliki file.'}, status=status.HTTP_404_NOT_FOUND)
+
+        def load():
+            with policy.file.open('rb') as f:
+                return f.read()
+
+        return preview_service.build_response(request, policy, load, policy.file_name or policy.file.name)
+
 
 class PolicyApprovalViewSet(viewsets.ModelViewSet):
     """ViewSet for policy approvals"""
@@ -12,6 +12,7 @@ from apps.procurement.vendor.models import (
 from apps.procurement.purchase_order.models import (
     PurchaseOrder, POItem, POStatus, POPriority,
 )
+from apps.procurement.purchase_order.lines import deferred_totals
 
 
 class Command(BaseCommand):
@@ -243,14 +244,15 @@ class Command(BaseCommand):
                 **data
             )
 
-            for item_data in items_data:
-                POItem.objects.create(
-                    purchase_order=po,
-                    item_name=item_data['item_name'],
-                    quantity=Decimal(str(item_data['quantity'])),
-                    unit_price=Decimal(str(item_data['unit_price'])),
-                    unit=item_data['unit'],
-                )
+            with deferred_totals(po):
+                for item_data in items_data:
+                    POItem.objects.create(
+                        purchase_order=po,
+                        item_name=item_data['item_name'],
+                        quantity=Decimal(str(item_data['quantity'])),
+                        unit_price=Decimal(str(item_data['unit_price'])),
+                        unit=item_data['unit'],
+                    )
 
             self.stdout.write(f'  Created PO: {po.po_number} - {po.vendor.name} ({po.get_status_display()})')
 
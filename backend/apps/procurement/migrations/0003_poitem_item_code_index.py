@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0002_poitem_tenant_poreceipt_tenant_poreceiptitem_tenant_and_more'),
+        ('tenants', '0002_invoice'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='poitem',
+            index=models.Index(fields=['item_code'], name='procurement_item_co_310fab_idx'),
+        ),
+    ]
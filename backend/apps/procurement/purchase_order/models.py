@@ -1,11 +1,12 @@
 """
 Purchase Order models.
 """
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from apps.core.models import TenantBaseModel, AuditMixin
+from apps.core.services.sequences import Sequence
 from apps.procurement.vendor.models import Vendor
 
 
@@ -37,6 +38,9 @@ class PaymentStatus(models.TextChoices):
     PAID = 'paid', 'Lunas'
 
 
+PO_NUMBERS = Sequence('purchase_order', 'PO-{year}-{seq:04d}', model='procurement.PurchaseOrder', field='po_number')
+
+
 class PurchaseOrder(TenantBaseModel, AuditMixin):
     """
     Purchase Order header.
@@ -168,26 +172,13 @@ class PurchaseOrder(TenantBaseModel, AuditMixin):
 
     def generate_po_number(self):
         """Generate PO number like PO-2024-0001."""
-        from django.utils import timezone
-        year = timezone.now().year
-        prefix = f'PO-{year}-'
-        last = PurchaseOrder.objects.filter(
-            po_number__startswith=prefix
-        ).order_by('-po_number').first()
-
-        if last:
-            try:
-                num = int(last.po_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                num = 1
-        else:
-            num = 1
-        return f'{prefix}{num:04d}'
+        return PO_NUMBERS.next()
 
     def calculate_totals(self):
         """Recalculate totals from items."""
-        items = self.items.filter(is_active=True)
-        self.subtotal = sum(item.total_price for item in items)
+        self.subtotal = self.items.filter(is_active=True).aggregate(
+            total=models.Sum('total_price')
+        )['total'] or Decimal('0')
 
         # Calculate discount
         if self.discount_percent > 0:
@@ -269,19 +260,35 @@ class POItem(TenantBaseModel):
         ordering = ['line_number']
         indexes = [
             models.Index(fields=['purchase_order', 'line_number']),
+            models.Index(fields=['item_code']),
         ]
 
     def __str__(self):
         return f"{self.purchase_order.po_number} - {self.item_name}"
 
-    def save(self, *args, **kwargs):
-        # Calculate total price
+    # Contribution to the PO subtotal when loaded (None: unknown)
+    _loaded_share = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'total_price' in instance.__dict__ and 'is_active' in instance.__dict__:
+            instance._loaded_share = instance.total_price if instance.is_active else Decimal('0')
+        return instance
+
+    def line_total(self):
+        """Quantity times unit price, less the line discount."""
         base_price = self.quantity * self.unit_price
         if self.discount_percent > 0:
             discount = base_price * (self.discount_percent / Decimal('100'))
-            self.total_price = base_price - discount
-        else:
-            self.total_price = base_price
+            return base_price - discount
+        return base_price
+
+    def save(self, *args, **kwargs):
+        from .lines import shift_subtotal, totals_deferred
+
+        adding = self._state.adding
+        self.total_price = self.line_total()
 
         # Auto-assign line number
         if not self.line_number:
@@ -290,10 +297,21 @@ class POItem(TenantBaseModel):
             ).order_by('-line_number').first()
             self.line_number = (last_item.line_number + 1) if last_item else 1
 
-        super().save(*args, **kwargs)
-
-        # Recalculate PO totals
-        self.purchase_order.calculate_totals()
+        share = self.total_price if self.is_active else Decimal('0')
+        previous = Decimal('0') if adding else self._loaded_share
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Move the PO totals by this line's change
+            if not totals_deferred(self.purchase_order_id):
+                cached = self.purchase_order if POItem.purchase_order.is_cached(self) else None
+                if previous is None:
+                    PurchaseOrder.all_objects.get(pk=self.purchase_order_id).calculate_totals()
+                    if cached is not None:
+                        cached.refresh_from_db(fields=['subtotal', 'discount_amount', 'tax_amount', 'total_amount'])
+                else:
+                    shift_subtotal(self.purchase_order_id, share - previous, cached)
+        self._loaded_share = share
 
     @property
     def is_fully_received(self):
@@ -304,6 +322,9 @@ class POItem(TenantBaseModel):
         return max(self.quantity - self.received_quantity, Decimal('0'))
 
 
+RECEIPT_NUMBERS = Sequence('po_receipt', 'GR-{year}-{seq:04d}', model='procurement.POReceipt', field='receipt_number')
+
+
 class POReceipt(TenantBaseModel, AuditMixin):
     """
     Goods receipt for Purchase Order.
@@ -345,21 +366,7 @@ class POReceipt(TenantBaseModel, AuditMixin):
 
     def generate_receipt_number(self):
         """Generate receipt number like GR-2024-0001."""
-        from django.utils import timezone
-        year = timezone.now().year
-        prefix = f'GR-{year}-'
-        last = POReceipt.objects.filter(
-            receipt_number__startswith=prefix
-        ).order_by('-receipt_number').first()
-
-        if last:
-            try:
-                num = int(last.receipt_number.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                num = 1
-        else:
-            num = 1
-        return f'{prefix}{num:04d}'
+        return RECEIPT_NUMBERS.next()
 
 
 class POReceiptItem(TenantBaseModel):
@@ -396,34 +403,27 @@ class POReceiptItem(TenantBaseModel):
     def __str__(self):
         return f"{self.receipt.receipt_number} - {self.po_item.item_name}"
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-
-        # Update PO item received quantity
-        total_received = POReceiptItem.objects.filter(
-            po_item=self.po_item
-        ).aggregate(
-            total=models.Sum('quantity_received')
-        )['total'] or Decimal('0')
+    # Quantity received when loaded
+    _loaded_quantity = None
 
-        self.po_item.received_quantity = total_received
-        self.po_item.save(update_fields=['received_quantity'])
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_quantity = instance.__dict__.get('quantity_received')
+        return instance
 
-        # Update PO status
-        self._update_po_status()
-
-    def _update_po_status(self):
-        """Update PO status based on receipt status."""
-        po = self.receipt.purchase_order
-        items = po.items.filter(is_active=True)
+    def save(self, *args, **kwargs):
+        from .lines import refresh_receipt_status, shift_received
 
-        all_received = all(item.is_fully_received for item in items)
-        any_received = any(item.received_quantity > 0 for item in items)
+        previous = self._loaded_quantity or Decimal('0')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
-        if all_received:
-            po.status = POStatus.RECEIVED
-            po.actual_delivery_date = self.receipt.receipt_date
-        elif any_received:
-            po.status = POStatus.PARTIAL
+            # Move the PO item received quantity by this receipt line's change
+            shift_received({self.po_item_id: self.quantity_received - previous})
+            if POReceiptItem.po_item.is_cached(self):
+                self.po_item.refresh_from_db(fields=['received_quantity'])
 
-        po.save(update_fields=['status', 'actual_delivery_date'])
+            # Update PO status
+            refresh_receipt_status(self.receipt.purchase_order, self.receipt.receipt_date)
+        self._loaded_quantity = self.quantity_received
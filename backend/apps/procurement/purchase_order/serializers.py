@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.utils import timezone
+from .lines import LINE_FIELDS, MAX_LINES, receive_lines, write_lines
 from .models import PurchaseOrder, POItem, POReceipt, POReceiptItem, POStatus
 
 
@@ -22,6 +23,35 @@ class POItemSerializer(serializers.ModelSerializer):
         ]
 
 
+class POLineSerializer(serializers.ModelSerializer):
+    """One line of a bulk line write; a line with an `id` updates that line."""
+    id = serializers.UUIDField(required=False)
+
+    class Meta:
+        model = POItem
+        fields = ['id'] + LINE_FIELDS
+
+    def validate(self, attrs):
+        if 'id' not in attrs:
+            missing = [name for name in ('item_name', 'quantity', 'unit_price') if name not in attrs]
+            if missing:
+                raise serializers.ValidationError({name: 'Wajib diisi untuk item baru.' for name in missing})
+        return attrs
+
+
+class POLinesSerializer(serializers.Serializer):
+    """Bulk replace (PUT) or patch (PATCH) of a PO's lines."""
+    items = POLineSerializer(many=True, max_length=MAX_LINES)
+
+    def validate(self, attrs):
+        if 'items' not in attrs:
+            raise serializers.ValidationError({'items': 'Wajib diisi.'})
+        ids = [line['id'] for line in attrs['items'] if 'id' in line]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError({'items': 'Item yang sama tidak boleh muncul dua kali.'})
+        return attrs
+
+
 class POListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for listing POs."""
     vendor_name = serializers.CharField(source='vendor.name', read_only=True)
@@ -113,10 +143,7 @@ class POCreateSerializer(serializers.ModelSerializer):
             **validated_data
         )
 
-        for item_data in items_data:
-            POItem.objects.create(purchase_order=po, **item_data)
-
-        po.calculate_totals()
+        write_lines(po, items_data, replace=True)
         return po
 
 
@@ -192,9 +219,7 @@ class POReceiptCreateSerializer(serializers.ModelSerializer):
             **validated_data
         )
 
-        for item_data in items_data:
-            POReceiptItem.objects.create(receipt=receipt, **item_data)
-
+        receive_lines(receipt, items_data)
         return receipt
 
 
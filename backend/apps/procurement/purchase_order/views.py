@@ -3,15 +3,17 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db.models import Sum, Count
+from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
 
 from apps.common.cache import cache_api_response, invalidate_cache
+from apps.common.stats import Stats
+from .lines import UnknownLine, write_lines
 from .models import PurchaseOrder, POItem, POReceipt, POReceiptItem, POStatus
 from .serializers import (
     POListSerializer, PODetailSerializer, POCreateSerializer, POUpdateSerializer,
     POItemSerializer, POReceiptSerializer, POReceiptCreateSerializer,
-    POApprovalSerializer,
+    POApprovalSerializer, POLinesSerializer,
 )
 
 
@@ -173,6 +175,46 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         serializer = POReceiptSerializer(receipts, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get', 'put', 'patch'])
+    def items(self, request, pk=None):
+        """
+        Read or write all lines of a PO in one request.
+
+        PUT replaces the lines (in the given order, lines left out are
+        removed); PATCH updates lines by `id` and appends lines without one.
+        Totals are recalculated once for the whole request.
+        """
+        po = self.get_object()
+        if request.method == 'GET':
+            items = po.items.filter(is_active=True)
+            return Response(POItemSerializer(items, many=True).data)
+
+        if po.status not in [POStatus.DRAFT, POStatus.REJECTED]:
+            return Response(
+                {'detail': 'Item hanya bisa diubah pada PO dengan status Draft atau Ditolak.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = POLinesSerializer(data=request.data, partial=request.method == 'PATCH')
+        serializer.is_valid(raise_exception=True)
+        try:
+            items = write_lines(po, serializer.validated_data['items'], replace=request.method == 'PUT')
+        except UnknownLine as exc:
+            return Response(
+                {'detail': f'Item tidak ditemukan pada PO ini: {exc}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        invalidate_cache('purchase_orders:*')
+        invalidate_cache('purchase_order_detail:*')
+        return Response({
+            'subtotal': po.subtotal,
+            'discount_amount': po.discount_amount,
+            'tax_amount': po.tax_amount,
+            'total_amount': po.total_amount,
+            'items': POItemSerializer(items, many=True).data,
+        })
+
     @action(detail=False, methods=['get'])
     def my_requests(self, request):
         """Get POs requested by current user."""
@@ -190,18 +232,15 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get PO statistics."""
-        qs = self.get_queryset()
-        stats = {
-            'total': qs.count(),
-            'by_status': {},
-            'total_value': qs.aggregate(total=Sum('total_amount'))['total'] or 0,
-            'pending_approval': qs.filter(status=POStatus.PENDING_APPROVAL).count(),
-            'pending_delivery': qs.filter(status__in=[POStatus.SENT, POStatus.PARTIAL]).count(),
-        }
-
-        for choice in POStatus.choices:
-            stats['by_status'][choice[0]] = qs.filter(status=choice[0]).count()
-
+        stats = (
+            Stats(self.get_queryset(), 'po_statistics')
+            .count('total')
+            .count_by('by_status', 'status', POStatus.values)
+            .sum('total_value', 'total_amount')
+            .count('pending_approval', Q(status=POStatus.PENDING_APPROVAL))
+            .count('pending_delivery', Q(status__in=[POStatus.SENT, POStatus.PARTIAL]))
+            .get(cache_key=request.query_params)
+        )
         return Response(stats)
 
 
@@ -242,7 +281,6 @@ class POItemViewSet(viewsets.ModelViewSet):
             )
         instance.is_active = False
         instance.save(update_fields=['is_active'])
-        instance.purchase_order.calculate_totals()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
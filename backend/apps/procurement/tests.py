@@ -13,6 +13,7 @@ from apps.procurement.purchase_order.models import (
     PurchaseOrder, POItem, POReceipt, POReceiptItem,
     POStatus, POPriority, PaymentStatus,
 )
+from apps.procurement.purchase_order.lines import deferred_totals
 
 
 class VendorModelTest(TestCase):
@@ -202,6 +203,114 @@ class PurchaseOrderModelTest(TestCase):
         self.assertEqual(po.tax_amount, Decimal('121000'))
         self.assertEqual(po.total_amount, Decimal('1221000'))
 
+    def test_line_changes_shift_totals(self):
+        po = PurchaseOrder.objects.create(
+            vendor=self.vendor,
+            order_date=timezone.now().date(),
+            requested_by=self.user,
+            tax_percent=Decimal('10'),
+        )
+        with deferred_totals(po):
+            first = POItem.objects.create(
+                purchase_order=po, item_name='Item 1', quantity=Decimal('2'), unit_price=Decimal('1000'),
+            )
+            POItem.objects.create(
+                purchase_order=po, item_name='Item 2', quantity=Decimal('1'), unit_price=Decimal('500'),
+            )
+            self.assertEqual(PurchaseOrder.objects.get(pk=po.pk).subtotal, Decimal('0'))
+        self.assertEqual(po.subtotal, Decimal('2500'))
+
+        item = POItem.objects.get(pk=first.pk)
+        item.quantity = Decimal('3')
+        with self.assertNumQueries(4):  # savepoint, item update, header update, release
+            item.save()
+        po.refresh_from_db()
+        self.assertEqual(po.subtotal, Decimal('3500'))
+        self.assertEqual(po.total_amount, Decimal('3850'))
+
+        item.is_active = False
+        item.save(update_fields=['is_active'])
+        po.refresh_from_db()
+        self.assertEqual(po.subtotal, Decimal('500'))
+        self.assertEqual(po.tax_amount, Decimal('50'))
+
+    def test_receipt_updates_received_quantity_and_status(self):
+        po = PurchaseOrder.objects.create(
+            vendor=self.vendor,
+            order_date=timezone.now().date(),
+            requested_by=self.user,
+            status=POStatus.SENT,
+        )
+        item = POItem.objects.create(
+            purchase_order=po, item_name='Item', quantity=Decimal('10'), unit_price=Decimal('100'),
+        )
+        receipt = POReceipt.objects.create(
+            purchase_order=po, receipt_date=timezone.now().date(), received_by=self.user,
+        )
+        line = POReceiptItem.objects.create(receipt=receipt, po_item=item, quantity_received=Decimal('4'))
+        item.refresh_from_db()
+        po.refresh_from_db()
+        self.assertEqual(item.received_quantity, Decimal('4'))
+        self.assertEqual(po.status, POStatus.PARTIAL)
+
+        line = POReceiptItem.objects.get(pk=line.pk)
+        line.quantity_received = Decimal('10')
+        line.save()
+        item.refresh_from_db()
+        po.refresh_from_db()
+        self.assertEqual(item.received_quantity, Decimal('10'))
+        self.assertEqual(po.status, POStatus.RECEIVED)
+        self.assertEqual(po.actual_delivery_date, receipt.receipt_date)
+
+
+class DocumentNumberSequenceTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='numbers',
+            email='numbers@test.com',
+            password='testpass123',
+        )
+        self.vendor = Vendor.objects.create(
+            name='Vendor',
+            address='Address',
+            city='Jakarta',
+            province='DKI Jakarta',
+            phone='021-111',
+            email='vendor@test.com',
+            contact_person='Contact',
+            contact_phone='08111',
+        )
+
+    def create_po(self, **kwargs):
+        return PurchaseOrder.objects.create(
+            vendor=self.vendor,
+            order_date=timezone.now().date(),
+            requested_by=self.user,
+            **kwargs,
+        )
+
+    def test_continues_after_existing_numbers(self):
+        year = timezone.localtime().year
+        self.create_po(po_number=f'PO-{year}-0999')
+        self.create_po(po_number=f'PO-{year}-1041')
+
+        self.assertEqual(self.create_po().po_number, f'PO-{year}-1042')
+        self.assertEqual(self.create_po().po_number, f'PO-{year}-1043')
+
+    def test_block_allocation(self):
+        from apps.core.models import NumberSequence
+        from apps.procurement.purchase_order.models import PO_NUMBERS
+
+        year = timezone.localtime().year
+        self.assertEqual(
+            PO_NUMBERS.block(3),
+            [f'PO-{year}-0001', f'PO-{year}-0002', f'PO-{year}-0003'],
+        )
+        self.assertEqual(self.create_po().po_number, f'PO-{year}-0004')
+        with self.assertNumQueries(1):
+            PO_NUMBERS.next()
+        self.assertEqual(NumberSequence.objects.get(key='purchase_order').last_value, 5)
+
 
 class VendorAPITest(APITestCase):
     def setUp(self):
@@ -347,3 +456,48 @@ class PurchaseOrderAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('total', response.data)
         self.assertIn('by_status', response.data)
+
+    def test_bulk_line_items(self):
+        self.client.force_authenticate(user=self.user)
+        po = PurchaseOrder.objects.create(
+            vendor=self.vendor,
+            order_date=timezone.now().date(),
+            requested_by=self.user,
+            tax_percent=Decimal('0'),
+        )
+        old = POItem.objects.create(
+            purchase_order=po, item_name='Old', quantity=Decimal('1'), unit_price=Decimal('100'),
+        )
+        url = reverse('api_v1:purchase-order-items', kwargs={'pk': po.id})
+
+        lines = [
+            {'item_name': f'Item {n}', 'quantity': '2', 'unit_price': '1000'}
+            for n in range(1, 51)
+        ]
+        with self.assertNumQueries(9):
+            response = self.client.put(url, {'items': lines}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['items']), 50)
+        self.assertEqual(response.data['items'][-1]['line_number'], 50)
+        self.assertEqual(response.data['total_amount'], Decimal('100000'))
+        old.refresh_from_db()
+        self.assertFalse(old.is_active)
+
+        first = response.data['items'][0]['id']
+        response = self.client.patch(url, {'items': [
+            {'id': first, 'quantity': '12'},
+            {'item_name': 'Extra', 'quantity': '1', 'unit_price': '500'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['items']), 51)
+        self.assertEqual(response.data['items'][-1]['line_number'], 51)
+        po.refresh_from_db()
+        self.assertEqual(po.subtotal, Decimal('110500'))
+
+        response = self.client.patch(url, {'items': [{'id': str(old.id), 'quantity': '2'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        po.status = POStatus.APPROVED
+        po.save(update_fields=['status'])
+        response = self.client.put(url, {'items': lines}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -7,6 +7,7 @@ from django.conf import settings
 from django.utils import timezone
 from apps.core.models import TenantBaseModel
 from apps.core.models.audit import AuditMixin
+from apps.core.services.sequences import Sequence
 
 
 class GrantStatus(models.TextChoices):
@@ -41,6 +42,9 @@ class FundingSource(models.TextChoices):
     OTHER = 'other', 'Lainnya'
 
 
+GRANT_NUMBERS = Sequence('grant', 'GRT-{year}-{seq:04d}', model='research.Grant', field='grant_number')
+
+
 class Grant(TenantBaseModel, AuditMixin):
     """Research grant/funding model."""
     grant_number = models.CharField(
@@ -147,18 +151,7 @@ class Grant(TenantBaseModel, AuditMixin):
 
     def _generate_grant_number(self):
         """Generate grant number: GRT-YYYY-XXXX"""
-        year = timezone.now().year
-        prefix = f"GRT-{year}-"
-        last = Grant.objects.filter(
-            grant_number__startswith=prefix
-        ).order_by('-grant_number').first()
-
-        if last:
-            last_num = int(last.grant_number.split('-')[-1])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-        return f"{prefix}{new_num:04d}"
+        return GRANT_NUMBERS.next()
 
     @property
     def remaining_budget(self):
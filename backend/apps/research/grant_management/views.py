@@ -7,8 +7,10 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.db.models import Q
 from django.utils import timezone
 
+from apps.common.stats import Stats
 from .models import Grant, GrantTeamMember, GrantMilestone, GrantDisbursement, GrantStatus
 from .serializers import (
     GrantListSerializer, GrantDetailSerializer, GrantCreateSerializer,
@@ -91,22 +93,19 @@ class GrantViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """Get grant summary statistics."""
-        queryset = self.get_queryset()
-        total_approved = sum(g.approved_amount for g in queryset.filter(status__in=[GrantStatus.APPROVED, GrantStatus.ACTIVE, GrantStatus.COMPLETED]))
-        total_disbursed = sum(g.disbursed_amount for g in queryset)
-
-        return Response({
-            'total_grants': queryset.count(),
-            'total_approved_amount': total_approved,
-            'total_disbursed_amount': total_disbursed,
-            'by_status': {
-                'draft': queryset.filter(status=GrantStatus.DRAFT).count(),
-                'submitted': queryset.filter(status=GrantStatus.SUBMITTED).count(),
-                'approved': queryset.filter(status=GrantStatus.APPROVED).count(),
-                'active': queryset.filter(status=GrantStatus.ACTIVE).count(),
-                'completed': queryset.filter(status=GrantStatus.COMPLETED).count(),
-            }
-        })
+        summary = (
+            Stats(self.get_queryset(), 'grant_summary')
+            .count('total_grants')
+            .sum('total_approved_amount', 'approved_amount',
+                 Q(status__in=[GrantStatus.APPROVED, GrantStatus.ACTIVE, GrantStatus.COMPLETED]))
+            .sum('total_disbursed_amount', 'disbursed_amount')
+            .count_by('by_status', 'status', [
+                GrantStatus.DRAFT, GrantStatus.SUBMITTED, GrantStatus.APPROVED,
+                GrantStatus.ACTIVE, GrantStatus.COMPLETED,
+            ])
+            .get(cache_key=request.query_params)
+        )
+        return Response(summary)
 
 
 class GrantTeamMemberViewSet(viewsets.ModelViewSet):
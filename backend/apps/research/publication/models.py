@@ -143,6 +143,16 @@ class Publication(TenantBaseModel, AuditMixin):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a change also refreshes the dashboard rollups of the old values
+        instance._loaded_rollup_state = {
+            name: instance.__dict__.get(name)
+            for name in ('tenant_id', 'publication_type', 'status', 'indexation', 'year', 'created_at')
+        }
+        return instance
+
     def save(self, *args, **kwargs):
         # Auto-set year from publication_date
         if self.publication_date and not self.year:
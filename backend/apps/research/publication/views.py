@@ -9,6 +9,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.utils import timezone
 
+from apps.common.stats import Stats
 from .models import Publication, PublicationAuthor, PublicationReview, PublicationStatus
 from .serializers import (
     PublicationListSerializer, PublicationDetailSerializer, PublicationCreateSerializer,
@@ -80,29 +81,20 @@ class PublicationViewSet(viewsets.ModelViewSet):
         if year:
             queryset = queryset.filter(year=year)
 
-        return Response({
-            'total_publications': queryset.count(),
-            'total_citations': sum(p.citation_count for p in queryset),
-            'by_type': {
-                'journal_article': queryset.filter(publication_type='journal_article').count(),
-                'conference_paper': queryset.filter(publication_type='conference_paper').count(),
-                'book': queryset.filter(publication_type='book').count(),
-                'book_chapter': queryset.filter(publication_type='book_chapter').count(),
-                'policy_brief': queryset.filter(publication_type='policy_brief').count(),
-                'other': queryset.exclude(publication_type__in=['journal_article', 'conference_paper', 'book', 'book_chapter', 'policy_brief']).count(),
-            },
-            'by_indexation': {
-                'scopus': queryset.filter(indexation='scopus').count(),
-                'wos': queryset.filter(indexation='wos').count(),
-                'sinta': queryset.filter(indexation='sinta').count(),
-                'non_indexed': queryset.filter(indexation='non_indexed').count(),
-            },
-            'by_status': {
-                'draft': queryset.filter(status=PublicationStatus.DRAFT).count(),
-                'in_review': queryset.filter(status=PublicationStatus.IN_REVIEW).count(),
-                'published': queryset.filter(status=PublicationStatus.PUBLISHED).count(),
-            }
-        })
+        summary = (
+            Stats(queryset, 'publication_summary')
+            .count('total_publications')
+            .sum('total_citations', 'citation_count')
+            .count_by('by_type', 'publication_type', [
+                'journal_article', 'conference_paper', 'book', 'book_chapter', 'policy_brief',
+            ], other='other')
+            .count_by('by_indexation', 'indexation', ['scopus', 'wos', 'sinta', 'non_indexed'])
+            .count_by('by_status', 'status', [
+                PublicationStatus.DRAFT, PublicationStatus.IN_REVIEW, PublicationStatus.PUBLISHED,
+            ])
+            .get(cache_key=request.query_params)
+        )
+        return Response(summary)
 
 
 class PublicationAuthorViewSet(viewsets.ModelViewSet):
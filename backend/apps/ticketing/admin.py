@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Category, SLAPolicy, Ticket, TicketComment, TicketAttachment
+from .models import (
+    AgentWorkload, Category, Holiday, SLAPolicy, Ticket, TicketAttachment, TicketComment,
+    WorkingCalendar, WorkingHours,
+)
 
 
 @admin.register(Category)
@@ -9,11 +12,30 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ['name', 'code']
 
 
+class WorkingHoursInline(admin.TabularInline):
+    model = WorkingHours
+    extra = 0
+
+
+class HolidayInline(admin.TabularInline):
+    model = Holiday
+    extra = 0
+
+
+@admin.register(WorkingCalendar)
+class WorkingCalendarAdmin(admin.ModelAdmin):
+    list_display = ['name', 'timezone', 'is_default', 'version', 'is_active']
+    list_filter = ['is_default', 'is_active']
+    search_fields = ['name']
+    readonly_fields = ['version']
+    inlines = [WorkingHoursInline, HolidayInline]
+
+
 @admin.register(SLAPolicy)
 class SLAPolicyAdmin(admin.ModelAdmin):
     list_display = [
         'name', 'priority', 'response_time', 'resolution_time',
-        'business_hours_only', 'is_active',
+        'business_hours_only', 'calendar', 'is_active',
     ]
     list_filter = ['priority', 'business_hours_only']
     search_fields = ['name']
@@ -95,3 +117,12 @@ class TicketAttachmentAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['filename', 'ticket__ticket_number']
     raw_id_fields = ['ticket', 'uploaded_by']
+
+
+@admin.register(AgentWorkload)
+class AgentWorkloadAdmin(admin.ModelAdmin):
+    list_display = ['user', 'skill_group', 'open_tickets', 'load', 'is_accepting', 'last_assigned_at']
+    list_filter = ['skill_group', 'is_accepting']
+    search_fields = ['user__email', 'skill_group']
+    raw_id_fields = ['user']
+    readonly_fields = ['open_tickets', 'load', 'last_assigned_at']
@@ -0,0 +1,365 @@
+"""
+Load-aware automatic ticket assignment.
+
+Agents serve skill groups: a category's `default_assignee_group` (or the
+nearest parent's) names a Django auth group, and every member of that group
+who is an active member of the category's tenant (`TenantUser`) gets an
+`AgentWorkload` row for it in that tenant (`rebuild`, or
+`python manage.py rebuild_agent_workload`); auth groups are global, so
+group membership alone never makes a user an agent of another tenant. Each
+row carries the agent's live counters:
+
+- `open_tickets`: unresolved tickets assigned to the agent;
+- `load`: the same tickets weighted by priority (PRIORITY_WEIGHTS).
+
+The counters move by deltas whenever a ticket's assignee, status or
+priority changes (`shift_workload`, called from `Ticket.save`), so nothing
+recounts tickets on the hot path.
+
+- `assign_ticket` gives one ticket to the least-loaded accepting agent of
+  its skill group: a single lookup on the (skill group, load) index, with
+  `SKIP LOCKED` so concurrent assignments spread over different agents.
+- `rebalance` hands out a backlog (unassigned open tickets, and optionally
+  tickets nobody has responded to yet) in one transaction: tickets go out
+  by priority, each to the agent with the lowest running load, then tickets
+  and counters are written with one bulk update each.
+
+Agents can be taken out of rotation with `is_accepting`; counters drifting
+after direct SQL edits are repaired by `rebuild`.
+"""
+import heapq
+from collections import defaultdict
+
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from apps.core.services.events import publish
+from .models import AgentWorkload, Category, Ticket, TicketPriority, TicketStatus
+
+PRIORITY_WEIGHTS = {
+    TicketPriority.LOW: 1,
+    TicketPriority.MEDIUM: 2,
+    TicketPriority.HIGH: 4,
+    TicketPriority.CRITICAL: 8,
+}
+
+# Statuses counted as open work of the assignee
+COUNTED_STATUSES = (
+    TicketStatus.OPEN, TicketStatus.IN_PROGRESS, TicketStatus.WAITING_USER, TicketStatus.WAITING_VENDOR,
+)
+
+
+def weight(status, priority) -> int:
+    """Workload weight of a ticket for its assignee."""
+    if status not in COUNTED_STATUSES:
+        return 0
+    return PRIORITY_WEIGHTS.get(priority, PRIORITY_WEIGHTS[TicketPriority.MEDIUM])
+
+
+# ==================== Counters ====================
+
+def _shift(tenant_id, deltas, assigned_at=None):
+    """
+    Apply counter deltas to agents' rows in one UPDATE.
+
+    Args:
+        tenant_id: Tenant of the agents' rows
+        deltas: {user_id: (tickets delta, load delta)}
+        assigned_at: Also stamp `last_assigned_at` of agents with a positive
+            tickets delta
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if user_id and any(delta)}
+    if not deltas:
+        return
+    output = IntegerField()
+
+    def case(index):
+        return Case(
+            *[When(user_id=user_id, then=Value(delta[index])) for user_id, delta in deltas.items()],
+            default=Value(0),
+            output_field=output,
+        )
+
+    values = {
+        'open_tickets': F('open_tickets') + case(0),
+        'load': F('load') + case(1),
+        'updated_at': timezone.now(),
+    }
+    gained = [user_id for user_id, delta in deltas.items() if delta[0] > 0]
+    if assigned_at and gained:
+        values['last_assigned_at'] = Case(
+            When(user_id__in=gained, then=Value(assigned_at)),
+            default=F('last_assigned_at'),
+        )
+    AgentWorkload.all_objects.filter(tenant_id=tenant_id, user_id__in=deltas).update(**values)
+
+
+def shift_workload(ticket, previous):
+    """
+    Move workload counters after a ticket was saved.
+
+    Args:
+        ticket: Saved Ticket
+        previous: (assignee_id, status, priority) as loaded, None for a new
+            ticket
+    """
+    old_user, old_weight = (previous[0], weight(*previous[1:])) if previous else (None, 0)
+    new_user, new_weight = ticket.assignee_id, weight(ticket.status, ticket.priority)
+    if not old_user:
+        old_weight = 0
+    if not new_user:
+        new_weight = 0
+    if (old_user, old_weight) == (new_user, new_weight):
+        return
+
+    deltas = defaultdict(lambda: (0, 0))
+    if old_weight:
+        deltas[old_user] = (-1, -old_weight)
+    if new_weight:
+        tickets, load = deltas[new_user]
+        deltas[new_user] = (tickets + 1, load + new_weight)
+    _shift(ticket.tenant_id, deltas)
+
+
+# ==================== Skill groups ====================
+
+def skill_group_for(category) -> str:
+    """Skill group of a category: its own or the nearest ancestor's."""
+    if category is None:
+        return ''
+    if category.default_assignee_group:
+        return category.default_assignee_group
+    groups = dict(
+        Category.all_objects.filter(pk__in=category.ancestor_ids())
+        .exclude(default_assignee_group='').values_list('depth', 'default_assignee_group')
+    )
+    return groups[max(groups)] if groups else ''
+
+
+def _skill_groups() -> dict:
+    """{category_id: skill group} of every category, in one query."""
+    rows = {
+        pk: (parent_id, group)
+        for pk, parent_id, group in Category.all_objects.values_list('pk', 'parent_id', 'default_assignee_group')
+    }
+    groups = {}
+    for pk in rows:
+        seen, current = set(), pk
+        while current in rows and current not in seen:
+            parent_id, group = rows[current]
+            if group:
+                groups[pk] = group
+                break
+            seen.add(current)
+            current = parent_id
+    return groups
+
+
+# ==================== Assignment ====================
+
+def _accepting(tenant_id, skill_group):
+    return AgentWorkload.all_objects.filter(tenant_id=tenant_id, skill_group=skill_group, is_accepting=True)
+
+
+def assign_ticket(ticket):
+    """
+    Assign a ticket to the least-loaded agent of its skill group.
+
+    Returns:
+        The assignee's user id, or None when the ticket is already assigned,
+        has no skill group or no agent is accepting
+    """
+    if ticket.assignee_id:
+        return None
+    skill_group = skill_group_for(ticket.category)
+    if not skill_group:
+        return None
+
+    now = timezone.now()
+    with transaction.atomic():
+        user_id = _accepting(ticket.tenant_id, skill_group).select_for_update(skip_locked=True).order_by(
+            'load', 'last_assigned_at',
+        ).values_list('user_id', flat=True).first()
+        if user_id is None:
+            return None
+
+        ticket.assignee_id = user_id
+        if ticket.status == TicketStatus.OPEN:
+            ticket.status = TicketStatus.IN_PROGRESS
+        ticket.save(update_fields=['assignee', 'status', 'updated_at'])
+        AgentWorkload.all_objects.filter(tenant_id=ticket.tenant_id, user_id=user_id).update(last_assigned_at=now)
+    return user_id
+
+
+def rebalance(tickets=None, include_assigned=False) -> int:
+    """
+    Distribute a backlog over the agents in one transaction.
+
+    Args:
+        tickets: Ticket queryset to draw from (all tickets by default)
+        include_assigned: Also move tickets that are assigned but have no
+            first response yet
+
+    Returns:
+        Number of tickets that got a (new) assignee
+    """
+    if tickets is None:
+        tickets = Ticket.all_objects.all()
+    if include_assigned:
+        backlog = tickets.filter(
+            Q(assignee__isnull=True) | Q(first_response_at__isnull=True),
+            status__in=[TicketStatus.OPEN, TicketStatus.IN_PROGRESS],
+        )
+    else:
+        backlog = tickets.filter(assignee__isnull=True, status=TicketStatus.OPEN)
+
+    now = timezone.now()
+    with transaction.atomic():
+        backlog = list(
+            backlog.select_for_update(skip_locked=True, of=('self',)).filter(category__isnull=False).only(
+                'id', 'tenant_id', 'category_id', 'assignee_id', 'status', 'priority', 'created_at',
+            )
+        )
+        groups = _skill_groups()
+        backlog = [ticket for ticket in backlog if ticket.category_id in groups]
+        if not backlog:
+            return 0
+
+        tenants = {ticket.tenant_id for ticket in backlog}
+        in_tenants = Q(tenant_id__in=tenants - {None})
+        if None in tenants:
+            # IN (...) never matches NULL
+            in_tenants |= Q(tenant__isnull=True)
+        agents = AgentWorkload.all_objects.select_for_update().filter(
+            in_tenants,
+            is_accepting=True,
+            skill_group__in={groups[ticket.category_id] for ticket in backlog},
+        )
+        loads, queues = {}, defaultdict(list)
+        for agent in agents:
+            loads[agent.tenant_id, agent.user_id] = agent.load
+            queues[agent.tenant_id, agent.skill_group].append(
+                [agent.load, agent.last_assigned_at, str(agent.user_id), agent.user_id]
+            )
+
+        # Moved tickets stop counting for their current assignee
+        for ticket in backlog:
+            key = (ticket.tenant_id, ticket.assignee_id)
+            if key in loads:
+                loads[key] -= weight(ticket.status, ticket.priority)
+        for (tenant_id, _), queue in queues.items():
+            for entry in queue:
+                entry[0] = loads[tenant_id, entry[3]]
+            heapq.heapify(queue)
+
+        deltas = defaultdict(lambda: defaultdict(lambda: (0, 0)))
+        changed = []
+        backlog.sort(key=lambda ticket: (-weight(TicketStatus.OPEN, ticket.priority), ticket.created_at))
+        for ticket in backlog:
+            queue = queues.get((ticket.tenant_id, groups[ticket.category_id]))
+            if not queue:
+                continue
+            # Entries may be stale when the agent took tickets of another
+            # group; refresh and retry until the top is current
+            while True:
+                load, _, _, user_id = queue[0]
+                current = loads[ticket.tenant_id, user_id]
+                if load == current:
+                    break
+                heapq.heapreplace(queue, [current] + queue[0][1:])
+
+            share = weight(TicketStatus.IN_PROGRESS, ticket.priority)
+            old_share = weight(ticket.status, ticket.priority)
+            loads[ticket.tenant_id, user_id] += share
+            heapq.heapreplace(queue, [loads[ticket.tenant_id, user_id], now, str(user_id), user_id])
+            if user_id == ticket.assignee_id:
+                continue
+
+            tenant_deltas = deltas[ticket.tenant_id]
+            if ticket.assignee_id:
+                tickets_delta, load_delta = tenant_deltas[ticket.assignee_id]
+                tenant_deltas[ticket.assignee_id] = (tickets_delta - 1, load_delta - old_share)
+            tickets_delta, load_delta = tenant_deltas[user_id]
+            tenant_deltas[user_id] = (tickets_delta + 1, load_delta + share)
+
+            ticket.assignee_id = user_id
+            ticket.status = TicketStatus.IN_PROGRESS
+            ticket.updated_at = now
+            changed.append(ticket)
+
+        Ticket.all_objects.bulk_update(changed, ['assignee', 'status', 'updated_at'], batch_size=500)
+        for tenant_id, tenant_deltas in deltas.items():
+            _shift(tenant_id, tenant_deltas, assigned_at=now)
+
+        for ticket in changed:
+            publish(
+                'ticket.assigned', {'id': ticket.pk, 'status': ticket.status},
+                tenant_id=ticket.tenant_id, users=[ticket.assignee_id],
+            )
+        for tenant_id in deltas:
+            publish('ticket.changed', {'rebalanced': len(changed)}, tenant_id=tenant_id)
+    return len(changed)
+
+
+# ==================== Rebuild ====================
+
+def rebuild() -> int:
+    """
+    Resync agents' rows with the skill groups' members and recount their
+    counters from the tickets.
+
+    Returns:
+        Number of agent rows
+    """
+    weights = Case(
+        *[When(priority=priority, then=Value(value)) for priority, value in PRIORITY_WEIGHTS.items()],
+        default=Value(PRIORITY_WEIGHTS[TicketPriority.MEDIUM]),
+        output_field=IntegerField(),
+    )
+    with transaction.atomic():
+        wanted = set()
+        skill_groups = Category.all_objects.exclude(default_assignee_group='').values_list(
+            'tenant_id', 'default_assignee_group',
+        ).distinct()
+        # (tenant, group name) -> members who belong to that tenant
+        members = defaultdict(list)
+        for name, user_id, tenant_id in Group.objects.filter(
+            name__in={name for tenant_id, name in skill_groups if tenant_id}, user__is_active=True,
+            user__tenant_memberships__is_active=True,
+            user__tenant_memberships__tenant_id__in={tenant_id for tenant_id, _ in skill_groups if tenant_id},
+        ).values_list('name', 'user__id', 'user__tenant_memberships__tenant_id'):
+            members[tenant_id, name].append(user_id)
+        # Categories without a tenant (single-tenant setups) take every member
+        for name, user_id in Group.objects.filter(
+            name__in={name for tenant_id, name in skill_groups if tenant_id is None}, user__is_active=True,
+        ).values_list('name', 'user__id'):
+            members[None, name].append(user_id)
+        for tenant_id, name in skill_groups:
+            wanted.update((tenant_id, user_id, name) for user_id in members[tenant_id, name])
+
+        existing = {
+            (row.tenant_id, row.user_id, row.skill_group): row
+            for row in AgentWorkload.all_objects.select_for_update()
+        }
+        stale = [row.pk for key, row in existing.items() if key not in wanted]
+        AgentWorkload.all_objects.filter(pk__in=stale).delete()
+        AgentWorkload.all_objects.bulk_create([
+            AgentWorkload(tenant_id=tenant_id, user_id=user_id, skill_group=name)
+            for tenant_id, user_id, name in wanted - existing.keys()
+        ])
+
+        counts = {
+            (row['tenant_id'], row['assignee_id']): (row['tickets'], row['load'])
+            for row in Ticket.all_objects.filter(
+                assignee__isnull=False, status__in=COUNTED_STATUSES,
+            ).values('tenant_id', 'assignee_id').annotate(tickets=Count('id'), load=Sum(weights))
+        }
+        rows = list(AgentWorkload.all_objects.all())
+        now = timezone.now()
+        for row in rows:
+            row.open_tickets, row.load = counts.get((row.tenant_id, row.user_id), (0, 0))
+            row.updated_at = now
+        AgentWorkload.all_objects.bulk_update(rows, ['open_tickets', 'load', 'updated_at'], batch_size=500)
+    return len(rows)
@@ -0,0 +1,71 @@
+"""
+Load Indonesian public holidays into a working calendar.
+
+Fixed-rule national holidays are computed for the given years; holidays set
+by the yearly joint ministerial decree (lunar holidays, cuti bersama) are
+read from a CSV file of `date,name` rows. Existing holidays on the same
+dates are renamed, others are kept.
+
+Usage:
+    python manage.py load_holidays --calendar "Kantor Jakarta" --year 2026
+    python manage.py load_holidays --calendar <id> --year 2026 --year 2027
+    python manage.py load_holidays --calendar <id> --file skb_2026.csv
+"""
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.ticketing.models import Holiday, WorkingCalendar
+from apps.ticketing.sla.holidays import national_holidays, read_holidays
+
+
+class Command(BaseCommand):
+    help = 'Load Indonesian public holidays into a working calendar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calendar', required=True, help='Calendar id or name')
+        parser.add_argument('--year', type=int, action='append', help='Year of national holidays (repeatable)')
+        parser.add_argument('--file', help='CSV of date,name rows (e.g. the SKB cuti bersama list)')
+
+    def handle(self, *args, **options):
+        calendar = self.get_calendar(options['calendar'])
+
+        days = []
+        years = options['year'] or ([] if options['file'] else [timezone.localdate().year])
+        for year in years:
+            days += national_holidays(year)
+        if options['file']:
+            try:
+                days += read_holidays(options['file'])
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read {options["file"]}: {exc}')
+
+        # Last name wins for a date listed twice
+        by_date = dict(days)
+        with transaction.atomic():
+            Holiday.all_objects.bulk_create(
+                [
+                    Holiday(tenant_id=calendar.tenant_id, calendar=calendar, date=day, name=name)
+                    for day, name in sorted(by_date.items())
+                ],
+                update_conflicts=True,
+                unique_fields=['calendar', 'date'],
+                update_fields=['name', 'is_active', 'updated_at'],
+            )
+            WorkingCalendar.bump_version(calendar.pk)
+
+        self.stdout.write(self.style.SUCCESS(f'Loaded {len(by_date)} holidays into {calendar.name}.'))
+
+    def get_calendar(self, value):
+        query = Q(name=value)
+        try:
+            WorkingCalendar._meta.pk.to_python(value)
+            query |= Q(pk=value)
+        except ValidationError:
+            pass
+        calendar = WorkingCalendar.all_objects.filter(query).first()
+        if calendar is None:
+            raise CommandError(f'Working calendar not found: {value}')
+        return calendar
@@ -0,0 +1,21 @@
+"""
+Resync helpdesk agents with their skill groups and recount their workload.
+
+Agents are the members of the auth groups named by categories'
+`default_assignee_group`. Run after changing group membership, or to repair
+counters after tickets were edited with direct SQL.
+
+Usage:
+    python manage.py rebuild_agent_workload
+"""
+from django.core.management.base import BaseCommand
+
+from apps.ticketing.assignment import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Resync agent workload counters'
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Agent workload rebuilt ({count} agent rows).'))
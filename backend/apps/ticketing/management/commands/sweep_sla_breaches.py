@@ -0,0 +1,25 @@
+"""
+Flag tickets whose SLA response or resolution deadline has passed.
+
+Meant to run from cron, e.g. every minute.
+
+Usage:
+    python manage.py sweep_sla_breaches
+    python manage.py sweep_sla_breaches --batch-size 500
+"""
+from django.core.management.base import BaseCommand
+
+from apps.ticketing.sla.tracking import BATCH_SIZE, sweep_breaches
+
+
+class Command(BaseCommand):
+    help = 'Flag breached ticket SLAs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Tickets per UPDATE')
+
+    def handle(self, *args, **options):
+        counts = sweep_breaches(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"SLA breaches flagged (response: {counts['response']}, resolution: {counts['resolution']})."
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0002_category_tenant_slapolicy_tenant_ticket_tenant_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketattachment',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,125 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:48
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_invoice'),
+        ('ticketing', '0003_ticketattachment_content_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('date', models.DateField()),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Holiday',
+                'verbose_name_plural': 'Holidays',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkingCalendar',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('name', models.CharField(max_length=100)),
+                ('timezone', models.CharField(default='Asia/Jakarta', max_length=50)),
+                ('is_default', models.BooleanField(default=False)),
+                ('version', models.PositiveIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'Working Calendar',
+                'verbose_name_plural': 'Working Calendars',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkingHours',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Senin'), (1, 'Selasa'), (2, 'Rabu'), (3, 'Kamis'), (4, 'Jumat'), (5, 'Sabtu'), (6, 'Minggu')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+            ],
+            options={
+                'verbose_name': 'Working Hours',
+                'verbose_name_plural': 'Working Hours',
+                'ordering': ['weekday', 'start_time'],
+            },
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='sla_paused_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='slapolicy',
+            name='business_hours_only',
+            field=models.BooleanField(default=True, help_text='Hitung hanya jam kerja menurut kalender kerja (default 09:00-17:00, Senin-Jumat)'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('first_response_at__isnull', True), ('response_breached', False)), fields=['response_due'], name='ticket_response_due_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('resolution_breached', False), ('resolved_at__isnull', True)), fields=['resolution_due'], name='ticket_resolution_due_open_idx'),
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='tenant',
+            field=models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant'),
+        ),
+        migrations.AddField(
+            model_name='workingcalendar',
+            name='tenant',
+            field=models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant'),
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='calendar',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='ticketing.workingcalendar'),
+        ),
+        migrations.AddField(
+            model_name='slapolicy',
+            name='calendar',
+            field=models.ForeignKey(blank=True, help_text='Kalender kerja; kosong = kalender default tenant', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sla_policies', to='ticketing.workingcalendar'),
+        ),
+        migrations.AddField(
+            model_name='workinghours',
+            name='calendar',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hours', to='ticketing.workingcalendar'),
+        ),
+        migrations.AddField(
+            model_name='workinghours',
+            name='tenant',
+            field=models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant'),
+        ),
+        migrations.AddIndex(
+            model_name='workingcalendar',
+            index=models.Index(fields=['tenant', 'is_default'], name='ticketing_w_tenant__982cce_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='holiday',
+            unique_together={('calendar', 'date')},
+        ),
+    ]
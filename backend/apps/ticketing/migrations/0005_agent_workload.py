@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:52
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_invoice'),
+        ('ticketing', '0004_sla_calendars'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentWorkload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('skill_group', models.CharField(help_text='Grup penanganan (Category.default_assignee_group)', max_length=100)),
+                ('open_tickets', models.IntegerField(default=0)),
+                ('load', models.IntegerField(default=0, help_text='Tiket terbuka dibobot prioritas')),
+                ('is_accepting', models.BooleanField(default=True, help_text='Menerima penugasan otomatis')),
+                ('last_assigned_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_workloads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Agent Workload',
+                'verbose_name_plural': 'Agent Workloads',
+                'ordering': ['skill_group', 'load'],
+                'indexes': [models.Index(fields=['user'], name='ticketing_a_user_id_189742_idx'), models.Index(condition=models.Q(('is_accepting', True)), fields=['tenant', 'skill_group', 'load', 'last_assigned_at'], name='agent_workload_pick_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'user', 'skill_group'), name='unique_agent_workload', nulls_distinct=False)],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:30
+
+from django.db import migrations, models
+
+from apps.core.models.tree import rebuild_paths
+
+
+def backfill_paths(apps, schema_editor):
+    """Compute materialized paths of existing categories."""
+    rebuild_paths(apps.get_model('ticketing', 'Category'), 'parent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_invoice'),
+        ('ticketing', '0005_agent_workload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.TextField(default='', editable=False, help_text='Ids from the root to this node, e.g. /<id>/<id>/'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='ticketing_category_path', opclasses=['text_pattern_ops']),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
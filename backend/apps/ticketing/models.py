@@ -1,7 +1,9 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-from apps.core.models import TenantBaseModel, AuditMixin
+from apps.core.models import TenantBaseModel, AuditMixin, TreeMixin
+from apps.core.services.sequences import Sequence
+from apps.core.services.previews import hash_file
 
 
 class TicketPriority(models.TextChoices):
@@ -28,7 +30,7 @@ class TicketType(models.TextChoices):
     CHANGE = 'change', 'Perubahan'
 
 
-class Category(TenantBaseModel):
+class Category(TreeMixin, TenantBaseModel):
     """Ticket category for classification."""
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=20, unique=True)
@@ -50,12 +52,117 @@ class Category(TenantBaseModel):
         indexes = [
             models.Index(fields=['code']),
             models.Index(fields=['parent']),
+            TreeMixin.path_index('ticketing_category_path'),
         ]
 
     def __str__(self):
         return self.name
 
 
+class WorkingCalendar(TenantBaseModel):
+    """
+    Working time used for business-hours SLA deadlines: weekly hours plus
+    holidays. A tenant's default calendar applies to SLA policies without
+    their own (see apps.ticketing.sla.calendar).
+    """
+    name = models.CharField(max_length=100)
+    timezone = models.CharField(max_length=50, default='Asia/Jakarta')
+    is_default = models.BooleanField(default=False)
+
+    # Bumped whenever hours or holidays change; compiled calendars are
+    # cached per version
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        verbose_name = 'Working Calendar'
+        verbose_name_plural = 'Working Calendars'
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['tenant', 'is_default']),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        # A changed timezone invalidates compiled copies too
+        if not self._state.adding:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def bump_version(cls, pk):
+        """Invalidate compiled copies of a calendar."""
+        cls.all_objects.filter(pk=pk).update(version=models.F('version') + 1)
+
+
+class WorkingHours(TenantBaseModel):
+    """One working period of a weekday (several per day for breaks)."""
+    WEEKDAY_CHOICES = [
+        (0, 'Senin'),
+        (1, 'Selasa'),
+        (2, 'Rabu'),
+        (3, 'Kamis'),
+        (4, 'Jumat'),
+        (5, 'Sabtu'),
+        (6, 'Minggu'),
+    ]
+    calendar = models.ForeignKey(
+        WorkingCalendar,
+        on_delete=models.CASCADE,
+        related_name='hours',
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        verbose_name = 'Working Hours'
+        verbose_name_plural = 'Working Hours'
+        ordering = ['weekday', 'start_time']
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        WorkingCalendar.bump_version(self.calendar_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        WorkingCalendar.bump_version(self.calendar_id)
+        return result
+
+
+class Holiday(TenantBaseModel):
+    """Non-working day of a calendar (public holiday, collective leave)."""
+    calendar = models.ForeignKey(
+        WorkingCalendar,
+        on_delete=models.CASCADE,
+        related_name='holidays',
+    )
+    date = models.DateField()
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        verbose_name = 'Holiday'
+        verbose_name_plural = 'Holidays'
+        ordering = ['date']
+        unique_together = ['calendar', 'date']
+
+    def __str__(self):
+        return f"{self.date} - {self.name}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        WorkingCalendar.bump_version(self.calendar_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        WorkingCalendar.bump_version(self.calendar_id)
+        return result
+
+
 class SLAPolicy(TenantBaseModel):
     """Service Level Agreement policy."""
     name = models.CharField(max_length=100)
@@ -74,7 +181,15 @@ class SLAPolicy(TenantBaseModel):
     # Business hours only (9-17, Mon-Fri)
     business_hours_only = models.BooleanField(
         default=True,
-        help_text='Hitung hanya jam kerja (09:00-17:00, Senin-Jumat)'
+        help_text='Hitung hanya jam kerja menurut kalender kerja (default 09:00-17:00, Senin-Jumat)'
+    )
+    calendar = models.ForeignKey(
+        WorkingCalendar,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='sla_policies',
+        help_text='Kalender kerja; kosong = kalender default tenant',
     )
 
     class Meta:
@@ -90,6 +205,9 @@ class SLAPolicy(TenantBaseModel):
         return f"{self.name} ({self.get_priority_display()})"
 
 
+TICKET_NUMBERS = Sequence('ticket', 'TKT-{year}{month}-{seq:05d}', model='ticketing.Ticket', field='ticket_number')
+
+
 class Ticket(TenantBaseModel, AuditMixin):
     """Main ticket model for helpdesk."""
     ticket_number = models.CharField(max_length=20, unique=True, editable=False)
@@ -149,6 +267,9 @@ class Ticket(TenantBaseModel, AuditMixin):
     resolved_at = models.DateTimeField(null=True, blank=True)
     closed_at = models.DateTimeField(null=True, blank=True)
 
+    # Set while the SLA clock is paused (waiting on user or vendor)
+    sla_paused_at = models.DateTimeField(null=True, blank=True)
+
     # SLA breach flags
     response_breached = models.BooleanField(default=False)
     resolution_breached = models.BooleanField(default=False)
@@ -179,33 +300,81 @@ class Ticket(TenantBaseModel, AuditMixin):
             models.Index(fields=['category']),
             models.Index(fields=['response_due']),
             models.Index(fields=['resolution_due']),
+            # Breach sweeper: only deadlines that can still be breached
+            models.Index(
+                fields=['response_due'],
+                name='ticket_response_due_open_idx',
+                condition=models.Q(response_breached=False, first_response_at__isnull=True),
+            ),
+            models.Index(
+                fields=['resolution_due'],
+                name='ticket_resolution_due_open_idx',
+                condition=models.Q(resolution_breached=False, resolved_at__isnull=True),
+            ),
         ]
 
     def __str__(self):
         return f"{self.ticket_number} - {self.title}"
 
+    # Status when loaded, to pause and resume the SLA clock on changes
+    _loaded_status = None
+    # (assignee, status, priority) when loaded, to move workload counters
+    _loaded_assignment = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_assignment = (
+            instance.__dict__.get('assignee_id'),
+            instance.__dict__.get('status'),
+            instance.__dict__.get('priority'),
+        )
+        return instance
+
     def save(self, *args, **kwargs):
+        from .sla.tracking import track_status
+
         if not self.ticket_number:
             self.ticket_number = self.generate_ticket_number()
         if not self.sla_policy and self.priority:
             self.assign_sla_policy()
+        changed = track_status(self, self._loaded_status)
+        if changed and kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | changed
         super().save(*args, **kwargs)
+        self._loaded_status = self.status
+
+        from .assignment import shift_workload
+        loaded = self._loaded_assignment
+        shift_workload(self, loaded)
+        self._loaded_assignment = (self.assignee_id, self.status, self.priority)
+        if self._loaded_assignment != loaded:
+            self.publish_changes(loaded)
+
+    def delete(self, *args, **kwargs):
+        from .assignment import shift_workload
+
+        loaded = self._loaded_assignment
+        result = super().delete(*args, **kwargs)
+        if loaded:
+            self.assignee_id = None
+            shift_workload(self, loaded)
+        return result
+
+    def publish_changes(self, loaded):
+        """Push assignment and status changes to connected clients."""
+        from apps.core.services.events import publish
+
+        data = {'id': self.pk, 'ticket_number': self.ticket_number, 'status': self.status}
+        if self.assignee_id and (loaded is None or loaded[0] != self.assignee_id):
+            publish('ticket.assigned', data, tenant_id=self.tenant_id, users=[self.assignee_id])
+        # Dashboards and queues of the whole tenant
+        publish('ticket.changed', data, tenant_id=self.tenant_id)
 
     def generate_ticket_number(self):
         """Generate unique ticket number: TKT-YYYYMM-XXXXX"""
-        from datetime import datetime
-        prefix = f"TKT-{datetime.now().strftime('%Y%m')}-"
-        last_ticket = Ticket.objects.filter(
-            ticket_number__startswith=prefix
-        ).order_by('-ticket_number').first()
-
-        if last_ticket:
-            last_num = int(last_ticket.ticket_number.split('-')[-1])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-
-        return f"{prefix}{new_num:05d}"
+        return TICKET_NUMBERS.next()
 
     def assign_sla_policy(self):
         """Assign SLA policy based on priority."""
@@ -220,16 +389,13 @@ class Ticket(TenantBaseModel, AuditMixin):
         if not self.sla_policy:
             return
 
-        from datetime import timedelta
+        from .sla.calendar import clock_for
         now = timezone.now()
 
-        if self.sla_policy.business_hours_only:
-            # Simplified: just add minutes, production would need business hours calc
-            self.response_due = now + timedelta(minutes=self.sla_policy.response_time)
-            self.resolution_due = now + timedelta(minutes=self.sla_policy.resolution_time)
-        else:
-            self.response_due = now + timedelta(minutes=self.sla_policy.response_time)
-            self.resolution_due = now + timedelta(minutes=self.sla_policy.resolution_time)
+        # Working calendar for business-hours policies, wall clock otherwise
+        clock = clock_for(self.sla_policy, self.tenant_id)
+        self.response_due = clock.add(now, self.sla_policy.response_time)
+        self.resolution_due = clock.add(now, self.sla_policy.resolution_time)
 
     def check_sla_breach(self):
         """Check and update SLA breach status."""
@@ -240,6 +406,52 @@ class Ticket(TenantBaseModel, AuditMixin):
             self.resolution_breached = True
 
 
+class AgentWorkload(TenantBaseModel):
+    """
+    Live workload of a helpdesk agent in one skill group, used for automatic
+    assignment (see apps.ticketing.assignment). An agent has one row per
+    skill group they serve; the counters are kept equal on all of them.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='ticket_workloads',
+    )
+    skill_group = models.CharField(
+        max_length=100,
+        help_text='Grup penanganan (Category.default_assignee_group)',
+    )
+    open_tickets = models.IntegerField(default=0)
+    load = models.IntegerField(default=0, help_text='Tiket terbuka dibobot prioritas')
+    is_accepting = models.BooleanField(default=True, help_text='Menerima penugasan otomatis')
+    # Tie-break between agents with the same load (longest idle first)
+    last_assigned_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Agent Workload'
+        verbose_name_plural = 'Agent Workloads'
+        ordering = ['skill_group', 'load']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'user', 'skill_group'],
+                name='unique_agent_workload',
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user']),
+            # Least-loaded agent of a group
+            models.Index(
+                fields=['tenant', 'skill_group', 'load', 'last_assigned_at'],
+                name='agent_workload_pick_idx',
+                condition=models.Q(is_accepting=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} ({self.skill_group}): {self.load}"
+
+
 class TicketComment(TenantBaseModel):
     """Comments/updates on a ticket."""
     ticket = models.ForeignKey(
@@ -293,6 +505,18 @@ class TicketComment(TenantBaseModel):
                 self.ticket.save(update_fields=['first_response_at'])
         super().save(*args, **kwargs)
 
+        if is_new:
+            from apps.core.services.events import publish
+            publish(
+                'ticket.commented',
+                {'id': self.ticket_id, 'comment_id': self.pk, 'comment_type': self.comment_type},
+                tenant_id=self.tenant_id,
+                users=[
+                    user_id for user_id in (self.ticket.requester_id, self.ticket.assignee_id)
+                    if user_id != self.author_id
+                ],
+            )
+
 
 class TicketAttachment(TenantBaseModel):
     """File attachments for tickets."""
@@ -309,6 +533,7 @@ class TicketAttachment(TenantBaseModel):
     filename = models.CharField(max_length=255)
     file_size = models.PositiveIntegerField(default=0)
     content_type = models.CharField(max_length=100, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
 
     class Meta:
         verbose_name = 'Ticket Attachment'
@@ -322,6 +547,8 @@ class TicketAttachment(TenantBaseModel):
         if self.file:
             self.filename = self.file.name
             self.file_size = self.file.size
+            if not self.file._committed:
+                self.content_hash = hash_file(self.file)
         super().save(*args, **kwargs)
         # Update attachment count on ticket
         self.ticket.attachments_count = self.ticket.attachments.count()
@@ -1,8 +1,9 @@
 from rest_framework import serializers
-from .models import Category, SLAPolicy, Ticket, TicketComment, TicketAttachment
+from apps.core.serializers import TreeSerializerMixin
+from .models import AgentWorkload, Category, SLAPolicy, Ticket, TicketComment, TicketAttachment
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TreeSerializerMixin, serializers.ModelSerializer):
     parent_name = serializers.CharField(source='parent.name', read_only=True)
     children_count = serializers.SerializerMethodField()
 
@@ -27,7 +28,7 @@ class SLAPolicySerializer(serializers.ModelSerializer):
         model = SLAPolicy
         fields = [
             'id', 'name', 'description', 'priority', 'priority_display',
-            'response_time', 'resolution_time', 'business_hours_only',
+            'response_time', 'resolution_time', 'business_hours_only', 'calendar',
             'is_active', 'created_at', 'updated_at',
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -160,6 +161,25 @@ class TicketAssignSerializer(serializers.Serializer):
     assignee_id = serializers.UUIDField()
 
 
+class TicketRebalanceSerializer(serializers.Serializer):
+    include_assigned = serializers.BooleanField(default=False)
+
+
+class AgentWorkloadSerializer(serializers.ModelSerializer):
+    user_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AgentWorkload
+        fields = [
+            'id', 'user', 'user_name', 'skill_group', 'open_tickets', 'load',
+            'is_accepting', 'last_assigned_at',
+        ]
+        read_only_fields = fields
+
+    def get_user_name(self, obj):
+        return obj.user.get_full_name() or obj.user.email
+
+
 class TicketStatusUpdateSerializer(serializers.Serializer):
     status = serializers.ChoiceField(choices=[
         'in_progress', 'waiting_user', 'waiting_vendor',
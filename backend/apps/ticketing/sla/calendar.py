@@ -0,0 +1,182 @@
+"""
+Working-time calendars for business-hours SLAs.
+
+A `WorkingCalendar` (weekly hours and holidays, in its own timezone) is
+compiled into a sorted table of working intervals as UTC timestamps, with
+the working seconds accumulated before each interval. Deadline arithmetic is
+then a binary search on that table:
+
+- `working_seconds(start, end)`: working time between two instants;
+- `add(start, minutes)`: the instant a given amount of working time after
+  `start` (landing on the end of a working period rather than the start of
+  the next one).
+
+Both are O(log n) in the number of intervals. The table covers whole years
+and is extended when a query falls outside it.
+
+Compiled calendars are kept per process, keyed by calendar id and `version`
+(bumped whenever the calendar's hours or holidays change). SLA policies
+without a calendar use the tenant's default calendar, or the built-in
+Monday-Friday 09:00-17:00 Asia/Jakarta calendar when the tenant has none.
+"""
+import bisect
+import threading
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+DEFAULT_TIMEZONE = 'Asia/Jakarta'
+DEFAULT_HOURS = {weekday: [(time(9), time(17))] for weekday in range(5)}
+
+_compiled = {}
+_lock = threading.Lock()
+
+
+class WallClock:
+    """Round-the-clock time, for policies not limited to business hours."""
+
+    def add(self, start, minutes) -> datetime:
+        return start + timedelta(minutes=minutes)
+
+    def add_seconds(self, start, seconds) -> datetime:
+        return start + timedelta(seconds=seconds)
+
+    def working_seconds(self, start, end) -> float:
+        return max((end - start).total_seconds(), 0)
+
+
+WALL_CLOCK = WallClock()
+
+
+def _merge(periods):
+    """Sort a weekday's periods and merge overlaps; an end of 00:00 means midnight."""
+    merged = []
+    for start, end in sorted(periods):
+        end_seconds = 24 * 3600 if end == time(0) else end.hour * 3600 + end.minute * 60 + end.second
+        start_seconds = start.hour * 3600 + start.minute * 60 + start.second
+        if end_seconds <= start_seconds:
+            continue
+        if merged and start_seconds <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end_seconds)
+        else:
+            merged.append([start_seconds, end_seconds])
+    return merged
+
+
+class CompiledCalendar:
+    """Interval table of a working calendar."""
+
+    def __init__(self, hours, holidays=(), tz=DEFAULT_TIMEZONE):
+        self.hours = {weekday: _merge(periods) for weekday, periods in hours.items()}
+        self.holidays = frozenset(holidays)
+        self.tz = ZoneInfo(tz)
+        self.first_year = self.last_year = None
+        self.starts, self.ends, self.before = [], [], []
+        self.total = 0.0
+
+    @property
+    def has_hours(self) -> bool:
+        return any(self.hours.values())
+
+    def _build(self, first_year, last_year):
+        starts, ends = [], []
+        day, last = date(first_year, 1, 1), date(last_year, 12, 31)
+        while day <= last:
+            if day not in self.holidays:
+                midnight = datetime.combine(day, time(0), self.tz)
+                for start, end in self.hours.get(day.weekday(), ()):
+                    # Wall-clock offsets, resolved in the calendar's timezone
+                    starts.append((midnight + timedelta(seconds=start)).timestamp())
+                    ends.append((midnight + timedelta(seconds=end)).timestamp())
+            day += timedelta(days=1)
+
+        before, total = [], 0.0
+        for start, end in zip(starts, ends):
+            before.append(total)
+            total += end - start
+        self.first_year, self.last_year = first_year, last_year
+        self.starts, self.ends, self.before, self.total = starts, ends, before, total
+
+    def _cover(self, instant):
+        """Make sure the table covers the year of `instant`."""
+        year = instant.astimezone(self.tz).year
+        if self.first_year is None:
+            self._build(year, year + 1)
+        elif year < self.first_year or year > self.last_year:
+            self._build(min(year, self.first_year), max(year, self.last_year))
+
+    def _elapsed(self, ts) -> float:
+        """Working seconds from the start of the table up to `ts`."""
+        i = bisect.bisect_right(self.starts, ts) - 1
+        if i < 0:
+            return 0.0
+        return self.before[i] + min(ts, self.ends[i]) - self.starts[i]
+
+    def working_seconds(self, start, end) -> float:
+        if end <= start:
+            return 0.0
+        if not self.has_hours:
+            return WALL_CLOCK.working_seconds(start, end)
+        with _lock:
+            self._cover(start)
+            self._cover(end)
+            return self._elapsed(end.timestamp()) - self._elapsed(start.timestamp())
+
+    def add_seconds(self, start, seconds) -> datetime:
+        if seconds <= 0:
+            return start
+        if not self.has_hours:
+            return WALL_CLOCK.add_seconds(start, seconds)
+        with _lock:
+            self._cover(start)
+            while True:
+                target = self._elapsed(start.timestamp()) + seconds
+                if target <= self.total:
+                    break
+                self._build(self.first_year, self.last_year + 1)
+            # Last interval starting before the target: a deadline that
+            # fills a period exactly ends it instead of opening the next
+            j = bisect.bisect_left(self.before, target) - 1
+            ts = self.starts[j] + (target - self.before[j])
+        return datetime.fromtimestamp(ts, tz=start.tzinfo or self.tz)
+
+    def add(self, start, minutes) -> datetime:
+        return self.add_seconds(start, minutes * 60)
+
+
+DEFAULT_CALENDAR = CompiledCalendar(DEFAULT_HOURS)
+
+
+def compile_calendar(calendar) -> CompiledCalendar:
+    """Compiled copy of a WorkingCalendar (cached per version)."""
+    key = (calendar.pk, calendar.version)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        hours = {}
+        for weekday, start, end in calendar.hours.filter(is_active=True).values_list('weekday', 'start_time', 'end_time'):
+            hours.setdefault(weekday, []).append((start, end))
+        holidays = calendar.holidays.filter(is_active=True).values_list('date', flat=True)
+        compiled = CompiledCalendar(hours, holidays, calendar.timezone)
+        with _lock:
+            for stale in [k for k in _compiled if k[0] == calendar.pk]:
+                del _compiled[stale]
+            _compiled[key] = compiled
+    return compiled
+
+
+def calendar_for(policy, tenant_id=None):
+    """Working calendar of an SLA policy (see module docstring)."""
+    from apps.ticketing.models import WorkingCalendar
+
+    calendars = WorkingCalendar.all_objects.filter(is_active=True)
+    if policy is not None and policy.calendar_id:
+        calendar = calendars.filter(pk=policy.calendar_id).first()
+    else:
+        calendar = calendars.filter(tenant_id=tenant_id, is_default=True).first()
+    return compile_calendar(calendar) if calendar else DEFAULT_CALENDAR
+
+
+def clock_for(policy, tenant_id=None):
+    """Business-hours calendar or wall clock, following the SLA policy."""
+    if policy is not None and policy.business_hours_only:
+        return calendar_for(policy, tenant_id)
+    return WALL_CLOCK
@@ -0,0 +1,70 @@
+"""
+Indonesian public holidays for working calendars.
+
+Only holidays with a fixed rule are computed here: fixed-date national days
+and the Easter-based Christian holidays. Holidays following the Islamic,
+Chinese, Hindu and Buddhist calendars (Idul Fitri, Idul Adha, Imlek, Nyepi,
+Waisak, ...) and cuti bersama are set every year by joint ministerial
+decree (SKB 3 Menteri), so they are loaded from a CSV of that decree
+(`date,name` per line) with `python manage.py load_holidays --file`.
+"""
+import csv
+from datetime import date, timedelta
+
+FIXED_HOLIDAYS = [
+    (1, 1, 'Tahun Baru Masehi'),
+    (5, 1, 'Hari Buruh Internasional'),
+    (6, 1, 'Hari Lahir Pancasila'),
+    (8, 17, 'Hari Kemerdekaan Republik Indonesia'),
+    (12, 25, 'Hari Raya Natal'),
+]
+
+# Days relative to Easter Sunday
+EASTER_HOLIDAYS = [
+    (-2, 'Wafat Yesus Kristus'),
+    (0, 'Kebangkitan Yesus Kristus (Paskah)'),
+    (39, 'Kenaikan Yesus Kristus'),
+]
+
+
+def easter(year) -> date:
+    """Western Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def national_holidays(year) -> list:
+    """Fixed-rule national holidays of a year as (date, name), by date."""
+    sunday = easter(year)
+    days = [(date(year, month, day), name) for month, day, name in FIXED_HOLIDAYS]
+    days += [(sunday + timedelta(days=offset), name) for offset, name in EASTER_HOLIDAYS]
+    return sorted(days)
+
+
+def read_holidays(path) -> list:
+    """
+    Read holidays from a CSV file of `date,name` rows (ISO dates; a header
+    row and blank lines are skipped).
+    """
+    days = []
+    with open(path, newline='', encoding='utf-8') as handle:
+        for row in csv.reader(handle):
+            if not row or not row[0].strip():
+                continue
+            try:
+                day = date.fromisoformat(row[0].strip())
+            except ValueError:
+                if not days:
+                    continue  # header
+                raise
+            days.append((day, row[1].strip() if len(row) > 1 else ''))
+    return days
@@ -0,0 +1,113 @@
+"""
+SLA clock: pausing on waiting states and the breach sweeper.
+
+While a ticket waits on the user or a vendor its SLA clock stands still:
+
+- entering a waiting status stamps `sla_paused_at`;
+- leaving it moves every deadline that is still running (no first response
+  or no resolution yet) forward by the time that was left at the pause,
+  counted in working time for business-hours policies, then clears
+  `sla_paused_at`. Deadlines already missed when the ticket was paused stay
+  where they are.
+
+`track_status` is called from `Ticket.save`, so every status change (API,
+admin, scripts) is covered.
+
+`sweep_breaches` flags missed deadlines with one UPDATE per batch, driven
+by the partial indexes on open `response_due` / `resolution_due`, instead of
+loading tickets one by one. Run `python manage.py sweep_sla_breaches` from
+cron (e.g. every minute).
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from apps.ticketing.models import Ticket, TicketStatus
+from .calendar import clock_for
+
+BATCH_SIZE = 1000
+
+PAUSED_STATUSES = (TicketStatus.WAITING_USER, TicketStatus.WAITING_VENDOR)
+
+# Statuses whose SLA clock is running
+RUNNING_STATUSES = (TicketStatus.OPEN, TicketStatus.IN_PROGRESS)
+
+
+def _running_deadlines(ticket):
+    """Names of deadline fields that can still be met or missed."""
+    fields = []
+    if ticket.response_due and not ticket.first_response_at:
+        fields.append('response_due')
+    if ticket.resolution_due and not ticket.resolved_at:
+        fields.append('resolution_due')
+    return fields
+
+
+def resume(ticket, now=None) -> set:
+    """Restart a paused SLA clock; returns the changed field names."""
+    now = now or timezone.now()
+    paused_at = ticket.sla_paused_at
+    changed = {'sla_paused_at'}
+    clock = clock_for(ticket.sla_policy, ticket.tenant_id)
+    for field in _running_deadlines(ticket):
+        due = getattr(ticket, field)
+        if due > paused_at:
+            remaining = clock.working_seconds(paused_at, due)
+            setattr(ticket, field, clock.add_seconds(now, remaining))
+            changed.add(field)
+    ticket.sla_paused_at = None
+    return changed
+
+
+def track_status(ticket, previous_status) -> set:
+    """
+    Pause or resume the SLA clock of a ticket on a status change.
+
+    Args:
+        ticket: Ticket about to be saved
+        previous_status: Status when the ticket was loaded (None if new)
+
+    Returns:
+        Names of the fields that were changed
+    """
+    paused = ticket.status in PAUSED_STATUSES
+    if paused and ticket.sla_paused_at is None:
+        ticket.sla_paused_at = timezone.now()
+        return {'sla_paused_at'}
+    if not paused and ticket.sla_paused_at is not None and previous_status != ticket.status:
+        return resume(ticket)
+    return set()
+
+
+def _flag(queryset, due_field, flag, batch_size) -> int:
+    """Set `flag` on overdue tickets in batches of primary keys."""
+    flagged = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.order_by(due_field).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            flagged += Ticket.all_objects.filter(pk__in=ids).update(**{flag: True, 'updated_at': timezone.now()})
+        if len(ids) < batch_size:
+            break
+    return flagged
+
+
+def sweep_breaches(now=None, batch_size=BATCH_SIZE) -> dict:
+    """
+    Flag tickets whose running SLA deadlines have passed.
+
+    Returns:
+        Number of tickets flagged per deadline ('response', 'resolution')
+    """
+    now = now or timezone.now()
+    running = Ticket.all_objects.filter(status__in=RUNNING_STATUSES)
+    return {
+        'response': _flag(
+            running.filter(response_breached=False, first_response_at__isnull=True, response_due__lt=now),
+            'response_due', 'response_breached', batch_size,
+        ),
+        'resolution': _flag(
+            running.filter(resolution_breached=False, resolved_at__isnull=True, resolution_due__lt=now),
+            'resolution_due', 'resolution_breached', batch_size,
+        ),
+    }
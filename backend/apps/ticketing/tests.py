@@ -1,14 +1,26 @@
-from django.test import TestCase
+import asyncio
+from django.contrib.auth.models import Group
+from django.db.models import Count, Q
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework import status
-from datetime import timedelta
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+from apps.common.stats import Stats
+from apps.core.services import events
+from apps.tenants.models import Tenant, TenantUser
 from apps.users.models import User
+from .assignment import rebalance, rebuild
 from .models import (
-    Category, SLAPolicy, Ticket, TicketComment, TicketAttachment,
-    TicketPriority, TicketStatus, TicketType,
+    AgentWorkload, Category, Holiday, SLAPolicy, Ticket, TicketComment, TicketAttachment,
+    TicketPriority, TicketStatus, TicketType, WorkingCalendar, WorkingHours,
 )
+from .sla.calendar import calendar_for
+from .sla.holidays import national_holidays
+from .sla.tracking import sweep_breaches
 
 
 class CategoryModelTest(TestCase):
@@ -114,6 +126,90 @@ class TicketModelTest(TestCase):
         self.assertEqual(seq2, seq1 + 1)
 
 
+class SLACalendarTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='requester',
+            email='requester@test.com',
+            password='testpass123',
+        )
+        self.calendar = WorkingCalendar.objects.create(name='Kantor Jakarta', is_default=True)
+        for weekday in range(5):
+            WorkingHours.objects.create(
+                calendar=self.calendar, weekday=weekday, start_time=time(8), end_time=time(12),
+            )
+            WorkingHours.objects.create(
+                calendar=self.calendar, weekday=weekday, start_time=time(13), end_time=time(17),
+            )
+        Holiday.objects.create(calendar=self.calendar, date=date(2026, 8, 17), name='Hari Kemerdekaan')
+        self.calendar.refresh_from_db()
+
+    def test_deadline_skips_breaks_weekends_and_holidays(self):
+        jakarta = ZoneInfo('Asia/Jakarta')
+        friday = datetime(2026, 8, 14, 16, 0, tzinfo=jakarta)
+        tuesday = datetime(2026, 8, 18, 9, 0, tzinfo=jakarta)
+        calendar = calendar_for(None)
+
+        self.assertEqual(calendar.add(friday, 60), datetime(2026, 8, 14, 17, 0, tzinfo=jakarta))
+        self.assertEqual(calendar.add(friday, 120), tuesday)
+        self.assertEqual(calendar.working_seconds(friday, tuesday), 7200)
+        self.assertEqual(
+            calendar.add(datetime(2026, 8, 18, 11, 30, tzinfo=jakarta), 60),
+            datetime(2026, 8, 18, 13, 30, tzinfo=jakarta),
+        )
+
+        # Holidays added later invalidate the compiled calendar
+        Holiday.objects.create(calendar=self.calendar, date=date(2026, 8, 18), name='Cuti bersama')
+        self.assertEqual(calendar_for(None).add(friday, 120), datetime(2026, 8, 19, 9, 0, tzinfo=jakarta))
+
+        self.assertIn((date(2026, 4, 3), 'Wafat Yesus Kristus'), national_holidays(2026))
+
+    def test_pause_and_resume_shifts_deadlines(self):
+        SLAPolicy.objects.create(
+            name='Critical SLA', priority=TicketPriority.CRITICAL,
+            response_time=60, resolution_time=240, business_hours_only=False,
+        )
+        ticket = Ticket.objects.create(
+            title='Printer rusak', description='Tidak bisa mencetak',
+            requester=self.user, priority=TicketPriority.CRITICAL,
+        )
+        response_due = ticket.response_due
+
+        ticket.status = TicketStatus.WAITING_USER
+        ticket.save()
+        self.assertIsNotNone(ticket.sla_paused_at)
+
+        # Paused for two hours
+        Ticket.objects.filter(pk=ticket.pk).update(sla_paused_at=ticket.sla_paused_at - timedelta(hours=2))
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.status = TicketStatus.IN_PROGRESS
+        ticket.save(update_fields=['status'])
+
+        ticket.refresh_from_db()
+        self.assertIsNone(ticket.sla_paused_at)
+        self.assertAlmostEqual(
+            ticket.response_due, response_due + timedelta(hours=2), delta=timedelta(seconds=5),
+        )
+
+    def test_sweep_flags_running_tickets_only(self):
+        past = timezone.now() - timedelta(hours=1)
+        tickets = {
+            state: Ticket.objects.create(
+                title=f'Tiket {state}', description='-', requester=self.user, status=state,
+            )
+            for state in [TicketStatus.OPEN, TicketStatus.IN_PROGRESS, TicketStatus.WAITING_VENDOR]
+        }
+        Ticket.objects.update(response_due=past, resolution_due=past)
+        Ticket.objects.filter(pk=tickets[TicketStatus.IN_PROGRESS].pk).update(first_response_at=past)
+
+        self.assertEqual(sweep_breaches(batch_size=1), {'response': 1, 'resolution': 2})
+        flags = dict(Ticket.objects.values_list('status', 'response_breached'))
+        self.assertEqual(flags, {
+            TicketStatus.OPEN: True, TicketStatus.IN_PROGRESS: False, TicketStatus.WAITING_VENDOR: False,
+        })
+        self.assertEqual(sweep_breaches(), {'response': 0, 'resolution': 0})
+
+
 class TicketCommentModelTest(TestCase):
     def setUp(self):
         self.requester = User.objects.create_user(
@@ -309,6 +405,185 @@ class TicketAPITest(APITestCase):
         self.assertEqual(response.data['open'], 1)
         self.assertEqual(response.data['in_progress'], 1)
 
+    @override_settings(
+        STATS_CACHE_TIMEOUT=60,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    def test_dashboard_stats_queries(self):
+        for ticket_status in (TicketStatus.OPEN, TicketStatus.OPEN, TicketStatus.CLOSED):
+            Ticket.objects.create(
+                title='Ticket', description='Test', requester=self.user,
+                category=self.category, status=ticket_status,
+            )
+        Ticket.objects.filter(status=TicketStatus.CLOSED).update(response_breached=True)
+        stats = (
+            Stats(Ticket.objects.all(), 'test_dashboard')
+            .count('total')
+            .count('breached', Q(response_breached=True))
+            .count_by('by_status', 'status', [TicketStatus.OPEN, TicketStatus.RESOLVED], other='rest')
+            .group('by_category', ['category__name'], count=Count('id'))
+        )
+        with self.assertNumQueries(2):
+            data = stats.get(cache_key='')
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['breached'], 1)
+        self.assertEqual(data['by_status'], {TicketStatus.OPEN: 2, TicketStatus.RESOLVED: 0, 'rest': 1})
+        self.assertEqual(data['by_category'], [{'category__name': 'IT Support', 'count': 3}])
+        with self.assertNumQueries(0):
+            self.assertEqual(stats.get(cache_key=''), data)
+
+
+class TicketAssignmentTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='testuser@test.com',
+            password='testpass123',
+        )
+        group = Group.objects.create(name='Network')
+        self.agents = []
+        for name in ['agent1', 'agent2']:
+            agent = User.objects.create_user(username=name, email=f'{name}@test.com', password='testpass123')
+            agent.groups.add(group)
+            self.agents.append(agent)
+        parent = Category.objects.create(name='Jaringan', code='NET', default_assignee_group='Network')
+        self.category = Category.objects.create(name='WiFi', code='NET-WIFI', parent=parent)
+        self.assertEqual(rebuild(), 2)
+
+    def loads(self):
+        return dict(AgentWorkload.objects.values_list('user__username', 'load'))
+
+    def test_new_tickets_go_to_least_loaded_agent(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('api_v1:ticket-list')
+        for priority in [TicketPriority.CRITICAL, TicketPriority.MEDIUM, TicketPriority.MEDIUM]:
+            response = self.client.post(url, {
+                'title': 'Wifi putus', 'description': 'Tidak ada koneksi',
+                'category': str(self.category.id), 'priority': priority,
+            })
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        critical = Ticket.objects.get(priority=TicketPriority.CRITICAL)
+        self.assertEqual(critical.status, TicketStatus.IN_PROGRESS)
+        busy = critical.assignee.username
+        other = 'agent2' if busy == 'agent1' else 'agent1'
+        self.assertEqual(self.loads(), {busy: 8, other: 4})
+
+        critical.status = TicketStatus.RESOLVED
+        critical.save()
+        self.assertEqual(self.loads(), {busy: 0, other: 4})
+        self.assertEqual(AgentWorkload.objects.get(user__username=other).open_tickets, 2)
+
+        # Counters kept by deltas match a full recount
+        rebuild()
+        self.assertEqual(self.loads(), {busy: 0, other: 4})
+
+    def test_agents_limited_to_tenant_members(self):
+        group = Group.objects.get(name='Network')
+        tenants = [
+            Tenant.objects.create(name=name, slug=name, subdomain=name, email=f'it@{name}.id')
+            for name in ['alpha', 'beta']
+        ]
+        for tenant, agent in zip(tenants, self.agents):
+            TenantUser.objects.create(tenant=tenant, user=agent)
+        outsider = User.objects.create_user(username='outsider', email='outsider@test.com', password='testpass123')
+        outsider.groups.add(group)
+        TenantUser.objects.create(tenant=tenants[1], user=outsider, is_active=False)
+        for tenant in tenants:
+            Category.all_objects.create(
+                tenant=tenant, name='Jaringan', code=f'NET-{tenant.slug}', default_assignee_group='Network',
+            )
+
+        rebuild()
+        agents = AgentWorkload.all_objects.filter(tenant__isnull=False).values_list('tenant__slug', 'user__username')
+        self.assertEqual(sorted(agents), [('alpha', 'agent1'), ('beta', 'agent2')])
+
+    def test_rebalance_backlog(self):
+        for priority in [TicketPriority.LOW, TicketPriority.MEDIUM, TicketPriority.HIGH, TicketPriority.MEDIUM]:
+            Ticket.objects.create(
+                title='Switch mati', description='-', requester=self.user,
+                category=self.category, priority=priority,
+            )
+        Ticket.objects.create(title='Tanpa kategori', description='-', requester=self.user)
+
+        self.assertEqual(rebalance(), 4)
+        self.assertEqual(sorted(self.loads().values()), [4, 5])
+        self.assertEqual(Ticket.objects.filter(assignee__isnull=True).count(), 1)
+        self.assertEqual(rebalance(), 0)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('api_v1:ticket-workload'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum(row['open_tickets'] for row in response.data), 4)
+
+
+class EventStreamTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='testuser@test.com',
+            password='testpass123',
+        )
+        self.agent = User.objects.create_user(
+            username='agent',
+            email='agent@test.com',
+            password='testpass123',
+        )
+
+    def read(self, stream, count):
+        async def frames():
+            return [await anext(stream) for _ in range(count)]
+        return frames()
+
+    def test_stream_delivers_own_and_tenant_events(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Ticket.objects.create(title='VPN', description='-', requester=self.user, assignee=self.agent)
+
+        async def scenario():
+            stream = events.stream(self.agent.pk, None, heartbeat=0.05, max_age=5)
+            self.assertEqual(await anext(stream), 'retry: 5000\n\n')
+            for callback in callbacks:
+                callback()
+            events.send('ticket.assigned', {'id': 'other'}, users=[self.user.pk])
+            frames = await self.read(stream, 3)
+            await stream.aclose()
+            return frames
+
+        assigned, changed, idle = asyncio.run(scenario())
+        self.assertTrue(assigned.startswith('event: ticket.assigned\n'))
+        self.assertIn(str(Ticket.objects.get().pk), assigned)
+        self.assertTrue(changed.startswith('event: ticket.changed\n'))
+        self.assertEqual(idle, ': keep-alive\n\n')
+
+    @override_settings(EVENT_STREAM_QUEUE_SIZE=2)
+    def test_slow_client_gets_overflow(self):
+        async def scenario():
+            stream = events.stream(self.agent.pk, None, heartbeat=0.05, max_age=5)
+            await anext(stream)
+            for number in range(4):
+                events.send('ticket.changed', {'number': number})
+            await asyncio.sleep(0)
+            frames = await self.read(stream, 3)
+            await stream.aclose()
+            return frames
+
+        overflow, first, second = asyncio.run(scenario())
+        self.assertEqual(overflow, 'event: overflow\ndata: {"dropped": 2}\n\n')
+        self.assertIn('"number": 0', first)
+        self.assertIn('"number": 1', second)
+
+    def test_endpoint_requires_authentication(self):
+        response = self.client.get(reverse('api_v1:event-stream'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_endpoint_accepts_token_parameter(self):
+        token = await asyncio.to_thread(lambda: str(AccessToken.for_user(self.agent)))
+        response = await self.async_client.get(reverse('api_v1:event-stream'), {'token': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunk = await anext(aiter(response.streaming_content))
+        self.assertEqual(chunk, b'retry: 5000\n\n')
+
 
 class CategoryAPITest(APITestCase):
     def setUp(self):
@@ -1,12 +1,18 @@
+from django.db.models import Count, Q
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from apps.common.stats import Stats
+from apps.core.services.previews import preview_service
+from apps.core.services.uploads import upload_service
+from .assignment import assign_ticket, rebalance
 from .models import (
-    Category, SLAPolicy, Ticket, TicketComment, TicketAttachment,
+    AgentWorkload, Category, SLAPolicy, Ticket, TicketComment, TicketAttachment,
     TicketStatus,
 )
 from .serializers import (
+    AgentWorkloadSerializer,
     CategorySerializer,
     SLAPolicySerializer,
     TicketSerializer,
@@ -15,6 +21,7 @@ from .serializers import (
     TicketCommentSerializer,
     TicketAttachmentSerializer,
     TicketAssignSerializer,
+    TicketRebalanceSerializer,
     TicketStatusUpdateSerializer,
 )
 
@@ -28,20 +35,12 @@ class CategoryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def tree(self, request):
         """Get category hierarchy as tree."""
-        root_categories = Category.objects.filter(
-            parent__isnull=True,
-            is_active=True,
-        )
-
-        def build_tree(category):
-            return {
-                'id': str(category.id),
-                'name': category.name,
-                'code': category.code,
-                'children': [build_tree(c) for c in category.children.filter(is_active=True)]
-            }
-
-        return Response([build_tree(c) for c in root_categories])
+        categories = Category.objects.filter(is_active=True).values('id', 'parent_id', 'name', 'code')
+        return Response(Category.nest(categories, lambda category: {
+            'id': str(category['id']),
+            'name': category['name'],
+            'code': category['code'],
+        }))
 
 
 class SLAPolicyViewSet(viewsets.ModelViewSet):
@@ -66,6 +65,10 @@ class TicketViewSet(viewsets.ModelViewSet):
             return TicketCreateSerializer
         return TicketSerializer
 
+    def perform_create(self, serializer):
+        ticket = serializer.save()
+        assign_ticket(ticket)
+
     @action(detail=False, methods=['get'])
     def my_tickets(self, request):
         """Get tickets requested by current user."""
@@ -170,6 +173,48 @@ class TicketViewSet(viewsets.ModelViewSet):
 
         return Response(TicketSerializer(ticket).data)
 
+    @action(detail=True, methods=['post'])
+    def auto_assign(self, request, pk=None):
+        """Assign ticket to the least-loaded agent of its category's group."""
+        ticket = self.get_object()
+
+        if ticket.assignee:
+            return Response(
+                {'error': 'Ticket is already assigned'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if assign_ticket(ticket) is None:
+            return Response(
+                {'error': 'No agent available for this category'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        TicketComment.objects.create(
+            ticket=ticket,
+            author=request.user,
+            content=f'Ticket auto-assigned to {ticket.assignee.email}',
+            comment_type='status_change',
+        )
+
+        return Response(TicketSerializer(ticket).data)
+
+    @action(detail=False, methods=['post'])
+    def rebalance(self, request):
+        """Distribute the unassigned backlog over the agents."""
+        serializer = TicketRebalanceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        assigned = rebalance(self.get_queryset(), **serializer.validated_data)
+        return Response({'assigned': assigned})
+
+    @action(detail=False, methods=['get'])
+    def workload(self, request):
+        """Get agents' current workload per skill group."""
+        queryset = AgentWorkload.objects.select_related('user').all()
+        skill_group = request.query_params.get('skill_group')
+        if skill_group:
+            queryset = queryset.filter(skill_group=skill_group)
+        return Response(AgentWorkloadSerializer(queryset, many=True).data)
+
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         """Update ticket status."""
@@ -227,33 +272,19 @@ class TicketViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
         """Get dashboard statistics."""
-        from django.db.models import Count, Q
-
-        total = Ticket.objects.count()
-        open_tickets = Ticket.objects.filter(status=TicketStatus.OPEN).count()
-        in_progress = Ticket.objects.filter(status=TicketStatus.IN_PROGRESS).count()
-        resolved = Ticket.objects.filter(status=TicketStatus.RESOLVED).count()
-        breached = Ticket.objects.filter(
-            Q(response_breached=True) | Q(resolution_breached=True)
-        ).exclude(status__in=[TicketStatus.CLOSED, TicketStatus.CANCELLED]).count()
-
-        by_priority = Ticket.objects.exclude(
-            status__in=[TicketStatus.CLOSED, TicketStatus.CANCELLED]
-        ).values('priority').annotate(count=Count('id'))
-
-        by_category = Ticket.objects.exclude(
-            status__in=[TicketStatus.CLOSED, TicketStatus.CANCELLED]
-        ).values('category__name').annotate(count=Count('id'))
-
-        return Response({
-            'total': total,
-            'open': open_tickets,
-            'in_progress': in_progress,
-            'resolved': resolved,
-            'breached': breached,
-            'by_priority': list(by_priority),
-            'by_category': list(by_category),
-        })
+        active = ~Q(status__in=[TicketStatus.CLOSED, TicketStatus.CANCELLED])
+        data = (
+            Stats(Ticket.objects.all(), 'ticket_dashboard')
+            .count('total')
+            .count('open', Q(status=TicketStatus.OPEN))
+            .count('in_progress', Q(status=TicketStatus.IN_PROGRESS))
+            .count('resolved', Q(status=TicketStatus.RESOLVED))
+            .count('breached', active & (Q(response_breached=True) | Q(resolution_breached=True)))
+            .group('by_priority', ['priority'], queryset=Ticket.objects.filter(active), count=Count('id'))
+            .group('by_category', ['category__name'], queryset=Ticket.objects.filter(active), count=Count('id'))
+            .get(cache_key='')
+        )
+        return Response(data)
 
 
 class TicketCommentViewSet(viewsets.ModelViewSet):
@@ -273,6 +304,23 @@ class TicketAttachmentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(uploaded_by=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def preview(self, request, pk=None):
+        attachment = self.get_object()
+
+        def load():
+            with attachment.file.open('rb') as f:
+                return f.read()
+
+        return preview_service.build_response(
+            request, attachment, load, attachment.filename, attachment.content_type,
+        )
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        attachment = self.get_object()
+        return upload_service.download_response(attachment.file, attachment.filename)
+
 
 # Import for Q
 from django.db import models
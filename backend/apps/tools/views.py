@@ -18,6 +18,10 @@ from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
+from apps.core.middleware import get_current_tenant
+from apps.core.services.previews import preview_service
+from apps.core.services.uploads import upload_service
+
 from .models import ShortenedURL, URLClickLog, QRCode, CompressedImage, PDFOperation, PDFInputFile
 from .serializers import (
     ShortenedURLSerializer, URLClickLogSerializer, URLStatsSerializer,
@@ -421,6 +425,14 @@ class CompressedImageViewSet(viewsets.ModelViewSet):
         buffer.seek(0)
         return HttpResponse(buffer, content_type=content_type)
 
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the compressed image (redirects to object storage)."""
+        img_obj = self.get_object()
+        if not img_obj.compressed_image:
+            return Response({'error': 'Gambar belum dikompresi'}, status=status.HTTP_404_NOT_FOUND)
+        return upload_service.download_response(img_obj.compressed_image)
+
 
 class PDFOperationViewSet(viewsets.ModelViewSet):
     """ViewSet for PDF Operations."""
@@ -436,6 +448,14 @@ class PDFOperationViewSet(viewsets.ModelViewSet):
             return super().get_queryset()
         return super().get_queryset().filter(created_by=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the result file (redirects to object storage)."""
+        operation = self.get_object()
+        if not operation.result_file:
+            return Response({'error': 'File hasil belum tersedia'}, status=status.HTTP_404_NOT_FOUND)
+        return upload_service.download_response(operation.result_file)
+
     @action(detail=False, methods=['post'])
     def merge(self, request):
         """Merge multiple PDF files."""
@@ -602,8 +622,7 @@ class PDFAuditView(APIView):
             import PyPDF2
             from io import BytesIO
             import base64
-            from pdf2image import convert_from_bytes
-            from PIL import Image
+            import hashlib
 
             # Read PDF file
             pdf_bytes = uploaded_file.read()
@@ -623,16 +642,20 @@ class PDFAuditView(APIView):
                     'author': pdf_reader.metadata.get('/Author', ''),
                 }
 
-            # Generate thumbnails for all pages
+            # Page thumbnails come from the shared preview cache, so
+            # re-auditing the same file does not rasterize it again
             thumbnails = []
             try:
-                images = convert_from_bytes(pdf_bytes, dpi=72, fmt='jpeg')
-                for img in images:
-                    # Resize thumbnail to reasonable size
-                    img.thumbnail((300, 400), Image.Resampling.LANCZOS)
-                    buffer = BytesIO()
-                    img.save(buffer, format='JPEG', quality=85)
-                    img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+                content_hash = hashlib.sha256(pdf_bytes).hexdigest()
+                tenant = get_current_tenant()
+                previews = preview_service.render_pages(
+                    tenant.pk if tenant else None, pdf_bytes, content_hash, uploaded_file.name, page_count,
+                )
+                for preview in previews:
+                    if preview is None:
+                        thumbnails.append(None)
+                        continue
+                    img_base64 = base64.b64encode(preview_service.read_image(preview)).decode('utf-8')
                     thumbnails.append(f"data:image/jpeg;base64,{img_base64}")
             except Exception as e:
                 print(f"Error generating thumbnails: {e}")
@@ -5,6 +5,8 @@ from .models import (
     ApprovalRequest,
     ApprovalAction,
     ApprovalDelegate,
+    ApprovalInbox,
+    WorkflowTimer,
 )
 
 
@@ -77,3 +79,19 @@ class ApprovalDelegateAdmin(admin.ModelAdmin):
     list_filter = ['start_date', 'end_date', 'workflow']
     search_fields = ['delegator__email', 'delegate__email']
     raw_id_fields = ['delegator', 'delegate']
+
+
+@admin.register(ApprovalInbox)
+class ApprovalInboxAdmin(admin.ModelAdmin):
+    list_display = ['user', 'approval_request', 'step', 'reason', 'valid_from', 'valid_until', 'submitted_at']
+    list_filter = ['reason']
+    search_fields = ['user__email', 'approval_request__title']
+    raw_id_fields = ['approval_request', 'step', 'user', 'delegation']
+
+
+@admin.register(WorkflowTimer)
+class WorkflowTimerAdmin(admin.ModelAdmin):
+    list_display = ['approval_request', 'step', 'kind', 'due_at', 'processed_at', 'outcome', 'attempts']
+    list_filter = ['kind', 'outcome']
+    search_fields = ['approval_request__title']
+    raw_id_fields = ['approval_request', 'step']
@@ -0,0 +1,218 @@
+"""
+Materialized approver inbox.
+
+"Who can act on this request now" depends on the current step's approver
+type, the requester's place in the organization and active delegations.
+Rather than working that out on every page load, the answer is stored in
+`ApprovalInbox`, one row per (request, approver):
+
+- `sync_request` rebuilds a request's rows whenever it is created or its
+  status or current step changes (see `ApprovalRequest.save`); only pending
+  requests have rows;
+- approver types resolve as: `user` -> the step's user; `supervisor` -> the
+  requester's supervisor; `department_head` -> the head of the requester's
+  department; `role` -> employees whose position or job title matches
+  `approver_role` (and tenant members with that tenant role);
+  `any_of_group` -> members of the step's group;
+- every approver's unexpired delegations (all workflows or the request's
+  workflow) add a row for the delegate with the delegation's date window;
+- `sync_delegation` re-applies one delegation to the pending requests of
+  its delegator when it is saved; deleting a delegation cascades to its rows.
+
+"My pending approvals" and the badge count are then a lookup of the user's
+rows on the (user, submitted_at) index. Organization changes (supervisors,
+department heads, positions) are picked up by the next sync of a request,
+or at once with `python manage.py rebuild_approval_inbox`.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.enums import EmploymentStatus
+from apps.core.services.events import publish
+from .models import ApprovalDelegate, ApprovalInbox, ApprovalRequest, ApprovalStatus
+
+DELEGATE = 'delegate'
+
+
+def _scoped(queryset, tenant_id):
+    return queryset.filter(tenant_id=tenant_id) if tenant_id else queryset
+
+
+def resolve_approvers(approval_request, step) -> set:
+    """User ids allowed to act on `step` of a request (before delegation)."""
+    from apps.hr.models import Employee
+    from apps.organization.models import Department
+    from apps.tenants.models import TenantUser
+
+    kind = step.approver_type
+    tenant_id = approval_request.tenant_id
+    employees = _scoped(Employee.all_objects, tenant_id).filter(user__isnull=False)
+
+    if kind == 'user':
+        users = [step.approver_user_id]
+    elif kind == 'any_of_group':
+        users = get_user_model().objects.filter(
+            groups=step.approver_group_id, is_active=True,
+        ).values_list('id', flat=True) if step.approver_group_id else []
+    elif kind == 'supervisor':
+        users = employees.filter(
+            subordinates__user_id=approval_request.requester_id,
+        ).values_list('user_id', flat=True)
+    elif kind == 'department_head':
+        users = _scoped(Department.all_objects, tenant_id).filter(
+            employees__user_id=approval_request.requester_id,
+        ).values_list('head_id', flat=True)
+    elif kind == 'role' and step.approver_role:
+        role = step.approver_role
+        users = list(employees.filter(
+            Q(position__iexact=role) | Q(job_title__iexact=role),
+            employment_status=EmploymentStatus.ACTIVE,
+        ).values_list('user_id', flat=True))
+        if tenant_id:
+            users += TenantUser.objects.filter(
+                tenant_id=tenant_id, role=role.lower(), is_active=True,
+            ).values_list('user_id', flat=True)
+    else:
+        users = []
+    return {user_id for user_id in users if user_id}
+
+
+def _entry(approval_request, step, user_id, reason, delegation=None):
+    return ApprovalInbox(
+        tenant_id=approval_request.tenant_id,
+        approval_request_id=approval_request.pk,
+        step_id=step.pk,
+        user_id=user_id,
+        reason=reason,
+        delegation=delegation,
+        valid_from=delegation.start_date if delegation else None,
+        valid_until=delegation.end_date if delegation else None,
+        submitted_at=approval_request.submitted_at,
+    )
+
+
+def _active_delegations(delegator_ids, workflow_id=None):
+    """Delegations of these users that have not ended yet."""
+    delegations = ApprovalDelegate.all_objects.filter(
+        delegator_id__in=delegator_ids,
+        end_date__gte=timezone.localdate(),
+    )
+    if workflow_id:
+        delegations = delegations.filter(Q(workflow__isnull=True) | Q(workflow_id=workflow_id))
+    return delegations
+
+
+def notify(approval_request, added=(), removed=()):
+    """Push inbox changes to the users' open event streams."""
+    data = {'id': approval_request.pk, 'title': approval_request.title}
+    if added:
+        publish('approval.pending', data, tenant_id=approval_request.tenant_id, users=added)
+    if removed:
+        publish('approval.removed', data, tenant_id=approval_request.tenant_id, users=removed)
+
+
+def sync_request(approval_request):
+    """Rebuild the inbox rows of one request."""
+    with transaction.atomic():
+        rows = ApprovalInbox.all_objects.filter(approval_request_id=approval_request.pk)
+        before = set(rows.values_list('user_id', 'step_id'))
+        rows.delete()
+        entries = []
+        pending = approval_request.status == ApprovalStatus.PENDING
+        step = approval_request.get_current_step_instance() if pending else None
+        if step is not None:
+            approvers = resolve_approvers(approval_request, step)
+            entries = [_entry(approval_request, step, user_id, step.approver_type) for user_id in approvers]
+            for delegation in _active_delegations(approvers, approval_request.workflow_id):
+                if delegation.delegate_id not in approvers:
+                    entries.append(_entry(approval_request, step, delegation.delegate_id, DELEGATE, delegation))
+            ApprovalInbox.all_objects.bulk_create(entries, ignore_conflicts=True)
+
+        # A new step for the same approver is new work too
+        after = {(entry.user_id, entry.step_id) for entry in entries}
+        users_after = {user_id for user_id, _ in after}
+        notify(
+            approval_request,
+            added={user_id for user_id, _ in after - before},
+            removed={user_id for user_id, _ in before} - users_after,
+        )
+
+
+def sync_delegation(delegation):
+    """Re-apply a saved delegation to its delegator's pending requests."""
+    with transaction.atomic():
+        ApprovalInbox.all_objects.filter(delegation=delegation).delete()
+        if delegation.end_date < timezone.localdate() or delegation.delegate_id == delegation.delegator_id:
+            return
+
+        direct = ApprovalInbox.all_objects.filter(
+            user_id=delegation.delegator_id, delegation__isnull=True,
+        ).select_related('approval_request', 'step')
+        if delegation.workflow_id:
+            direct = direct.filter(approval_request__workflow_id=delegation.workflow_id)
+        direct = list(direct)
+
+        # A delegate who is already a direct approver needs no second row
+        already = set(ApprovalInbox.all_objects.filter(
+            approval_request_id__in=[row.approval_request_id for row in direct],
+            user_id=delegation.delegate_id,
+            delegation__isnull=True,
+        ).values_list('approval_request_id', flat=True))
+
+        entries = ApprovalInbox.all_objects.bulk_create(
+            [
+                _entry(row.approval_request, row.step, delegation.delegate_id, DELEGATE, delegation)
+                for row in direct if row.approval_request_id not in already
+            ],
+            ignore_conflicts=True,
+        )
+        if entries:
+            publish(
+                'approval.pending', {'count': len(entries)},
+                tenant_id=delegation.tenant_id, users=[delegation.delegate_id],
+            )
+
+
+def rebuild(requests=None) -> int:
+    """
+    Resync the inbox of pending requests (all of them by default).
+
+    Returns:
+        Number of requests synced
+    """
+    if requests is None:
+        requests = ApprovalRequest.all_objects.all()
+    # Rows of requests that are no longer pending are dropped in one statement
+    ApprovalInbox.all_objects.filter(approval_request__in=requests).exclude(
+        approval_request__status=ApprovalStatus.PENDING,
+    ).delete()
+
+    count = 0
+    pending = requests.filter(status=ApprovalStatus.PENDING).select_related('workflow')
+    for approval_request in pending.iterator(chunk_size=500):
+        sync_request(approval_request)
+        count += 1
+    return count
+
+
+def active_entries(on=None):
+    """Inbox rows valid today (or on a given date)."""
+    on = on or timezone.localdate()
+    return ApprovalInbox.all_objects.filter(
+        Q(valid_from__isnull=True) | Q(valid_from__lte=on),
+        Q(valid_until__isnull=True) | Q(valid_until__gte=on),
+    )
+
+
+def inbox_for(user, on=None):
+    """Inbox rows a user can act on today (or on a given date)."""
+    return active_entries(on).filter(user=user)
+
+
+def pending_for(user, on=None):
+    """Pending requests a user can act on, in a queryset of ApprovalRequest."""
+    return ApprovalRequest.objects.filter(
+        pk__in=inbox_for(user, on).values('approval_request_id'),
+    )
@@ -0,0 +1,25 @@
+"""
+Apply due workflow timers (auto-approval, escalation, reminders).
+
+Meant to run from cron, e.g. every minute; several runs may overlap safely.
+
+Usage:
+    python manage.py process_workflow_timers
+    python manage.py process_workflow_timers --batch-size 200 --max-batches 10
+"""
+from django.core.management.base import BaseCommand
+
+from apps.workflow.timers import BATCH_SIZE, process_due
+
+
+class Command(BaseCommand):
+    help = 'Apply due workflow timers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Timers per transaction')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+
+    def handle(self, *args, **options):
+        counts = process_due(batch_size=options['batch_size'], max_batches=options['max_batches'])
+        summary = ', '.join(f'{outcome}: {count}' for outcome, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Workflow timers processed ({summary}).'))
@@ -0,0 +1,31 @@
+"""
+Rebuild the materialized approver inbox.
+
+The inbox follows approval requests and delegations automatically; run this
+after organization changes (supervisors, department heads, positions,
+group membership) or workflow step changes to re-resolve the approvers of
+every pending request.
+
+Usage:
+    python manage.py rebuild_approval_inbox
+    python manage.py rebuild_approval_inbox --workflow PO_APPROVAL
+"""
+from django.core.management.base import BaseCommand
+
+from apps.workflow.inbox import rebuild
+from apps.workflow.models import ApprovalRequest
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the approver inbox of pending approval requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workflow', help='Only requests of this workflow code')
+
+    def handle(self, *args, **options):
+        requests = ApprovalRequest.all_objects.all()
+        if options['workflow']:
+            requests = requests.filter(workflow__code=options['workflow'])
+
+        count = rebuild(requests)
+        self.stdout.write(self.style.SUCCESS(f'Approver inbox rebuilt for {count} pending request(s).'))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:37
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_invoice'),
+        ('workflow', '0002_approvalaction_tenant_approvaldelegate_tenant_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalInbox',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('reason', models.CharField(max_length=20)),
+                ('valid_from', models.DateField(blank=True, null=True)),
+                ('valid_until', models.DateField(blank=True, null=True)),
+                ('submitted_at', models.DateTimeField()),
+                ('approval_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='workflow.approvalrequest')),
+                ('delegation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='workflow.approvaldelegate')),
+                ('step', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='workflow.workflowstep')),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='approval_inbox', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Approval Inbox Entry',
+                'verbose_name_plural': 'Approval Inbox',
+                'ordering': ['-submitted_at'],
+                'indexes': [models.Index(fields=['user', '-submitted_at'], name='workflow_ap_user_id_42705f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('approval_request', 'user', 'delegation'), name='unique_approval_inbox_entry', nulls_distinct=False)],
+            },
+        ),
+    ]
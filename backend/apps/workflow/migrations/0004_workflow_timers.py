@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:41
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_invoice'),
+        ('workflow', '0003_approval_inbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='approvalaction',
+            name='actor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='approval_actions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='WorkflowTimer',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('kind', models.CharField(choices=[('auto_approve', 'Persetujuan Otomatis'), ('escalate', 'Eskalasi'), ('remind', 'Pengingat')], max_length=20)),
+                ('due_at', models.DateTimeField()),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('outcome', models.CharField(blank=True, choices=[('applied', 'Applied'), ('skipped', 'Skipped'), ('failed', 'Failed')], max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('approval_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timers', to='workflow.approvalrequest')),
+                ('step', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timers', to='workflow.workflowstep')),
+                ('tenant', models.ForeignKey(blank=True, help_text='Tenant that owns this record', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Workflow Timer',
+                'verbose_name_plural': 'Workflow Timers',
+                'ordering': ['due_at'],
+                'indexes': [models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['due_at'], name='workflow_timer_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('approval_request', 'step', 'kind'), name='unique_workflow_timer')],
+            },
+        ),
+    ]
@@ -180,6 +180,26 @@ class ApprovalRequest(TenantBaseModel, AuditMixin):
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
 
+    # (status, current_step) when loaded, to detect inbox-relevant changes
+    _loaded_state = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_state = (instance.__dict__.get('status'), instance.__dict__.get('current_step'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        from .inbox import sync_request
+        from .timers import schedule
+
+        changed = self._state.adding or self._loaded_state != (self.status, self.current_step)
+        super().save(*args, **kwargs)
+        if changed:
+            sync_request(self)
+            schedule(self)
+        self._loaded_state = (self.status, self.current_step)
+
     def get_current_step_instance(self):
         """Get the current workflow step."""
         try:
@@ -195,14 +215,14 @@ class ApprovalRequest(TenantBaseModel, AuditMixin):
 
         if next_step:
             self.current_step = next_step.step_order
-            self.save()
+            self.save(update_fields=['current_step', 'updated_at'])
             return next_step
         else:
             # No more steps, workflow is complete
             from django.utils import timezone
             self.status = ApprovalStatus.APPROVED
             self.completed_at = timezone.now()
-            self.save()
+            self.save(update_fields=['status', 'completed_at', 'updated_at'])
             return None
 
 
@@ -230,9 +250,12 @@ class ApprovalAction(TenantBaseModel):
     ]
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
 
+    # Empty for actions taken by the system (workflow timers)
     actor = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='approval_actions',
     )
     comment = models.TextField(blank=True)
@@ -258,7 +281,7 @@ class ApprovalAction(TenantBaseModel):
         ]
 
     def __str__(self):
-        return f"{self.approval_request.title} - {self.get_action_display()} by {self.actor}"
+        return f"{self.approval_request.title} - {self.get_action_display()} by {self.actor or 'system'}"
 
 
 class ApprovalDelegate(TenantBaseModel):
@@ -302,8 +325,129 @@ class ApprovalDelegate(TenantBaseModel):
     def __str__(self):
         return f"{self.delegator} -> {self.delegate} ({self.start_date} to {self.end_date})"
 
+    def save(self, *args, **kwargs):
+        from .inbox import sync_delegation
+
+        super().save(*args, **kwargs)
+        sync_delegation(self)
+
     @property
     def is_active(self):
         from datetime import date
         today = date.today()
         return self.start_date <= today <= self.end_date
+
+
+class ApprovalInbox(TenantBaseModel):
+    """
+    Resolved approvers of pending approval requests, one row per user who
+    may act on the request's current step (see apps.workflow.inbox).
+
+    Rows for delegates carry the delegation and its date window; direct
+    approvers have no window.
+    """
+    approval_request = models.ForeignKey(
+        ApprovalRequest,
+        on_delete=models.CASCADE,
+        related_name='inbox_entries',
+    )
+    step = models.ForeignKey(
+        WorkflowStep,
+        on_delete=models.CASCADE,
+        related_name='inbox_entries',
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='approval_inbox',
+    )
+
+    # Why the user is an approver: the step's approver_type, or 'delegate'
+    reason = models.CharField(max_length=20)
+    delegation = models.ForeignKey(
+        ApprovalDelegate,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='inbox_entries',
+    )
+    valid_from = models.DateField(null=True, blank=True)
+    valid_until = models.DateField(null=True, blank=True)
+
+    # Copied from the request for ordering without a join
+    submitted_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Approval Inbox Entry'
+        verbose_name_plural = 'Approval Inbox'
+        ordering = ['-submitted_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['approval_request', 'user', 'delegation'],
+                name='unique_approval_inbox_entry',
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-submitted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.approval_request.title}"
+
+
+class TimerKind(models.TextChoices):
+    AUTO_APPROVE = 'auto_approve', 'Persetujuan Otomatis'
+    ESCALATE = 'escalate', 'Eskalasi'
+    REMIND = 'remind', 'Pengingat'
+
+
+class WorkflowTimer(TenantBaseModel):
+    """
+    A due-time for an automatic action on a pending step
+    (see apps.workflow.timers).
+    """
+    approval_request = models.ForeignKey(
+        ApprovalRequest,
+        on_delete=models.CASCADE,
+        related_name='timers',
+    )
+    step = models.ForeignKey(
+        WorkflowStep,
+        on_delete=models.CASCADE,
+        related_name='timers',
+    )
+    kind = models.CharField(max_length=20, choices=TimerKind.choices)
+    due_at = models.DateTimeField()
+
+    # Processing state
+    processed_at = models.DateTimeField(null=True, blank=True)
+    OUTCOME_CHOICES = [
+        ('applied', 'Applied'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = 'Workflow Timer'
+        verbose_name_plural = 'Workflow Timers'
+        ordering = ['due_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['approval_request', 'step', 'kind'],
+                name='unique_workflow_timer',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['due_at'],
+                name='workflow_timer_due_idx',
+                condition=models.Q(processed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.approval_request.title} @ {self.due_at}"
@@ -68,6 +68,8 @@ class ApprovalActionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'acted_at']
 
     def get_actor_name(self, obj):
+        if obj.actor is None:
+            return 'Sistem'
         return obj.actor.get_full_name() or obj.actor.email
 
 
@@ -0,0 +1,213 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.contenttypes.models import ContentType
+from django.core import mail
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.hr.models import Employee
+from apps.organization.models import Department
+from apps.users.models import User
+from apps.workflow.inbox import inbox_for, pending_for, rebuild
+from apps.workflow.models import (
+    ApprovalDelegate, ApprovalInbox, ApprovalRequest, ApprovalStatus,
+    TimerKind, WorkflowStep, WorkflowTemplate, WorkflowTimer,
+)
+from apps.workflow.timers import process_due
+
+
+def make_user(name):
+    return User.objects.create_user(username=name, email=f'{name}@test.com', password='testpass123')
+
+
+class ApprovalInboxTest(APITestCase):
+    def setUp(self):
+        self.requester = make_user('requester')
+        self.supervisor = make_user('supervisor')
+        self.head = make_user('head')
+        self.hr_manager = make_user('hrmanager')
+        self.deputy = make_user('deputy')
+
+        department = Department.objects.create(name='Operasional', code='OPS', head=self.head)
+        boss = Employee.objects.create(
+            user=self.supervisor, employee_id='E-1', first_name='Budi', last_name='S', department=department,
+        )
+        Employee.objects.create(
+            user=self.requester, employee_id='E-2', first_name='Ani', last_name='R',
+            department=department, supervisor=boss,
+        )
+        Employee.objects.create(
+            user=self.hr_manager, employee_id='E-3', first_name='Citra', last_name='H', position='HR Manager',
+        )
+
+        self.workflow = WorkflowTemplate.objects.create(
+            name='Persetujuan Cuti',
+            code='LEAVE_TEST',
+            content_type=ContentType.objects.get_for_model(Department),
+        )
+        WorkflowStep.objects.create(workflow=self.workflow, name='Supervisor', step_order=1, approver_type='supervisor')
+        WorkflowStep.objects.create(workflow=self.workflow, name='Kepala', step_order=2, approver_type='department_head')
+        WorkflowStep.objects.create(
+            workflow=self.workflow, name='HR', step_order=3, approver_type='role', approver_role='hr manager',
+        )
+
+    def make_request(self):
+        return ApprovalRequest.objects.create(
+            workflow=self.workflow,
+            content_type=self.workflow.content_type,
+            object_id=self.workflow.pk,
+            requester=self.requester,
+            title='Cuti tahunan',
+        )
+
+    def test_inbox_follows_request_steps(self):
+        approval = self.make_request()
+        self.assertEqual(list(pending_for(self.supervisor)), [approval])
+        self.assertFalse(pending_for(self.head).exists())
+
+        approval.advance_to_next_step()
+        self.assertFalse(pending_for(self.supervisor).exists())
+        self.assertEqual(list(pending_for(self.head)), [approval])
+
+        approval.advance_to_next_step()
+        self.assertEqual(list(pending_for(self.hr_manager)), [approval])
+
+        approval.status = ApprovalStatus.REJECTED
+        approval.save()
+        self.assertFalse(ApprovalInbox.objects.filter(approval_request=approval).exists())
+
+    def test_delegation_and_api(self):
+        approval = self.make_request()
+        today = timezone.localdate()
+        delegation = ApprovalDelegate.objects.create(
+            delegator=self.supervisor, delegate=self.deputy,
+            start_date=today, end_date=today + timedelta(days=7),
+        )
+        ApprovalDelegate.objects.create(
+            delegator=self.supervisor, delegate=self.head,
+            start_date=today + timedelta(days=3), end_date=today + timedelta(days=7),
+        )
+        self.assertFalse(inbox_for(self.head).exists())
+        self.assertTrue(inbox_for(self.head, on=today + timedelta(days=3)).exists())
+
+        self.client.force_authenticate(user=self.deputy)
+        response = self.client.get(reverse('api_v1:approval-request-pending-count'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+
+        response = self.client.get(reverse('api_v1:approval-request-pending-my-approval'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual([row['id'] for row in results], [str(approval.pk)])
+
+        delegation.delete()
+        self.assertFalse(inbox_for(self.deputy).exists())
+
+
+class ApprovalInboxRebuildTest(TestCase):
+    def test_rebuild_picks_up_new_approver(self):
+        requester = make_user('requester')
+        approver = make_user('approver')
+        workflow = WorkflowTemplate.objects.create(
+            name='PO', code='PO_TEST', content_type=ContentType.objects.get_for_model(User),
+        )
+        step = WorkflowStep.objects.create(workflow=workflow, name='Approver', step_order=1, approver_type='user')
+        approval = ApprovalRequest.objects.create(
+            workflow=workflow, content_type=workflow.content_type, object_id=requester.pk,
+            requester=requester, title='PO baru',
+        )
+        self.assertFalse(ApprovalInbox.objects.filter(approval_request=approval).exists())
+
+        step.approver_user = approver
+        step.save()
+        self.assertEqual(rebuild(), 1)
+        self.assertEqual(list(pending_for(approver)), [approval])
+
+
+class WorkflowTimerTest(TestCase):
+    def setUp(self):
+        self.requester = make_user('requester')
+        self.approver = make_user('approver')
+        self.manager = make_user('manager')
+        manager = Employee.objects.create(user=self.manager, employee_id='E-1', first_name='Dedi', last_name='M')
+        Employee.objects.create(
+            user=self.approver, employee_id='E-2', first_name='Eka', last_name='A', supervisor=manager,
+        )
+        self.workflow = WorkflowTemplate.objects.create(
+            name='Reimbursement', code='EXP_TEST',
+            content_type=ContentType.objects.get_for_model(User),
+            auto_approve_threshold=Decimal('500000'),
+        )
+        self.first = WorkflowStep.objects.create(
+            workflow=self.workflow, name='Atasan', step_order=1,
+            approver_type='user', approver_user=self.approver, auto_approve_days=2,
+        )
+        WorkflowStep.objects.create(
+            workflow=self.workflow, name='Finance', step_order=2,
+            approver_type='user', approver_user=self.approver, notify_on_pending=False,
+        )
+
+    def make_request(self, value):
+        return ApprovalRequest.objects.create(
+            workflow=self.workflow, content_type=self.workflow.content_type, object_id=self.requester.pk,
+            requester=self.requester, title='Biaya perjalanan', value=value,
+        )
+
+    def expire(self, approval, kind):
+        WorkflowTimer.objects.filter(approval_request=approval, kind=kind).update(
+            due_at=timezone.now() - timedelta(minutes=1),
+        )
+
+    def test_below_threshold_passes_every_step(self):
+        approval = self.make_request(Decimal('100000'))
+        counts = process_due()
+        self.assertEqual(counts['applied'], 2)
+        approval.refresh_from_db()
+        self.assertEqual(approval.status, ApprovalStatus.APPROVED)
+        self.assertEqual(approval.actions.filter(actor__isnull=True).count(), 2)
+        self.assertEqual(process_due()['applied'], 0)
+
+    def test_auto_approve_after_days_and_reminders(self):
+        approval = self.make_request(Decimal('900000'))
+        self.assertEqual(
+            set(approval.timers.values_list('kind', flat=True)), {TimerKind.AUTO_APPROVE, TimerKind.REMIND},
+        )
+        self.assertEqual(process_due()['applied'], 0)
+
+        self.expire(approval, TimerKind.REMIND)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(process_due()['rescheduled'], 1)
+        self.assertEqual(mail.outbox[0].to, ['approver@test.com'])
+
+        self.expire(approval, TimerKind.AUTO_APPROVE)
+        process_due()
+        approval.refresh_from_db()
+        self.assertEqual(approval.current_step, 2)
+        # Step 2 escalates instead of auto-approving and has no reminder
+        self.assertEqual(
+            list(approval.timers.filter(processed_at__isnull=True).values_list('kind', flat=True)),
+            [TimerKind.ESCALATE],
+        )
+
+        self.expire(approval, TimerKind.ESCALATE)
+        self.assertEqual(process_due()['applied'], 1)
+        self.assertEqual(list(pending_for(self.manager)), [approval])
+
+    def test_timer_rechecks_request_before_applying(self):
+        approval = self.make_request(Decimal('900000'))
+        self.expire(approval, TimerKind.AUTO_APPROVE)
+        # Acted on without going through save(), so the timer row is still there
+        ApprovalRequest.objects.filter(pk=approval.pk).update(
+            status=ApprovalStatus.REJECTED, title='Ditolak manual',
+        )
+
+        counts = process_due()
+        self.assertEqual(counts['skipped'], 1)
+        approval.refresh_from_db()
+        self.assertEqual(approval.status, ApprovalStatus.REJECTED)
+        self.assertEqual(approval.title, 'Ditolak manual')
+        self.assertFalse(approval.actions.exists())
@@ -0,0 +1,255 @@
+"""
+Workflow timers: auto-approval, escalation and reminders.
+
+Every pending step gets its due-times as rows in `WorkflowTimer`, written
+when the request is created or moves to another step (see
+`ApprovalRequest.save`); the previous step's unprocessed timers are
+dropped at the same time. A step gets:
+
+- `auto_approve` when the request's value is below the workflow's
+  `auto_approve_threshold` (due at once, so a below-threshold request
+  passes every step) or after the step's `auto_approve_days`;
+- `escalate` after WORKFLOW_ESCALATION_DAYS when the step does not
+  auto-approve: the approvers' supervisors are added to the inbox and
+  notified;
+- `remind` every WORKFLOW_REMINDER_HOURS for steps with
+  `notify_on_pending`: the step's approvers are emailed.
+
+`process_due` claims due timers in batches from the partial index on
+unprocessed `due_at` (`FOR UPDATE SKIP LOCKED`, so several workers can run
+side by side) and never scans the request table. Applying a timer is
+idempotent: the request is locked (`FOR UPDATE`) and a timer whose request
+is no longer pending at the timer's step is marked `skipped`; a processed
+timer is never picked up again; emails go out only after the batch
+commits. Failing timers are retried with a growing delay and marked
+`failed` after MAX_ATTEMPTS.
+
+Run `python manage.py process_workflow_timers` from cron (e.g. every
+minute).
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import send_mail
+from django.db import transaction
+from django.utils import timezone
+
+from .inbox import active_entries, notify
+from .models import (
+    ApprovalAction, ApprovalInbox, ApprovalRequest, ApprovalStatus, TimerKind, WorkflowTimer,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=5)
+
+ESCALATION = 'escalation'
+
+
+# ==================== Scheduling ====================
+
+def _below_threshold(approval_request) -> bool:
+    threshold = approval_request.workflow.auto_approve_threshold
+    return threshold is not None and approval_request.value is not None and approval_request.value < threshold
+
+
+def schedule(approval_request, now=None):
+    """Replace the unprocessed timers of a request with its current step's."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        WorkflowTimer.all_objects.filter(approval_request=approval_request, processed_at__isnull=True).delete()
+        if approval_request.status != ApprovalStatus.PENDING:
+            return
+        step = approval_request.get_current_step_instance()
+        if step is None:
+            return
+
+        due = {}
+        if _below_threshold(approval_request):
+            due[TimerKind.AUTO_APPROVE] = now
+        elif step.auto_approve_days:
+            due[TimerKind.AUTO_APPROVE] = now + timedelta(days=step.auto_approve_days)
+        elif settings.WORKFLOW_ESCALATION_DAYS:
+            due[TimerKind.ESCALATE] = now + timedelta(days=settings.WORKFLOW_ESCALATION_DAYS)
+        if step.notify_on_pending and settings.WORKFLOW_REMINDER_HOURS:
+            due[TimerKind.REMIND] = now + timedelta(hours=settings.WORKFLOW_REMINDER_HOURS)
+
+        # A step visited again (e.g. after revision) reuses its timer rows
+        WorkflowTimer.all_objects.bulk_create(
+            [
+                WorkflowTimer(
+                    tenant_id=approval_request.tenant_id,
+                    approval_request=approval_request,
+                    step=step,
+                    kind=kind,
+                    due_at=due_at,
+                )
+                for kind, due_at in due.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['approval_request', 'step', 'kind'],
+            update_fields=['due_at', 'processed_at', 'outcome', 'attempts', 'last_error', 'updated_at'],
+        )
+
+
+# ==================== Actions ====================
+
+def _notify(user_ids, subject, message):
+    """Email users once the surrounding transaction commits."""
+    emails = list(
+        get_user_model().objects.filter(pk__in=user_ids, is_active=True).exclude(email='').values_list('email', flat=True)
+    )
+    if emails:
+        transaction.on_commit(lambda: send_mail(subject, message, None, emails, fail_silently=True))
+
+
+def _auto_approve(timer, approval_request, now):
+    ApprovalAction.objects.create(
+        tenant_id=approval_request.tenant_id,
+        approval_request=approval_request,
+        step=timer.step,
+        action='approve',
+        actor=None,
+        comment='Disetujui otomatis oleh sistem',
+    )
+    approval_request.advance_to_next_step()
+
+
+def _escalate(timer, approval_request, now):
+    from apps.hr.models import Employee
+
+    approvers = ApprovalInbox.all_objects.filter(
+        approval_request=approval_request, delegation__isnull=True,
+    ).exclude(reason=ESCALATION).values('user_id')
+    supervisors = set(
+        Employee.all_objects.filter(subordinates__user_id__in=approvers, user__isnull=False).values_list('user_id', flat=True)
+    )
+    ApprovalInbox.all_objects.bulk_create(
+        [
+            ApprovalInbox(
+                tenant_id=approval_request.tenant_id,
+                approval_request=approval_request,
+                step=timer.step,
+                user_id=user_id,
+                reason=ESCALATION,
+                submitted_at=approval_request.submitted_at,
+            )
+            for user_id in supervisors
+        ],
+        ignore_conflicts=True,
+    )
+    notify(approval_request, added=supervisors)
+    _notify(
+        supervisors,
+        f'Eskalasi persetujuan: {approval_request.title}',
+        f'Pengajuan "{approval_request.title}" belum diproses pada tahap {timer.step.name} '
+        f'dan dieskalasi kepada Anda.',
+    )
+
+
+def _remind(timer, approval_request, now):
+    users = active_entries(timezone.localdate(now)).filter(approval_request=approval_request).values_list('user_id', flat=True)
+    _notify(
+        set(users),
+        f'Menunggu persetujuan: {approval_request.title}',
+        f'Pengajuan "{approval_request.title}" menunggu persetujuan Anda pada tahap {timer.step.name}.',
+    )
+    # Reminders repeat until the step is acted on
+    return now + timedelta(hours=settings.WORKFLOW_REMINDER_HOURS)
+
+
+ACTIONS = {
+    TimerKind.AUTO_APPROVE: _auto_approve,
+    TimerKind.ESCALATE: _escalate,
+    TimerKind.REMIND: _remind,
+}
+
+
+# ==================== Processing ====================
+
+def _is_current(timer, approval_request) -> bool:
+    return (
+        approval_request is not None
+        and approval_request.status == ApprovalStatus.PENDING
+        and approval_request.current_step == timer.step.step_order
+    )
+
+
+def _process(timer, now):
+    """
+    Apply one timer; updates its processing fields in memory.
+
+    The request is locked and checked again before the action runs, so a
+    user acting on it at the same time either finishes first (the timer is
+    skipped) or waits until the batch commits.
+    """
+    try:
+        with transaction.atomic():
+            approval_request = ApprovalRequest.all_objects.select_for_update(of=('self',)).select_related(
+                'workflow',
+            ).filter(pk=timer.approval_request_id).first()
+            if not _is_current(timer, approval_request):
+                timer.processed_at, timer.outcome = now, 'skipped'
+                return
+            next_due = ACTIONS[timer.kind](timer, approval_request, now)
+    except Exception as exc:
+        logger.exception('Workflow timer %s failed', timer.pk)
+        timer.attempts += 1
+        timer.last_error = str(exc)
+        if timer.attempts >= MAX_ATTEMPTS:
+            timer.processed_at, timer.outcome = now, 'failed'
+        else:
+            timer.due_at = now + RETRY_DELAY * timer.attempts
+        return
+
+    if next_due and settings.WORKFLOW_REMINDER_HOURS:
+        timer.due_at = next_due
+    else:
+        timer.processed_at, timer.outcome = now, 'applied'
+
+
+def process_due(batch_size=BATCH_SIZE, max_batches=None) -> dict:
+    """
+    Apply every timer that is due.
+
+    Args:
+        batch_size: Timers claimed per transaction
+        max_batches: Stop after this many batches (None: until none is due)
+
+    Returns:
+        Counts per outcome ('applied', 'skipped', 'failed', 'retried',
+        'rescheduled')
+    """
+    counts = dict.fromkeys(['applied', 'skipped', 'failed', 'retried', 'rescheduled'], 0)
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        now = timezone.now()
+        with transaction.atomic():
+            timers = list(
+                WorkflowTimer.all_objects.select_for_update(skip_locked=True, of=('self',)).filter(
+                    processed_at__isnull=True, due_at__lte=now,
+                ).select_related('step').order_by('due_at')[:batch_size]
+            )
+            if not timers:
+                break
+
+            for timer in timers:
+                attempts = timer.attempts
+                _process(timer, now)
+                if timer.outcome:
+                    counts[timer.outcome] += 1
+                else:
+                    counts['retried' if timer.attempts > attempts else 'rescheduled'] += 1
+                timer.updated_at = now
+
+            # Timers replaced by a step change in this batch no longer exist
+            # and are simply not updated
+            WorkflowTimer.all_objects.bulk_update(
+                timers, ['due_at', 'processed_at', 'outcome', 'attempts', 'last_error', 'updated_at'],
+            )
+        batches += 1
+    return counts
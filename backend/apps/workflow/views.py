@@ -10,6 +10,7 @@ from .models import (
     ApprovalDelegate,
     ApprovalStatus,
 )
+from .inbox import inbox_for
 from .serializers import (
     WorkflowTemplateSerializer,
     WorkflowTemplateListSerializer,
@@ -85,38 +86,23 @@ class ApprovalRequestViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def pending_my_approval(self, request):
         """Get requests pending current user's approval."""
-        # This is a simplified version - in production, you'd need to check
-        # the approver_type and determine if user can approve based on their role
-        user = request.user
-
-        # Get requests where current user is the direct approver
-        direct_approvals = self.queryset.filter(
-            status=ApprovalStatus.PENDING,
-            workflow__steps__approver_user=user,
-            current_step=models.F('workflow__steps__step_order'),
-        ).distinct()
-
-        # Also check delegations
-        active_delegations = ApprovalDelegate.objects.filter(
-            delegate=user,
-            start_date__lte=timezone.now().date(),
-            end_date__gte=timezone.now().date(),
-        ).values_list('delegator_id', flat=True)
-
-        delegated_approvals = self.queryset.filter(
-            status=ApprovalStatus.PENDING,
-            workflow__steps__approver_user__in=active_delegations,
-        ).distinct()
-
-        combined = (direct_approvals | delegated_approvals).distinct()
-
-        page = self.paginate_queryset(combined)
+        queryset = self.queryset.filter(
+            pk__in=inbox_for(request.user).values('approval_request_id'),
+        ).prefetch_related(None)
+
+        page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = ApprovalRequestListSerializer(page, many=True)
             return self.get_paginated_response(serializer.data)
-        serializer = ApprovalRequestListSerializer(combined, many=True)
+        serializer = ApprovalRequestListSerializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def pending_count(self, request):
+        """Number of requests pending current user's approval (for badges)."""
+        count = inbox_for(request.user).values('approval_request_id').distinct().count()
+        return Response({'count': count})
+
     @action(detail=True, methods=['post'])
     def take_action(self, request, pk=None):
         """Take an approval action on a request."""
@@ -260,6 +260,114 @@ CORS_ALLOW_HEADERS = [
 ]
 
 
+# ===========================
+# Document Content Search
+# ===========================
+# Text search configuration used for document tsvectors ('simple' works for
+# mixed Indonesian/English content)
+DOCUMENT_SEARCH_CONFIG = os.environ.get('DOCUMENT_SEARCH_CONFIG', 'simple')
+# Extract text in a background thread pool after upload; when disabled, run
+# `manage.py process_document_content` periodically instead
+DOCUMENT_EXTRACTION_ASYNC = os.environ.get('DOCUMENT_EXTRACTION_ASYNC', 'true').lower() == 'true'
+DOCUMENT_EXTRACTION_WORKERS = int(os.environ.get('DOCUMENT_EXTRACTION_WORKERS', '2'))
+
+
+# ===========================
+# File Previews
+# ===========================
+# Thumbnail render threads per process (0 renders inline in the request)
+PREVIEW_WORKERS = int(os.environ.get('PREVIEW_WORKERS', '4'))
+# How long a preview request waits for rendering before answering 202
+PREVIEW_WAIT_SECONDS = float(os.environ.get('PREVIEW_WAIT_SECONDS', '5'))
+# How long the PDF tools wait for all page thumbnails of a file
+PREVIEW_PAGES_WAIT_SECONDS = float(os.environ.get('PREVIEW_PAGES_WAIT_SECONDS', '30'))
+# Lifetime of signed preview image URLs
+PREVIEW_URL_MAX_AGE = int(os.environ.get('PREVIEW_URL_MAX_AGE', '3600'))
+
+
+# ===========================
+# Direct Uploads (presigned object storage URLs)
+# ===========================
+# Only used when the default storage is S3/RustFS (see prod settings)
+# Public endpoint browsers use to reach the bucket; defaults to the storage endpoint
+DIRECT_UPLOAD_ENDPOINT_URL = os.environ.get('DIRECT_UPLOAD_ENDPOINT_URL', '')
+DIRECT_UPLOAD_URL_EXPIRY = 15 * 60
+DIRECT_DOWNLOAD_URL_EXPIRY = 5 * 60
+# Files above this size are uploaded in parts of DIRECT_UPLOAD_PART_SIZE
+DIRECT_UPLOAD_MULTIPART_THRESHOLD = 64 * 1024 * 1024
+DIRECT_UPLOAD_PART_SIZE = 8 * 1024 * 1024
+
+
+# ===========================
+# Face Recognition Index
+# ===========================
+# Embedding backend for local face matching (dotted path). Empty keeps the
+# per-employee AWS Rekognition comparison.
+# e.g. 'apps.hr.services.face_index.DeepFaceBackend' (needs the `ml` extra)
+FACE_EMBEDDING_BACKEND = os.environ.get('FACE_EMBEDDING_BACKEND', '')
+
+
+# ===========================
+# Attendance Device Sync
+# ===========================
+# Events older than this are rejected instead of rewriting old attendance
+ATTENDANCE_SYNC_MAX_AGE_DAYS = 7
+# Tolerated device clock drift ahead of the server, in seconds
+ATTENDANCE_SYNC_MAX_CLOCK_SKEW = 5 * 60
+
+
+# ===========================
+# Payroll
+# ===========================
+# Overtime pay per hour = basic salary / PAYROLL_MONTHLY_HOURS * multiplier
+PAYROLL_MONTHLY_HOURS = 176
+PAYROLL_OVERTIME_MULTIPLIER = 1.5
+# What-if simulation results are cached per scenario for this many seconds
+PAYROLL_SIMULATION_CACHE_TIMEOUT = 10 * 60
+
+
+# ===========================
+# Inventory
+# ===========================
+# Scan batches sent with a batch_id are remembered this long (seconds) so
+# retries from barcode scanners are applied once
+OPNAME_SCAN_BATCH_TTL = 24 * 60 * 60
+
+# ===========================
+# Workflow
+# ===========================
+# Pending approval steps get a reminder every N hours (steps with
+# notify_on_pending) and are escalated to the approvers' supervisors after
+# N days unless the step auto-approves; 0 disables either
+WORKFLOW_REMINDER_HOURS = int(os.environ.get('WORKFLOW_REMINDER_HOURS', 24))
+WORKFLOW_ESCALATION_DAYS = int(os.environ.get('WORKFLOW_ESCALATION_DAYS', 3))
+
+# ===========================
+# Statistics
+# ===========================
+# Seconds statistics endpoints cache their numbers per tenant and filters
+# (apps.common.stats); 0 disables the cache
+STATS_CACHE_TIMEOUT = int(os.environ.get('STATS_CACHE_TIMEOUT', 0))
+
+# ===========================
+# Org Chart
+# ===========================
+# Seconds rendered org chart subtrees stay cached per tenant
+# (apps.organization.org_chart); employee writes drop the affected subtrees
+# right away. 0 disables the cache. Deepest ?depth= a request may ask for
+ORG_CHART_CACHE_TIMEOUT = int(os.environ.get('ORG_CHART_CACHE_TIMEOUT', 0))
+ORG_CHART_MAX_DEPTH = int(os.environ.get('ORG_CHART_MAX_DEPTH', 10))
+
+# ===========================
+# Event Stream
+# ===========================
+# Server-sent events (apps.core.services.events). Without a Redis URL events
+# are delivered in-process only, which suits a single dev server
+EVENT_STREAM_REDIS_URL = os.environ.get('EVENT_STREAM_REDIS_URL', os.environ.get('REDIS_URL', ''))
+EVENT_STREAM_QUEUE_SIZE = int(os.environ.get('EVENT_STREAM_QUEUE_SIZE', 100))
+EVENT_STREAM_HEARTBEAT = int(os.environ.get('EVENT_STREAM_HEARTBEAT', 15))
+EVENT_STREAM_MAX_AGE = int(os.environ.get('EVENT_STREAM_MAX_AGE', 300))
+
 # ===========================
 # Polar.sh Configuration
 # ===========================
@@ -39,6 +39,15 @@ CACHES = {
     }
 }
 
+# Short-lived statistics cache
+STATS_CACHE_TIMEOUT = int(os.environ.get('STATS_CACHE_TIMEOUT', 30))
+
+# Org chart subtrees, invalidated on employee writes
+ORG_CHART_CACHE_TIMEOUT = int(os.environ.get('ORG_CHART_CACHE_TIMEOUT', 60 * 60))
+
+# Server-sent events across workers
+EVENT_STREAM_REDIS_URL = os.environ.get('EVENT_STREAM_REDIS_URL', REDIS_URL)
+
 # Session with Redis
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -89,8 +98,14 @@ AWS_S3_OBJECT_PARAMETERS = {
     'CacheControl': 'max-age=86400',
 }
 
-# Use RustFS for media files
-DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+# Use RustFS for media files (DEFAULT_FILE_STORAGE is ignored since Django 5.1)
+STORAGES = {
+    **STORAGES,
+    'default': {'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage'},
+}
+
+# Presigned upload/download URLs must use the endpoint browsers can reach
+DIRECT_UPLOAD_ENDPOINT_URL = os.environ.get('RUSTFS_ENDPOINT_PUBLIC', '')
 
 # Keep static files local (served by Caddy/Nginx in production)
 # Or uncomment to use RustFS for static files too: